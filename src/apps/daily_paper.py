@@ -10,6 +10,7 @@ import logging
 import traceback
 from pathlib import Path
 from datetime import datetime, timedelta
+from functools import reduce
 from typing import Dict, List, Optional, Any
 from tqdm import tqdm
 
@@ -19,9 +20,14 @@ sys.path.insert(0, str(PROJECT_ROOT / "src"))
 
 from config.settings import Settings
 from container import ServiceContainer
+from core.cache_store import checkpoint_namespace, get_cache_store
+from core.identity import get_identity_index, group_duplicates
+from core.ledger import SyncLedger
+from core.fanout import StorageFanout
 from models.paper import Paper
 from services.llm import LLMServiceFactory, BaseLLMService
 from services.data_sources import ArxivDataSource, HuggingFaceDataSource
+from services.pdf import download_papers, get_pdf_store
 from services.storage import NotionStorage, ZoteroStorage
 from services.storage.zotero import ZoteroItemExistsError
 import common_utils
@@ -55,12 +61,18 @@ class DailyPaperApp:
             else:
                 self.settings = Settings()
 
-        # 初始化服务
-        self._init_services()
-
         # 检查点管理
         self.checkpoint_dir = self.output_dir / "cache"
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_store = get_cache_store(str(self.checkpoint_dir / "cache.db"))
+        self.identity = get_identity_index(self.cache_store)
+        get_pdf_store(identity=self.identity)
+
+        # 同步账本（与主程序共用），存储服务先查账本，每次写入都记入账本
+        self.ledger = SyncLedger(str(self.checkpoint_dir / "ledger.db"), identity=self.identity)
+
+        # 初始化服务
+        self._init_services()
 
     def _init_services(self):
         """初始化各项服务"""
@@ -86,12 +98,14 @@ class DailyPaperApp:
         # 存储服务
         self.notion_storage = None
         self.zotero_storage = None
+        self.storage_fanout = StorageFanout()
 
         if self.settings.services.notion:
             try:
                 self.notion_storage = NotionStorage(
                     create_time=datetime.now(),
-                    use_proxy=True
+                    use_proxy=True,
+                    ledger=self.ledger
                 )
                 if not self.notion_storage.is_available():
                     logger.warning("Notion服务不可用，请检查环境变量")
@@ -103,7 +117,11 @@ class DailyPaperApp:
             try:
                 self.zotero_storage = ZoteroStorage(
                     create_time=datetime.now(),
-                    use_proxy=True
+                    use_proxy=True,
+                    category_map=self.settings.category_map,
+                    default_category=self.settings.default_category,
+                    mirror_path=str(self.output_dir / "cache" / "zotero_mirror.db"),
+                    ledger=self.ledger
                 )
                 if not self.zotero_storage.is_available():
                     logger.warning("Zotero服务不可用，请检查环境变量")
@@ -112,18 +130,72 @@ class DailyPaperApp:
                 logger.warning(f"初始化Zotero服务失败: {e}")
 
     def _load_checkpoint(self, name: str) -> set:
-        """加载检查点"""
-        ckpt_file = self.checkpoint_dir / f"{name}.txt"
-        if ckpt_file.exists():
-            with open(ckpt_file, 'r') as f:
-                return set(line.strip() for line in f if line.strip())
-        return set()
+        """加载检查点（论文的规范键集合）"""
+        return set(self.cache_store.keys(checkpoint_namespace(name)))
 
     def _save_checkpoint(self, name: str, paper_id: str):
         """保存检查点"""
-        ckpt_file = self.checkpoint_dir / f"{name}.txt"
-        with open(ckpt_file, 'a') as f:
-            f.write(paper_id + '\n')
+        self.cache_store.set(checkpoint_namespace(name), self.identity.resolve_id(paper_id), True, evictable=False)
+
+    @staticmethod
+    def _hf_checkpoint_name(date: str = None) -> str:
+        """HuggingFace流程的检查点名称（按日期）"""
+        return f"hf_{date or datetime.now().strftime('%Y-%m-%d')}"
+
+    def plan(
+        self,
+        date: str = None,
+        process_arxiv: bool = True,
+        process_hf: bool = True,
+        keywords: List[str] = None,
+        categories: List[str] = None,
+        limit: int = None
+    ) -> Dict[str, Any]:
+        """
+        规划阶段：先收集ArXiv搜索和HuggingFace每日论文两路候选，按规范键、DOI 和标题去重
+
+        候选论文此时尚未做LLM增强。两路都有的论文合并后只交给HuggingFace流程（保留媒体信息，
+        写入后同时记入两路检查点）；任一检查点中已有的论文不再处理。
+
+        Returns:
+            {"arxiv": ArXiv流程的论文, "hf": HuggingFace流程的论文, "errors": {"arxiv": int, "hf": int}}
+        """
+        candidates: List[Paper] = []
+        errors = {"arxiv": 0, "hf": 0}
+
+        if process_arxiv:
+            keywords = keywords or self.settings.keywords
+            categories = categories or self.settings.categories
+            limit = limit or self.settings.search_limit
+            logger.info(f"搜索ArXiv论文: keywords={keywords}, categories={categories}, limit={limit}")
+            try:
+                candidates.extend(self.arxiv_source.search(keywords, categories=categories, limit=limit, enrich=False))
+            except Exception as e:
+                logger.error(f"搜索ArXiv论文失败: {e}")
+                errors["arxiv"] += 1
+
+        if process_hf:
+            logger.info(f"获取HuggingFace论文: date={date}")
+            try:
+                candidates.extend(self.hf_source.fetch_papers(date=date))
+            except Exception as e:
+                logger.error(f"获取HuggingFace论文失败: {e}")
+                errors["hf"] += 1
+
+        done = self._load_checkpoint("arxiv_ckpt") | self._load_checkpoint(self._hf_checkpoint_name(date))
+        plan = {"arxiv": [], "hf": [], "errors": errors}
+        for group in group_duplicates(candidates, self.identity):
+            if self.identity.resolve_id(group[0].id) in done:
+                logger.info(f"跳过已处理: {group[0].id}")
+                continue
+            flow = "hf" if any(paper.source == "huggingface" for paper in group) else "arxiv"
+            plan[flow].append(reduce(lambda merged, paper: merged.merge(paper), group))
+
+        logger.info(
+            f"候选论文 {len(candidates)} 篇，待处理 ArXiv {len(plan['arxiv'])} 篇, "
+            f"HuggingFace {len(plan['hf'])} 篇"
+        )
+        return plan
 
     def _get_collections(self, category: str) -> List[str]:
         """获取Zotero集合ID"""
@@ -133,45 +205,83 @@ class DailyPaperApp:
         )
 
     def _save_paper(self, paper: Paper, hf_obj: Dict = None) -> Dict[str, bool]:
-        """保存论文到各存储服务"""
+        """保存论文到各存储服务（各服务并行写入）"""
+        calls = {}
+        if self.notion_storage:
+            calls["notion"] = lambda: self._save_to_notion(paper, hf_obj)
+        if self.zotero_storage:
+            calls["zotero"] = lambda: self._save_to_zotero(paper)
+
         results = {"notion": False, "zotero": False}
+        for name, (saved, error) in self.storage_fanout.run(calls).items():
+            if error is not None:
+                logger.error(f"保存到{name}失败: {error}")
+            results[name] = bool(saved)
+        return results
 
-        # 保存到Notion
-        if self.notion_storage:
-            try:
-                self.notion_storage.create_time = datetime.now()
-                self.notion_storage.insert(paper, hf_obj=hf_obj)
-                results["notion"] = True
+    def _save_to_notion(self, paper: Paper, hf_obj: Dict = None) -> bool:
+        """保存论文到Notion"""
+        if self.notion_storage.exists(paper.id):
+            logger.info(f"论文已存在于Notion: {paper.id}")
+            return True
+
+        try:
+            result = self.notion_storage.insert(paper, hf_obj=hf_obj, create_time=datetime.now())
+            if result["success"]:
+                self._record_written(self.notion_storage, paper, result)
                 logger.info(f"成功保存到Notion: {paper.id}")
-            except Exception as e:
-                logger.error(f"保存到Notion失败: {e}")
+            else:
+                logger.error(f"保存到Notion失败: {result['message']}")
+            return result["success"]
+        except Exception as e:
+            logger.error(f"保存到Notion失败: {e}")
+            return False
 
-        # 保存到Zotero
-        if self.zotero_storage:
-            try:
-                collections = self._get_collections(paper.category)
-                self.zotero_storage.create_time = datetime.now()
-                self.zotero_storage.insert(paper, collections=collections)
-                results["zotero"] = True
-                logger.info(f"成功保存到Zotero: {paper.id}")
-            except ZoteroItemExistsError:
-                logger.info(f"论文已存在于Zotero: {paper.id}")
-                results["zotero"] = True  # 标记为成功（已存在）
-            except Exception as e:
-                logger.error(f"保存到Zotero失败: {e}")
+    def _save_to_zotero(self, paper: Paper) -> bool:
+        """保存论文到Zotero"""
+        try:
+            collections = self._get_collections(paper.category)
+            self.zotero_storage.create_time = datetime.now()
+            result = self.zotero_storage.insert(paper, collections=collections)
+            if not result["success"]:
+                logger.error(f"保存到Zotero失败: {result['message']}")
+                return False
+            self._record_written(self.zotero_storage, paper, result)
+            logger.info(f"成功保存到Zotero: {paper.id}")
+            return True
+        except ZoteroItemExistsError:
+            logger.info(f"论文已存在于Zotero: {paper.id}")
+            return True  # 标记为成功（已存在）
+        except Exception as e:
+            logger.error(f"保存到Zotero失败: {e}")
+            return False
+
+    def _record_written(self, storage: Any, paper: Paper, result: Dict) -> None:
+        """将写入成功的论文连同载荷哈希和字段哈希记入账本"""
+        self.ledger.record(
+            storage.get_storage_name(), paper.id, result.get("id"),
+            self.ledger.payload_hash(paper), result.get("field_hashes")
+        )
 
-        return results
+    def _download_pdfs(self, papers: List[Paper], download_pdf: bool) -> None:
+        """存储写入完成后并行下载本次处理的论文PDF"""
+        if download_pdf and self.settings.pdf_dir and papers:
+            download_papers(papers, self.settings.pdf_dir)
 
     def process_arxiv(
         self,
         keywords: List[str] = None,
         categories: List[str] = None,
         limit: int = None,
-        download_pdf: bool = None
+        download_pdf: bool = None,
+        papers: List[Paper] = None
     ) -> Dict[str, int]:
         """
         处理ArXiv论文
 
+        papers 为规划阶段去重后的论文（见 plan），未提供时自行搜索。LLM增强在检查点之后进行，
+        已处理的论文不再增强。
+
         Returns:
             {"processed": int, "errors": int, "total": int}
         """
@@ -186,32 +296,30 @@ class DailyPaperApp:
         checkpoint = self._load_checkpoint("arxiv_ckpt")
 
         # 搜索论文
-        try:
-            papers = self.arxiv_source.search(keywords, categories=categories, limit=limit)
-        except Exception as e:
-            logger.error(f"搜索ArXiv论文失败: {e}")
-            return {"processed": 0, "errors": 1, "total": 0}
+        if papers is None:
+            try:
+                papers = self.arxiv_source.search(keywords, categories=categories, limit=limit, enrich=False)
+            except Exception as e:
+                logger.error(f"搜索ArXiv论文失败: {e}")
+                return {"processed": 0, "errors": 1, "total": 0}
 
         results = {"processed": 0, "errors": 0, "total": len(papers)}
+        pdf_papers: List[Paper] = []
 
         for paper in tqdm(papers, desc="处理ArXiv论文"):
-            if paper.id in checkpoint:
+            if self.identity.resolve_id(paper.id) in checkpoint:
                 logger.info(f"跳过已处理: {paper.id}")
                 continue
 
             try:
-                # 下载PDF
-                if download_pdf and self.settings.pdf_dir:
-                    pdf_dir = Path(self.settings.pdf_dir)
-                    pdf_dir.mkdir(parents=True, exist_ok=True)
-                    ArxivDataSource.download_pdf(paper, str(pdf_dir))
-
-                # 保存到存储服务
+                # 生成TLDR和标签后保存到存储服务
+                paper = self.arxiv_source.enrich(paper)
                 save_results = self._save_paper(paper)
 
                 if any(save_results.values()):
                     self._save_checkpoint("arxiv_ckpt", paper.id)
                     results["processed"] += 1
+                    pdf_papers.append(paper)
                 else:
                     results["errors"] += 1
 
@@ -219,16 +327,21 @@ class DailyPaperApp:
                 logger.error(f"处理论文失败 {paper.id}: {e}")
                 results["errors"] += 1
 
+        self._download_pdfs(pdf_papers, download_pdf)
         return results
 
     def process_huggingface(
         self,
         date: str = None,
-        download_pdf: bool = None
+        download_pdf: bool = None,
+        hf_papers: List[Paper] = None
     ) -> Dict[str, int]:
         """
         处理HuggingFace每日论文
 
+        hf_papers 为规划阶段去重后的论文（见 plan），未提供时自行获取。已与ArXiv搜索结果合并的论文
+        不再从ArXiv获取详细信息，写入后同时记入ArXiv流程的检查点。
+
         Returns:
             {"processed": int, "errors": int, "total": int}
         """
@@ -237,44 +350,43 @@ class DailyPaperApp:
         logger.info(f"开始处理HuggingFace论文: date={date}")
 
         # 获取HuggingFace论文列表
-        try:
-            hf_papers = self.hf_source.fetch_papers(date=date)
-        except Exception as e:
-            logger.error(f"获取HuggingFace论文失败: {e}")
-            return {"processed": 0, "errors": 1, "total": 0}
+        if hf_papers is None:
+            try:
+                hf_papers = self.hf_source.fetch_papers(date=date)
+            except Exception as e:
+                logger.error(f"获取HuggingFace论文失败: {e}")
+                return {"processed": 0, "errors": 1, "total": 0}
 
         # 加载检查点
-        ckpt_name = f"hf_{date or datetime.now().strftime('%Y-%m-%d')}"
+        ckpt_name = self._hf_checkpoint_name(date)
         checkpoint = self._load_checkpoint(ckpt_name)
 
         results = {"processed": 0, "errors": 0, "total": len(hf_papers)}
+        pdf_papers: List[Paper] = []
 
         for hf_paper in tqdm(hf_papers, desc="处理HuggingFace论文"):
-            if hf_paper.id in checkpoint:
+            if self.identity.resolve_id(hf_paper.id) in checkpoint:
                 logger.info(f"跳过已处理: {hf_paper.id}")
                 continue
 
             try:
-                # 从ArXiv获取详细信息
-                paper = self.arxiv_source.get_by_id(
-                    hf_paper.id,
-                    hf_obj={
-                        'media_type': hf_paper.media_type,
-                        'media_url': hf_paper.media_url
-                    }
-                )
+                # 从ArXiv获取详细信息（规划阶段已合并ArXiv搜索结果的只需增强）
+                if hf_paper.source == "huggingface":
+                    paper = self.arxiv_source.get_by_id(
+                        hf_paper.id,
+                        hf_obj={
+                            'media_type': hf_paper.media_type,
+                            'media_url': hf_paper.media_url
+                        }
+                    )
+                else:
+                    paper = self.arxiv_source.enrich(hf_paper)
 
                 if not paper:
                     logger.warning(f"无法获取论文详情: {hf_paper.id}")
                     results["errors"] += 1
                     continue
 
-                # 下载PDF
-                if download_pdf and self.settings.pdf_dir:
-                    pdf_dir = Path(self.settings.pdf_dir)
-                    pdf_dir.mkdir(parents=True, exist_ok=True)
-                    ArxivDataSource.download_pdf(paper, str(pdf_dir))
-
                 # 保存到存储服务
                 hf_obj = {
                     'media_type': hf_paper.media_type,
@@ -284,7 +396,10 @@ class DailyPaperApp:
 
                 if any(save_results.values()):
                     self._save_checkpoint(ckpt_name, hf_paper.id)
+                    if hf_paper.source != "huggingface":
+                        self._save_checkpoint("arxiv_ckpt", hf_paper.id)
                     results["processed"] += 1
+                    pdf_papers.append(paper)
                 else:
                     results["errors"] += 1
 
@@ -293,6 +408,7 @@ class DailyPaperApp:
                 logger.debug(traceback.format_exc())
                 results["errors"] += 1
 
+        self._download_pdfs(pdf_papers, download_pdf)
         return results
 
     def run(
@@ -311,7 +427,7 @@ class DailyPaperApp:
             process_hf: 是否处理HuggingFace
             date: 指定日期
             days: 处理过去N天
-            **kwargs: 其他参数传递给处理函数
+            **kwargs: 其他参数（keywords、categories、limit 用于规划阶段，download_pdf 传递给处理函数）
 
         Returns:
             运行结果统计
@@ -321,28 +437,29 @@ class DailyPaperApp:
             "hf": {"processed": 0, "errors": 0, "total": 0}
         }
 
-        if days:
-            # 处理多天
-            for i in range(days):
-                current_date = (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d')
+        download_pdf = kwargs.pop("download_pdf", None)
+        dates = [
+            (datetime.now() - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)
+        ] if days else [date]
+
+        for current_date in dates:
+            if days:
                 logger.info(f"处理日期: {current_date}")
 
-                if process_arxiv:
-                    result = self.process_arxiv(**kwargs)
-                    for key in result:
-                        total_results["arxiv"][key] += result[key]
+            # 先规划（两路候选去重），再分别处理
+            plan = self.plan(date=current_date, process_arxiv=process_arxiv, process_hf=process_hf, **kwargs)
 
-                if process_hf:
-                    result = self.process_huggingface(date=current_date, **kwargs)
-                    for key in result:
-                        total_results["hf"][key] += result[key]
-        else:
-            # 处理单天
             if process_arxiv:
-                total_results["arxiv"] = self.process_arxiv(**kwargs)
+                result = self.process_arxiv(download_pdf=download_pdf, papers=plan["arxiv"])
+                result["errors"] += plan["errors"]["arxiv"]
+                for key in result:
+                    total_results["arxiv"][key] += result[key]
 
             if process_hf:
-                total_results["hf"] = self.process_huggingface(date=date, **kwargs)
+                result = self.process_huggingface(date=current_date, download_pdf=download_pdf, hf_papers=plan["hf"])
+                result["errors"] += plan["errors"]["hf"]
+                for key in result:
+                    total_results["hf"][key] += result[key]
 
         # 发送通知
         arxiv_count = total_results["arxiv"]["processed"]
@@ -114,5 +114,182 @@ def init_config(config_path):
 
     click.echo(f"配置文件已生成: {config_path}")
 
+def _load_settings(config_path: str = None) -> Settings:
+    """加载配置文件，未指定时使用项目根目录下的 config.json"""
+    path = Path(config_path) if config_path else PROJECT_ROOT / "config.json"
+    return Settings.from_file(str(path)) if path.exists() else Settings()
+
+@cli.group()
+def zotero():
+    """Zotero文库维护"""
+    pass
+
+@zotero.command('backfill-tags')
+@click.option('--config', type=click.Path(exists=True), help='配置文件')
+@click.option('--dry-run', is_flag=True, help='只统计需要补充标签的条目，不写入')
+def backfill_tags(config, dry_run):
+    """为已有条目补充 arxiv:<id> 机器标签"""
+    from main import create_container
+    from services.storage import ZoteroStorage
+
+    settings = _load_settings(config)
+    # 带账本写入，补充完成后记录标记，之后标签未命中不再退回全文搜索
+    storage = ZoteroStorage(
+        api_key=settings.zotero.api_key,
+        user_id=settings.zotero.library_id,
+        group_id=settings.zotero.group_id,
+        library_type=settings.zotero.library_type,
+        ledger=create_container(settings).get('ledger')
+    )
+    if not storage.is_available():
+        click.echo("错误: 未配置Zotero API Key或Library ID", err=True)
+        sys.exit(1)
+
+    stats = storage.backfill_machine_tags(dry_run=dry_run)
+    action = "需要补充" if dry_run else "已补充"
+    click.echo(f"扫描 {stats['scanned']} 条, {action} {stats['tagged']} 条, 失败 {stats['failed']} 条")
+
+@cli.group()
+def outbox():
+    """存储发件箱维护"""
+    pass
+
+@outbox.command('status')
+def outbox_status():
+    """查看发件箱中各存储服务的条目统计"""
+    from core.outbox import StorageOutbox
+    from main import OUTBOX_PATH
+
+    if not OUTBOX_PATH.exists():
+        click.echo("发件箱为空")
+        return
+
+    box = StorageOutbox(str(OUTBOX_PATH))
+    stats = box.stats()
+    if not stats:
+        click.echo("发件箱为空")
+    for name, counts in sorted(stats.items()):
+        click.echo(
+            f"{name}: 待写出 {counts['pending']}, 写出中 {counts['inflight']}, "
+            f"已完成 {counts['done']}, 失败 {counts['failed']}"
+        )
+    for error in box.recent_errors(limit=5):
+        click.echo(f"  [{error['storage']}] {error['paper_id']} (尝试 {error['attempts']} 次): {error['error']}")
+    box.close()
+
+@outbox.command('flush')
+@click.option('--config', type=click.Path(exists=True), help='配置文件')
+@click.option('--storage', '-s', 'storage_names', multiple=True, help='只写出指定存储服务')
+@click.option('--retry-failed', is_flag=True, help='同时重试已超过最大尝试次数的条目')
+def outbox_flush(config, storage_names, retry_failed):
+    """立即写出发件箱中的待写出条目"""
+    from core.outbox import OutboxFlusher, StorageOutbox
+    from main import OUTBOX_PATH, create_container, get_storages
+
+    settings = _load_settings(config)
+    container = create_container(settings)
+    storages = get_storages(container, settings)
+    if not storages:
+        click.echo("错误: 没有可用的存储服务", err=True)
+        sys.exit(1)
+
+    box = StorageOutbox(str(OUTBOX_PATH))
+    for name in storage_names or [None]:
+        if retry_failed:
+            box.retry_failed(name)
+        box.make_due(name)
+
+    processed = OutboxFlusher(box, storages, ledger=container.get('ledger')).flush(
+        list(storage_names) or None
+    )
+    for name, count in processed.items():
+        counts = box.stats().get(name, {})
+        click.echo(
+            f"{name}: 处理 {count} 条, 剩余待写出 {counts.get('pending', 0)}, 失败 {counts.get('failed', 0)}"
+        )
+    box.close()
+
+@cli.group()
+def index():
+    """论文全文索引维护"""
+    pass
+
+@index.command('rebuild')
+def index_rebuild():
+    """从本地缓存存储补全全文索引"""
+    from core.cache_store import CacheStore
+    from core.identity import IdentityIndex
+    from core.search_index import PaperSearchIndex
+    from main import CACHE_PATH, SEARCH_INDEX_PATH
+
+    store = CacheStore(str(CACHE_PATH))
+    search_index = PaperSearchIndex(str(SEARCH_INDEX_PATH), identity=IdentityIndex(store))
+    count = search_index.index_cache_store(store)
+    store.close()
+    click.echo(f"已索引 {count} 篇论文，索引共 {search_index.count()} 篇 (分词器: {search_index.tokenizer})")
+    search_index.close()
+
+@index.command('search')
+@click.argument('query')
+@click.option('--page', default=1, help='页码')
+@click.option('--page-size', default=10, help='每页数量')
+def index_search(query, page, page_size):
+    """在本地全文索引中检索论文"""
+    from core.search_index import PaperSearchIndex
+    from main import SEARCH_INDEX_PATH
+
+    search_index = PaperSearchIndex(str(SEARCH_INDEX_PATH))
+    result = search_index.search(query, page=page, page_size=page_size)
+    click.echo(f"共 {result['total']} 篇")
+    for doc in result["papers"]:
+        click.echo(f"  [{doc['paper_id']}] {doc['title']} ({doc['published']})")
+    search_index.close()
+
+@cli.group()
+def cache():
+    """本地缓存存储维护"""
+    pass
+
+@cache.command('stats')
+def cache_stats():
+    """查看各命名空间的条目数和大小"""
+    from core.cache_store import CacheStore
+    from main import CACHE_PATH
+
+    store = CacheStore(str(CACHE_PATH))
+    stats = store.stats()
+    for name, counts in sorted(stats["namespaces"].items()):
+        click.echo(f"{name}: {counts['entries']} 条, {counts['bytes'] / 1024:.1f} KB")
+    click.echo(
+        f"合计 {stats['entries']} 条, {stats['bytes'] / 1024 / 1024:.2f} MB "
+        f"(上限 {stats['max_bytes'] / 1024 / 1024:.0f} MB, 文件 {stats['file_bytes'] / 1024 / 1024:.2f} MB, "
+        f"zstd 压缩: {'启用' if stats['compression'] else '未安装'})"
+    )
+    store.close()
+
+@cache.command('gc')
+@click.option('--max-mb', type=int, help='大小上限 (MB)，默认为缓存的上限')
+def cache_gc(max_mb):
+    """按最近访问时间淘汰缓存条目并压缩数据库文件"""
+    from core.cache_store import CacheStore
+    from main import CACHE_PATH
+
+    store = CacheStore(str(CACHE_PATH))
+    evicted = store.gc(max_bytes=max_mb * 1024 * 1024 if max_mb is not None else None, vacuum=True)
+    click.echo(f"已淘汰 {evicted} 条, 剩余 {store.stats()['entries']} 条")
+    store.close()
+
+@cache.command('migrate')
+@click.option('--delete', is_flag=True, help='导入成功后删除原文件')
+def cache_migrate(delete):
+    """把缓存目录中的旧版 JSON、pickle 和检查点文件导入缓存存储"""
+    from core.cache_store import CacheStore
+    from main import CACHE_PATH
+
+    store = CacheStore(str(CACHE_PATH))
+    counts = store.migrate_dir(str(CACHE_PATH.parent), delete=delete)
+    click.echo(f"导入 {counts['migrated']} 个文件, 失败 {counts['failed']} 个, 跳过 {counts['skipped']} 个")
+    store.close()
+
 if __name__ == '__main__':
     cli()
@@ -74,6 +74,8 @@ class ServiceConfig:
         notion: 是否启用 Notion 存储
         zotero: 是否启用 Zotero 存储
         wolai: 是否启用 Wolai 存储
+        feishu: 是否启用飞书多维表格存储
+        archive: 是否启用本地列式归档存储（需要 pyarrow）
         arxiv: 是否启用 ArXiv 数据源
         semantic_scholar: 是否启用 Semantic Scholar 数据源
     """
@@ -81,6 +83,8 @@ class ServiceConfig:
     notion: bool = True
     zotero: bool = True
     wolai: bool = False
+    feishu: bool = False
+    archive: bool = False
     arxiv: bool = True
     semantic_scholar: bool = False
 
@@ -90,6 +94,8 @@ class ServiceConfig:
             "notion": self.notion,
             "zotero": self.zotero,
             "wolai": self.wolai,
+            "feishu": self.feishu,
+            "archive": self.archive,
             "arxiv": self.arxiv,
             "semantic_scholar": self.semantic_scholar,
         }
@@ -135,13 +141,21 @@ class ZoteroConfig:
         api_key: Zotero API密钥
         library_id: Zotero库ID
         library_type: 库类型，"user" 或 "group"
+        group_id: 群组库ID（library_type 为 group 时使用，默认同 library_id）
         collection_id: 收藏夹ID（可选）
+        upload_pdf: 是否把下载的PDF作为附件上传
+        upload_concurrency: 同时上传的附件数
+        upload_bandwidth: 附件上传带宽上限（字节/秒，不设置时不限速）
     """
 
     api_key: Optional[str] = None
     library_id: Optional[str] = None
     library_type: str = "user"
+    group_id: Optional[str] = None
     collection_id: Optional[str] = None
+    upload_pdf: bool = False
+    upload_concurrency: int = 2
+    upload_bandwidth: Optional[int] = None
 
     def __post_init__(self) -> None:
         """初始化后处理，从环境变量加载配置"""
@@ -149,6 +163,10 @@ class ZoteroConfig:
             self.api_key = os.getenv("ZOTERO_API_KEY")
         if self.library_id is None:
             self.library_id = os.getenv("ZOTERO_LIBRARY_ID")
+        if self.group_id is None:
+            self.group_id = os.getenv("ZOTERO_GROUP_ID") or (
+                self.library_id if self.library_type == "group" else None
+            )
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典（不包含敏感信息）"""
@@ -156,7 +174,77 @@ class ZoteroConfig:
             "has_api_key": self.api_key is not None,
             "library_id": self.library_id,
             "library_type": self.library_type,
+            "group_id": self.group_id,
             "collection_id": self.collection_id,
+            "upload_pdf": self.upload_pdf,
+            "upload_concurrency": self.upload_concurrency,
+            "upload_bandwidth": self.upload_bandwidth,
+        }
+
+
+@dataclass
+class WolaiConfig:
+    """
+    Wolai服务配置
+
+    Attributes:
+        token: Wolai API令牌
+        database_id: Wolai数据库ID
+    """
+
+    token: Optional[str] = None
+    database_id: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        """初始化后处理，从环境变量加载配置"""
+        if self.token is None:
+            self.token = os.getenv("WOLAI_TOKEN")
+        if self.database_id is None:
+            self.database_id = os.getenv("WOLAI_DB_ID")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（不包含敏感信息）"""
+        return {
+            "has_token": self.token is not None,
+            "database_id": self.database_id,
+        }
+
+
+@dataclass
+class FeishuConfig:
+    """
+    飞书多维表格服务配置
+
+    Attributes:
+        app_id: 飞书应用ID
+        app_secret: 飞书应用密钥
+        app_token: 多维表格 app_token
+        table_id: 数据表ID
+    """
+
+    app_id: Optional[str] = None
+    app_secret: Optional[str] = None
+    app_token: Optional[str] = None
+    table_id: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        """初始化后处理，从环境变量加载配置"""
+        if self.app_id is None:
+            self.app_id = os.getenv("FEISHU_APP_ID")
+        if self.app_secret is None:
+            self.app_secret = os.getenv("FEISHU_APP_SECRET")
+        if self.app_token is None:
+            self.app_token = os.getenv("FEISHU_APP_TOKEN")
+        if self.table_id is None:
+            self.table_id = os.getenv("FEISHU_TABLE_ID")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（不包含敏感信息）"""
+        return {
+            "app_id": self.app_id,
+            "has_app_secret": self.app_secret is not None,
+            "app_token": self.app_token,
+            "table_id": self.table_id,
         }
 
 
@@ -176,11 +264,14 @@ class Settings:
         llm: LLM服务配置
         notion: Notion服务配置
         zotero: Zotero服务配置
+        wolai: Wolai服务配置
+        feishu: 飞书多维表格服务配置
         download_pdf: 是否下载PDF
         pdf_dir: PDF存储目录
         search_limit: 搜索结果数量限制
         retries: 重试次数
         retry_delay: 重试延迟（秒）
+        use_outbox: 是否通过本地发件箱异步写出到存储服务（默认关闭，直接同步写入）
         category_map: 分类映射表
         default_category: 默认分类
         log_level: 日志级别
@@ -200,6 +291,8 @@ class Settings:
     llm: LLMConfig = field(default_factory=LLMConfig)
     notion: NotionConfig = field(default_factory=NotionConfig)
     zotero: ZoteroConfig = field(default_factory=ZoteroConfig)
+    wolai: WolaiConfig = field(default_factory=WolaiConfig)
+    feishu: FeishuConfig = field(default_factory=FeishuConfig)
 
     # 下载配置
     download_pdf: bool = True
@@ -209,6 +302,7 @@ class Settings:
     search_limit: int = 20
     retries: int = 3
     retry_delay: float = 1.0
+    use_outbox: bool = False
 
     # 分类配置
     category_map: Dict[str, List[str]] = field(default_factory=dict)
@@ -290,17 +384,23 @@ class Settings:
         llm_data = data.pop("llm", {})
         notion_data = data.pop("notion", {})
         zotero_data = data.pop("zotero", {})
+        wolai_data = data.pop("wolai", {})
+        feishu_data = data.pop("feishu", {})
 
         services = ServiceConfig(**services_data) if services_data else ServiceConfig()
         llm = LLMConfig(**llm_data) if llm_data else LLMConfig()
         notion = NotionConfig(**notion_data) if notion_data else NotionConfig()
         zotero = ZoteroConfig(**zotero_data) if zotero_data else ZoteroConfig()
+        wolai = WolaiConfig(**wolai_data) if wolai_data else WolaiConfig()
+        feishu = FeishuConfig(**feishu_data) if feishu_data else FeishuConfig()
 
         return cls(
             services=services,
             llm=llm,
             notion=notion,
             zotero=zotero,
+            wolai=wolai,
+            feishu=feishu,
             **{k: v for k, v in data.items() if k in cls.__dataclass_fields__}
         )
 
@@ -348,6 +448,20 @@ class Settings:
             if not self.zotero.library_id:
                 errors.append("启用 Zotero 服务但未配置 Library ID")
 
+        # 验证 Wolai 配置（如果启用）
+        if self.services.wolai:
+            if not self.wolai.token:
+                errors.append("启用 Wolai 服务但未配置 Token")
+            if not self.wolai.database_id:
+                errors.append("启用 Wolai 服务但未配置 Database ID")
+
+        # 验证飞书配置（如果启用）
+        if self.services.feishu:
+            if not (self.feishu.app_id and self.feishu.app_secret):
+                errors.append("启用飞书服务但未配置 App ID / App Secret")
+            if not (self.feishu.app_token and self.feishu.table_id):
+                errors.append("启用飞书服务但未配置多维表格 App Token / Table ID")
+
         # 验证 LLM 配置
         if not self.llm.api_key:
             logger.warning("未配置 LLM API Key，LLM 功能可能不可用")
@@ -379,11 +493,14 @@ class Settings:
             "llm": self.llm.to_dict(),
             "notion": self.notion.to_dict(),
             "zotero": self.zotero.to_dict(),
+            "wolai": self.wolai.to_dict(),
+            "feishu": self.feishu.to_dict(),
             "download_pdf": self.download_pdf,
             "pdf_dir": self.pdf_dir,
             "search_limit": self.search_limit,
             "retries": self.retries,
             "retry_delay": self.retry_delay,
+            "use_outbox": self.use_outbox,
             "category_map": self.category_map,
             "default_category": self.default_category,
             "log_level": self.log_level,
@@ -426,13 +543,26 @@ class Settings:
             "zotero": {
                 "library_id": self.zotero.library_id,
                 "library_type": self.zotero.library_type,
+                "group_id": self.zotero.group_id,
                 "collection_id": self.zotero.collection_id,
+                "upload_pdf": self.zotero.upload_pdf,
+                "upload_concurrency": self.zotero.upload_concurrency,
+                "upload_bandwidth": self.zotero.upload_bandwidth,
+            },
+            "wolai": {
+                "database_id": self.wolai.database_id,
+            },
+            "feishu": {
+                "app_id": self.feishu.app_id,
+                "app_token": self.feishu.app_token,
+                "table_id": self.feishu.table_id,
             },
             "download_pdf": self.download_pdf,
             "pdf_dir": self.pdf_dir,
             "search_limit": self.search_limit,
             "retries": self.retries,
             "retry_delay": self.retry_delay,
+            "use_outbox": self.use_outbox,
             "category_map": self.category_map,
             "default_category": self.default_category,
             "log_level": self.log_level,
@@ -3,10 +3,42 @@
 
 该模块包含系统的核心业务处理逻辑，包括：
 - PaperProcessor: 论文处理器
+- StorageOutbox / OutboxFlusher: 存储发件箱及其刷写器
+- StorageFanout: 存储写入并行分发器
+- SyncLedger: 跨存储服务的同步账本
+- PaperSearchIndex: 论文全文索引
+- ResponseCache: 带请求合并的进程内响应缓存
+- JobQueue: 有界后台任务队列
+- CacheStore: 命名空间键值缓存存储
+- TieredCache: 内存 LRU + 本地缓存存储的两级缓存
+- IdentityIndex: 论文ID别名到规范键的索引
 """
 
+from .cache_store import CacheStore, get_cache_store
+from .fanout import StorageFanout
+from .identity import IdentityIndex, get_identity_index, group_duplicates
+from .job_queue import JobQueue, QueueFullError
+from .ledger import SyncLedger
+from .outbox import OutboxFlusher, StorageOutbox
 from .processor import PaperProcessor
+from .response_cache import ResponseCache
+from .search_index import PaperSearchIndex
+from .tiered_cache import TieredCache
 
 __all__ = [
     "PaperProcessor",
+    "StorageOutbox",
+    "OutboxFlusher",
+    "StorageFanout",
+    "SyncLedger",
+    "PaperSearchIndex",
+    "ResponseCache",
+    "JobQueue",
+    "QueueFullError",
+    "CacheStore",
+    "get_cache_store",
+    "TieredCache",
+    "IdentityIndex",
+    "get_identity_index",
+    "group_duplicates",
 ]
@@ -0,0 +1,409 @@
+"""
+本地缓存存储模块
+
+用一个 SQLite 数据库代替 `output/cache/` 下的大量小文件（ArxivVisitor 的 `<id>.json`/`<id>.pkl`、
+数据源的 `arxiv_<id>.json` 和各类检查点 `.txt`）。条目按命名空间区分，值以紧凑 JSON
+序列化为二进制存储，安装 zstandard 时较大的值再经 zstd 压缩；总大小超过上限时按最近访问时间淘汰。
+arXiv 结果以字段字典的形式存储，不再依赖 pickle，arxiv 库升级后缓存仍可读取。
+"""
+
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖：pip install zstandard
+    zstandard = None
+
+from models.identifiers import normalize_arxiv_id
+
+logger = logging.getLogger(__name__)
+
+# 默认大小上限
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# 超过该大小的值才压缩
+COMPRESS_THRESHOLD = 1024
+# 每写入这么多条检查一次是否超过大小上限
+GC_INTERVAL = 200
+# 访问时间的精度（秒）：距上次记录不足该时间的读取不更新访问时间，命中时不产生写入
+ACCESS_RESOLUTION = 3600
+
+# 命名空间
+ARXIV_META = "arxiv_meta"
+ARXIV_RESULT = "arxiv_result"
+DATASOURCE = "datasource"
+IDENTITY = "identity"
+CHECKPOINT_PREFIX = "checkpoint:"
+# 缓存库自身的标记（如旧版缓存文件是否已导入）
+META = "meta"
+
+# 旧版缓存目录中需要导入的文件
+LEGACY_PATTERNS = ("*.json", "*.pkl", "arxiv_ckpt.txt", "ckpt_*.txt", "hf_*.txt")
+
+CODEC_JSON = "json"
+CODEC_JSON_ZSTD = "json+zstd"
+
+
+def _paper_key(paper_id: str) -> str:
+    """旧版缓存文件名中的论文ID带版本号，导入时去掉（与 core.identity 的规范键一致）"""
+    return normalize_arxiv_id(paper_id) or paper_id
+
+
+def checkpoint_namespace(name: str) -> str:
+    """检查点（如 arxiv_ckpt、ckpt_<日期>、hf_<日期>）的命名空间"""
+    return f"{CHECKPOINT_PREFIX}{name}"
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def encode_value(value: Any) -> tuple:
+    """序列化缓存值，返回 (二进制数据, 编码方式)"""
+    data = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+    if zstandard is not None and len(data) > COMPRESS_THRESHOLD:
+        return zstandard.ZstdCompressor().compress(data), CODEC_JSON_ZSTD
+    return data, CODEC_JSON
+
+
+def decode_value(data: bytes, codec: str) -> Any:
+    """反序列化缓存值"""
+    if codec == CODEC_JSON_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("缓存条目经 zstd 压缩，需要安装 zstandard")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return json.loads(data)
+
+
+def arxiv_result_to_dict(result: Any) -> Dict[str, Any]:
+    """把 arxiv.Result 转为可序列化的字段字典"""
+    return {
+        "entry_id": result.entry_id,
+        "updated": result.updated.isoformat() if result.updated else None,
+        "published": result.published.isoformat() if result.published else None,
+        "title": result.title,
+        "authors": [author.name for author in result.authors],
+        "summary": result.summary,
+        "comment": result.comment,
+        "journal_ref": result.journal_ref,
+        "doi": result.doi,
+        "primary_category": result.primary_category,
+        "categories": list(result.categories or []),
+        "links": [
+            {"href": link.href, "title": link.title, "rel": link.rel, "content_type": link.content_type}
+            for link in result.links
+        ],
+        "pdf_url": result.pdf_url,
+    }
+
+
+def arxiv_result_from_dict(data: Dict[str, Any]) -> Any:
+    """由字段字典重建 arxiv.Result"""
+    import arxiv
+
+    result = arxiv.Result(
+        entry_id=data["entry_id"],
+        updated=datetime.fromisoformat(data["updated"]) if data.get("updated") else None,
+        published=datetime.fromisoformat(data["published"]) if data.get("published") else None,
+        title=data.get("title", ""),
+        authors=[arxiv.Result.Author(name) for name in data.get("authors", [])],
+        summary=data.get("summary", ""),
+        comment=data.get("comment"),
+        journal_ref=data.get("journal_ref"),
+        doi=data.get("doi"),
+        primary_category=data.get("primary_category", ""),
+        categories=data.get("categories", []),
+        links=[
+            arxiv.Result.Link(link["href"], title=link.get("title"), rel=link.get("rel"),
+                              content_type=link.get("content_type"))
+            for link in data.get("links", [])
+        ],
+    )
+    if data.get("pdf_url"):
+        result.pdf_url = data["pdf_url"]
+    return result
+
+
+class CacheStore:
+    """
+    命名空间键值缓存
+
+    每个条目记录大小和最近访问时间；总大小超过 max_bytes 时按最近访问时间从旧到新淘汰
+    可淘汰的条目（检查点等不可丢失的条目写入时设置 evictable=False）。
+
+    Attributes:
+        db_path: SQLite 数据库路径
+        max_bytes: 缓存大小上限（字节）
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        """创建缓存表"""
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    codec TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    evictable INTEGER NOT NULL DEFAULT 1,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_entries_lru ON entries (evictable, accessed_at)"
+            )
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """读取缓存值，未命中或无法解码时返回 default"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, codec, accessed_at FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None:
+                return default
+            now = time.time()
+            if now - row[2] >= ACCESS_RESOLUTION:
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                        (now, namespace, key)
+                    )
+        try:
+            return decode_value(row[0], row[1])
+        except Exception as e:
+            logger.warning(f"解码缓存条目失败 {namespace}/{key}: {e}")
+            return default
+
+    def set(self, namespace: str, key: str, value: Any, evictable: bool = True) -> None:
+        """写入缓存值（覆盖已有条目）"""
+        data, codec = encode_value(value)
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO entries (namespace, key, value, codec, size, evictable, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(namespace, key) DO UPDATE SET "
+                    "value = excluded.value, codec = excluded.codec, size = excluded.size, "
+                    "evictable = excluded.evictable, accessed_at = excluded.accessed_at",
+                    (namespace, key, data, codec, len(data), int(evictable), now, now)
+                )
+            self._writes += 1
+            check = self._writes % GC_INTERVAL == 0
+        if check:
+            self.gc()
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """删除缓存条目，返回是否存在"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).rowcount > 0
+
+    def contains(self, namespace: str, key: str) -> bool:
+        """是否存在缓存条目（不更新访问时间）"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone() is not None
+
+    def keys(self, namespace: str) -> List[str]:
+        """命名空间下的全部键"""
+        with self._lock:
+            rows = self._conn.execute("SELECT key FROM entries WHERE namespace = ?", (namespace,)).fetchall()
+        return [row[0] for row in rows]
+
+    def items(self, namespace: str):
+        """遍历命名空间下的 (键, 值)，不更新访问时间"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, codec FROM entries WHERE namespace = ?", (namespace,)
+            ).fetchall()
+        for key, data, codec in rows:
+            try:
+                yield key, decode_value(data, codec)
+            except Exception as e:
+                logger.warning(f"解码缓存条目失败 {namespace}/{key}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        各命名空间的条目数和大小
+
+        Returns:
+            {"namespaces": {命名空间: {"entries", "bytes"}}, "entries", "bytes", "max_bytes",
+             "file_bytes", "compression"}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT namespace, COUNT(*), COALESCE(SUM(size), 0) FROM entries GROUP BY namespace"
+            ).fetchall()
+        namespaces = {name: {"entries": count, "bytes": size} for name, count, size in rows}
+        return {
+            "namespaces": namespaces,
+            "entries": sum(ns["entries"] for ns in namespaces.values()),
+            "bytes": sum(ns["bytes"] for ns in namespaces.values()),
+            "max_bytes": self.max_bytes,
+            "file_bytes": self.db_path.stat().st_size if self.db_path.exists() else 0,
+            "compression": zstandard is not None,
+        }
+
+    def gc(self, max_bytes: Optional[int] = None, vacuum: bool = False) -> int:
+        """
+        淘汰最久未访问的可淘汰条目，直到总大小不超过上限
+
+        Args:
+            max_bytes: 本次使用的大小上限（默认为 self.max_bytes）
+            vacuum: 淘汰后是否压缩数据库文件
+
+        Returns:
+            淘汰的条目数
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        evicted = 0
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total > limit:
+                rows = self._conn.execute(
+                    "SELECT namespace, key, size FROM entries WHERE evictable = 1 ORDER BY accessed_at"
+                ).fetchall()
+                victims = []
+                for namespace, key, size in rows:
+                    if total <= limit:
+                        break
+                    victims.append((namespace, key))
+                    total -= size
+                with self._conn:
+                    self._conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", victims)
+                evicted = len(victims)
+            if vacuum:
+                self._conn.execute("VACUUM")
+        if evicted:
+            logger.info(f"缓存超过上限，已淘汰 {evicted} 条")
+        return evicted
+
+    def migrate_dir(self, cache_dir: str, delete: bool = False) -> Dict[str, int]:
+        """
+        把旧版缓存目录中的文件导入缓存库
+
+        - `arxiv_<id>.json` → datasource
+        - 其他带 id 字段的 `<id>.json` → arxiv_meta
+        - `<id>.pkl`（arxiv.Result）→ arxiv_result
+        - `arxiv_ckpt.txt`、`ckpt_<日期>.txt`、`hf_<日期>.txt` → checkpoint:<文件名>
+
+        Args:
+            cache_dir: 旧版缓存目录
+            delete: 导入成功后删除原文件
+
+        Returns:
+            {"migrated", "failed", "skipped"}
+        """
+        counts = {"migrated": 0, "failed": 0, "skipped": 0}
+        for path in sorted(glob.glob(os.path.join(cache_dir, "*"))):
+            name = os.path.basename(path)
+            stem, ext = os.path.splitext(name)
+            try:
+                if ext == ".json":
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if stem.startswith("arxiv_"):
+                        self.set(DATASOURCE, "arxiv_" + _paper_key(stem[len("arxiv_"):]), data)
+                    elif isinstance(data, dict) and data.get("id"):
+                        self.set(ARXIV_META, _paper_key(stem), data)
+                    else:
+                        counts["skipped"] += 1
+                        continue
+                elif ext == ".pkl":
+                    import pickle
+
+                    with open(path, "rb") as f:
+                        result = pickle.load(f)
+                    self.set(ARXIV_RESULT, _paper_key(stem), arxiv_result_to_dict(result))
+                elif ext == ".txt" and (stem == "arxiv_ckpt" or stem.startswith(("ckpt_", "hf_"))):
+                    with open(path, "r", encoding="utf-8") as f:
+                        paper_ids = {_paper_key(line.strip()) for line in f if line.strip()}
+                    for paper_id in paper_ids:
+                        self.set(checkpoint_namespace(stem), paper_id, True, evictable=False)
+                else:
+                    counts["skipped"] += 1
+                    continue
+            except Exception as e:
+                logger.warning(f"导入缓存文件失败 {path}: {e}")
+                counts["failed"] += 1
+                continue
+
+            counts["migrated"] += 1
+            if delete:
+                os.remove(path)
+        logger.info(f"缓存目录导入完成: {counts}")
+        return counts
+
+    def migrate_legacy(self) -> Optional[Dict[str, int]]:
+        """
+        首次打开时自动导入同目录下的旧版缓存文件（只导入一次，不删除原文件）
+
+        升级后旧版流程只从缓存库读取检查点，不导入时已处理过的论文会被重新增强和写入。
+
+        Returns:
+            导入统计（见 migrate_dir），已导入过或没有旧版文件时返回 None
+        """
+        if self.contains(META, "legacy_migrated"):
+            return None
+
+        cache_dir = str(self.db_path.parent)
+        counts = None
+        if any(glob.glob(os.path.join(cache_dir, pattern)) for pattern in LEGACY_PATTERNS):
+            logger.info(f"发现旧版缓存文件，导入缓存库: {cache_dir}")
+            counts = self.migrate_dir(cache_dir)
+        self.set(META, "legacy_migrated", time.time(), evictable=False)
+        return counts
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+_stores: Dict[str, CacheStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_cache_store(db_path: str) -> CacheStore:
+    """进程内按路径共享的缓存存储，首次打开时导入同目录下的旧版缓存文件"""
+    key = os.path.abspath(db_path)
+    with _stores_lock:
+        if key not in _stores:
+            store = CacheStore(key)
+            try:
+                store.migrate_legacy()
+            except Exception as e:
+                logger.warning(f"导入旧版缓存文件失败: {e}")
+            _stores[key] = store
+        return _stores[key]
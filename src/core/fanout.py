@@ -0,0 +1,76 @@
+"""
+存储写入并行分发模块
+
+把同一篇论文对多个存储服务的写入并行执行，每个存储服务有独立的并发上限，
+单篇论文的保存耗时由各服务耗时之和降为最慢的单个服务。
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StorageFanout:
+    """
+    存储写入并行分发器
+
+    所有调用共享一个线程池，每个存储服务（按名称）由一个信号量限制同时进行的写入数，
+    在多个线程同时保存论文时也不会超过单个服务的并发上限。
+
+    Attributes:
+        limits: 各存储服务的并发上限
+        default_limit: 未单独配置的存储服务的并发上限
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 2,
+        max_workers: int = 16
+    ):
+        self.limits = limits or {}
+        self.default_limit = default_limit
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage-fanout")
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _get_semaphore(self, name: str) -> threading.BoundedSemaphore:
+        """获取存储服务的并发信号量"""
+        with self._lock:
+            if name not in self._semaphores:
+                self._semaphores[name] = threading.BoundedSemaphore(
+                    self.limits.get(name, self.default_limit)
+                )
+            return self._semaphores[name]
+
+    def _call(self, name: str, func: Callable[[], Any]) -> Any:
+        with self._get_semaphore(name):
+            return func()
+
+    def run(self, calls: Dict[str, Callable[[], Any]]) -> Dict[str, Tuple[Any, Optional[Exception]]]:
+        """
+        并行执行对各存储服务的调用并等待全部完成
+
+        Args:
+            calls: {存储服务名称: 无参调用}
+
+        Returns:
+            {存储服务名称: (返回值, 异常)}，顺序与 calls 一致；调用失败时返回值为 None
+        """
+        futures = {name: self._executor.submit(self._call, name, func) for name, func in calls.items()}
+
+        outcomes: Dict[str, Tuple[Any, Optional[Exception]]] = {}
+        for name, future in futures.items():
+            try:
+                outcomes[name] = (future.result(), None)
+            except Exception as e:
+                outcomes[name] = (None, e)
+        return outcomes
+
+    def close(self) -> None:
+        """关闭线程池"""
+        self._executor.shutdown(wait=True)
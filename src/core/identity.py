@@ -0,0 +1,162 @@
+"""
+论文身份模块
+
+同一篇论文在不同来源和版本中有不同的ID：带版本号的 ArXiv ID、HuggingFace 使用的裸 ArXiv ID、
+DOI、Semantic Scholar 的 paperId。别名索引把这些别名（以及规范化标题的哈希）映射到同一个
+规范键，缓存、检查点和账本都按规范键存取，同一论文不会因为键不同而重复处理和写入；
+多个数据源的候选论文在增强前按同样的别名分组去重（group_duplicates）。
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from models.identifiers import canonical_key, paper_aliases, parse_alias
+from .cache_store import IDENTITY, CacheStore
+
+logger = logging.getLogger(__name__)
+
+
+class IdentityIndex:
+    """
+    论文别名索引
+
+    别名到规范键的映射保存在本地缓存存储的 identity 命名空间中（不参与淘汰），
+    进程内另有一份字典缓存。一个别名第一次登记后不再改变所属的规范键。
+
+    Attributes:
+        store: 本地缓存存储
+    """
+
+    def __init__(self, store: CacheStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._memo: Dict[str, str] = {}
+
+    @staticmethod
+    def _alias_key(kind: str, value: str) -> str:
+        return f"{kind}:{value}"
+
+    def lookup(self, kind: str, value: str) -> Optional[str]:
+        """查询别名对应的规范键，未登记时返回 None"""
+        alias = self._alias_key(kind, value)
+        with self._lock:
+            if alias in self._memo:
+                return self._memo[alias]
+        canonical = self.store.get(IDENTITY, alias)
+        if canonical is not None:
+            with self._lock:
+                self._memo[alias] = canonical
+        return canonical
+
+    def link(self, canonical: str, aliases: List[Tuple[str, str]]) -> None:
+        """把尚未登记的别名登记到规范键"""
+        for kind, value in aliases:
+            existing = self.lookup(kind, value)
+            if existing is None:
+                alias = self._alias_key(kind, value)
+                self.store.set(IDENTITY, alias, canonical, evictable=False)
+                with self._lock:
+                    self._memo[alias] = canonical
+            elif existing != canonical:
+                logger.debug(f"别名 {kind}:{value} 已属于 {existing}，不再登记到 {canonical}")
+
+    def resolve(self, paper: Any) -> str:
+        """
+        解析论文的规范键并登记其全部别名
+
+        任一别名已登记时沿用其规范键（标题相同但 ArXiv ID 不同的论文除外）；
+        否则规范键取自优先级最高的别名（ArXiv ID > DOI > Semantic Scholar ID > 标题哈希）。
+
+        Returns:
+            规范键，论文没有任何别名时返回原ID
+        """
+        aliases = paper_aliases(paper)
+        if not aliases:
+            return getattr(paper, "id", "") or ""
+
+        own_arxiv = dict(aliases).get("arxiv")
+        canonical = None
+        for kind, value in aliases:
+            canonical = self.lookup(kind, value)
+            # 标题相同但 ArXiv ID 不同的是两篇论文
+            if kind == "title" and own_arxiv and canonical is not None and parse_alias(canonical)[0] == "arxiv":
+                canonical = None
+            if canonical is not None:
+                break
+        if canonical is None:
+            canonical = canonical_key(*aliases[0])
+        self.link(canonical, aliases)
+        return canonical
+
+    def resolve_id(self, value: str) -> str:
+        """
+        解析单个ID字符串（ArXiv ID、DOI、paperId 或规范键）的规范键
+
+        只查询不登记；别名未登记时返回由其本身得出的规范键。
+        """
+        kind, normalized = parse_alias(value)
+        if kind == "id":
+            return normalized
+        return self.lookup(kind, normalized) or canonical_key(kind, normalized)
+
+
+_indexes: Dict[str, IdentityIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_identity_index(store: CacheStore) -> IdentityIndex:
+    """进程内按缓存存储共享的别名索引"""
+    key = str(store.db_path)
+    with _indexes_lock:
+        if key not in _indexes or _indexes[key].store is not store:
+            _indexes[key] = IdentityIndex(store)
+        return _indexes[key]
+
+
+def group_duplicates(papers: Iterable[Any], identity: Optional[IdentityIndex] = None) -> List[List[Any]]:
+    """
+    把同一论文的多个候选分为一组
+
+    按规范键（提供别名索引时）、ArXiv ID、DOI 和规范化标题判断重复，标题相同但 ArXiv ID
+    不同的是两篇论文。组按首次出现的顺序排列，组内保持输入顺序。
+
+    Args:
+        papers: 候选论文（Paper 或带同名属性的对象，见 paper_aliases）
+        identity: 论文别名索引（可选，提供时同时登记候选论文的别名）
+
+    Returns:
+        [[同一论文的候选]]
+    """
+    groups: List[List[Any]] = []
+    group_arxiv: List[str] = []
+    index: Dict[Tuple[str, str], int] = {}
+
+    for paper in papers:
+        aliases = paper_aliases(paper)
+        keys = list(aliases)
+        if identity is not None:
+            canonical = identity.resolve(paper)
+            if canonical:
+                keys.insert(0, ("canonical", canonical))
+        own_arxiv = dict(aliases).get("arxiv", "")
+
+        slot = None
+        for key in keys:
+            found = index.get(key)
+            if found is None:
+                continue
+            if key[0] == "title" and own_arxiv and group_arxiv[found] not in ("", own_arxiv):
+                continue
+            slot = found
+            break
+        if slot is None:
+            slot = len(groups)
+            groups.append([])
+            group_arxiv.append(own_arxiv)
+
+        groups[slot].append(paper)
+        group_arxiv[slot] = group_arxiv[slot] or own_arxiv
+        for key in keys:
+            index.setdefault(key, slot)
+    return groups
@@ -0,0 +1,190 @@
+"""
+后台任务队列模块
+
+固定数量的工作线程从有界队列中取任务执行，同一键的任务在排队或执行期间只保留一个，
+并记录任务状态、排队和执行耗时，供接口查询。
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """任务队列已满"""
+
+
+class JobQueue:
+    """
+    有界后台任务队列
+
+    Attributes:
+        handler: 任务处理函数，参数为提交时的 key，返回值记录为任务结果
+        workers: 工作线程数
+        max_pending: 最多排队的任务数，超过时 submit 抛出 QueueFullError
+        history_size: 保留的已结束任务数
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str], Any],
+        workers: int = 2,
+        max_pending: int = 100,
+        history_size: int = 500,
+        name: str = "job"
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.history_size = history_size
+        self.name = name
+
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_pending)
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._active: Dict[str, str] = {}  # key -> 排队或执行中的 job_id
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._stats = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "rejected": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "wait_seconds": 0.0,
+            "run_seconds": 0.0,
+        }
+
+    def start(self) -> None:
+        """启动工作线程（重复调用无效）"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"{self.name}-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, key: str) -> Dict[str, Any]:
+        """
+        提交任务
+
+        同一 key 已有排队或执行中的任务时直接返回该任务。
+
+        Returns:
+            任务信息（见 get）
+
+        Raises:
+            QueueFullError: 队列已满
+        """
+        self.start()
+        with self._lock:
+            job_id = self._active.get(key)
+            if job_id is not None:
+                self._stats["deduplicated"] += 1
+                return dict(self._jobs[job_id])
+
+            job = {
+                "id": uuid.uuid4().hex[:12],
+                "key": key,
+                "status": QUEUED,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            try:
+                self._queue.put_nowait(job["id"])
+            except queue.Full:
+                self._stats["rejected"] += 1
+                raise QueueFullError(f"任务队列已满 ({self.max_pending})")
+
+            self._jobs[job["id"]] = job
+            self._active[key] = job["id"]
+            self._stats["submitted"] += 1
+            self._trim_history()
+            return dict(job)
+
+    def _trim_history(self) -> None:
+        """丢弃最早的已结束任务（调用方持有锁）"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] in (SUCCEEDED, FAILED)]
+        for job_id in finished[:max(len(finished) - self.history_size, 0)]:
+            del self._jobs[job_id]
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                job = self._jobs[job_id]
+                job["status"] = RUNNING
+                job["started_at"] = time.time()
+                self._stats["wait_seconds"] += job["started_at"] - job["created_at"]
+
+            try:
+                result, error, status = self.handler(job["key"]), None, SUCCEEDED
+            except Exception as e:
+                logger.error(f"任务执行失败 {job['key']}: {e}")
+                result, error, status = None, str(e), FAILED
+
+            with self._lock:
+                job.update(status=status, result=result, error=error, finished_at=time.time())
+                self._stats[status] += 1
+                self._stats["run_seconds"] += job["finished_at"] - job["started_at"]
+                self._active.pop(job["key"], None)
+            self._queue.task_done()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取任务信息
+
+        Returns:
+            {"id", "key", "status", "created_at", "started_at", "finished_at", "result", "error"}，
+            任务不存在时返回 None
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """按提交时间从新到旧列出任务，可按状态过滤"""
+        with self._lock:
+            jobs = [dict(job) for job in reversed(self._jobs.values()) if status in (None, job["status"])]
+        return jobs[:limit]
+
+    def join(self) -> None:
+        """等待队列中的任务全部执行完"""
+        self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        队列深度、执行中任务数和平均排队/执行耗时
+
+        Returns:
+            {"queue_depth", "running", "workers", "max_pending", "submitted", "deduplicated",
+             "rejected", "succeeded", "failed", "avg_wait_seconds", "avg_run_seconds"}
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["running"] = sum(1 for job in self._jobs.values() if job["status"] == RUNNING)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["workers"] = self.workers
+        stats["max_pending"] = self.max_pending
+
+        started = stats["succeeded"] + stats["failed"] + stats["running"]
+        finished = stats["succeeded"] + stats["failed"]
+        wait_seconds, run_seconds = stats.pop("wait_seconds"), stats.pop("run_seconds")
+        stats["avg_wait_seconds"] = round(wait_seconds / started, 4) if started else 0.0
+        stats["avg_run_seconds"] = round(run_seconds / finished, 4) if finished else 0.0
+        return stats
@@ -0,0 +1,231 @@
+"""
+同步账本模块
+
+记录每篇论文写入了哪些存储服务：远程ID（Notion 页面ID、Zotero 条目 key 等）、
+写入时的载荷哈希、各字段的载荷哈希（差量更新时用于找出变化的字段）和写入时间。
+处理器在请求远程存在性检查之前先查询账本，已写入的论文不再访问网络；只有部分存储服务写入失败的论文，重新运行时只重试失败的服务。
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set
+
+from models.identifiers import normalize_arxiv_id
+from models.paper import Paper
+
+if TYPE_CHECKING:
+    from .identity import IdentityIndex
+
+logger = logging.getLogger(__name__)
+
+# SQLite 单条语句的参数上限较低，批量查询按此分块
+_QUERY_CHUNK = 500
+
+
+class SyncLedger:
+    """
+    跨存储服务的同步账本
+
+    每个 (论文, 存储服务) 对应一条记录，论文ID按规范化的 arXiv ID 存储，
+    版本号不同的同一论文视为同一条记录；设置别名索引时按论文的规范键存储，
+    DOI、Semantic Scholar ID 等别名也对应到同一条记录。
+
+    Attributes:
+        db_path: SQLite 数据库路径
+        identity: 论文别名索引（可选）
+    """
+
+    def __init__(self, db_path: str, identity: Optional["IdentityIndex"] = None):
+        self.db_path = Path(db_path)
+        self.identity = identity
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        """创建账本表"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ledger (
+                    paper_id TEXT NOT NULL,
+                    storage TEXT NOT NULL,
+                    remote_id TEXT,
+                    payload_hash TEXT,
+                    field_hashes TEXT,
+                    written_at REAL NOT NULL,
+                    PRIMARY KEY (paper_id, storage)
+                )
+                """
+            )
+            # 旧版本账本没有 field_hashes 列
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(ledger)")}
+            if "field_hashes" not in columns:
+                self._conn.execute("ALTER TABLE ledger ADD COLUMN field_hashes TEXT")
+
+    def normalize_id(self, paper_id: str) -> str:
+        """账本中使用的论文ID"""
+        if self.identity is not None:
+            return self.identity.resolve_id(paper_id)
+        return normalize_arxiv_id(paper_id) or paper_id
+
+    @staticmethod
+    def payload_hash(paper: Paper) -> str:
+        """计算论文载荷的哈希，用于判断内容是否在写入后发生变化"""
+        payload = json.dumps(paper.to_dict(), ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def record(
+        self,
+        storage: str,
+        paper_id: str,
+        remote_id: Optional[str] = None,
+        payload_hash: Optional[str] = None,
+        field_hashes: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        记录一次写入
+
+        已有记录时更新写入时间；未提供的远程ID和哈希保留原有的值。
+        """
+        self.record_many(storage, [(paper_id, remote_id, payload_hash, field_hashes)])
+
+    def record_many(self, storage: str, entries: Iterable[tuple]) -> None:
+        """
+        批量记录写入
+
+        Args:
+            storage: 存储服务名称
+            entries: [(论文ID, 远程ID, 载荷哈希, 各字段哈希)]
+        """
+        now = time.time()
+        rows = [
+            (
+                self.normalize_id(paper_id),
+                storage,
+                remote_id,
+                payload_hash,
+                json.dumps(field_hashes, sort_keys=True) if field_hashes else None,
+                now
+            )
+            for paper_id, remote_id, payload_hash, field_hashes in entries
+        ]
+        if not rows:
+            return
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO ledger (paper_id, storage, remote_id, payload_hash, field_hashes, written_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(paper_id, storage) DO UPDATE SET "
+                "remote_id = COALESCE(excluded.remote_id, ledger.remote_id), "
+                "payload_hash = COALESCE(excluded.payload_hash, ledger.payload_hash), "
+                "field_hashes = COALESCE(excluded.field_hashes, ledger.field_hashes), "
+                "written_at = excluded.written_at",
+                rows
+            )
+
+    def get(self, storage: str, paper_id: str) -> Optional[Dict[str, Any]]:
+        """
+        查询论文在指定存储服务的写入记录
+
+        Returns:
+            {"paper_id", "storage", "remote_id", "payload_hash", "field_hashes", "written_at"}，
+            未写入时返回 None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT paper_id, storage, remote_id, payload_hash, field_hashes, written_at FROM ledger "
+                "WHERE paper_id = ? AND storage = ?",
+                (self.normalize_id(paper_id), storage)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "paper_id": row[0],
+            "storage": row[1],
+            "remote_id": row[2],
+            "payload_hash": row[3],
+            "field_hashes": json.loads(row[4]) if row[4] else {},
+            "written_at": row[5],
+        }
+
+    def contains(self, storage: str, paper_id: str) -> bool:
+        """论文是否已写入指定存储服务"""
+        return self.get(storage, paper_id) is not None
+
+    def written_storages(
+        self,
+        paper_ids: List[str],
+        storages: Optional[Iterable[str]] = None
+    ) -> Dict[str, Set[str]]:
+        """
+        批量查询论文已写入的存储服务
+
+        Args:
+            paper_ids: 论文ID列表
+            storages: 只统计这些存储服务（默认全部）
+
+        Returns:
+            {论文ID: 已写入的存储服务集合}，键使用调用方传入的ID，没有任何记录的论文不出现在结果中
+        """
+        by_normalized: Dict[str, List[str]] = {}
+        for paper_id in paper_ids:
+            by_normalized.setdefault(self.normalize_id(paper_id), []).append(paper_id)
+
+        allowed = set(storages) if storages is not None else None
+        keys = list(by_normalized)
+        result: Dict[str, Set[str]] = {}
+
+        with self._lock:
+            for start in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[start:start + _QUERY_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT paper_id, storage FROM ledger WHERE paper_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for normalized, storage in rows:
+                    if allowed is not None and storage not in allowed:
+                        continue
+                    for paper_id in by_normalized[normalized]:
+                        result.setdefault(paper_id, set()).add(storage)
+
+        return result
+
+    def forget(self, storage: Optional[str] = None, paper_id: Optional[str] = None) -> int:
+        """
+        删除写入记录（例如远程条目被手动删除后需要重新写入）
+
+        Returns:
+            删除的记录数
+        """
+        query = "DELETE FROM ledger WHERE 1 = 1"
+        params: List[Any] = []
+        if storage:
+            query += " AND storage = ?"
+            params.append(storage)
+        if paper_id:
+            query += " AND paper_id = ?"
+            params.append(self.normalize_id(paper_id))
+        with self._lock, self._conn:
+            return self._conn.execute(query, params).rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """各存储服务已记录的论文数"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT storage, COUNT(*) FROM ledger GROUP BY storage"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,423 @@
+"""
+存储发件箱模块
+
+处理器将待写入的论文追加到本地 SQLite 发件箱，由每个存储服务各自的
+刷写线程按批次调用存储服务的 batch_insert 写出。写入失败的条目按指数退避
+重试，跨运行持久保留，无需重新获取和增强论文。
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set
+
+from interfaces.storage import StorageInterface
+from models.identifiers import normalize_arxiv_id
+from models.paper import Paper
+
+if TYPE_CHECKING:
+    from .ledger import SyncLedger
+
+logger = logging.getLogger(__name__)
+
+# 条目状态
+PENDING = "pending"
+INFLIGHT = "inflight"
+DONE = "done"
+FAILED = "failed"
+
+# 各存储服务 batch_insert 结果中 {论文ID: 远程ID} 映射的键
+REMOTE_ID_KEYS = ("pages", "keys", "records", "rows")
+
+
+class StorageOutbox:
+    """
+    持久化的存储发件箱
+
+    每个 (存储服务, 论文) 对应一条记录，幂等键为 `<storage>:<规范化论文ID>`：
+    重复追加同一论文时只更新尚未写出的载荷，已写出的论文不会再次发送。
+
+    Attributes:
+        db_path: SQLite 数据库路径
+        max_attempts: 最大尝试次数，超过后条目标记为 failed
+        retry_delay: 首次重试的等待秒数（之后按指数增长）
+        max_retry_delay: 重试等待的上限秒数
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_attempts: int = 5,
+        retry_delay: float = 30.0,
+        max_retry_delay: float = 3600.0
+    ):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        """创建表和索引，并把上次运行遗留的 inflight 条目恢复为 pending"""
+        with self._lock, self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    storage TEXT NOT NULL,
+                    paper_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    next_attempt_at REAL NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_outbox_claim
+                    ON outbox(storage, status, next_attempt_at);
+                """
+            )
+            self._conn.execute(
+                "UPDATE outbox SET status = ? WHERE status = ?",
+                (PENDING, INFLIGHT)
+            )
+
+    @staticmethod
+    def make_key(storage: str, paper_id: str) -> str:
+        """生成幂等键"""
+        return f"{storage}:{normalize_arxiv_id(paper_id) or paper_id}"
+
+    def enqueue(self, storage: str, paper: Paper) -> bool:
+        """
+        追加一篇论文到指定存储服务的发件箱
+
+        Returns:
+            是否需要写出（已写出的论文返回 False）
+        """
+        now = time.time()
+        key = self.make_key(storage, paper.id)
+        payload = json.dumps(paper.to_dict(), ensure_ascii=False)
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT status FROM outbox WHERE idempotency_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO outbox (idempotency_key, storage, paper_id, payload, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, storage, paper.id, payload, now, now)
+                )
+                return True
+            if row[0] == DONE:
+                return False
+
+            # 未写出的条目使用最新载荷，失败条目重新开始计数
+            self._conn.execute(
+                "UPDATE outbox SET payload = ?, status = CASE WHEN status = ? THEN status ELSE ? END, "
+                "attempts = CASE WHEN status = ? THEN 0 ELSE attempts END, "
+                "next_attempt_at = CASE WHEN status = ? THEN 0 ELSE next_attempt_at END, updated_at = ? "
+                "WHERE idempotency_key = ?",
+                (payload, INFLIGHT, PENDING, FAILED, FAILED, now, key)
+            )
+            return True
+
+    def enqueue_many(self, storages: Iterable[str], paper: Paper) -> int:
+        """追加一篇论文到多个存储服务，返回需要写出的数量"""
+        return sum(self.enqueue(storage, paper) for storage in storages)
+
+    def claim(self, storage: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        领取一批到期的待写出条目并标记为 inflight
+
+        Returns:
+            [{"id", "key", "paper"}]
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, idempotency_key, payload FROM outbox "
+                "WHERE storage = ? AND status = ? AND next_attempt_at <= ? "
+                "ORDER BY id LIMIT ?",
+                (storage, PENDING, now, limit)
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE outbox SET status = ?, updated_at = ? WHERE id = ?",
+                [(INFLIGHT, now, row[0]) for row in rows]
+            )
+
+        return [
+            {"id": row[0], "key": row[1], "paper": Paper.from_dict(json.loads(row[2]))}
+            for row in rows
+        ]
+
+    def mark_done(self, entry_ids: Iterable[int]) -> None:
+        """标记条目已写出"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET status = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                [(DONE, now, entry_id) for entry_id in entry_ids]
+            )
+
+    def mark_failed(self, entry_id: int, error: str) -> None:
+        """记录一次写出失败，未超过最大尝试次数时按指数退避重新排队"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT attempts FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+            if row is None:
+                return
+            attempts = row[0] + 1
+            if attempts >= self.max_attempts:
+                status, next_attempt_at = FAILED, 0
+            else:
+                status = PENDING
+                next_attempt_at = now + min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay)
+            self._conn.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?, "
+                "updated_at = ? WHERE id = ?",
+                (status, attempts, error, next_attempt_at, now, entry_id)
+            )
+
+    def retry_failed(self, storage: Optional[str] = None) -> int:
+        """把 failed 条目重新排队，返回条目数"""
+        query = "UPDATE outbox SET status = ?, attempts = 0, next_attempt_at = 0 WHERE status = ?"
+        params: List[Any] = [PENDING, FAILED]
+        if storage:
+            query += " AND storage = ?"
+            params.append(storage)
+        with self._lock, self._conn:
+            return self._conn.execute(query, params).rowcount
+
+    def make_due(self, storage: Optional[str] = None) -> None:
+        """让所有等待重试的 pending 条目立即到期（用于手动刷写）"""
+        query = "UPDATE outbox SET next_attempt_at = 0 WHERE status = ?"
+        params: List[Any] = [PENDING]
+        if storage:
+            query += " AND storage = ?"
+            params.append(storage)
+        with self._lock, self._conn:
+            self._conn.execute(query, params)
+
+    def pending_count(self, storage: str) -> int:
+        """未写出（pending 或 inflight）的条目数"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE storage = ? AND status IN (?, ?)",
+                (storage, PENDING, INFLIGHT)
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        各存储服务的条目统计
+
+        Returns:
+            {storage: {"pending", "inflight", "done", "failed"}}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT storage, status, COUNT(*) FROM outbox GROUP BY storage, status"
+            ).fetchall()
+
+        result: Dict[str, Dict[str, int]] = {}
+        for storage, status, count in rows:
+            result.setdefault(storage, {PENDING: 0, INFLIGHT: 0, DONE: 0, FAILED: 0})[status] = count
+        return result
+
+    def recent_errors(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """最近的失败记录"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT storage, paper_id, status, attempts, last_error FROM outbox "
+                "WHERE last_error IS NOT NULL ORDER BY updated_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {"storage": r[0], "paper_id": r[1], "status": r[2], "attempts": r[3], "error": r[4]}
+            for r in rows
+        ]
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+class OutboxFlusher:
+    """
+    发件箱刷写器
+
+    为每个存储服务启动一个后台线程，循环领取批次并调用 batch_insert 写出，
+    批次的幂等键通过 `idempotency_key` 参数传给存储服务（支持的后端用作写令牌）。
+
+    Attributes:
+        outbox: 存储发件箱
+        storages: 存储服务字典
+        batch_size: 每批领取的条目数
+        poll_interval: 没有到期条目时的轮询间隔（秒）
+        ledger: 同步账本（可选，写出成功的论文记入账本）
+    """
+
+    def __init__(
+        self,
+        outbox: StorageOutbox,
+        storages: Dict[str, StorageInterface],
+        batch_size: int = 50,
+        poll_interval: float = 1.0,
+        ledger: Optional["SyncLedger"] = None
+    ):
+        self.outbox = outbox
+        self.storages = storages
+        self.ledger = ledger
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+        self._stop = threading.Event()
+        self._draining = threading.Event()
+        self._threads: Dict[str, threading.Thread] = {}
+
+    def start(self) -> None:
+        """启动各存储服务的后台刷写线程"""
+        self._stop.clear()
+        self._draining.clear()
+        for name in self.storages:
+            if name in self._threads and self._threads[name].is_alive():
+                continue
+            thread = threading.Thread(target=self._run, args=(name,), name=f"outbox-{name}", daemon=True)
+            self._threads[name] = thread
+            thread.start()
+        logger.info(f"发件箱刷写线程已启动: {list(self.storages)}")
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        停止刷写线程
+
+        Args:
+            drain: 是否先写完当前已到期的条目（等待重试的条目留到下次运行）
+            timeout: 每个线程的最长等待秒数
+        """
+        if drain:
+            self._draining.set()
+        else:
+            self._stop.set()
+        for thread in self._threads.values():
+            thread.join(timeout)
+        self._threads.clear()
+
+    def _run(self, name: str) -> None:
+        """单个存储服务的刷写循环"""
+        while not self._stop.is_set():
+            try:
+                flushed = self.flush_batch(name)
+            except Exception as e:
+                logger.error(f"发件箱刷写失败 ({name}): {e}")
+                flushed = 0
+
+            if flushed:
+                continue
+            if self._draining.is_set():
+                break
+            self._stop.wait(self.poll_interval)
+
+    def flush_batch(self, name: str) -> int:
+        """
+        领取并写出一批条目
+
+        Returns:
+            本批领取的条目数，0 表示没有到期条目
+        """
+        entries = self.outbox.claim(name, self.batch_size)
+        if not entries:
+            return 0
+
+        storage = self.storages[name]
+        papers = [entry["paper"] for entry in entries]
+        batch_key = hashlib.sha1(
+            "\n".join(sorted(entry["key"] for entry in entries)).encode("utf-8")
+        ).hexdigest()
+
+        # 入队前处理器已查过账本和远程存在性，这里不再重复检查
+        try:
+            result = storage.batch_insert(papers, skip_existing=False, idempotency_key=batch_key)
+        except Exception as e:
+            logger.error(f"批量写入 {name} 失败 ({len(entries)} 篇): {e}")
+            for entry in entries:
+                self.outbox.mark_failed(entry["id"], str(e))
+            return len(entries)
+
+        succeeded = set(result.get("success", []))
+        skipped = set(result.get("skipped", [])) - succeeded
+        verified = self._verify_skipped(storage, name, skipped)
+        written = succeeded | verified
+        errors = {item["id"]: item.get("error", "") for item in result.get("failed", [])}
+        errors.update((paper_id, "写入被跳过，但未确认远程已存在") for paper_id in skipped - verified)
+
+        self.outbox.mark_done(entry["id"] for entry in entries if entry["paper"].id in written)
+        if self.ledger is not None:
+            # 跳过的论文已存在于远程，但不是本次载荷写入的，不记录载荷哈希和字段哈希
+            remote_ids = next((result[key] for key in REMOTE_ID_KEYS if key in result), {})
+            field_hashes = result.get("field_hashes", {})
+            self.ledger.record_many(name, (
+                (
+                    paper.id,
+                    remote_ids.get(paper.id),
+                    self.ledger.payload_hash(paper) if paper.id in succeeded else None,
+                    field_hashes.get(paper.id) if paper.id in succeeded else None
+                )
+                for paper in papers if paper.id in written
+            ))
+        for entry in entries:
+            paper_id = entry["paper"].id
+            if paper_id not in written:
+                self.outbox.mark_failed(entry["id"], errors.get(paper_id) or "批量写入结果中缺少该论文")
+
+        logger.info(f"发件箱写出 {name}: 成功 {len(written)}/{len(entries)}")
+        return len(entries)
+
+    @staticmethod
+    def _verify_skipped(storage: StorageInterface, name: str, paper_ids: Set[str]) -> Set[str]:
+        """
+        确认被跳过的论文确实已存在于远程
+
+        刷写时不做存在性检查，批次仍被跳过（如写令牌已被使用）只说明服务端
+        见过该请求；确认前这些条目保持待写出，留到下次重试。
+        """
+        if not paper_ids:
+            return set()
+        try:
+            found = storage.exists_many(sorted(paper_ids))
+        except Exception as e:
+            logger.warning(f"确认 {name} 已存在的论文失败: {e}")
+            return set()
+        return {paper_id for paper_id in paper_ids if found.get(paper_id)}
+
+    def flush(self, storage_names: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        在当前线程同步写出所有到期条目
+
+        Returns:
+            {storage: 处理的条目数}
+        """
+        processed: Dict[str, int] = {}
+        for name in storage_names or list(self.storages):
+            if name not in self.storages:
+                logger.warning(f"存储服务未启用，跳过: {name}")
+                continue
+            total = 0
+            while True:
+                count = self.flush_batch(name)
+                if not count:
+                    break
+                total += count
+            processed[name] = total
+        return processed
@@ -8,14 +8,24 @@ import logging
 import os
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial, reduce
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional, Tuple
-from urllib.request import urlretrieve
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
 
 from interfaces.data_source import DataSourceInterface
 from interfaces.llm import LLMInterface
 from interfaces.storage import StorageInterface
 from models.paper import Paper
+from services.pdf import PdfDownloadError, download_papers, get_pdf_store
+
+from .fanout import StorageFanout
+from .identity import group_duplicates
+
+if TYPE_CHECKING:
+    from .identity import IdentityIndex
+    from .ledger import SyncLedger
+    from .outbox import StorageOutbox
+    from .search_index import PaperSearchIndex
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +54,10 @@ class PaperProcessor:
         storages: 存储服务字典
         llm: LLM 服务
         config: 处理配置
+        outbox: 存储发件箱（可选，设置后论文追加到发件箱，由刷写线程异步写出）
+        ledger: 同步账本（可选，设置后先查账本再检查远程，并记录每次写入）
+        search_index: 全文索引（可选，处理完成的论文增量加入索引）
+        identity: 论文别名索引（可选，获取的论文先登记别名，账本按规范键查询）
     """
 
     def __init__(
@@ -51,7 +65,11 @@ class PaperProcessor:
         data_sources: Dict[str, DataSourceInterface],
         storages: Dict[str, StorageInterface],
         llm_service: Optional[LLMInterface] = None,
-        config: Optional[Dict[str, Any]] = None
+        config: Optional[Dict[str, Any]] = None,
+        outbox: Optional["StorageOutbox"] = None,
+        ledger: Optional["SyncLedger"] = None,
+        search_index: Optional["PaperSearchIndex"] = None,
+        identity: Optional["IdentityIndex"] = None
     ):
         """
         初始化论文处理器
@@ -61,11 +79,19 @@ class PaperProcessor:
             storages: 存储服务字典，键为服务名称
             llm_service: LLM 服务（可选，如果不提供则不进行 LLM 增强）
             config: 处理配置字典
+            outbox: 存储发件箱（可选）
+            ledger: 同步账本（可选）
+            search_index: 全文索引（可选）
+            identity: 论文别名索引（可选）
         """
         self.data_sources = data_sources
         self.storages = storages
         self.llm = llm_service
         self.config = config or {}
+        self.outbox = outbox
+        self.ledger = ledger
+        self.search_index = search_index
+        self.identity = identity
 
         # 默认配置
         self._retries = self.config.get("retries", 3)
@@ -73,6 +99,9 @@ class PaperProcessor:
         self._batch_size = self.config.get("batch_size", 10)
         self._parallel_downloads = self.config.get("parallel_downloads", 3)
 
+        # 存储写入并行分发器，storage_concurrency 为 {存储服务名称: 并发上限}
+        self._fanout = StorageFanout(self.config.get("storage_concurrency"))
+
         # 处理统计
         self._stats: Dict[str, int] = {
             "fetched": 0,
@@ -80,8 +109,12 @@ class PaperProcessor:
             "saved": 0,
             "failed": 0,
             "skipped": 0,
+            "queued": 0,
         }
 
+        # 本次处理下载的 PDF {论文ID: 文件路径}，供上传附件使用
+        self._downloaded_pdfs: Dict[str, str] = {}
+
         # 进度回调
         self._progress_callback: Optional[Callable[[str, int, int], None]] = None
 
@@ -141,15 +174,8 @@ class PaperProcessor:
             - errors: 错误列表
         """
         # 重置统计
-        self._stats = {
-            "fetched": 0,
-            "enhanced": 0,
-            "saved": 0,
-            "failed": 0,
-            "skipped": 0,
-        }
+        self.reset_stats()
         errors: List[Dict[str, Any]] = []
-        processed_papers: List[Paper] = []
 
         # 验证数据源
         if source not in self.data_sources:
@@ -195,9 +221,143 @@ class PaperProcessor:
                 "errors": [],
             }
 
+        return self.process_planned(
+            papers,
+            download_pdf=download_pdf,
+            pdf_dir=pdf_dir,
+            storage_names=storage_names,
+            skip_existing=skip_existing,
+            enhance_with_llm=enhance_with_llm
+        )
+
+    def plan_papers(
+        self,
+        sources: List[str],
+        keywords: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        limit: int = 20,
+        candidates: Optional[List[Paper]] = None,
+        merge_duplicates: bool = True,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """
+        规划阶段：收集全部数据源的候选论文并去重
+
+        先从各数据源获取候选论文（设置了 LLM 服务时数据源不做增强，由处理阶段统一增强），
+        再按规范键、DOI 和规范化标题分组，同一论文的多个候选用 Paper.merge 合并（先出现的优先）。
+        之后只对去重后的论文执行增强和写入（见 process_planned）。
+
+        Args:
+            sources: 数据源名称列表
+            keywords: 搜索关键词列表
+            categories: 论文分类列表
+            limit: 每个数据源获取论文数量限制
+            candidates: 已获取的候选论文（如 HuggingFace 每日论文），排在各数据源的结果之后
+            merge_duplicates: 是否合并重复论文（否则只去掉ID相同的论文）
+            **kwargs: 其他参数传递给数据源
+
+        Returns:
+            规划结果字典，包含：
+            - papers: 去重后的论文列表
+            - fetched: 候选论文数
+            - duplicates: 合并掉的重复候选数
+            - errors: 获取失败的数据源列表
+        """
+        fetched: List[Paper] = []
+        errors: List[Dict[str, Any]] = []
+        if self.llm is not None:
+            kwargs.setdefault("enrich", False)
+
+        for source in sources:
+            if source not in self.data_sources:
+                errors.append({"source": source, "stage": "fetch", "error": f"数据源 '{source}' 不可用"})
+                continue
+            try:
+                papers = self._fetch_papers(
+                    self.data_sources[source],
+                    keywords=keywords,
+                    categories=categories,
+                    limit=limit,
+                    **kwargs
+                )
+                logger.info(f"从 {source} 获取到 {len(papers)} 篇候选论文")
+                fetched.extend(papers)
+            except Exception as e:
+                logger.error(f"从 {source} 获取论文失败: {e}")
+                errors.append({"source": source, "stage": "fetch", "error": str(e)})
+        fetched.extend(candidates or [])
+
+        if merge_duplicates:
+            groups = group_duplicates(fetched, self.identity)
+        else:
+            by_id: Dict[str, List[Paper]] = {}
+            for paper in fetched:
+                by_id.setdefault(paper.id, []).append(paper)
+            groups = list(by_id.values())
+        papers = [reduce(lambda merged, paper: merged.merge(paper), group) for group in groups]
+
+        duplicates = len(fetched) - len(papers)
+        if duplicates:
+            logger.info(f"候选论文 {len(fetched)} 篇，合并重复后 {len(papers)} 篇")
+        return {
+            "papers": papers,
+            "fetched": len(fetched),
+            "duplicates": duplicates,
+            "errors": errors,
+        }
+
+    def process_planned(
+        self,
+        papers: List[Paper],
+        download_pdf: bool = False,
+        pdf_dir: Optional[str] = None,
+        storage_names: Optional[List[str]] = None,
+        skip_existing: bool = True,
+        enhance_with_llm: bool = True
+    ) -> Dict[str, Any]:
+        """
+        处理阶段：增强已获取（已去重）的论文并保存到存储服务
+
+        已有 LLM 结果（如数据源已生成 TLDR）的论文不再重复增强。
+
+        Args:
+            papers: 论文列表
+            download_pdf: 是否下载 PDF
+            pdf_dir: PDF 存储目录
+            storage_names: 目标存储服务名称列表（默认保存到所有启用的存储）
+            skip_existing: 是否跳过已存在的论文
+            enhance_with_llm: 是否使用 LLM 增强论文信息
+
+        Returns:
+            处理结果字典（同 process_papers）
+        """
+        self.reset_stats()
+        self._stats["fetched"] = len(papers)
+        errors: List[Dict[str, Any]] = []
+        processed_papers: List[Paper] = []
+        pdf_papers: List[Paper] = []
+
+        # 登记论文的别名（DOI、Semantic Scholar ID 等），以其他ID写入过的同一论文也能在账本中查到
+        if self.identity is not None:
+            for paper in papers:
+                self.identity.resolve(paper)
+
         # 确定目标存储服务
         target_storages = self._get_target_storages(storage_names)
 
+        # 先查账本：已写入部分存储服务的论文只重试其余服务，不再请求远程检查
+        paper_ids = [paper.id for paper in papers]
+        written = (
+            self.ledger.written_storages(paper_ids, target_storages)
+            if skip_existing and self.ledger is not None else {}
+        )
+
+        # 批量检查账本中没有记录的论文是否已存在
+        existing_ids = (
+            self._find_existing([pid for pid in paper_ids if pid not in written], target_storages)
+            if skip_existing else set()
+        )
+
         # 第二步：处理每篇论文
         total = len(papers)
         for i, paper in enumerate(papers):
@@ -205,25 +365,45 @@ class PaperProcessor:
 
             try:
                 # 检查是否已存在
-                if skip_existing and self._paper_exists(paper.id, target_storages):
+                if paper.id in existing_ids:
                     logger.debug(f"论文已存在，跳过: {paper.id}")
                     self._stats["skipped"] += 1
                     continue
 
+                paper_storages = target_storages
+                if paper.id in written:
+                    paper_storages = {
+                        name: storage for name, storage in target_storages.items()
+                        if name not in written[paper.id]
+                    }
+                    if not paper_storages:
+                        logger.debug(f"账本记录论文已写入全部存储服务，跳过: {paper.id}")
+                        self._stats["skipped"] += 1
+                        continue
+
                 # 使用 LLM 增强
-                if enhance_with_llm and self.llm:
+                if enhance_with_llm and self.llm and not paper.tldr:
                     paper = self._enhance_paper(paper)
                     self._stats["enhanced"] += 1
 
-                # 下载 PDF
+                # 收集待下载 PDF 的论文，循环结束后统一并行下载
                 if download_pdf and paper.pdf_url:
-                    self._download_pdf(paper, pdf_dir)
+                    pdf_papers.append(paper)
+
+                # 追加到发件箱，由刷写线程异步写出
+                if self.outbox is not None:
+                    self.outbox.enqueue_many(paper_storages.keys(), paper)
+                    self._stats["queued"] += 1
+                    processed_papers.append(paper)
+                    self._index_paper(paper)
+                    continue
 
                 # 保存到存储服务
-                save_result = self._save_to_storages(paper, target_storages)
+                save_result = self._save_to_storages(paper, paper_storages)
                 if save_result.get("success_count", 0) > 0:
                     self._stats["saved"] += 1
                     processed_papers.append(paper)
+                    self._index_paper(paper)
                 else:
                     self._stats["failed"] += 1
                     errors.append({
@@ -249,10 +429,23 @@ class PaperProcessor:
                     "error": str(e)
                 })
 
+        # 批量下载 PDF（使用发件箱时与刷写线程的写出并行进行）
+        if pdf_papers:
+            downloads = download_papers(
+                pdf_papers,
+                pdf_dir or self.config.get("pdf_dir", "papers/pdf"),
+                max_workers=self._parallel_downloads,
+                name_by="id"
+            )
+            self._downloaded_pdfs.update(downloads["paths"])
+
         # 返回结果
         return {
             "success": True,
-            "message": f"处理完成，成功保存 {self._stats['saved']} 篇论文",
+            "message": (
+                f"处理完成，成功保存 {self._stats['saved']} 篇论文"
+                + (f"，{self._stats['queued']} 篇已加入发件箱" if self._stats['queued'] else "")
+            ),
             "papers": processed_papers,
             "stats": self._stats,
             "errors": errors,
@@ -345,6 +538,8 @@ class PaperProcessor:
         """
         保存论文到存储服务
 
+        对各存储服务的写入并行执行，每个存储服务的并发数受 `storage_concurrency` 配置限制。
+
         Args:
             paper: 论文对象
             storages: 目标存储服务字典
@@ -358,34 +553,42 @@ class PaperProcessor:
         fail_count = 0
         errors: List[str] = []
 
-        for name, storage in target_storages.items():
-            try:
-                result = storage.insert(paper)
-                if result.get("success"):
-                    success_count += 1
-                    results.append({
-                        "storage": name,
-                        "success": True,
-                        "result": result
-                    })
-                    logger.debug(f"论文 {paper.id} 已保存到 {name}")
-                else:
-                    fail_count += 1
-                    errors.append(f"{name}: {result.get('message', '未知错误')}")
-                    results.append({
-                        "storage": name,
-                        "success": False,
-                        "error": result.get("message")
-                    })
-            except Exception as e:
+        # 并行写入各存储服务，结果按存储服务顺序汇总
+        outcomes = self._fanout.run({
+            name: partial(storage.insert, paper) for name, storage in target_storages.items()
+        })
+
+        for name, (result, error) in outcomes.items():
+            if error is not None:
                 fail_count += 1
-                errors.append(f"{name}: {str(e)}")
+                errors.append(f"{name}: {str(error)}")
                 results.append({
                     "storage": name,
                     "success": False,
-                    "error": str(e)
+                    "error": str(error)
+                })
+                logger.error(f"保存到 {name} 失败: {error}")
+            elif result.get("success"):
+                success_count += 1
+                if self.ledger is not None:
+                    self.ledger.record(
+                        name, paper.id, result.get("id"),
+                        self.ledger.payload_hash(paper), result.get("field_hashes")
+                    )
+                results.append({
+                    "storage": name,
+                    "success": True,
+                    "result": result
+                })
+                logger.debug(f"论文 {paper.id} 已保存到 {name}")
+            else:
+                fail_count += 1
+                errors.append(f"{name}: {result.get('message', '未知错误')}")
+                results.append({
+                    "storage": name,
+                    "success": False,
+                    "error": result.get("message")
                 })
-                logger.error(f"保存到 {name} 失败: {e}")
 
         return {
             "success_count": success_count,
@@ -394,29 +597,67 @@ class PaperProcessor:
             "errors": errors,
         }
 
-    def _paper_exists(
+    def _index_paper(self, paper: Paper) -> None:
+        """把处理完成的论文加入全文索引，索引失败不影响处理流程"""
+        if self.search_index is None:
+            return
+        try:
+            self.search_index.add(paper)
+        except Exception as e:
+            logger.warning(f"更新全文索引失败 {paper.id}: {e}")
+
+    def _find_existing(
         self,
-        paper_id: str,
+        paper_ids: List[str],
         storages: Dict[str, StorageInterface]
-    ) -> bool:
+    ) -> Set[str]:
         """
-        检查论文是否已存在于任一存储服务
+        批量检查论文是否已存在于任一存储服务
+
+        每个存储服务调用一次 exists_many，避免逐篇请求远程服务；
+        远程已存在的论文记入账本，下次运行不再检查。
 
         Args:
-            paper_id: 论文 ID
+            paper_ids: 论文 ID 列表
             storages: 存储服务字典
 
         Returns:
-            是否存在
+            已存在的论文 ID 集合
         """
+        existing: Set[str] = set()
         for name, storage in storages.items():
+            pending = [paper_id for paper_id in paper_ids if paper_id not in existing]
+            if not pending:
+                break
             try:
-                if storage.exists(paper_id):
-                    return True
+                found = storage.exists_many(pending)
+                found_ids = [paper_id for paper_id, exists in found.items() if exists]
+                existing.update(found_ids)
+                if self.ledger is not None:
+                    self.ledger.record_many(name, ((paper_id, None, None, None) for paper_id in found_ids))
             except Exception as e:
                 logger.warning(f"检查论文存在性失败 ({name}): {e}")
 
-        return False
+        return existing
+
+    def attach_pdfs(self, storage_names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        把本次下载的 PDF 作为附件上传到支持附件的存储服务（如 Zotero）
+
+        使用发件箱时应在发件箱写出之后调用，以确保论文条目已创建。
+
+        Returns:
+            {存储服务名称: 批量上传结果}
+        """
+        files = list(self._downloaded_pdfs.items())
+        results: Dict[str, Dict[str, Any]] = {}
+        if not files:
+            return results
+
+        for name, storage in self._get_target_storages(storage_names).items():
+            if hasattr(storage, "upload_attachments"):
+                results[name] = storage.upload_attachments(files)
+        return results
 
     def _get_target_storages(
         self,
@@ -466,26 +707,12 @@ class PaperProcessor:
         safe_id = paper.id.replace("/", "_").replace(":", "_")
         file_path = save_path / f"{safe_id}.pdf"
 
-        # 如果文件已存在，跳过下载
-        if file_path.exists():
-            logger.debug(f"PDF 已存在: {file_path}")
-            return str(file_path)
-
-        # 下载文件
-        for attempt in range(self._retries):
-            try:
-                logger.debug(f"下载 PDF: {paper.pdf_url}")
-                urlretrieve(paper.pdf_url, str(file_path))
-                logger.info(f"PDF 已下载: {file_path}")
-                return str(file_path)
-            except Exception as e:
-                logger.warning(
-                    f"下载 PDF 失败 (尝试 {attempt + 1}/{self._retries}): {e}"
-                )
-                if attempt < self._retries - 1:
-                    time.sleep(self._retry_delay * (attempt + 1))
-
-        return None
+        # 文件是 PDF 存储中对象的硬链接，已存储的论文不会重复下载
+        try:
+            return get_pdf_store().materialize(paper.id, paper.pdf_url, str(file_path))
+        except PdfDownloadError as e:
+            logger.warning(str(e))
+            return None
 
     def batch_download_pdfs(
         self,
@@ -541,61 +768,38 @@ class PaperProcessor:
         """
         从多个数据源搜索并处理论文
 
+        先收集全部数据源的候选论文并合并重复（见 plan_papers），再对去重后的论文统一增强和保存，
+        同时出现在多个数据源中的论文只增强和写入一次。
+
         Args:
             keywords: 搜索关键词列表
             sources: 数据源名称列表（默认使用所有可用数据源）
             merge_duplicates: 是否合并重复论文
-            **kwargs: 其他参数
+            **kwargs: 其他参数（download_pdf、pdf_dir、storage_names、skip_existing、
+                enhance_with_llm 用于处理阶段，其余传递给数据源）
 
         Returns:
-            处理结果字典
+            处理结果字典（同 process_papers），另含：
+            - total: 处理的论文数
+            - plan: {"fetched": 候选论文数, "duplicates": 合并掉的重复候选数}
         """
-        target_sources = sources or list(self.data_sources.keys())
-        all_papers: Dict[str, Paper] = {}
-        all_errors: List[Dict[str, Any]] = []
-
-        # 从各数据源获取论文
-        for source in target_sources:
-            try:
-                result = self.process_papers(
-                    source=source,
-                    keywords=keywords,
-                    enhance_with_llm=False,  # 先获取，后统一增强
-                    **kwargs
-                )
-                for paper in result.get("papers", []):
-                    if merge_duplicates:
-                        # 使用 DOI 或标题作为去重键
-                        key = paper.doi or paper.title.lower()
-                        if key in all_papers:
-                            all_papers[key] = all_papers[key].merge(paper)
-                        else:
-                            all_papers[key] = paper
-                    else:
-                        all_papers[paper.id] = paper
-
-                all_errors.extend(result.get("errors", []))
-
-            except Exception as e:
-                logger.error(f"从 {source} 获取论文失败: {e}")
-                all_errors.append({
-                    "source": source,
-                    "error": str(e)
-                })
-
-        # 统一使用 LLM 增强
-        papers = list(all_papers.values())
-        if self.llm and kwargs.get("enhance_with_llm", True):
-            for i, paper in enumerate(papers):
-                self._report_progress("enhancing", i + 1, len(papers))
-                papers[i] = self._enhance_paper(paper)
-
-        return {
-            "success": True,
-            "papers": papers,
-            "total": len(papers),
-            "errors": all_errors,
+        process_kwargs = {
+            name: kwargs.pop(name)
+            for name in ("download_pdf", "pdf_dir", "storage_names", "skip_existing", "enhance_with_llm")
+            if name in kwargs
         }
+        plan = self.plan_papers(
+            sources or list(self.data_sources.keys()),
+            keywords=keywords,
+            merge_duplicates=merge_duplicates,
+            **kwargs
+        )
+
+        result = self.process_planned(plan["papers"], **process_kwargs)
+        result["errors"] = plan["errors"] + result["errors"]
+        result["total"] = len(result["papers"])
+        result["plan"] = {"fetched": plan["fetched"], "duplicates": plan["duplicates"]}
+        return result
 
     def get_stats(self) -> Dict[str, int]:
         """
@@ -614,4 +818,5 @@ class PaperProcessor:
             "saved": 0,
             "failed": 0,
             "skipped": 0,
+            "queued": 0,
         }
@@ -0,0 +1,193 @@
+"""
+进程内响应缓存模块
+
+为查询接口提供 LRU + TTL 的响应缓存，并对同一键的并发请求做单飞（single-flight）合并：
+同一时刻只有一个线程执行计算，其余线程等待并共享结果。
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+class _InFlight:
+    """正在进行的计算"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ResponseCache:
+    """
+    LRU + TTL 响应缓存，带单飞请求合并
+
+    计算失败时不缓存，异常传给所有等待同一键的线程。
+
+    Attributes:
+        max_entries: 最多缓存的条目数，超过时淘汰最久未使用的条目
+        ttl: 默认过期秒数
+        max_bytes: 缓存总大小上限（按 sizeof 计算），为 None 时只按条目数限制
+        sizeof: 计算条目大小的函数
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl: float = 600.0,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "evictions": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "compute_seconds": 0.0,
+        }
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        ttl: Union[float, Callable[[Any], float], None] = None
+    ) -> Any:
+        """
+        获取缓存结果，未命中时计算并缓存
+
+        Args:
+            key: 缓存键
+            compute: 无参计算函数
+            ttl: 本条目的过期秒数（默认为实例的 ttl），也可以是由计算结果得出秒数的函数，不大于 0 时不缓存
+
+        Returns:
+            计算结果
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _InFlight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            waited = time.monotonic() - now
+            with self._lock:
+                self._stats["wait_seconds"] += waited
+                self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._stats["errors"] += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - now
+            if flight.error is None:
+                if callable(ttl):
+                    ttl = ttl(flight.result)
+                ttl = self.ttl if ttl is None else ttl
+                size = self._measure(flight.result) if ttl > 0 else 0
+            with self._lock:
+                self._in_flight.pop(key, None)
+                self._stats["compute_seconds"] += elapsed
+                if flight.error is None:
+                    self._store(key, flight.result, ttl, size)
+            flight.done.set()
+
+        return flight.result
+
+    def _measure(self, value: Any) -> int:
+        """计算条目大小（在锁外调用，避免序列化大对象时阻塞其他线程）"""
+        return self.sizeof(value) if self.sizeof is not None and self.max_bytes is not None else 0
+
+    def _store(self, key: Hashable, value: Any, ttl: float, size: int) -> None:
+        """写入条目并按 LRU 淘汰（调用方持有锁）"""
+        if ttl <= 0:
+            return
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entries) > 1
+        ):
+            self._bytes -= self._entries.popitem(last=False)[1][2]
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: Hashable) -> None:
+        """删除条目（调用方持有锁）"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """直接写入缓存（如流式接口在结束时写入完整结果）"""
+        ttl = self.ttl if ttl is None else ttl
+        size = self._measure(value) if ttl > 0 else 0
+        with self._lock:
+            self._store(key, value, ttl, size)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """删除指定键的缓存，不指定时清空全部"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        命中、未命中、合并等待等统计
+
+        Returns:
+            {"hits", "misses", "coalesced", "errors", "evictions", "hit_rate",
+             "wait_seconds", "max_wait_seconds", "avg_wait_seconds", "compute_seconds",
+             "size", "bytes", "in_flight"}
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+            stats["bytes"] = self._bytes
+            stats["in_flight"] = len(self._in_flight)
+
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["avg_wait_seconds"] = (
+            round(stats["wait_seconds"] / stats["coalesced"], 4) if stats["coalesced"] else 0.0
+        )
+        return stats
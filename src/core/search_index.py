@@ -0,0 +1,285 @@
+"""
+论文全文索引模块
+
+基于 SQLite FTS5 为已收集的论文建立本地全文索引（标题、摘要、中文摘要、标签、作者），
+论文处理完成时增量更新，查询接口优先查本地索引，未命中时再请求 arXiv。
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from core.cache_store import ARXIV_META, ARXIV_RESULT, CacheStore
+from models.identifiers import is_arxiv_id, normalize_arxiv_id
+from models.paper import Paper
+
+if TYPE_CHECKING:
+    from core.identity import IdentityIndex
+
+logger = logging.getLogger(__name__)
+
+# 参与全文检索的列及其 bm25 权重（标题命中最重要）
+FTS_COLUMNS = ("title", "summary", "summary_cn", "tags", "authors")
+BM25_WEIGHTS = (10.0, 1.0, 2.0, 4.0, 2.0)
+
+# trigram 分词器按 3 个字符切分，更短的词无法用 MATCH 查询
+TRIGRAM_MIN_LENGTH = 3
+
+
+def _join(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(item) for item in value)
+    return value or ""
+
+
+def document_from(obj: Any, identity: Optional["IdentityIndex"] = None) -> Dict[str, str]:
+    """
+    从论文对象构建索引文档
+
+    支持 Paper 和旧版 FormattedArxivObj（按属性名读取）。提供别名索引时文档ID为论文的规范键。
+    """
+    if isinstance(obj, Paper):
+        published = obj.published_date.strftime("%Y-%m-%d") if obj.published_date else ""
+    else:
+        published = getattr(obj, "published_dt", "") or ""
+
+    return {
+        "paper_id": identity.resolve_id(obj.id) if identity is not None else normalize_arxiv_id(obj.id) or obj.id,
+        "title": getattr(obj, "title", "") or "",
+        "summary": getattr(obj, "summary", "") or "",
+        "summary_cn": getattr(obj, "summary_cn", "") or "",
+        "short_summary": getattr(obj, "short_summary", "") or "",
+        "tags": _join(getattr(obj, "tags", [])),
+        "authors": _join(getattr(obj, "authors", [])),
+        "category": getattr(obj, "category", "") or "",
+        "published": published,
+    }
+
+
+class PaperSearchIndex:
+    """
+    SQLite FTS5 论文全文索引
+
+    文档表 `papers` 保存展示字段，FTS5 表 `papers_fts` 以相同 rowid 保存检索列。
+    优先使用 trigram 分词器（支持中文子串匹配），SQLite 不支持时退回 unicode61。
+
+    Attributes:
+        db_path: SQLite 数据库路径
+        tokenizer: 实际使用的分词器
+        identity: 论文别名索引（可选，设置时文档按论文的规范键存储）
+    """
+
+    def __init__(self, db_path: str, identity: Optional["IdentityIndex"] = None):
+        self.db_path = Path(db_path)
+        self.identity = identity
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self.tokenizer = self._init_schema()
+
+    def _init_schema(self) -> str:
+        """创建文档表和 FTS5 表，返回使用的分词器"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS papers (
+                    rowid INTEGER PRIMARY KEY,
+                    paper_id TEXT NOT NULL UNIQUE,
+                    title TEXT,
+                    summary TEXT,
+                    summary_cn TEXT,
+                    short_summary TEXT,
+                    tags TEXT,
+                    authors TEXT,
+                    category TEXT,
+                    published TEXT,
+                    indexed_at REAL NOT NULL
+                )
+                """
+            )
+            row = self._conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'papers_fts'"
+            ).fetchone()
+            if row is not None:
+                return "trigram" if "trigram" in row[0] else "unicode61"
+
+            for tokenizer in ("trigram", "unicode61"):
+                try:
+                    self._conn.execute(
+                        f"CREATE VIRTUAL TABLE papers_fts USING fts5({', '.join(FTS_COLUMNS)}, "
+                        f"tokenize='{tokenizer}')"
+                    )
+                    return tokenizer
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"SQLite 不支持 {tokenizer} 分词器: {e}")
+            raise RuntimeError("SQLite 未启用 FTS5，无法建立全文索引")
+
+    def add(self, obj: Any) -> None:
+        """索引或更新一篇论文"""
+        self.add_many([obj])
+
+    def add_many(self, objs: Iterable[Any]) -> int:
+        """
+        批量索引论文，已索引的论文按新内容覆盖
+
+        Returns:
+            索引的论文数
+        """
+        documents = [document_from(obj, self.identity) for obj in objs]
+        now = time.time()
+        with self._lock, self._conn:
+            for doc in documents:
+                row = self._conn.execute(
+                    "SELECT rowid FROM papers WHERE paper_id = ?", (doc["paper_id"],)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("DELETE FROM papers_fts WHERE rowid = ?", (row[0],))
+                    self._conn.execute("DELETE FROM papers WHERE rowid = ?", (row[0],))
+
+                rowid = self._conn.execute(
+                    "INSERT INTO papers (paper_id, title, summary, summary_cn, short_summary, tags, "
+                    "authors, category, published, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        doc["paper_id"], doc["title"], doc["summary"], doc["summary_cn"],
+                        doc["short_summary"], doc["tags"], doc["authors"], doc["category"],
+                        doc["published"], now
+                    )
+                ).lastrowid
+                self._conn.execute(
+                    f"INSERT INTO papers_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                    (rowid, *(doc[column] for column in FTS_COLUMNS))
+                )
+        return len(documents)
+
+    def get(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """按论文ID获取索引文档"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM papers WHERE paper_id = ?",
+                (self.identity.resolve_id(paper_id) if self.identity is not None else normalize_arxiv_id(paper_id) or paper_id,)
+            ).fetchone()
+        return self._to_document(row) if row else None
+
+    def count(self) -> int:
+        """已索引的论文数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    @staticmethod
+    def _to_document(row: sqlite3.Row) -> Dict[str, Any]:
+        doc = {key: row[key] for key in row.keys() if key not in ("rowid", "indexed_at")}
+        if "score" in doc:
+            doc["score"] = -doc["score"]
+        return doc
+
+    def _split_terms(self, query: str) -> tuple:
+        """把查询拆分为可用 MATCH 查询的词和需要 LIKE 匹配的短词"""
+        terms = [term for term in re.split(r"\s+", query.strip()) if term]
+        if self.tokenizer != "trigram":
+            return terms, []
+        long_terms = [term for term in terms if len(term) >= TRIGRAM_MIN_LENGTH]
+        short_terms = [term for term in terms if len(term) < TRIGRAM_MIN_LENGTH]
+        return long_terms, short_terms
+
+    def search(self, query: str, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
+        """
+        全文检索
+
+        ArXiv ID 直接按ID查找；其余查询的各个词以 AND 组合，按 bm25 排序（标题权重最高）。
+        trigram 分词器下少于 3 个字符的词改用 LIKE 匹配标题、中文摘要和标签。
+
+        Args:
+            query: 查询字符串
+            page: 页码（从 1 开始）
+            page_size: 每页数量
+
+        Returns:
+            {"total", "page", "page_size", "papers": [文档]}
+        """
+        page = max(page, 1)
+        result: Dict[str, Any] = {"total": 0, "page": page, "page_size": page_size, "papers": []}
+
+        if is_arxiv_id(query.strip()):
+            doc = self.get(query.strip())
+            if doc:
+                result.update(total=1, papers=[doc] if page == 1 else [])
+            return result
+
+        long_terms, short_terms = self._split_terms(query)
+        if not long_terms and not short_terms:
+            return result
+
+        where: List[str] = []
+        params: List[Any] = []
+        if long_terms:
+            where.append("papers_fts MATCH ?")
+            params.append(" AND ".join('"' + term.replace('"', '""') + '"' for term in long_terms))
+        for term in short_terms:
+            where.append("(p.title LIKE ? OR p.summary_cn LIKE ? OR p.tags LIKE ?)")
+            params.extend([f"%{term}%"] * 3)
+
+        source = "papers_fts JOIN papers p ON p.rowid = papers_fts.rowid"
+        order = (
+            f"bm25(papers_fts, {', '.join(str(w) for w in BM25_WEIGHTS)})"
+            if long_terms else "-p.rowid"
+        )
+        condition = " AND ".join(where)
+
+        with self._lock:
+            result["total"] = self._conn.execute(
+                f"SELECT COUNT(*) FROM {source} WHERE {condition}", params
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT p.*, {order} AS score FROM {source} WHERE {condition} "
+                f"ORDER BY score LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size]
+            ).fetchall()
+
+        result["papers"] = [self._to_document(row) for row in rows]
+        return result
+
+    def index_cache_store(self, store: CacheStore) -> int:
+        """
+        从本地缓存存储重建索引
+
+        arxiv_meta 命名空间提供中文摘要和标签，同键的 arxiv_result 提供作者、英文摘要和发表日期。
+
+        Returns:
+            索引的论文数
+        """
+        papers: List[Paper] = []
+        for key, cache_obj in store.items(ARXIV_META):
+            if not isinstance(cache_obj, dict) or not cache_obj.get("id"):
+                continue
+
+            paper = Paper(
+                id=cache_obj["id"],
+                title=cache_obj.get("title", ""),
+                summary_cn=cache_obj.get("summary_cn", ""),
+                short_summary=cache_obj.get("short_summary", ""),
+                category=cache_obj.get("tag_info", {}).get("主要领域", ""),
+                tags=cache_obj.get("tag_info", {}).get("标签", []),
+            )
+            result = store.get(ARXIV_RESULT, key)
+            if isinstance(result, dict):
+                paper.authors = result.get("authors", [])
+                paper.summary = (result.get("summary") or "").replace("\n", " ")
+                if result.get("published"):
+                    paper.published_date = datetime.fromisoformat(result["published"])
+            papers.append(paper)
+
+        count = self.add_many(papers)
+        logger.info(f"已从缓存存储索引 {count} 篇论文")
+        return count
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,159 @@
+"""
+两级缓存模块
+
+在本地缓存存储（磁盘）前加一层进程内 LRU（按条目数和字节数限制），长期运行的进程中
+刚读过的条目不再查询数据库和解码。查询结果为空（如 arXiv 没有返回论文）时写入带短 TTL 的
+否定条目，过期前不再重复请求；同一键的并发加载只执行一次。
+"""
+
+import copy
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .cache_store import CacheStore, _json_default
+from .response_cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+# 否定条目所在的命名空间前缀
+NEGATIVE_PREFIX = "negative:"
+
+
+class _Negative:
+    """内存层中的否定条目"""
+
+    def __init__(self, until: float):
+        self.until = until
+
+
+def _sizeof(value: Any) -> int:
+    """条目大小按未压缩的 JSON 长度估算（内存中保存的是对象本身，不必按压缩后的大小计算）"""
+    if isinstance(value, _Negative):
+        return 0
+    return len(json.dumps(value, separators=(",", ":"), default=_json_default))
+
+
+class TieredCache:
+    """
+    内存 LRU + 本地缓存存储的两级缓存
+
+    Attributes:
+        store: 磁盘层缓存存储
+        memory: 内存层（带单飞加载的 LRU）
+        memory_ttl: 内存层条目的有效秒数
+        negative_ttl: 否定条目的有效秒数
+    """
+
+    def __init__(
+        self,
+        store: CacheStore,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        memory_ttl: float = 86400.0,
+        negative_ttl: float = 3600.0
+    ):
+        self.store = store
+        self.memory_ttl = memory_ttl
+        self.negative_ttl = negative_ttl
+        self.memory = ResponseCache(max_entries=max_entries, ttl=memory_ttl, max_bytes=max_bytes, sizeof=_sizeof)
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, namespace: str, name: str) -> None:
+        with self._lock:
+            counts = self._stats.setdefault(namespace, {
+                "lookups": 0, "memory_misses": 0, "disk_hits": 0, "negative_hits": 0, "loads": 0, "misses": 0
+            })
+            counts[name] += 1
+
+    def _ttl(self, value: Any) -> float:
+        """内存层条目的有效秒数：否定条目到期为止，磁盘层也没有的结果不缓存"""
+        if isinstance(value, _Negative):
+            return value.until - time.time()
+        return 0 if value is None else self.memory_ttl
+
+    def get_or_load(
+        self,
+        namespace: str,
+        key: str,
+        loader: Optional[Callable[[], Optional[Any]]] = None
+    ) -> Optional[Any]:
+        """
+        依次查询内存层、磁盘层，均未命中时调用 loader 加载并写入两层
+
+        loader 返回 None 表示结果为空，写入否定条目；抛出异常时不缓存（如网络错误）。
+
+        Returns:
+            缓存值的副本（调用方修改不影响内存层），未命中（未提供 loader）或结果为空时返回 None
+        """
+        self._count(namespace, "lookups")
+        value = self.memory.get_or_compute(
+            (namespace, key), lambda: self._load(namespace, key, loader), ttl=self._ttl
+        )
+        return None if isinstance(value, _Negative) else copy.deepcopy(value)
+
+    def _load(self, namespace: str, key: str, loader: Optional[Callable[[], Optional[Any]]]) -> Any:
+        """内存层未命中时查询磁盘层，仍未命中时调用 loader"""
+        self._count(namespace, "memory_misses")
+        value = self.store.get(namespace, key)
+        if value is not None:
+            self._count(namespace, "disk_hits")
+            return value
+
+        negative_until = self.store.get(NEGATIVE_PREFIX + namespace, key)
+        if negative_until is not None and negative_until > time.time():
+            self._count(namespace, "negative_hits")
+            return _Negative(negative_until)
+        if loader is None:
+            self._count(namespace, "misses")
+            return None
+
+        self._count(namespace, "loads")
+        value = loader()
+        if value is None:
+            until = time.time() + self.negative_ttl
+            self.store.set(NEGATIVE_PREFIX + namespace, key, until)
+            return _Negative(until)
+        self.store.set(namespace, key, value)
+        if negative_until is not None:
+            self.store.delete(NEGATIVE_PREFIX + namespace, key)
+        return value
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        """写入两层缓存"""
+        self.store.set(namespace, key, value)
+        self.memory.set((namespace, key), value, ttl=self.memory_ttl)
+
+    def invalidate(self, namespace: str, key: str) -> None:
+        """删除两层缓存中的条目及其否定条目"""
+        self.memory.invalidate((namespace, key))
+        self.store.delete(namespace, key)
+        self.store.delete(NEGATIVE_PREFIX + namespace, key)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        各命名空间的命中统计
+
+        Returns:
+            {"namespaces": {命名空间: {"lookups", "memory_hits", "disk_hits", "negative_hits", "loads",
+             "misses", "hit_ratio"}}, "memory": 内存层统计（见 ResponseCache.stats）}
+        """
+        with self._lock:
+            counts = {namespace: dict(c) for namespace, c in self._stats.items()}
+        namespaces = {}
+        for namespace, c in counts.items():
+            lookups = c["lookups"]
+            namespaces[namespace] = {
+                "lookups": lookups,
+                "memory_hits": lookups - c["memory_misses"],
+                "disk_hits": c["disk_hits"],
+                "negative_hits": c["negative_hits"],
+                "loads": c["loads"],
+                "misses": c["misses"],
+                "hit_ratio": round((lookups - c["loads"] - c["misses"]) / lookups, 4) if lookups else 0.0,
+            }
+        return {"namespaces": namespaces, "memory": self.memory.stats()}
@@ -15,6 +15,7 @@ import traceback
 import warnings
 from pathlib import Path
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from tqdm import tqdm
 import time
 
@@ -39,7 +40,10 @@ from service.notion_service import NotionService
 from service.wolai_service import WolaiService 
 from service.zotero_service import ZoteroService
 from service.feishu_service import FeishuService
-from service.pdf_downloader import download_paper_pdfs
+from services.pdf import download_papers
+from core.cache_store import checkpoint_namespace
+from core.identity import group_duplicates
+from core.fanout import StorageFanout
 
 # 设置日志
 
@@ -120,10 +124,72 @@ def load_config(config_path=None):
         
     return default_config
 
+# 各存储服务的写入并行执行，每个服务同时最多2个写入
+storage_fanout = StorageFanout()
+
+def insert_to_services(paper_id, inserts):
+    """并行插入到各服务，inserts 为 {服务名称: 无参调用}"""
+    for name in inserts:
+        logger.info(f"插入到{name}: {paper_id}")
+    for name, (_, error) in storage_fanout.run(inserts).items():
+        if error is None:
+            logger.info(f"成功插入到{name}: {paper_id}")
+        else:
+            logger.error(f"插入到{name}时出错: {error}")
+            logger.debug("".join(traceback.format_exception(type(error), error, error.__traceback__)))
+
+def plan_candidates(arxiv_visitor, hf_visitor, keywords, categories, limit=20, search_arxiv=True):
+    """
+    规划阶段：先收集ArXiv搜索和HuggingFace每日论文两路候选，按规范ID、DOI和标题去重
+
+    搜索结果此时尚未生成TLDR和标签。两路都有的论文只交给HuggingFace流程（保留媒体信息，
+    写入后同时记入两路检查点）；任一检查点中已有的论文不再处理。
+
+    Returns:
+        (ArXiv流程的搜索结果列表, HuggingFace流程的论文列表, {HF论文ID: 重复的ArXiv搜索结果})
+    """
+    candidates = []
+    if search_arxiv:
+        try:
+            for result in arxiv_visitor.search_by_keywords(keywords, categories=categories, limit=limit, format_result=False):
+                candidates.append(SimpleNamespace(
+                    id=result.get_short_id(), title=result.title, doi=result.doi, flow="arxiv", item=result
+                ))
+        except Exception as e:
+            logger.error(f"搜索ArXiv论文时出错: {e}")
+            logger.debug(traceback.format_exc())
+    if hf_visitor is not None:
+        for hf_obj in hf_visitor.paper_list:
+            candidates.append(SimpleNamespace(id=hf_obj['id'], title=hf_obj['title'], flow="hf", item=hf_obj))
+
+    cache_store = arxiv_visitor.cache_store
+    identity = arxiv_visitor.identity
+    done = set(cache_store.keys(checkpoint_namespace('arxiv_ckpt')))
+    if hf_visitor is not None and hf_visitor.datetime is not None:
+        done |= set(cache_store.keys(checkpoint_namespace(f"ckpt_{hf_visitor.datetime.strftime('%Y-%m-%d')}")))
+
+    search_results, hf_list, matched = [], [], {}
+    for group in group_duplicates(candidates, identity):
+        if identity.resolve_id(group[0].id) in done:
+            logger.info(f"已处理过文章: {group[0].id}, 跳过")
+            continue
+        hf_members = [c for c in group if c.flow == "hf"]
+        arxiv_members = [c for c in group if c.flow == "arxiv"]
+        if not hf_members:
+            search_results.append(arxiv_members[0].item)
+            continue
+        hf_list.append(hf_members[0].item)
+        if arxiv_members:
+            matched[hf_members[0].item['id']] = arxiv_members[0].item
+
+    logger.info(f"候选论文 {len(candidates)} 篇，待处理 ArXiv {len(search_results)} 篇, HuggingFace {len(hf_list)} 篇")
+    return search_results, hf_list, matched
+
 def process_arxiv_papers(arxiv_visitor, notion_service, wolai_service, zotero_service, feishu_service,
                         keywords, categories, date, limit=20, enable_services=None, 
-                        download_pdf=True, pdf_dir=None, category_map=None, default_category=None):
-    """处理ArXiv论文"""
+                        download_pdf=True, pdf_dir=None, category_map=None, default_category=None,
+                        search_results=None):
+    """处理ArXiv论文（search_results 为规划阶段去重后的未格式化搜索结果，未提供时自行搜索）"""
     if enable_services is None:
         enable_services = {"notion": True, "zotero": True, "wolai": True, "feishu": False}
         
@@ -135,13 +201,9 @@ def process_arxiv_papers(arxiv_visitor, notion_service, wolai_service, zotero_se
         
     logger.info(f"搜索关键词: {keywords}, 分类: {categories}, 限制: {limit}")
     
-    output_root = os.path.join(project_root, 'output')
-    arxiv_ckpt_filename = os.path.join(output_root, 'cache', 'arxiv_ckpt.txt')
-    
-    # 确保检查点文件存在
-    os.makedirs(os.path.dirname(arxiv_ckpt_filename), exist_ok=True)
-    if not os.path.exists(arxiv_ckpt_filename):
-        open(arxiv_ckpt_filename, 'w').close()
+    cache_store = arxiv_visitor.cache_store
+    identity = arxiv_visitor.identity
+    ckpt_namespace = checkpoint_namespace('arxiv_ckpt')
     
     # 确保PDF目录存在
     if download_pdf and pdf_dir:
@@ -149,101 +211,76 @@ def process_arxiv_papers(arxiv_visitor, notion_service, wolai_service, zotero_se
         logger.info(f"PDF将保存到: {pdf_dir}")
     
     # 加载已处理的论文ID
-    with open(arxiv_ckpt_filename, 'r') as f:
-        arxiv_ckpt = set(line.strip() for line in f if line.strip())
+    arxiv_ckpt = set(cache_store.keys(ckpt_namespace))
     
-    # 搜索论文
-    try:
-        search_results = arxiv_visitor.search_by_keywords(keywords, categories=categories, limit=limit)
-    except Exception as e:
-        logger.error(f"搜索ArXiv论文时出错: {e}")
-        logger.debug(traceback.format_exc())
-        return 0, 0, 0
+    # 搜索论文（先不生成TLDR和标签，检查点中已有的论文不再增强）
+    if search_results is None:
+        try:
+            search_results = arxiv_visitor.search_by_keywords(keywords, categories=categories, limit=limit, format_result=False)
+        except Exception as e:
+            logger.error(f"搜索ArXiv论文时出错: {e}")
+            logger.debug(traceback.format_exc())
+            return 0, 0, 0
     
     processed_count = 0
     error_count = 0
+    pdf_papers = []
     
-    with open(arxiv_ckpt_filename, 'a') as arxiv_ckpt_file:
-        for arxiv_obj in tqdm(search_results, desc="处理搜索结果"):
-            if arxiv_obj.id in arxiv_ckpt:
-                logger.info(f"已处理过文章: {arxiv_obj.id}, 跳过")
-                continue
-                
-            try:
-                logger.info(f"处理文章: {arxiv_obj.id}, 标题: {arxiv_obj.title}, 分类: {arxiv_obj.category}")
-                
-                # 下载PDF文件
-                if download_pdf and pdf_dir:
-                    try:
-                        logger.info(f"开始下载PDF: {arxiv_obj.id}")
-                        # 使用pdf_downloader中的下载函数
-                        pdf_paths = download_paper_pdfs([arxiv_obj.id], pdf_dir, arxiv_visitor)
-                        if pdf_paths:
-                            logger.info(f"PDF已下载到: {pdf_paths[0]}")
-                        else:
-                            logger.warning(f"PDF下载失败: {arxiv_obj.id}")
-                    except Exception as e:
-                        logger.error(f"下载PDF时出错: {e}")
-                        logger.debug(traceback.format_exc())
-                
-                # 插入到Zotero
-                if enable_services.get("zotero", True) and zotero_service is not None:
-                    try:
-                        logger.info(f"插入到Zotero: {arxiv_obj.id}")
-                        # 查找匹配的分类，如果没有则使用默认分类
-                        params = category_map.get(arxiv_obj.category, default_category)
-                        zotero_service.insert(arxiv_obj, params)
-                        logger.info(f"成功插入到Zotero: {arxiv_obj.id}")
-                    except Exception as e:
-                        logger.error(f"插入到Zotero时出错: {e}")
-                        logger.debug(traceback.format_exc())
-                
-                # 插入到Notion
-                if enable_services.get("notion", True) and notion_service is not None:
-                    try:
-                        logger.info(f"插入到Notion: {arxiv_obj.id}")
-                        notion_service.insert(arxiv_obj)
-                        logger.info(f"成功插入到Notion: {arxiv_obj.id}")
-                    except Exception as e:
-                        logger.error(f"插入到Notion时出错: {e}")
-                        logger.debug(traceback.format_exc())
-                
-                # 插入到我来
-                if enable_services.get("wolai", True) and wolai_service is not None:
-                    try:
-                        logger.info(f"插入到我来: {arxiv_obj.id}")
-                        wolai_service.insert(arxiv_obj)
-                        logger.info(f"成功插入到我来: {arxiv_obj.id}")
-                    except Exception as e:
-                        logger.error(f"插入到我来时出错: {e}")
-                        logger.debug(traceback.format_exc())
-                
-                # 插入到飞书
-                if enable_services.get("feishu", False) and feishu_service is not None:
-                    try:
-                        logger.info(f"插入到飞书: {arxiv_obj.id}")
-                        feishu_service.insert(arxiv_obj)
-                        logger.info(f"成功插入到飞书: {arxiv_obj.id}")
-                    except Exception as e:
-                        logger.error(f"插入到飞书时出错: {e}")
-                        logger.debug(traceback.format_exc())
-                
-                # 标记为已处理
-                arxiv_ckpt.add(arxiv_obj.id)
-                arxiv_ckpt_file.write(arxiv_obj.id + '\n')
-                arxiv_ckpt_file.flush()  # 确保实时写入
-                processed_count += 1
-                
-            except Exception as e:
-                logger.error(f"处理文章时出错: {arxiv_obj.id}, 错误: {e}")
-                logger.debug(traceback.format_exc())
-                error_count += 1
+    for result in tqdm(search_results, desc="处理搜索结果"):
+        ckpt_key = identity.resolve_id(result.get_short_id())
+        if ckpt_key in arxiv_ckpt:
+            logger.info(f"已处理过文章: {result.get_short_id()}, 跳过")
+            continue
+            
+        try:
+            arxiv_obj = arxiv_visitor.enrich(result)
+            logger.info(f"处理文章: {arxiv_obj.id}, 标题: {arxiv_obj.title}, 分类: {arxiv_obj.category}")
+            
+            # 并行插入到Zotero、Notion、我来、飞书
+            inserts = {}
+            if enable_services.get("zotero", True) and zotero_service is not None:
+                # 查找匹配的分类，如果没有则使用默认分类
+                params = category_map.get(arxiv_obj.category, default_category)
+                inserts["Zotero"] = lambda: zotero_service.insert(arxiv_obj, params)
+            if enable_services.get("notion", True) and notion_service is not None:
+                inserts["Notion"] = lambda: notion_service.insert(arxiv_obj)
+            if enable_services.get("wolai", True) and wolai_service is not None:
+                inserts["我来"] = lambda: wolai_service.insert(arxiv_obj)
+            if enable_services.get("feishu", False) and feishu_service is not None:
+                inserts["飞书"] = lambda: feishu_service.insert(arxiv_obj)
+            insert_to_services(arxiv_obj.id, inserts)
+            pdf_papers.append(arxiv_obj)
+            
+            # 标记为已处理
+            arxiv_ckpt.add(ckpt_key)
+            cache_store.set(ckpt_namespace, ckpt_key, True, evictable=False)
+            processed_count += 1
+            
+        except Exception as e:
+            logger.error(f"处理文章时出错: {result.get_short_id()}, 错误: {e}")
+            logger.debug(traceback.format_exc())
+            error_count += 1
+    
+    # 存储写入完成后并行下载全部PDF
+    if download_pdf and pdf_dir and pdf_papers:
+        download_papers(pdf_papers, pdf_dir)
     
     return processed_count, error_count, len(search_results)
 
 def process_hf_papers(hf_visitor, arxiv_visitor, notion_service, wolai_service, zotero_service, feishu_service,
-                      enable_services=None, download_pdf=True, pdf_dir=None, category_map=None, default_category=None):
-    """处理HuggingFace论文"""
+                      enable_services=None, download_pdf=True, pdf_dir=None, category_map=None, default_category=None,
+                      paper_list=None, matched=None):
+    """
+    处理HuggingFace论文
+
+    paper_list 为规划阶段去重后的论文列表（未提供时使用 hf_visitor.paper_list）；
+    matched 中的论文已有ArXiv搜索结果，不再重新获取，写入后同时记入ArXiv流程的检查点。
+    """
+    if paper_list is None:
+        paper_list = hf_visitor.paper_list
+    if matched is None:
+        matched = {}
+
     if enable_services is None:
         enable_services = {"notion": True, "zotero": True, "wolai": True, "feishu": False}
         
@@ -253,14 +290,10 @@ def process_hf_papers(hf_visitor, arxiv_visitor, notion_service, wolai_service,
     if default_category is None:
         default_category = ["DFGZNVCM"]
         
-    output_root = os.path.join(project_root, 'output')
     create_dt = hf_visitor.datetime.strftime('%Y-%m-%d')
-    ckpt_filename = os.path.join(output_root, "cache", f"ckpt_{create_dt}.txt")
-    
-    # 确保检查点文件存在
-    os.makedirs(os.path.dirname(ckpt_filename), exist_ok=True)
-    if not os.path.exists(ckpt_filename):
-        open(ckpt_filename, 'w').close()
+    cache_store = arxiv_visitor.cache_store
+    identity = arxiv_visitor.identity
+    ckpt_namespace = checkpoint_namespace(f"ckpt_{create_dt}")
         
     # 确保PDF目录存在
     if download_pdf and pdf_dir:
@@ -268,103 +301,70 @@ def process_hf_papers(hf_visitor, arxiv_visitor, notion_service, wolai_service,
         logger.info(f"PDF将保存到: {pdf_dir}")
     
     # 加载已处理的论文ID
-    with open(ckpt_filename, 'r') as f:
-        ckpt = set(line.strip() for line in f if line.strip())
+    ckpt = set(cache_store.keys(ckpt_namespace))
     
     processed_count = 0
     error_count = 0
+    pdf_papers = []
     
-    with open(ckpt_filename, 'a') as ckpt_file:
-        for hf_obj in tqdm(hf_visitor.paper_list, desc=create_dt):
-            if hf_obj['id'] in ckpt:
-                logger.info(f"已处理过文章: {hf_obj['id']}, 跳过")
-                continue
-                
+    for hf_obj in tqdm(paper_list, desc=create_dt):
+        ckpt_key = identity.resolve_id(hf_obj['id'])
+        if ckpt_key in ckpt:
+            logger.info(f"已处理过文章: {hf_obj['id']}, 跳过")
+            continue
+            
+        try:
+            logger.info(f"处理文章: {hf_obj['id']}, 标题: {hf_obj['title']}")
+            
+            # 获取ArXiv详细信息（规划阶段已有搜索结果的只需增强）
             try:
-                logger.info(f"处理文章: {hf_obj['id']}, 标题: {hf_obj['title']}")
-                
-                # 获取ArXiv详细信息
-                try:
+                if hf_obj['id'] in matched:
+                    arxiv_obj = arxiv_visitor.enrich(matched[hf_obj['id']])
+                else:
                     arxiv_obj = arxiv_visitor.find_by_id(hf_obj['id'])
-                except Exception as e:
-                    logger.error(f"获取ArXiv信息时出错: {hf_obj['id']}, 错误: {e}")
-                    logger.debug(traceback.format_exc())
-                    continue
-                
-                logger.info(f"分类: {arxiv_obj.category}")
-                
-                # 下载PDF文件
-                if download_pdf and pdf_dir:
-                    try:
-                        logger.info(f"开始下载PDF: {hf_obj['id']}")
-                        # 使用pdf_downloader中的下载函数
-                        pdf_paths = download_paper_pdfs([hf_obj['id']], pdf_dir, arxiv_visitor)
-                        if pdf_paths:
-                            logger.info(f"PDF已下载到: {pdf_paths[0]}")
-                        else:
-                            logger.warning(f"PDF下载失败: {hf_obj['id']}")
-                    except Exception as e:
-                        logger.error(f"下载PDF时出错: {e}")
-                        logger.debug(traceback.format_exc())
-                
-                # 插入到Zotero
-                if enable_services.get("zotero", True) and zotero_service is not None:
-                    try:
-                        logger.info(f"插入到Zotero: {hf_obj['id']}")
-                        params = category_map.get(arxiv_obj.category, default_category)
-                        zotero_service.insert(arxiv_obj, params)
-                        logger.info(f"成功插入到Zotero: {hf_obj['id']}")
-                    except Exception as e:
-                        logger.error(f"插入到Zotero时出错: {e}")
-                        logger.debug(traceback.format_exc())
-                
-                # 插入到Notion
-                if enable_services.get("notion", True) and notion_service is not None:
-                    try:
-                        logger.info(f"插入到Notion: {hf_obj['id']}")
-                        notion_service.insert(arxiv_obj, hf_obj)
-                        logger.info(f"成功插入到Notion: {hf_obj['id']}")
-                    except Exception as e:
-                        logger.error(f"插入到Notion时出错: {e}")
-                        logger.debug(traceback.format_exc())
-                
-                # 插入到我来
-                if enable_services.get("wolai", True) and wolai_service is not None:
-                    try:
-                        logger.info(f"插入到我来: {hf_obj['id']}")
-                        # 如果HF对象具有媒体信息，应该一并传递
-                        if 'media_type' in hf_obj and 'media_url' in hf_obj and hf_obj['media_type'] and hf_obj['media_url']:
-                            # 确保arxiv_obj已包含媒体信息
-                            arxiv_obj.media_type = hf_obj['media_type']
-                            arxiv_obj.media_url = hf_obj['media_url']
-                        wolai_service.insert(arxiv_obj)
-                        logger.info(f"成功插入到我来: {hf_obj['id']}")
-                    except Exception as e:
-                        logger.error(f"插入到我来时出错: {e}")
-                        logger.debug(traceback.format_exc())
-                
-                # 插入到飞书
-                if enable_services.get("feishu", False) and feishu_service is not None:
-                    try:
-                        logger.info(f"插入到飞书: {hf_obj['id']}")
-                        feishu_service.insert(arxiv_obj)
-                        logger.info(f"成功插入到飞书: {hf_obj['id']}")
-                    except Exception as e:
-                        logger.error(f"插入到飞书时出错: {e}")
-                        logger.debug(traceback.format_exc())
-                
-                # 标记为已处理
-                ckpt.add(hf_obj['id'])
-                ckpt_file.write(hf_obj['id'] + '\n')
-                ckpt_file.flush()  # 确保实时写入
-                processed_count += 1
-                
             except Exception as e:
-                logger.error(f"处理文章时出错: {hf_obj['id']}, 错误: {e}")
+                logger.error(f"获取ArXiv信息时出错: {hf_obj['id']}, 错误: {e}")
                 logger.debug(traceback.format_exc())
-                error_count += 1
+                continue
+            
+            logger.info(f"分类: {arxiv_obj.category}")
+            
+            # 如果HF对象具有媒体信息，应该一并传递给我来
+            if enable_services.get("wolai", True) and hf_obj.get('media_type') and hf_obj.get('media_url'):
+                arxiv_obj.media_type = hf_obj['media_type']
+                arxiv_obj.media_url = hf_obj['media_url']
+            
+            # 并行插入到Zotero、Notion、我来、飞书
+            inserts = {}
+            if enable_services.get("zotero", True) and zotero_service is not None:
+                params = category_map.get(arxiv_obj.category, default_category)
+                inserts["Zotero"] = lambda: zotero_service.insert(arxiv_obj, params)
+            if enable_services.get("notion", True) and notion_service is not None:
+                inserts["Notion"] = lambda: notion_service.insert(arxiv_obj, hf_obj)
+            if enable_services.get("wolai", True) and wolai_service is not None:
+                inserts["我来"] = lambda: wolai_service.insert(arxiv_obj)
+            if enable_services.get("feishu", False) and feishu_service is not None:
+                inserts["飞书"] = lambda: feishu_service.insert(arxiv_obj)
+            insert_to_services(hf_obj['id'], inserts)
+            pdf_papers.append(arxiv_obj)
+            
+            # 标记为已处理
+            ckpt.add(ckpt_key)
+            cache_store.set(ckpt_namespace, ckpt_key, True, evictable=False)
+            if hf_obj['id'] in matched:
+                cache_store.set(checkpoint_namespace('arxiv_ckpt'), ckpt_key, True, evictable=False)
+            processed_count += 1
+            
+        except Exception as e:
+            logger.error(f"处理文章时出错: {hf_obj['id']}, 错误: {e}")
+            logger.debug(traceback.format_exc())
+            error_count += 1
+    
+    # 存储写入完成后并行下载全部PDF
+    if download_pdf and pdf_dir and pdf_papers:
+        download_papers(pdf_papers, pdf_dir)
     
-    return processed_count, error_count, len(hf_visitor.paper_list)
+    return processed_count, error_count, len(paper_list)
 
 def main(args=None):
     """主函数"""
@@ -456,13 +456,27 @@ def main(args=None):
             if zotero_service:
                 zotero_service.create_time = current_datetime
             
+            # 规划阶段：先收集两路候选并去重，同一论文只增强和写入一次
+            hf_visitor = None
+            if not (hasattr(args, 'no_hf') and args.no_hf):
+                try:
+                    hf_visitor = HFDailyPaperVisitor(output_root, dt=current_date)
+                except Exception as e:
+                    logger.error(f"获取日期 {current_date} 的HuggingFace论文时出错: {e}")
+                    logger.debug(traceback.format_exc())
+            search_arxiv = not (hasattr(args, 'no_arxiv') and args.no_arxiv)
+            search_results, hf_list, matched = plan_candidates(
+                arxiv_visitor, hf_visitor, keywords, categories, limit, search_arxiv=search_arxiv
+            )
+            
             # 处理ArXiv论文
-            if not (hasattr(args, 'no_arxiv') and args.no_arxiv):
+            if search_arxiv:
                 try:
                     processed, errors, total = process_arxiv_papers(
                         arxiv_visitor, notion_service, wolai_service, zotero_service, feishu_service,
                         keywords, categories, current_date, limit, enable_services,
-                        download_pdf, pdf_dir, category_map, default_category  # 传递分类映射参数
+                        download_pdf, pdf_dir, category_map, default_category,  # 传递分类映射参数
+                        search_results=search_results
                     )
                     total_arxiv_processed += processed
                     logger.info(f"日期 {current_date} ArXiv论文: 处理 {processed}/{total}, 错误 {errors}")
@@ -471,12 +485,12 @@ def main(args=None):
                     logger.debug(traceback.format_exc())
             
             # 处理HuggingFace论文
-            if not (hasattr(args, 'no_hf') and args.no_hf):
+            if hf_visitor is not None:
                 try:
-                    hf_visitor = HFDailyPaperVisitor(output_root, dt=current_date)
                     processed, errors, total = process_hf_papers(
                         hf_visitor, arxiv_visitor, notion_service, wolai_service, zotero_service, feishu_service,
-                        enable_services, download_pdf, pdf_dir, category_map, default_category  # 传递分类映射参数# 传递分类映射参数
+                        enable_services, download_pdf, pdf_dir, category_map, default_category,  # 传递分类映射参数
+                        paper_list=hf_list, matched=matched
                     )
                     total_hf_processed += processed
                     logger.info(f"日期 {current_date} HuggingFace论文: 处理 {processed}/{total}, 错误 {errors}")
@@ -501,13 +515,27 @@ def main(args=None):
         arxiv_processed = 0
         hf_processed = 0
         
+        # 规划阶段：先收集两路候选并去重，同一论文只增强和写入一次
+        hf_visitor = None
+        if not (hasattr(args, 'no_hf') and args.no_hf):
+            try:
+                hf_visitor = HFDailyPaperVisitor(output_root, dt=date)
+            except Exception as e:
+                logger.error(f"获取HuggingFace论文时发生错误: {e}")
+                logger.debug(traceback.format_exc())
+        search_arxiv = not (hasattr(args, 'no_arxiv') and args.no_arxiv)
+        search_results, hf_list, matched = plan_candidates(
+            arxiv_visitor, hf_visitor, keywords, categories, limit, search_arxiv=search_arxiv
+        )
+        
         # 处理ArXiv论文
-        if not (hasattr(args, 'no_arxiv') and args.no_arxiv):
+        if search_arxiv:
             try:
                 processed, errors, total = process_arxiv_papers(
                     arxiv_visitor, notion_service, wolai_service, zotero_service, feishu_service,
                     keywords, categories, date, limit, enable_services,
-                    download_pdf, pdf_dir, category_map, default_category
+                    download_pdf, pdf_dir, category_map, default_category,
+                    search_results=search_results
                 )
                 arxiv_processed = processed
                 logger.info(f"ArXiv论文: 处理 {processed}/{total}, 错误 {errors}")
@@ -516,12 +544,12 @@ def main(args=None):
                 logger.debug(traceback.format_exc())
         
         # 处理HuggingFace论文
-        if not (hasattr(args, 'no_hf') and args.no_hf):
+        if hf_visitor is not None:
             try:
-                hf_visitor = HFDailyPaperVisitor(output_root, dt=date)
                 processed, errors, total = process_hf_papers(
                     hf_visitor, arxiv_visitor, notion_service, wolai_service, zotero_service, feishu_service,
-                    enable_services, download_pdf, pdf_dir, category_map, default_category
+                    enable_services, download_pdf, pdf_dir, category_map, default_category,
+                    paper_list=hf_list, matched=matched
                 )
                 hf_processed = processed
                 logger.info(f"HuggingFace论文: 处理 {processed}/{total}, 错误 {errors}")
@@ -72,6 +72,21 @@ class StorageInterface(ABC):
         """
         pass
 
+    def exists_many(self, paper_ids: List[str]) -> Dict[str, bool]:
+        """
+        批量检查论文是否存在
+
+        默认逐个调用 exists，支持批量查询的存储服务应覆盖此方法，
+        用一次（或少量）请求完成整批检查。
+
+        Args:
+            paper_ids: 论文 ID 列表
+
+        Returns:
+            {paper_id: 是否存在}
+        """
+        return {paper_id: self.exists(paper_id) for paper_id in paper_ids}
+
     @abstractmethod
     def update(self, paper_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -10,17 +10,35 @@ import logging
 import traceback
 from pathlib import Path
 from datetime import datetime, timedelta
+from typing import Any, Dict
 
 # 配置路径
 PROJECT_ROOT = Path(__file__).parent.parent.resolve()
 sys.path.insert(0, str(PROJECT_ROOT / "src"))
 
+# 存储发件箱数据库
+OUTBOX_PATH = PROJECT_ROOT / "output" / "cache" / "outbox.db"
+# 同步账本数据库
+LEDGER_PATH = PROJECT_ROOT / "output" / "cache" / "ledger.db"
+# 论文全文索引数据库
+SEARCH_INDEX_PATH = PROJECT_ROOT / "output" / "cache" / "search_index.db"
+# 本地缓存存储数据库
+CACHE_PATH = PROJECT_ROOT / "output" / "cache" / "cache.db"
+
 from config.settings import Settings
 from container import ServiceContainer
+from core.cache_store import get_cache_store
+from core.identity import get_identity_index
+from core.ledger import SyncLedger
+from core.outbox import OutboxFlusher, StorageOutbox
 from core.processor import PaperProcessor
+from core.search_index import PaperSearchIndex
 from services.llm import LLMServiceFactory
+from services.pdf import get_pdf_store
 from services.data_sources import DataSourceFactory, ArxivDataSource, HuggingFaceDataSource
-from services.storage import StorageFactory, NotionStorage, ZoteroStorage
+from services.storage import (
+    StorageFactory, NotionStorage, ZoteroStorage, FeishuStorage, WolaiStorage, ArchiveStorage
+)
 
 # 设置日志
 def setup_logging(log_dir: Path = None) -> logging.Logger:
@@ -83,6 +101,10 @@ def parse_args():
     # 服务开关
     parser.add_argument('--no-notion', action='store_true', help='禁用Notion')
     parser.add_argument('--no-zotero', action='store_true', help='禁用Zotero')
+    parser.add_argument('--no-wolai', action='store_true', help='禁用Wolai')
+    parser.add_argument('--no-feishu', action='store_true', help='禁用飞书')
+    parser.add_argument('--outbox', action='store_true', help='通过发件箱异步写出到存储服务')
+    parser.add_argument('--no-outbox', action='store_true', help='不使用发件箱，直接同步写入存储服务')
 
     return parser.parse_args()
 
@@ -109,23 +131,107 @@ def create_container(settings: Settings) -> ServiceContainer:
         proxy=s.proxy
     ))
 
+    # 注册论文别名索引（保存在本地缓存存储中）
+    container.register('identity', lambda s: get_identity_index(get_cache_store(str(CACHE_PATH))))
+
+    # 注册同步账本
+    container.register('ledger', lambda s: SyncLedger(str(LEDGER_PATH), identity=container.get('identity')))
+
+    # 注册全文索引
+    container.register('search_index', lambda s: PaperSearchIndex(
+        str(SEARCH_INDEX_PATH), identity=container.get('identity')
+    ))
+
     # 注册存储服务
     if settings.services.notion:
         container.register('notion', lambda s: NotionStorage(
             db_id=s.notion.database_id if hasattr(s, 'notion') else None,
             secret=s.notion.api_key if hasattr(s, 'notion') else None,
-            create_time=datetime.now()
+            create_time=datetime.now(),
+            ledger=container.get('ledger')
         ))
 
     if settings.services.zotero:
         container.register('zotero', lambda s: ZoteroStorage(
             api_key=s.zotero.api_key if hasattr(s, 'zotero') else None,
             user_id=s.zotero.library_id if hasattr(s, 'zotero') else None,
-            create_time=datetime.now()
+            group_id=s.zotero.group_id if hasattr(s, 'zotero') else None,
+            library_type=s.zotero.library_type if hasattr(s, 'zotero') else "user",
+            create_time=datetime.now(),
+            category_map=s.category_map,
+            default_category=s.default_category,
+            mirror_path=str(PROJECT_ROOT / "output" / "cache" / "zotero_mirror.db"),
+            upload_concurrency=s.zotero.upload_concurrency,
+            upload_bandwidth=s.zotero.upload_bandwidth,
+            ledger=container.get('ledger')
+        ))
+
+    if settings.services.wolai:
+        container.register('wolai', lambda s: WolaiStorage(
+            token=s.wolai.token,
+            db_id=s.wolai.database_id,
+            create_time=datetime.now(),
+            ledger=container.get('ledger')
+        ))
+
+    if settings.services.feishu:
+        container.register('feishu', lambda s: FeishuStorage(
+            app_id=s.feishu.app_id,
+            app_secret=s.feishu.app_secret,
+            app_token=s.feishu.app_token,
+            table_id=s.feishu.table_id,
+            create_time=datetime.now(),
+            ledger=container.get('ledger')
+        ))
+
+    if settings.services.archive:
+        container.register('archive', lambda s: ArchiveStorage(
+            root_dir=str(PROJECT_ROOT / "output" / "archive"),
+            create_time=datetime.now(),
+            identity=container.get('identity')
         ))
 
     return container
 
+def get_storages(container: ServiceContainer, settings: Settings) -> Dict[str, Any]:
+    """获取已启用的存储服务"""
+    storages: Dict[str, Any] = {}
+    try:
+        if settings.services.notion:
+            storages['notion'] = container.get('notion')
+    except Exception as e:
+        logger.warning(f"Notion服务不可用: {e}")
+
+    try:
+        if settings.services.zotero:
+            storages['zotero'] = container.get('zotero')
+    except Exception as e:
+        logger.warning(f"Zotero服务不可用: {e}")
+
+    try:
+        if settings.services.wolai:
+            storages['wolai'] = container.get('wolai')
+    except Exception as e:
+        logger.warning(f"Wolai服务不可用: {e}")
+
+    try:
+        if settings.services.feishu:
+            storages['feishu'] = container.get('feishu')
+    except Exception as e:
+        logger.warning(f"飞书服务不可用: {e}")
+
+    try:
+        if settings.services.archive:
+            archive = container.get('archive')
+            if archive.is_available():
+                storages['archive'] = archive
+            else:
+                logger.warning("本地归档存储需要 pyarrow，已跳过")
+    except Exception as e:
+        logger.warning(f"本地归档服务不可用: {e}")
+
+    return storages
+
 def run_processor(
     container: ServiceContainer,
     settings: Settings,
@@ -146,18 +252,19 @@ def run_processor(
     if process_arxiv:
         data_sources['arxiv'] = container.get('arxiv')
 
-    storages = {}
-    try:
-        if settings.services.notion:
-            storages['notion'] = container.get('notion')
-    except Exception as e:
-        logger.warning(f"Notion服务不可用: {e}")
+    storages = get_storages(container, settings)
+    ledger = container.get('ledger')
 
-    try:
-        if settings.services.zotero:
-            storages['zotero'] = container.get('zotero')
-    except Exception as e:
-        logger.warning(f"Zotero服务不可用: {e}")
+    # 发件箱：论文先持久化，由各存储服务的刷写线程批量写出
+    outbox = None
+    flusher = None
+    if settings.use_outbox and storages:
+        outbox = StorageOutbox(str(OUTBOX_PATH))
+        flusher = OutboxFlusher(outbox, storages, ledger=ledger)
+        flusher.start()
+
+    # PDF 存储按论文的规范键索引
+    get_pdf_store(identity=container.get('identity'))
 
     # 创建处理器
     processor = PaperProcessor(
@@ -169,76 +276,118 @@ def run_processor(
             "default_category": settings.default_category,
             "download_pdf": settings.download_pdf,
             "pdf_dir": settings.pdf_dir
-        }
+        },
+        outbox=outbox,
+        ledger=ledger,
+        search_index=container.get('search_index'),
+        identity=container.get('identity')
     )
 
-    # 处理ArXiv论文
-    if process_arxiv and 'arxiv' in data_sources:
+    # 规划阶段：先收集ArXiv搜索结果和HuggingFace每日论文两路候选，按规范键、DOI 和标题去重，
+    # 两路都有的论文只增强和写入一次
+    hf_papers = []
+    if process_hf:
         try:
-            logger.info(f"开始处理ArXiv论文: 关键词={settings.keywords}, 分类={settings.categories}")
-            result = processor.process_papers(
-                source='arxiv',
-                keywords=settings.keywords,
-                categories=settings.categories,
-                limit=settings.search_limit,
-                download_pdf=settings.download_pdf
-            )
-            results["arxiv"] = result
-            logger.info(f"ArXiv处理完成: {result}")
+            logger.info(f"获取HuggingFace论文: 日期={date}")
+            hf_papers = container.get('huggingface').fetch_papers(date=date)
         except Exception as e:
-            logger.error(f"ArXiv处理失败: {e}")
+            logger.error(f"获取HuggingFace论文失败: {e}")
             logger.debug(traceback.format_exc())
 
-    # 处理HuggingFace论文
-    if process_hf:
-        try:
-            hf_source = container.get('huggingface')
-            logger.info(f"开始处理HuggingFace论文: 日期={date}")
-
-            # 获取论文列表
-            hf_papers = hf_source.fetch_papers(date=date)
-
-            # 使用ArXiv补充详细信息
-            arxiv_source = container.get('arxiv') if process_arxiv else ArxivDataSource(
-                output_dir=str(PROJECT_ROOT / "output"),
-                llm_service=llm_service
+    if process_arxiv:
+        logger.info(f"搜索ArXiv论文: 关键词={settings.keywords}, 分类={settings.categories}")
+    plan = processor.plan_papers(
+        list(data_sources.keys()),
+        keywords=settings.keywords,
+        categories=settings.categories,
+        limit=settings.search_limit,
+        candidates=hf_papers
+    )
+    logger.info(f"候选论文 {plan['fetched']} 篇，去重后 {len(plan['papers'])} 篇")
+
+    # 只出现在HuggingFace中的论文从ArXiv补充详细信息；账本中已写入全部存储服务的直接跳过
+    papers = [paper for paper in plan["papers"] if paper.source != "huggingface"]
+    hf_only = [paper for paper in plan["papers"] if paper.source == "huggingface"]
+    if hf_only:
+        arxiv_source = container.get('arxiv') if process_arxiv else ArxivDataSource(
+            output_dir=str(PROJECT_ROOT / "output"),
+            llm_service=llm_service
+        )
+        written = ledger.written_storages([hf_paper.id for hf_paper in hf_only], storages)
+        for hf_paper in hf_only:
+            if storages and set(storages) <= written.get(hf_paper.id, set()):
+                logger.debug(f"账本记录论文已写入全部存储服务，跳过: {hf_paper.id}")
+                continue
+            paper = arxiv_source.get_by_id(
+                hf_paper.id,
+                hf_obj={
+                    'media_type': hf_paper.media_type,
+                    'media_url': hf_paper.media_url
+                }
             )
+            if paper:
+                papers.append(paper)
+            else:
+                logger.warning(f"无法获取论文详情: {hf_paper.id}")
+                results["hf"]["errors"] += 1
 
-            processed = 0
-            for hf_paper in hf_papers:
-                try:
-                    # 从ArXiv获取详细信息
-                    paper = arxiv_source.get_by_id(
-                        hf_paper.id,
-                        hf_obj={
-                            'media_type': hf_paper.media_type,
-                            'media_url': hf_paper.media_url
-                        }
-                    )
-
-                    if paper:
-                        # 保存到存储服务
-                        for storage_name, storage in storages.items():
-                            try:
-                                storage.insert(paper)
-                                processed += 1
-                            except Exception as e:
-                                logger.error(f"保存到{storage_name}失败: {e}")
-
-                except Exception as e:
-                    logger.error(f"处理HuggingFace论文失败 {hf_paper.id}: {e}")
-
-            results["hf"]["processed"] = processed
-            logger.info(f"HuggingFace处理完成: 处理 {processed}/{len(hf_papers)} 篇")
+    # 处理阶段：只对去重后的论文增强和写入
+    try:
+        result = processor.process_planned(papers, download_pdf=settings.download_pdf)
+        results["processing"] = result
+
+        # 按来源统计：HuggingFace每日论文中的计入 hf，其余计入 arxiv
+        identity = container.get('identity')
+        hf_keys = {identity.resolve_id(hf_paper.id) for hf_paper in hf_papers}
+        for paper in result["papers"]:
+            flow = "hf" if identity.resolve_id(paper.id) in hf_keys else "arxiv"
+            results[flow]["processed"] += 1
+        for error in result["errors"]:
+            flow = "hf" if identity.resolve_id(error.get("paper_id", "")) in hf_keys else "arxiv"
+            results[flow]["errors"] += 1
+        logger.info(
+            f"处理完成: ArXiv {results['arxiv']['processed']} 篇, "
+            f"HuggingFace {results['hf']['processed']} 篇, 统计: {result['stats']}"
+        )
+    except Exception as e:
+        logger.error(f"处理论文失败: {e}")
+        logger.debug(traceback.format_exc())
+
+    if flusher is not None:
+        logger.info("等待发件箱写出...")
+        flusher.stop(drain=True)
+        for name, counts in outbox.stats().items():
+            if counts["pending"] or counts["failed"]:
+                logger.warning(
+                    f"发件箱 {name}: {counts['pending']} 篇待重试, {counts['failed']} 篇失败，"
+                    f"可运行 `paper-flow outbox flush` 重试"
+                )
+        outbox.close()
 
+    # 论文条目写入后上传下载的 PDF 附件
+    if settings.download_pdf and settings.zotero.upload_pdf and 'zotero' in storages:
+        try:
+            results["attachments"] = processor.attach_pdfs(['zotero'])
         except Exception as e:
-            logger.error(f"HuggingFace处理失败: {e}")
+            logger.error(f"上传PDF附件失败: {e}")
             logger.debug(traceback.format_exc())
 
+    # 写出本地归档中缓冲的论文
+    if 'archive' in storages:
+        storages['archive'].flush()
+
     return results
 
+# 维护类子命令（如 `paper-flow zotero backfill-tags`）交由 click 命令行处理
+MAINTENANCE_COMMANDS = ('zotero', 'outbox', 'index', 'cache')
+
 def main():
     """主函数"""
+    if len(sys.argv) > 1 and sys.argv[1] in MAINTENANCE_COMMANDS:
+        from cli import cli
+        cli()
+        return
+
     args = parse_args()
 
     try:
@@ -266,6 +415,14 @@ def main():
             settings.services.notion = False
         if args.no_zotero:
             settings.services.zotero = False
+        if args.no_wolai:
+            settings.services.wolai = False
+        if args.no_feishu:
+            settings.services.feishu = False
+        if args.outbox:
+            settings.use_outbox = True
+        if args.no_outbox:
+            settings.use_outbox = False
 
         # 确定日期
         if args.date:
@@ -276,7 +433,10 @@ def main():
         logger.info(f"开始运行 - 日期: {target_date}")
         logger.info(f"关键词: {settings.keywords}")
         logger.info(f"分类: {settings.categories}")
-        logger.info(f"服务: Notion={settings.services.notion}, Zotero={settings.services.zotero}")
+        logger.info(
+            f"服务: Notion={settings.services.notion}, Zotero={settings.services.zotero}, "
+            f"Wolai={settings.services.wolai}, 飞书={settings.services.feishu}"
+        )
 
         # 创建服务容器
         container = create_container(settings)
@@ -0,0 +1,133 @@
+"""
+论文标识符规范化
+
+提供 ArXiv ID、DOI、标题、URL 等识别字段的规范化函数，供各存储服务的存在性检查共用；
+以及由这些字段得出论文别名和规范键的函数（见 core.identity）。
+"""
+
+import hashlib
+import re
+from typing import Any, List, Optional, Tuple
+
+_ARXIV_URL_PATTERN = re.compile(r"arxiv\.org/(?:abs|pdf)/([^/?#]+?)(?:\.pdf)?$", re.IGNORECASE)
+_ARXIV_VERSION_PATTERN = re.compile(r"v\d+$")
+_ARXIV_ID_PATTERN = re.compile(r"^(?:\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?$")
+_DOI_PREFIX_PATTERN = re.compile(r"^(?:https?://(?:dx\.)?doi\.org/|doi:)", re.IGNORECASE)
+_S2_ID_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+
+# 别名类型，按优先级排列：规范键取自优先级最高的别名
+ALIAS_KINDS = ("arxiv", "doi", "s2", "title")
+
+
+def normalize_arxiv_id(value: Optional[str]) -> str:
+    """规范化ArXiv ID：去掉 arXiv: 前缀和版本号"""
+    if not value:
+        return ""
+    value = value.strip()
+    if value.lower().startswith("arxiv:"):
+        value = value[len("arxiv:"):]
+    return _ARXIV_VERSION_PATTERN.sub("", value)
+
+
+def is_arxiv_id(value: Optional[str]) -> bool:
+    """判断是否为ArXiv ID（新旧两种编号格式，可带版本号）"""
+    return bool(value) and _ARXIV_ID_PATTERN.match(normalize_arxiv_id(value) or "") is not None
+
+
+def normalize_title(value: Optional[str]) -> str:
+    """规范化标题：小写并合并所有非字母数字字符"""
+    if not value:
+        return ""
+    return " ".join(re.sub(r"[\W_]+", " ", value.lower()).split())
+
+
+def normalize_url(value: Optional[str]) -> str:
+    """规范化URL：去掉协议、www 前缀和末尾斜杠"""
+    if not value:
+        return ""
+    value = value.strip().lower()
+    value = re.sub(r"^https?://", "", value)
+    if value.startswith("www."):
+        value = value[len("www."):]
+    return value.rstrip("/")
+
+
+def arxiv_id_from_url(value: Optional[str]) -> str:
+    """从 arxiv.org 的 abs/pdf 链接中提取ArXiv ID"""
+    if not value:
+        return ""
+    match = _ARXIV_URL_PATTERN.search(value.strip())
+    return normalize_arxiv_id(match.group(1)) if match else ""
+
+
+def normalize_doi(value: Optional[str]) -> str:
+    """规范化DOI：去掉 doi.org 链接或 doi: 前缀并转为小写"""
+    if not value:
+        return ""
+    return _DOI_PREFIX_PATTERN.sub("", value.strip()).lower()
+
+
+def title_hash(value: Optional[str]) -> str:
+    """规范化标题的哈希（前 16 位），用于没有任何外部ID时识别同一论文"""
+    title = normalize_title(value)
+    return hashlib.sha1(title.encode("utf-8")).hexdigest()[:16] if title else ""
+
+
+def paper_aliases(paper: Any) -> List[Tuple[str, str]]:
+    """
+    论文的全部别名
+
+    从 Paper（或旧版 FormattedArxivObj 等带同名属性的对象）的 ID、DOI、链接、
+    Semantic Scholar 外部ID 和标题中提取，按 ALIAS_KINDS 的优先级排列。
+
+    Returns:
+        [(别名类型, 规范化的值)]
+    """
+    paper_id = getattr(paper, "id", "") or ""
+    raw = getattr(paper, "raw_data", None)
+    external_ids = raw.get("externalIds") or {} if isinstance(raw, dict) else {}
+
+    arxiv_id = (
+        (normalize_arxiv_id(paper_id) if is_arxiv_id(paper_id) else "")
+        or normalize_arxiv_id(external_ids.get("ArXiv"))
+        or arxiv_id_from_url(getattr(paper, "abstract_url", ""))
+        or arxiv_id_from_url(getattr(paper, "pdf_url", ""))
+    )
+    doi = normalize_doi(getattr(paper, "doi", None) or external_ids.get("DOI"))
+    s2_id = paper_id if getattr(paper, "source", "") == "semantic_scholar" else ""
+
+    candidates = (("arxiv", arxiv_id), ("doi", doi), ("s2", s2_id), ("title", title_hash(getattr(paper, "title", ""))))
+    return [(kind, value) for kind, value in candidates if value]
+
+
+def parse_alias(value: Optional[str]) -> Tuple[str, str]:
+    """
+    识别单个ID字符串的别名类型
+
+    支持ArXiv ID（可带版本号或为 abs/pdf 链接）、DOI、Semantic Scholar paperId
+    以及规范键本身（doi:、s2:、title: 前缀）。无法识别时类型为 id。
+    """
+    value = (value or "").strip()
+    kind, _, rest = value.partition(":")
+    if rest and kind in ALIAS_KINDS and kind != "arxiv":
+        return kind, normalize_doi(rest) if kind == "doi" else rest
+    if is_arxiv_id(value):
+        return "arxiv", normalize_arxiv_id(value)
+    if arxiv_id_from_url(value):
+        return "arxiv", arxiv_id_from_url(value)
+    doi = normalize_doi(value)
+    if doi.startswith("10."):
+        return "doi", doi
+    if _S2_ID_PATTERN.match(value):
+        return "s2", value
+    return "id", value
+
+
+def canonical_key(kind: str, value: str) -> str:
+    """
+    由别名得出规范键
+
+    ArXiv 论文的规范键就是去掉版本号的 ArXiv ID（与账本、PDF 存储等已有的键一致），
+    其他类型带类型前缀，如 doi:10.1000/xyz。
+    """
+    return value if kind in ("arxiv", "id") else f"{kind}:{value}"
@@ -8,6 +8,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from .identifiers import normalize_arxiv_id
+
 
 @dataclass
 class Paper:
@@ -259,11 +261,8 @@ class Paper:
         # 提取论文 ID（从 entry_id 中解析）
         paper_id = ""
         if abstract_url:
-            # ArXiv entry_id 格式: http://arxiv.org/abs/2301.00001v1
-            paper_id = abstract_url.split("/")[-1]
-            # 移除版本号
-            if "v" in paper_id:
-                paper_id = paper_id.rsplit("v", 1)[0]
+            # ArXiv entry_id 格式: http://arxiv.org/abs/2301.00001v1，去掉版本号
+            paper_id = normalize_arxiv_id(abstract_url.split("/")[-1])
 
         # 处理标签信息
         tags: List[str] = []
@@ -385,7 +384,10 @@ class Paper:
             elif isinstance(value, dict) and isinstance(merged_data.get(key), dict):
                 merged_data[key] = {**merged_data[key], **value}
 
-        return Paper.from_dict(merged_data)
+        merged = Paper.from_dict(merged_data)
+        # 原始数据不在 to_dict 中，保留当前论文的（没有时取另一篇的）
+        merged.raw_data = self.raw_data if self.raw_data is not None else other.raw_data
+        return merged
 
     def update_with_llm_results(
         self,
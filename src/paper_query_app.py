@@ -1,19 +1,24 @@
 """
 Modified by: Xiaodong Zheng
 """
+import json
 import os
 from pathlib import Path
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, stream_with_context
 
 import sys
 
 sys.path.append('')
 
 import common_utils
+from core.identity import get_identity_index
+from core.job_queue import JobQueue, QueueFullError
+from core.response_cache import ResponseCache
+from core.search_index import PaperSearchIndex
 from service.arxiv_visitor import ArxivVisitor
 from service.wolai_service import WolaiService
-import threading
+import time
 
 
 app = Flask(__name__)
@@ -25,6 +30,33 @@ TOKEN= os.environ['WOLAI_TOKEN']
 output_root = os.path.join(Path(__file__).parent.parent.resolve(), 'output')
 os.makedirs(os.path.join(output_root, 'cache'), exist_ok=True)
 arxiv_visitor = ArxivVisitor(output_dir=output_root)
+wolai_service = WolaiService()
+search_index = PaperSearchIndex(
+    os.path.join(output_root, 'cache', 'search_index.db'), identity=get_identity_index(arxiv_visitor.cache_store)
+)
+
+# 响应缓存：同一键的并发请求只计算一次，结果按 TTL 缓存
+SEARCH_CACHE_TTL = 10 * 60
+PAPER_CACHE_TTL = 24 * 60 * 60
+response_cache = ResponseCache(max_entries=1024, ttl=PAPER_CACHE_TTL)
+
+
+def index_paper(formatted_arxiv_obj):
+    """把获取到的论文加入本地全文索引"""
+    try:
+        search_index.add(formatted_arxiv_obj)
+    except Exception as e:
+        logger.warning(f'更新全文索引失败: {e}')
+
+
+def find_formatted(entry_id):
+    """获取格式化后的论文（含翻译和标签），并发请求共享同一次计算"""
+    def compute():
+        formatted_arxiv_obj = arxiv_visitor.find_by_id(entry_id, format_result=True)
+        index_paper(formatted_arxiv_obj)
+        return formatted_arxiv_obj
+
+    return response_cache.get_or_compute(('formatted', entry_id), compute)
 
 
 @app.route('/api/papers', methods=['GET'])
@@ -37,51 +69,78 @@ def search():
     query = query.strip()
     if query == '':
         return jsonify({'msg': 'query required!'})
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    page_size = min(max(request.args.get('page_size', 20, type=int), 1), 100)
+    return jsonify(response_cache.get_or_compute(
+        ('papers', query, page, page_size),
+        lambda: search_papers(query, page, page_size),
+        ttl=SEARCH_CACHE_TTL
+    ))
+
+
+def search_papers(query, page, page_size):
+    # 优先查询本地全文索引，未命中时再请求arXiv
+    hits = search_index.search(query, page=page, page_size=page_size)
+    if hits['total'] > 0:
+        return {
+            'msg': 'success',
+            'source': 'local',
+            'total': hits['total'],
+            'page': page,
+            'page_size': page_size,
+            'papers': [{
+                "id": doc['paper_id'],
+                "title": doc['title'],
+                "authors": doc['authors'],
+                "publish_dt": doc['published'][:7],
+                "summary_cn": doc['summary_cn'],
+                "tags": doc['tags'].split(', ') if doc['tags'] else []
+            } for doc in hits['papers']]
+        }
+
     result = arxiv_visitor.smart_find(query, format_result=False)
-    if isinstance(result, list):
-        return jsonify(
-            {
-                'msg': 'success',
-                'papers': [{
-                    "id": item.entry_id.split('/')[-1],
-                    "title": item.title,
-                    "authors": ', '.join(author.name for author in item.authors),
-                    "publish_dt": item.published.strftime('%Y-%m')
-                } for item in result]
-            })
-    return jsonify({
-        'msg': "success",
+    if not isinstance(result, list):
+        result = [result]
+    return {
+        'msg': 'success',
+        'source': 'arxiv',
         'papers': [{
-            "id": result.entry_id.split('/')[-1],
-            "title": result.title,
-            "authors": ', '.join(author.name for author in result.authors),
-            "publish_dt": result.published.strftime('%Y-%m')
-        }]
-    })
+            "id": item.entry_id.split('/')[-1],
+            "title": item.title,
+            "authors": ', '.join(author.name for author in item.authors),
+            "publish_dt": item.published.strftime('%Y-%m')
+        } for item in result]
+    }
 
 
-def async_download(entry_id, retry_count=3):
-    logger.info('async thread started!')
-    formatted_arxiv_obj = arxiv_visitor.find_by_id(entry_id, format_result=True)
-    wolai_service = WolaiService()
+def download_paper(entry_id, retry_count=3):
+    """下载论文PDF并写入Wolai，失败时按指数退避重试，最终失败时抛出最后一次的异常"""
+    formatted_arxiv_obj = find_formatted(entry_id)
 
     os.makedirs('papers', exist_ok=True)
 
-    def do_download():
-        arxiv_visitor.download_pdf(formatted_arxiv_obj, 'Papers')
-        resp = wolai_service.insert(formatted_arxiv_obj)
-        logger.info(resp)
-        common_utils.send_slack(f'论文《{formatted_arxiv_obj.title}》下载完成！', '深度学习研究')
-
-    while retry_count > 0:
+    for attempt in range(retry_count):
         try:
-            do_download()
-            return
+            arxiv_visitor.download_pdf(formatted_arxiv_obj, 'Papers')
+            resp = wolai_service.insert(formatted_arxiv_obj)
+            logger.info(resp)
+            common_utils.send_slack(f'论文《{formatted_arxiv_obj.title}》下载完成！', '深度学习研究')
+            return {'title': formatted_arxiv_obj.title}
         except Exception as e:
             logger.error(e)
-            retry_count -= 1
+            if attempt == retry_count - 1:
+                common_utils.send_slack(f'论文《{formatted_arxiv_obj.title}》下载失败, {e}', '深度学习研究')
+                raise
+            time.sleep(2 ** attempt)
+
 
-    common_utils.send_slack(f'论文《{formatted_arxiv_obj.title}》下载失败, {e}', '深度学习研究')
+download_queue = JobQueue(
+    download_paper,
+    workers=int(os.environ.get('DOWNLOAD_WORKERS', 2)),
+    max_pending=int(os.environ.get('DOWNLOAD_QUEUE_SIZE', 100)),
+    name='download'
+)
 
 
 @app.route('/api/papers/<entry_id>/basic_info', methods=['GET'])
@@ -90,17 +149,20 @@ def get_basic_info(entry_id):
     if token != TOKEN:
         return {'msg': 'token invalid!'}
 
-    result = arxiv_visitor.find_by_id(entry_id, format_result=False)
-    return jsonify({
-        'msg': "success",
-        'paper': {
-            "id": result.entry_id.split('/')[-1],
-            "title": result.title,
-            "authors": ', '.join(author.name for author in result.authors),
-            "publish_dt": result.published.strftime('%Y-%m'),
-            "summary": result.summary
+    def compute():
+        result = arxiv_visitor.find_by_id(entry_id, format_result=False)
+        return {
+            'msg': "success",
+            'paper': {
+                "id": result.entry_id.split('/')[-1],
+                "title": result.title,
+                "authors": ', '.join(author.name for author in result.authors),
+                "publish_dt": result.published.strftime('%Y-%m'),
+                "summary": result.summary
+            }
         }
-    })
+
+    return jsonify(response_cache.get_or_compute(('basic_info', entry_id), compute))
 
 
 @app.route('/api/papers/<entry_id>/details', methods=['GET'])
@@ -109,22 +171,68 @@ def get_details(entry_id):
     if token != TOKEN:
         return {'msg': 'token invalid!'}
 
-    result = arxiv_visitor.find_by_id(entry_id, format_result=True)
+    result = find_formatted(entry_id)
     return jsonify({
         'msg': "success",
-        'paper': {
-            "id": result.id,
-            "title": result.title,
-            "authors": result.authors,
-            "publish_dt": result.published_dt,
-            "summary": result.summary,
-            "summary_cn": result.summary_cn,
-            "动机": result.tldr.get('动机', ''),
-            "方法": result.tldr.get("方法", ''),
-            "结果": result.tldr.get('结果', ''),
-            "category": result.category,
-            "tags": result.tags
-        }
+        'paper': details_of(result)
+    })
+
+
+def details_of(result):
+    """详情接口返回的论文字段"""
+    return {
+        "id": result.id,
+        "title": result.title,
+        "authors": result.authors,
+        "publish_dt": result.published_dt,
+        "summary": result.summary,
+        "summary_cn": result.summary_cn,
+        "动机": result.tldr.get('动机', ''),
+        "方法": result.tldr.get("方法", ''),
+        "结果": result.tldr.get('结果', ''),
+        "category": result.category,
+        "tags": result.tags
+    }
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route('/api/papers/<entry_id>/details/stream', methods=['GET'])
+def stream_details(entry_id):
+    """以SSE推送论文详情：先推送基本信息，再推送生成中的TLDR字段和标签，最后推送完整详情"""
+    token = request.args.get('token', '')
+    if token != TOKEN:
+        return {'msg': 'token invalid!'}
+
+    def generate():
+        try:
+            for event, data in arxiv_visitor.stream_details(entry_id):
+                if event == 'done':
+                    index_paper(data)
+                    response_cache.set(('formatted', entry_id), data)
+                    data = details_of(data)
+                yield sse_event(event, data)
+        except Exception as e:
+            logger.error(f'流式获取论文详情失败 {entry_id}: {e}')
+            yield sse_event('error', {'msg': str(e)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    token = request.args.get('token', '')
+    if token != TOKEN:
+        return {'msg': 'token invalid!'}
+
+    return jsonify({
+        'msg': "success",
+        'stats': response_cache.stats()
     })
 
 
@@ -134,11 +242,44 @@ def download(entry_id):
     if token != TOKEN:
         return {'msg': 'token invalid!'}
 
-    thread = threading.Thread(target=async_download, args=(entry_id,))
-    thread.start()
+    try:
+        job = download_queue.submit(entry_id)
+    except QueueFullError as e:
+        return jsonify({'msg': str(e)}), 503
 
     return jsonify({
-        'msg': "success"
+        'msg': "success",
+        'job': job
+    })
+
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    token = request.args.get('token', '')
+    if token != TOKEN:
+        return {'msg': 'token invalid!'}
+
+    status = request.args.get('status') or None
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+    return jsonify({
+        'msg': "success",
+        'stats': download_queue.stats(),
+        'jobs': download_queue.list(status=status, limit=limit)
+    })
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    token = request.args.get('token', '')
+    if token != TOKEN:
+        return {'msg': 'token invalid!'}
+
+    job = download_queue.get(job_id)
+    if job is None:
+        return jsonify({'msg': 'job not found!'}), 404
+    return jsonify({
+        'msg': "success",
+        'job': job
     })
 
 
@@ -4,31 +4,44 @@ Modified by Xiaodong Zheng on 2025/4/22
 """
 import json
 import os
-import pickle
 import re
 import copy
 import sys
 import time
 from typing import Union, List
-from urllib.request import urlretrieve
 
 import arxiv
 
 import common_utils
+from core.cache_store import ARXIV_META, ARXIV_RESULT, arxiv_result_from_dict, arxiv_result_to_dict, get_cache_store
+from core.identity import get_identity_index
 from entity.formatted_arxiv_obj import FormattedArxivObj
 from service import llm_service
+from services.pdf import get_pdf_store, safe_filename
 
 logger = common_utils.get_logger(__name__)
 
+
+class PaperCacheObj(dict):
+    """论文的回写缓存对象：内容变化时标记为脏，处理结束后只写入一次"""
+
+    def __init__(self, data, dirty=False):
+        super().__init__(data)
+        self.dirty = dirty
+
+
 class ArxivVisitor:
     def __init__(self, output_dir, page_size=10, disable_cache=False):
         self.cache_dir = os.path.join(output_dir, 'cache')
         os.makedirs(self.cache_dir, exist_ok=True)
+        self.cache_store = get_cache_store(os.path.join(self.cache_dir, 'cache.db'))
+        # 缓存键和检查点使用论文的规范键（去掉版本号，DOI 等别名对应到同一篇论文）
+        self.identity = get_identity_index(self.cache_store)
         self.client = arxiv.Client(page_size=page_size)
         self.max_retries = 3
         self.retry_wait = 2
 
-    def _process_tldr(self, summary, cache_obj, cache_filename):
+    def _process_tldr(self, summary, cache_obj):
         logger.info(f"处理论文TLDR: {cache_obj['id']}")
 
         keys = ('动机', '方法', '结果', 'remark')
@@ -61,21 +74,11 @@ class ArxivVisitor:
             cache_obj['summary_cn'] = cache_obj['tldr']['翻译']
         if 'short_summary' in cache_obj['tldr']:
             cache_obj['short_summary'] = cache_obj['tldr']['short_summary']
-            
-        try:
-            json.dump(cache_obj, open(cache_filename, 'w'), ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"保存缓存文件时出错: {e}")
-            # 创建备份路径
-            backup_filename = cache_filename + ".backup"
-            logger.info(f"尝试保存到备份文件: {backup_filename}")
-            json.dump(cache_obj, open(backup_filename, 'w'), ensure_ascii=False, indent=2)
+        cache_obj.dirty = True
 
-    def _generate_tldr(self, summary):
-        """使用LLM生成摘要的TLDR"""
-        logger.info("生成论文TLDR")
-        
-        prmpt = f'''下面这段话（<summary></summary>之间的部分）是一篇论文的摘要。
+    @staticmethod
+    def _tldr_prompt(summary):
+        return f'''下面这段话（<summary></summary>之间的部分）是一篇论文的摘要。
         请基于摘要信息总结论文的动机、方法、结果、remark、翻译、short_summary等信息，, 其中remark请你用不超过15个英文字符总结
         该文章的领域,如果有算法请将算法放到前面，如"LLM/强化学习"，或"RL/多智能体"等，其中"翻译"将整个摘要内容使用中文进行翻译，
         "short_summary"部分则是使用中文根据翻译结果进行不超过50字的主题简介,注意不要使用任何的markdown格式标点符号，也不要写任何的公式。
@@ -91,7 +94,13 @@ class ArxivVisitor:
         }}
         如果某一项不存在，请输出空字符串，请认真回答，
         如果回答的好我会给你很多小费：\n<summary>{summary}</summary>'''
+
+    def _generate_tldr(self, summary):
+        """使用LLM生成摘要的TLDR"""
+        logger.info("生成论文TLDR")
         
+        prmpt = self._tldr_prompt(summary)
+
         # 添加重试逻辑
         for attempt in range(self.max_retries):
             try:
@@ -117,7 +126,7 @@ class ArxivVisitor:
                         "remark": ""
                     }
 
-    def _process_tag_info(self, summary, cache_obj, cache_filename):
+    def _process_tag_info(self, summary, cache_obj):
         logger.info(f"处理论文标签: {cache_obj['id']}")
 
         keys = ('主要领域', '标签')
@@ -154,20 +163,11 @@ class ArxivVisitor:
                 '主要领域': 'RL' if 'reinforcement' in summary.lower() else 'NLP', 
                 '标签': ['/unread']
             }
+        cache_obj.dirty = True
 
-        try:
-            json.dump(cache_obj, open(cache_filename, 'w'), ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"保存缓存文件时出错: {e}")
-            backup_filename = cache_filename + ".backup"
-            logger.info(f"尝试保存到备份文件: {backup_filename}")
-            json.dump(cache_obj, open(backup_filename, 'w'), ensure_ascii=False, indent=2)
-
-    def _generate_tag_info(self, summary):
-        """使用LLM生成标签信息"""
-        logger.info(f"生成论文标签")
-        
-        prompt = f"""
+    @staticmethod
+    def _tag_info_prompt(summary):
+        return f"""
                     以下是论文摘要内容：\n {summary}\n
 
                     请参考论文摘要内容，判断该论文的主要研究领域（例如RL、MTS、NLP、多模态、CV、MARL、LLM等）概括的结果
@@ -186,7 +186,13 @@ class ArxivVisitor:
                     ]
                     }}
                     """
-                    
+
+    def _generate_tag_info(self, summary):
+        """使用LLM生成标签信息"""
+        logger.info(f"生成论文标签")
+        
+        prompt = self._tag_info_prompt(summary)
+
         # 添加重试逻辑
         for attempt in range(self.max_retries):
             try:
@@ -210,33 +216,49 @@ class ArxivVisitor:
                         "标签": ["research", "/unread"]
                     }
 
-    def _post_process(self, arxiv_result, hf_obj=None):
-        """对ArXiv结果进行后处理，生成摘要、标签等信息"""
+    def _flush_cache_obj(self, cache_obj, cache_key):
+        """缓存对象有变化时写入缓存存储（单个事务，中断时不会留下不完整的缓存）"""
+        if not cache_obj.dirty:
+            return
+        logger.info(f'保存缓存 {cache_key}')
+        try:
+            self.cache_store.set(ARXIV_META, cache_key, cache_obj)
+            cache_obj.dirty = False
+        except Exception as e:
+            logger.error(f"保存缓存时出错: {e}")
+
+    def _load_cache_obj(self, arxiv_result, hf_obj=None):
+        """加载论文的缓存对象，返回 (摘要, 缓存对象, 缓存键)"""
         summary = arxiv_result.summary.replace('\n', ' ').replace('  ', ' ')
         _id = arxiv_result.entry_id.split('/')[-1]
-        cache_obj = {
+        cache_key = self.identity.resolve_id(_id)
+        cached = self.cache_store.get(ARXIV_META, cache_key)
+        if isinstance(cached, dict):
+            logger.info(f'找到缓存 {cache_key}')
+            return summary, PaperCacheObj(cached), cache_key
+
+        cache_obj = PaperCacheObj({
             'id': _id,
             'title': arxiv_result.title,
             'pdf_url': arxiv_result.pdf_url
-        }
+        }, dirty=True)
         if hf_obj is not None:
             cache_obj['media_type'] = hf_obj['media_type']
             cache_obj['media_url'] = hf_obj['media_url']
+        return summary, cache_obj, cache_key
 
-        cache_filename = os.path.join(self.cache_dir, f"{_id}.json")
-        if os.path.exists(cache_filename):
-            logger.info(f'找到缓存文件 {cache_filename}, 正在加载...')
-            try:
-                with open(cache_filename, 'r', encoding='utf-8') as f:
-                    cache_obj = json.load(f)
-                logger.info('缓存内容加载成功')
-            except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                logger.error(f"读取缓存文件出错: {e}")
-                logger.info("使用新的缓存对象")
+    def _post_process(self, arxiv_result, hf_obj=None, loaded=None):
+        """
+        对ArXiv结果进行后处理，生成摘要、标签等信息
+
+        loaded 为已加载的 (摘要, 缓存对象, 缓存键)，缓存对象在处理结束时最多写入一次。
+        """
+        summary, cache_obj, cache_key = loaded or self._load_cache_obj(arxiv_result, hf_obj)
+        _id = arxiv_result.entry_id.split('/')[-1]
 
         # 处理TLDR和标签
-        self._process_tldr(summary, cache_obj, cache_filename)
-        self._process_tag_info(summary, cache_obj, cache_filename)
+        self._process_tldr(summary, cache_obj)
+        self._process_tag_info(summary, cache_obj)
 
         # 创建格式化对象
         ret = FormattedArxivObj(
@@ -269,39 +291,34 @@ class ArxivVisitor:
             arxiv_categories=arxiv_result.categories if hasattr(arxiv_result, 'categories') else []
         )
         
-        logger.info(f'保存缓存到 {cache_filename}')
-        try:
-            json.dump(cache_obj, open(cache_filename, 'w'), ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"保存缓存文件时出错: {e}")
-            backup_filename = cache_filename + ".backup"
-            logger.info(f"尝试保存到备份文件: {backup_filename}")
-            json.dump(cache_obj, open(backup_filename, 'w'), ensure_ascii=False, indent=2)
-            
+        self.identity.resolve(ret)
+        self._flush_cache_obj(cache_obj, cache_key)
         return ret
 
+    def enrich(self, arxiv_result, hf_obj=None) -> FormattedArxivObj:
+        """为未格式化的搜索结果（format_result=False）生成摘要、标签，返回格式化对象"""
+        return self._post_process(arxiv_result, hf_obj)
+
     def find_by_id(self, id_or_idlist, hf_obj=None, format_result=True) -> Union[FormattedArxivObj, arxiv.Result]:
         """通过ID查找论文"""
-        cache_filename = os.path.join(self.cache_dir, f'{id_or_idlist}.pkl')
+        cache_key = str(id_or_idlist) if isinstance(id_or_idlist, list) else self.identity.resolve_id(id_or_idlist)
         
         # 尝试从缓存加载
-        if os.path.exists(cache_filename):
-            logger.info(f"缓存命中: {cache_filename}")
+        result = None
+        cached = self.cache_store.get(ARXIV_RESULT, cache_key)
+        if cached is not None:
+            logger.info(f"缓存命中: {cache_key}")
             try:
-                with open(cache_filename, 'rb') as f:
-                    result = pickle.load(f)
+                result = arxiv_result_from_dict(cached)
             except Exception as e:
                 logger.error(f"读取缓存出错: {e}，重新获取数据")
-                result = self._fetch_arxiv_result(id_or_idlist)
-        else:
+        if result is None:
             result = self._fetch_arxiv_result(id_or_idlist)
-            
-        # 保存到缓存
-        try:
-            with open(cache_filename, 'wb') as f:
-                pickle.dump(result, f)
-        except Exception as e:
-            logger.error(f"保存缓存文件时出错: {e}")
+            # 保存到缓存
+            try:
+                self.cache_store.set(ARXIV_RESULT, cache_key, arxiv_result_to_dict(result))
+            except Exception as e:
+                logger.error(f"保存缓存时出错: {e}")
             
         logger.info(f"标题: {result.title}")
         logger.info(f"作者: {', '.join(author.name for author in result.authors)}")
@@ -309,6 +326,78 @@ class ArxivVisitor:
         
         return self._post_process(result, hf_obj) if format_result else result
         
+    def stream_details(self, entry_id, hf_obj=None):
+        """
+        流式获取论文详情，依次产出 (事件名, 数据)
+
+        - basic: arXiv 元数据，拿到 arXiv 结果后立即产出
+        - tldr: TLDR 字段，流式生成时每个字段完整后产出一次
+        - tags: 主要领域（category）和标签（tags）
+        - done: 完整的 FormattedArxivObj
+
+        流式请求失败时退回普通请求，缓存命中时不调用大模型。
+        """
+        result = self.find_by_id(entry_id, hf_obj, format_result=False)
+        yield 'basic', {
+            "id": result.entry_id.split('/')[-1],
+            "title": result.title,
+            "authors": ', '.join(author.name for author in result.authors),
+            "publish_dt": result.published.strftime('%Y-%m'),
+            "summary": result.summary
+        }
+
+        loaded = self._load_cache_obj(result, hf_obj)
+        summary, cache_obj, cache_key = loaded
+
+        # 客户端中途断开时也保存已生成的内容
+        try:
+            emitted = set()
+            if not cache_obj.get('raw_tldr', '').strip() and not cache_obj.get('tldr'):
+                tldr = {}
+                try:
+                    chunks = llm_service.chat_stream(self._tldr_prompt(summary), response_format='json_object')
+                    for key, value in llm_service.iter_json_fields(chunks):
+                        tldr[key] = value
+                        emitted.add(key)
+                        yield 'tldr', {key: value}
+                    if tldr:
+                        cache_obj['raw_tldr'] = json.dumps(tldr)
+                except Exception as e:
+                    logger.warning(f"流式生成TLDR失败，改用普通请求: {e}")
+            self._process_tldr(summary, cache_obj)
+            rest = {key: value for key, value in cache_obj['tldr'].items() if key not in emitted}
+            if rest:
+                yield 'tldr', rest
+
+            tag_names = {'主要领域': 'category', '标签': 'tags'}
+            emitted = set()
+            if not cache_obj.get('tag_info_raw', '').strip() and not cache_obj.get('tag_info'):
+                tag_info = {}
+                try:
+                    chunks = llm_service.chat_stream(
+                        self._tag_info_prompt(summary), response_format='json_object', temperature=0.1
+                    )
+                    for key, value in llm_service.iter_json_fields(chunks):
+                        tag_info[key] = value
+                        if key in tag_names:
+                            emitted.add(key)
+                            yield 'tags', {tag_names[key]: value}
+                    if tag_info:
+                        cache_obj['tag_info_raw'] = json.dumps(tag_info)
+                except Exception as e:
+                    logger.warning(f"流式生成标签失败，改用普通请求: {e}")
+            self._process_tag_info(summary, cache_obj)
+            # 标签在后处理中会补上 /unread，始终产出最终结果
+            rest = {
+                name: cache_obj['tag_info'].get(key)
+                for key, name in tag_names.items() if key == '标签' or key not in emitted
+            }
+            yield 'tags', rest
+
+            yield 'done', self._post_process(result, hf_obj, loaded)
+        finally:
+            self._flush_cache_obj(cache_obj, cache_key)
+
     def _fetch_arxiv_result(self, id_or_idlist):
         """从ArXiv API获取论文数据，包含重试机制"""
         logger.info(f"从ArXiv获取论文: {id_or_idlist}")
@@ -402,37 +491,13 @@ class ArxivVisitor:
     def download_pdf(cls, obj: Union[FormattedArxivObj, arxiv.Result], save_dir: str):
         """下载论文PDF"""
         # 两种类都有这个属性
-        title = obj.title
-        filename = f"{title}.pdf"
-        
-        # 移除文件名中的非法字符
-        for ch in ('?', '/', ':', '\\', '*', '"', '<', '>', '|'):
-            filename = filename.replace(ch, '_')
-            
-        # 防止文件名过长
-        if len(filename) > 150:
-            filename = filename[:147] + "..."
-            
-        path = os.path.join(save_dir, filename)
-        
-        # 添加重试逻辑
-        max_retries = 3
-        retry_wait = 2
-        
-        for attempt in range(max_retries):
-            try:
-                written_path, _ = urlretrieve(obj.pdf_url, path)
-                logger.info(f"论文 '{title}' 已下载到 {written_path}")
-                return written_path
-            except Exception as e:
-                logger.warning(f"下载PDF失败 (尝试 {attempt+1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    logger.info(f"等待 {retry_wait} 秒后重试...")
-                    time.sleep(retry_wait)
-                    retry_wait *= 2  # 指数退避
-                else:
-                    logger.error(f"达到最大重试次数，下载失败")
-                    raise
+        path = os.path.join(save_dir, safe_filename(obj.title))
+        paper_id = getattr(obj, 'id', None) or obj.entry_id.split('/')[-1]
+
+        # 按标题命名的文件是PDF存储中对象的硬链接，已存储的论文不会重复下载
+        written_path = get_pdf_store().materialize(paper_id, obj.pdf_url, path)
+        logger.info(f"论文 '{obj.title}' 已下载到 {written_path}")
+        return written_path
 
     def search_by_keywords(self, keywords, categories=None, limit=10, format_result=True) -> Union[List[FormattedArxivObj], List[arxiv.Result]]:
         """通过关键词和分类搜索论文"""
@@ -5,6 +5,7 @@
     Created: 2026-01-24
 """
 import os
+import time
 import requests
 
 from entity.formatted_arxiv_obj import FormattedArxivObj
@@ -14,6 +15,11 @@ logger = common_utils.get_logger(__name__)
 
 
 class FeishuService:
+    # Refresh the cached token this many seconds before it expires
+    TOKEN_REFRESH_MARGIN = 300
+    # Token lifetime assumed when the response carries no `expire`
+    DEFAULT_TOKEN_EXPIRE = 7200
+
     def __init__(self, app_id=None, app_secret=None):
         """
         Initialize Feishu service
@@ -25,6 +31,7 @@ class FeishuService:
         self.app_id = app_id or os.environ.get('FEISHU_APP_ID')
         self.app_secret = app_secret or os.environ.get('FEISHU_APP_SECRET')
         self._access_token = None
+        self._token_expires_at = 0.0
         
         if not self.app_id or not self.app_secret:
             logger.warning("Feishu app_id or app_secret not provided")
@@ -34,10 +41,10 @@ class FeishuService:
         Get tenant access token for API authentication
         Reference: https://open.feishu.cn/document/server-docs/authentication-management/access-token-creation-method/tenant_access_token
         """
-        if self._access_token:
+        if self._access_token and time.monotonic() < self._token_expires_at - self.TOKEN_REFRESH_MARGIN:
             return self._access_token
             
-        url = "https://open.feishu.cn/open-api/auth/v3/tenant_access_token/internal"
+        url = "https://open.feishu.cn/open-apis/auth/v3/tenant_access_token/internal"
         headers = {
             "Content-Type": "application/json; charset=utf-8"
         }
@@ -53,6 +60,8 @@ class FeishuService:
             
             if result.get("code") == 0:
                 self._access_token = result.get("tenant_access_token")
+                expire = result.get("expire") or self.DEFAULT_TOKEN_EXPIRE
+                self._token_expires_at = time.monotonic() + expire
                 logger.debug("Successfully obtained Feishu access token")
                 return self._access_token
             else:
@@ -114,7 +123,7 @@ class FeishuService:
         fields["摘要"] = abstract_content
         
         # Create API request
-        url = f"https://open.feishu.cn/open-api/bitable/v1/apps/{app_token}/tables/{table_id}/records"
+        url = f"https://open.feishu.cn/open-apis/bitable/v1/apps/{app_token}/tables/{table_id}/records"
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json; charset=utf-8"
@@ -8,13 +8,19 @@ import json
 import logging
 import common_utils
 import random
+import re
 import requests
 from requests.exceptions import Timeout, ConnectionError
 from openai import OpenAI
 MAX_RETRIES = 3
 
 logger = common_utils.get_logger(__name__)
-def chat(prompt, retry_count=MAX_RETRIES-1, service="deepseek", response_format="text", **kwargs):
+
+SYSTEM_PROMPT = "你是人工智能助手，你更擅长中文和英文的对话。你会为用户提供安全，有帮助，准确的回答。"
+
+
+def _resolve_service(service, **kwargs):
+    """根据服务名解析 api_key、base_url 和模型名"""
     # 从 kwargs 中获取 API 相关参数，如果没有提供则使用环境变量中的默认值
     api_key = kwargs.get('api_key', os.environ.get('DEFAULT_API_KEY'))
     base_url = kwargs.get('base_url', os.environ.get('DEFAULT_BASE_URL'))
@@ -43,12 +49,17 @@ def chat(prompt, retry_count=MAX_RETRIES-1, service="deepseek", response_format=
             raise ValueError("缺少 'model_name'")
     else:
         raise Exception(f"未知或缺失的大模型服务: {service}")
+    return api_key, base_url, model_name
+
+
+def chat(prompt, retry_count=MAX_RETRIES-1, service="deepseek", response_format="text", **kwargs):
+    api_key, base_url, model_name = _resolve_service(service, **kwargs)
 
     # 创建 OpenAI 客户端
     client = OpenAI(api_key=api_key, base_url=base_url)
 
     messages = [
-        {"role": "system", "content": "你是人工智能助手，你更擅长中文和英文的对话。你会为用户提供安全，有帮助，准确的回答。"},
+        {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": prompt}
     ]
     
@@ -86,3 +97,60 @@ def chat(prompt, retry_count=MAX_RETRIES-1, service="deepseek", response_format=
     # logger.error("所有尝试均失败，返回空字符串")
     # return ""  # 如果所有重试都失败，返回空字符串
 
+
+def chat_stream(prompt, service="deepseek", response_format="text", **kwargs):
+    """
+    流式对话，逐段产出模型输出的文本
+
+    不做重试：调用方可在流式失败时改用 chat。
+    """
+    api_key, base_url, model_name = _resolve_service(service, **kwargs)
+    client = OpenAI(api_key=api_key, base_url=base_url)
+
+    stream = client.chat.completions.create(
+        model=model_name,
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=kwargs.get('temperature', 0),
+        response_format={"type": f"{response_format}"},
+        stream=True,
+        timeout=30
+    )
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
+
+_FIELD_PATTERN = re.compile(r'"((?:[^"\\]|\\.)*)"\s*:\s*')
+
+
+def iter_json_fields(chunks):
+    """
+    从流式输出的 JSON 对象文本中逐个产出已完整的字段
+
+    每收到一段文本就检查新出现的 "键": 值，值能完整解析时产出 (键, 值)，每个键只产出一次。
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    seen = set()
+    position = 0
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            match = _FIELD_PATTERN.search(buffer, position)
+            if match is None:
+                break
+            try:
+                value, end = decoder.raw_decode(buffer, match.end())
+            except ValueError:
+                break
+            key = json.loads(f'"{match.group(1)}"')
+            position = end
+            if key not in seen:
+                seen.add(key)
+                yield key, value
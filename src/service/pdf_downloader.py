@@ -1,6 +1,13 @@
+"""
+已弃用：逐篇重新查询 arXiv 元数据后串行下载。
+请改用 services.pdf.download_papers，直接用已获取的论文对象并行写入 PDF 存储。
+"""
+import warnings
+
+
 def download_paper_pdfs(arxiv_ids, output_dir=None, arxiv_visitor=None):
     """
-    下载指定论文ID的PDF文件
+    下载指定论文ID的PDF文件（已弃用，请使用 services.pdf.download_papers）
     
     参数:
         arxiv_ids: 字符串或字符串列表，包含ArXiv论文ID
@@ -16,6 +23,12 @@ def download_paper_pdfs(arxiv_ids, output_dir=None, arxiv_visitor=None):
     import traceback
     
     logger = logging.getLogger(__name__)
+
+    warnings.warn(
+        "download_paper_pdfs 已弃用，请使用 services.pdf.download_papers",
+        DeprecationWarning,
+        stacklevel=2
+    )
     
     # 确保arxiv_ids是列表形式
     if isinstance(arxiv_ids, str):
@@ -16,11 +16,11 @@ logger = common_utils.get_logger(__name__)
 
 
 class WolaiService:
-    def __init__(self, token=os.environ['WOLAI_TOKEN']):
-        self.token = token
-        self._blocks = []
+    def __init__(self, token=None):
+        self.token = token or os.environ.get('WOLAI_TOKEN')
 
-    def insert(self, formatted_arxiv_obj: FormattedArxivObj, db_id=os.environ['WOLAI_DB_ID']):
+    def insert(self, formatted_arxiv_obj: FormattedArxivObj, db_id=None):
+        db_id = db_id or os.environ.get('WOLAI_DB_ID')
         # db加入记录
         tags = [str(tag) for tag in formatted_arxiv_obj.tags]
         category = [str(formatted_arxiv_obj.category)]
@@ -54,45 +54,51 @@ class WolaiService:
         if resp.status_code != 200:
             logger.warning(f"create database row failed, resp status code: {resp.status_code}, resp: {resp_json}")
 
-        if formatted_arxiv_obj.media_type != '':
-            self._add_media(formatted_arxiv_obj.media_type, formatted_arxiv_obj.media_url)
-
-        self._add_text("关键词: " + ', '.join(formatted_arxiv_obj.tags))
-        self._add_h1('TL;DR')
-        tldr_keys = ('动机', '方法', '结果')
-        if any([key in formatted_arxiv_obj.tldr and formatted_arxiv_obj.tldr[key] != '' for key in tldr_keys]):
-            for key in tldr_keys:
-                if key in formatted_arxiv_obj.tldr and formatted_arxiv_obj.tldr[key] != '':
-                    self._add_h2(key)._add_text(formatted_arxiv_obj.tldr[key])
-        else:
-            self._add_text(formatted_arxiv_obj.raw_tldr)
-            logger.warning(f'insert raw tldr! full obj:')
-            logger.warning(formatted_arxiv_obj)
-        (
-            self._add_h1('摘要')
-            ._add_h2('原文')
-            ._add_quote(formatted_arxiv_obj.summary)
-            ._add_h2('中文译文')
-            ._add_quote(formatted_arxiv_obj.summary_cn)
-        )
         block_id = resp_json['data'][0].split('/')[-1]
         req_body = {
             "parent_id": block_id,
-            "blocks": self._blocks
+            "blocks": self._build_blocks(formatted_arxiv_obj)
         }
         logger.debug("create block request:")
         logger.debug(json.dumps(req_body, ensure_ascii=False, indent=2))
 
-        url = ' https://openapi.wolai.com/v1/blocks'
+        url = 'https://openapi.wolai.com/v1/blocks'
         resp = requests.post(url, headers=headers, json=req_body)
         resp_json = resp.json()
         if resp.status_code not in (200, 201):
             logger.warning(f"create block failed, resp status code: {resp.status_code}, resp: {resp_json}")
-        self._blocks.clear()
         return resp_json
 
-    def __add_header(self, level, text):
-        self._blocks.append({
+    def _build_blocks(self, formatted_arxiv_obj: FormattedArxivObj):
+        # build page blocks locally so concurrent inserts never share state
+        blocks = []
+        if formatted_arxiv_obj.media_type != '':
+            blocks.append(self._media(formatted_arxiv_obj.media_type, formatted_arxiv_obj.media_url))
+
+        blocks.append(self._text("关键词: " + ', '.join(formatted_arxiv_obj.tags)))
+        blocks.append(self._header(1, 'TL;DR'))
+        tldr_keys = ('动机', '方法', '结果')
+        if any([key in formatted_arxiv_obj.tldr and formatted_arxiv_obj.tldr[key] != '' for key in tldr_keys]):
+            for key in tldr_keys:
+                if key in formatted_arxiv_obj.tldr and formatted_arxiv_obj.tldr[key] != '':
+                    blocks.append(self._header(2, key))
+                    blocks.append(self._text(formatted_arxiv_obj.tldr[key]))
+        else:
+            blocks.append(self._text(formatted_arxiv_obj.raw_tldr))
+            logger.warning(f'insert raw tldr! full obj:')
+            logger.warning(formatted_arxiv_obj)
+        blocks.extend([
+            self._header(1, '摘要'),
+            self._header(2, '原文'),
+            self._quote(formatted_arxiv_obj.summary),
+            self._header(2, '中文译文'),
+            self._quote(formatted_arxiv_obj.summary_cn),
+        ])
+        return blocks
+
+    @staticmethod
+    def _header(level, text):
+        return {
             "type": "heading",
             "level": level,
             "content": {
@@ -100,37 +106,27 @@ class WolaiService:
                 # "front_color": "red"
             },
             "text_alignment": "left"
-        })
-        return self
+        }
 
-    def _add_text(self, text):
-        self._blocks.append({
+    @staticmethod
+    def _text(text):
+        return {
             "type": "text",
             "content": text,
             "text_alignment": "left"
-        })
-        return self
-
-    def _add_h1(self, text):
-        return self.__add_header(1, text)
-
-    def _add_h2(self, text):
-        return self.__add_header(2, text)
-
-    def _add_h3(self, text):
-        return self.__add_header(3, text)
+        }
 
-    def _add_media(self, media_type, url):
-        self._blocks.append({
+    @staticmethod
+    def _media(media_type, url):
+        return {
             "type": media_type,
             "link": url,
-        })
-        return self
+        }
 
-    def _add_quote(self, text):
-        self._blocks.append({
+    @staticmethod
+    def _quote(text):
+        return {
             "type": "quote",
             "content": text,
             "text_alignment": "left"
-        })
-        return self
+        }
@@ -10,6 +10,8 @@ import os
 import common_utils
 from common_utils.json_templates import *
 from entity.formatted_arxiv_obj import FormattedArxivObj
+from models.identifiers import is_arxiv_id
+from services.storage.zotero_mirror import arxiv_machine_tag
 from datetime import datetime
 logger = common_utils.get_logger(__name__)
 
@@ -148,6 +150,11 @@ class ZoteroService:
             self.item_data[0]['tags'].extend(sharp_tags)
             logger.info(f"新标签为: {self.item_data[0]['tags']}")
 
+    def add_machine_tag(self, arxiv_id):
+        """添加用于精确查找的ArXiv机器标签，如 arxiv:2401.01234"""
+        if is_arxiv_id(arxiv_id):
+            self.item_data[0]['tags'].append({"tag": arxiv_machine_tag(arxiv_id)})
+
     # 更新 accessDate 的方法
     def update_access_date(self, new_access_date):
         pass
@@ -289,9 +296,12 @@ class ZoteroService:
             'https': 'http://127.0.0.1:7890',
         } if self.use_proxy else None
     
-        # 确定查询参数和类型
+        # 确定查询参数和类型，ArXiv ID 优先使用机器标签精确匹配
         query_type = None
-        if doi:
+        if arxiv_id and is_arxiv_id(arxiv_id):
+            params = {'tag': arxiv_machine_tag(arxiv_id), 'format': 'json'}
+            query_type = 'arxiv_tag'
+        elif doi:
             params = {'q': doi, 'qmode': 'everything', 'format': 'json'}
             query_type = 'doi'
         elif arxiv_id:
@@ -313,6 +323,13 @@ class ZoteroService:
             response = requests.get(url, headers=headers, params=params, proxies=proxies)
             response.raise_for_status()
             items = response.json()  # Zotero 的返回是一个列表(符合条件的 items)
+            if not items and query_type == 'arxiv_tag':
+                # 旧条目可能还没有机器标签，退回按 ArXiv ID 全文搜索
+                params = {'q': arxiv_id, 'qmode': 'everything', 'format': 'json'}
+                query_type = 'arxiv_id'
+                response = requests.get(url, headers=headers, params=params, proxies=proxies)
+                response.raise_for_status()
+                items = response.json()
             count = len(items)
             if count > 0:
                 return {
@@ -383,6 +400,7 @@ class ZoteroService:
         self.update_creators(formatted_arxiv_obj.authors)
         self.update_dates(self.create_time.strftime('%Y-%m-%d'), self.create_time.strftime('%Y-%m-%d'))
         self.update_tags(formatted_arxiv_obj.tags,formatted_arxiv_obj.arxiv_categories)
+        self.add_machine_tag(formatted_arxiv_obj.id)
         self.update_access_date(formatted_arxiv_obj.published_dt)
         self.update_abstract(formatted_arxiv_obj.summary_cn) # 更新中文摘要
         self.update_collections(collection)
@@ -3,15 +3,16 @@ import time
 import pickle
 import re
 import logging
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 from pathlib import Path
-from urllib.request import urlretrieve
 
 import arxiv
 
 from .base import BaseDataSource
+from models.identifiers import normalize_arxiv_id
 from models.paper import Paper
 from services.llm import LLMServiceFactory, BaseLLMService
+from services.pdf import PdfDownloadError, get_pdf_store, safe_filename
 
 logger = logging.getLogger(__name__)
 
@@ -48,9 +49,14 @@ class ArxivDataSource(BaseDataSource):
         keywords: List[str],
         categories: List[str] = None,
         limit: int = 10,
+        enrich: bool = True,
         **kwargs
     ) -> List[Paper]:
-        """搜索论文"""
+        """
+        搜索论文
+
+        enrich 为 False 时不生成 TLDR 和标签（由调用方在去重后统一增强）
+        """
         query = self._build_query(keywords, categories)
         logger.info(f"构建的查询: {query}")
 
@@ -65,7 +71,7 @@ class ArxivDataSource(BaseDataSource):
                 )
 
                 for result in self.client.results(search):
-                    paper = self._process_result(result)
+                    paper = self._process_result(result, enrich=enrich)
                     papers.append(paper)
                     if len(papers) >= limit:
                         break
@@ -80,31 +86,39 @@ class ArxivDataSource(BaseDataSource):
 
     def get_by_id(self, paper_id: str, **kwargs) -> Optional[Paper]:
         """通过ID获取论文"""
-        # 检查缓存
-        cache_key = f"arxiv_{paper_id}"
-        cached = self._load_cache(cache_key)
-        if cached:
-            logger.info(f"从缓存加载论文: {paper_id}")
-            return Paper.from_dict(cached)
+        try:
+            data = self._cached(
+                f"arxiv_{self.identity.resolve_id(paper_id)}", lambda: self._fetch_by_id(paper_id, **kwargs)
+            )
+        except Exception as e:
+            logger.error(f"获取论文失败: {paper_id}: {e}")
+            return None
+        return Paper.from_dict(data) if data else None
 
+    def _fetch_by_id(self, paper_id: str, **kwargs) -> Optional[Dict]:
+        """
+        从 arXiv 获取论文
+
+        Returns:
+            论文字典，arXiv 没有该论文时返回 None
+
+        Raises:
+            Exception: 重试后仍请求失败
+        """
         for attempt in range(self.max_retries):
             try:
                 search = arxiv.Search(id_list=[paper_id])
                 results = list(self.client.results(search))
-
-                if results:
-                    paper = self._process_result(results[0], **kwargs)
-                    # 保存缓存
-                    self._save_cache(cache_key, paper.to_dict())
-                    return paper
-                return None
+                if not results:
+                    logger.info(f"ArXiv没有返回论文: {paper_id}")
+                    return None
+                return self._process_result(results[0], **kwargs).to_dict()
 
             except Exception as e:
                 logger.warning(f"获取论文失败 (尝试 {attempt + 1}/{self.max_retries}): {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.retry_wait * (attempt + 1))
-
-        return None
+                if attempt == self.max_retries - 1:
+                    raise
+                time.sleep(self.retry_wait * (attempt + 1))
 
     def _build_query(self, keywords: List[str], categories: List[str] = None) -> str:
         """构建ArXiv查询字符串"""
@@ -134,44 +148,54 @@ class ArxivDataSource(BaseDataSource):
 
     def _process_result(self, arxiv_result, **kwargs) -> Paper:
         """处理ArXiv结果，生成Paper对象"""
-        paper_id = arxiv_result.entry_id.split('/')[-1]
+        paper_id = normalize_arxiv_id(arxiv_result.entry_id.split('/')[-1])
         summary = arxiv_result.summary.replace('\n', ' ').replace('  ', ' ')
 
-        # 生成TLDR和标签（如果有LLM服务）
-        tldr = {}
-        tag_info = {}
-
-        if self.llm_service:
-            try:
-                tldr = self.llm_service.generate_summary(summary)
-                tag_info = self.llm_service.generate_tags(summary)
-            except Exception as e:
-                logger.error(f"LLM处理失败: {e}")
-
         # 从hf_obj获取媒体信息（如果有）
         hf_obj = kwargs.get('hf_obj')
         media_type = hf_obj.get('media_type', '') if hf_obj else ''
         media_url = hf_obj.get('media_url', '') if hf_obj else ''
 
-        return Paper(
+        paper = Paper(
             id=paper_id,
             title=arxiv_result.title,
             authors=[author.name for author in arxiv_result.authors],
             published_date=arxiv_result.published,
             summary=summary,
-            summary_cn=tldr.get('翻译', ''),
-            short_summary=tldr.get('short_summary', ''),
             pdf_url=arxiv_result.pdf_url,
-            tldr=tldr,
-            category=tag_info.get('主要领域', ''),
-            tags=tag_info.get('标签', []),
             doi=arxiv_result.doi if hasattr(arxiv_result, 'doi') else None,
             journal_ref=arxiv_result.journal_ref if hasattr(arxiv_result, 'journal_ref') else None,
             arxiv_categories=arxiv_result.categories if hasattr(arxiv_result, 'categories') else [],
             media_type=media_type,
             media_url=media_url,
+            source="arxiv",
             raw_data=arxiv_result
         )
+        # 登记 DOI、标题等别名
+        self.identity.resolve(paper)
+
+        # 生成TLDR和标签（如果有LLM服务）
+        if kwargs.get('enrich', True):
+            self.enrich(paper)
+        return paper
+
+    def enrich(self, paper: Paper) -> Paper:
+        """生成论文的TLDR和标签（没有LLM服务或已有TLDR时不处理）"""
+        if not self.llm_service or paper.tldr:
+            return paper
+
+        try:
+            tldr = self.llm_service.generate_summary(paper.summary)
+            paper.tldr = tldr
+            paper.summary_cn = tldr.get('翻译', '')
+            paper.short_summary = tldr.get('short_summary', '')
+
+            tag_info = self.llm_service.generate_tags(paper.summary)
+            paper.category = tag_info.get('主要领域', '')
+            paper.tags = tag_info.get('标签', [])
+        except Exception as e:
+            logger.error(f"LLM处理失败: {e}")
+        return paper
 
     @staticmethod
     def download_pdf(paper: Paper, save_dir: str) -> Optional[str]:
@@ -179,20 +203,9 @@ class ArxivDataSource(BaseDataSource):
         if not paper.pdf_url:
             return None
 
-        filename = f"{paper.title}.pdf"
-        for ch in ('?', '/', ':', '\\', '*', '"', '<', '>', '|'):
-            filename = filename.replace(ch, '_')
-
-        if len(filename) > 150:
-            filename = filename[:147] + "..."
-
-        save_path = Path(save_dir) / filename
-        save_path.parent.mkdir(parents=True, exist_ok=True)
-
+        save_path = Path(save_dir) / safe_filename(paper.title)
         try:
-            urlretrieve(paper.pdf_url, str(save_path))
-            logger.info(f"PDF已下载: {save_path}")
-            return str(save_path)
-        except Exception as e:
+            return get_pdf_store().materialize(paper.id, paper.pdf_url, str(save_path))
+        except PdfDownloadError as e:
             logger.error(f"下载PDF失败: {e}")
             return None
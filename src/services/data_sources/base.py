@@ -1,10 +1,11 @@
-import os
-import json
 import logging
 from abc import abstractmethod
-from typing import List, Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 from pathlib import Path
 
+from core.cache_store import DATASOURCE, get_cache_store
+from core.identity import get_identity_index
+from core.tiered_cache import TieredCache
 from interfaces.data_source import DataSourceInterface
 from models.paper import Paper
 
@@ -18,7 +19,10 @@ class BaseDataSource(DataSourceInterface):
         output_dir: str = "./output",
         cache_enabled: bool = True,
         max_retries: int = 3,
-        retry_wait: int = 2
+        retry_wait: int = 2,
+        memory_cache_entries: int = 1024,
+        memory_cache_bytes: int = 64 * 1024 * 1024,
+        negative_ttl: float = 3600.0
     ):
         self.output_dir = Path(output_dir)
         self.cache_dir = self.output_dir / "cache"
@@ -28,23 +32,26 @@ class BaseDataSource(DataSourceInterface):
 
         # 确保目录存在
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-
-    def _get_cache_path(self, cache_key: str) -> Path:
-        """获取缓存文件路径"""
-        return self.cache_dir / f"{cache_key}.json"
+        self.cache_store = get_cache_store(str(self.cache_dir / "cache.db"))
+        # 磁盘缓存前的内存 LRU，空结果以否定条目缓存 negative_ttl 秒
+        self.cache = TieredCache(
+            self.cache_store,
+            max_entries=memory_cache_entries,
+            max_bytes=memory_cache_bytes,
+            negative_ttl=negative_ttl
+        )
+        # 缓存键使用论文的规范键，版本号不同或来源不同的同一论文共用缓存
+        self.identity = get_identity_index(self.cache_store)
 
     def _load_cache(self, cache_key: str) -> Optional[Dict]:
         """加载缓存"""
         if not self.cache_enabled:
             return None
 
-        cache_path = self._get_cache_path(cache_key)
-        if cache_path.exists():
-            try:
-                with open(cache_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"加载缓存失败: {e}")
+        try:
+            return self.cache.get_or_load(DATASOURCE, cache_key)
+        except Exception as e:
+            logger.warning(f"加载缓存失败: {e}")
         return None
 
     def _save_cache(self, cache_key: str, data: Dict):
@@ -52,13 +59,22 @@ class BaseDataSource(DataSourceInterface):
         if not self.cache_enabled:
             return
 
-        cache_path = self._get_cache_path(cache_key)
         try:
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.cache.set(DATASOURCE, cache_key, data)
         except Exception as e:
             logger.error(f"保存缓存失败: {e}")
 
+    def _cached(self, cache_key: str, loader: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        """
+        读取缓存，未命中时调用 loader 加载并缓存
+
+        并发加载同一键时只调用一次 loader；loader 返回 None（结果为空）时在否定条目有效期内不再调用，
+        抛出异常时不缓存，异常传给调用方。
+        """
+        if not self.cache_enabled:
+            return loader()
+        return self.cache.get_or_load(DATASOURCE, cache_key, loader)
+
     @abstractmethod
     def get_source_name(self) -> str:
         """获取数据源名称"""
@@ -73,5 +89,6 @@ class BaseDataSource(DataSourceInterface):
         return {
             "name": self.get_source_name(),
             "cache_enabled": self.cache_enabled,
-            "output_dir": str(self.output_dir)
+            "output_dir": str(self.output_dir),
+            "cache": self.cache.stats()
         }
@@ -56,7 +56,8 @@ class HuggingFaceDataSource(BaseDataSource):
                 id=p['id'],
                 title=p['title'],
                 media_type=p.get('media_type', ''),
-                media_url=p.get('media_url', '')
+                media_url=p.get('media_url', ''),
+                source="huggingface"
             )
             for p in self._paper_list
         ]
@@ -74,7 +75,8 @@ class HuggingFaceDataSource(BaseDataSource):
                     id=p['id'],
                     title=p['title'],
                     media_type=p.get('media_type', ''),
-                    media_url=p.get('media_url', '')
+                    media_url=p.get('media_url', ''),
+                    source="huggingface"
                 )
         return None
 
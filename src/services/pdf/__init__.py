@@ -0,0 +1,9 @@
+"""PDF 下载服务模块"""
+from .downloader import PdfDownloader, PdfDownloadError, get_downloader, is_pdf, safe_filename
+from .store import PdfStore, file_sha256, get_pdf_store
+from .bulk import download_papers, pdf_filename
+
+__all__ = [
+    'PdfDownloader', 'PdfDownloadError', 'get_downloader', 'is_pdf', 'safe_filename',
+    'PdfStore', 'file_sha256', 'get_pdf_store', 'download_papers', 'pdf_filename',
+]
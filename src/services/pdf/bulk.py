@@ -0,0 +1,78 @@
+"""
+批量 PDF 下载
+
+直接使用已获取元数据的论文对象（Paper 或旧版 FormattedArxivObj，按 id/title/pdf_url 属性读取），
+不再为了获取标题重新查询 arXiv；所有论文并行写入 PDF 存储。
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from .downloader import safe_filename
+from .store import PdfStore, get_pdf_store
+
+logger = logging.getLogger(__name__)
+
+
+def pdf_filename(paper: Any, name_by: str = "title") -> str:
+    """论文 PDF 的文件名：按标题（title）或按论文ID（id）命名"""
+    if name_by == "id":
+        return f"{paper.id.replace('/', '_').replace(':', '_')}.pdf"
+    return safe_filename(paper.title)
+
+
+def download_papers(
+    papers: Iterable[Any],
+    save_dir: str,
+    max_workers: int = 4,
+    name_by: str = "title",
+    store: Optional[PdfStore] = None
+) -> Dict[str, Any]:
+    """
+    批量下载论文 PDF
+
+    Args:
+        papers: 论文对象列表
+        save_dir: PDF 目录
+        max_workers: 并行下载数（每个主机的并发另受下载器限制）
+        name_by: 文件命名方式，title 或 id
+        store: PDF 存储（默认为进程内共享的存储）
+
+    Returns:
+        {"success": [...], "failed": [{"id", "error"}], "skipped": [...], "paths": {论文ID: 文件路径}}
+    """
+    store = store or get_pdf_store()
+    results: Dict[str, Any] = {"success": [], "failed": [], "skipped": [], "paths": {}}
+
+    pending = {}
+    for paper in papers:
+        if not getattr(paper, "pdf_url", None) or paper.id in pending:
+            results["skipped"].append(paper.id)
+            continue
+        pending[paper.id] = paper
+    if not pending:
+        return results
+
+    Path(save_dir).mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+        futures = {
+            executor.submit(
+                store.materialize, paper.id, paper.pdf_url, str(Path(save_dir) / pdf_filename(paper, name_by))
+            ): paper.id
+            for paper in pending.values()
+        }
+        for future in as_completed(futures):
+            paper_id = futures[future]
+            try:
+                results["paths"][paper_id] = future.result()
+                results["success"].append(paper_id)
+            except Exception as e:
+                logger.error(f"下载 PDF 失败 ({paper_id}): {e}")
+                results["failed"].append({"id": paper_id, "error": str(e)})
+
+    logger.info(
+        f"PDF 批量下载完成: 成功 {len(results['success'])}, 失败 {len(results['failed'])}, "
+        f"跳过 {len(results['skipped'])}"
+    )
+    return results
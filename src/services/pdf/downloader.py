@@ -0,0 +1,177 @@
+"""
+PDF 下载器
+
+以流式写入临时文件（`<目标>.part`）并在校验通过后原子重命名，中断的下载通过
+HTTP Range 续传。连接由共享的 requests.Session 复用，每个主机的并发下载数有上限。
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+PDF_MAGIC = b"%PDF"
+PART_SUFFIX = ".part"
+CHUNK_SIZE = 64 * 1024
+
+
+class PdfDownloadError(Exception):
+    """PDF 下载或校验失败"""
+
+
+def is_pdf(path: str) -> bool:
+    """检查文件是否以 %PDF 开头"""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(PDF_MAGIC)) == PDF_MAGIC
+    except OSError:
+        return False
+
+
+def safe_filename(title: str, max_length: int = 150) -> str:
+    """由论文标题生成文件名，替换非法字符并限制长度"""
+    filename = f"{title}.pdf"
+    for ch in ('?', '/', ':', '\\', '*', '"', '<', '>', '|'):
+        filename = filename.replace(ch, '_')
+    if len(filename) > max_length:
+        filename = filename[:max_length - 3] + "..."
+    return filename
+
+
+class PdfDownloader:
+    """
+    可续传的流式 PDF 下载器
+
+    Attributes:
+        max_per_host: 每个主机的最大并发下载数
+        retries: 失败重试次数（重试时从已下载的位置续传）
+        timeout: (连接超时, 读取超时) 秒
+    """
+
+    def __init__(
+        self,
+        max_per_host: int = 4,
+        retries: int = 3,
+        retry_delay: float = 2.0,
+        timeout: tuple = (10, 60),
+        pool_size: int = 16
+    ):
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def download(self, url: str, dest_path: str, overwrite: bool = False) -> str:
+        """
+        下载 PDF 到指定路径
+
+        目标文件已存在且是有效 PDF 时直接返回（overwrite 为 True 时重新下载）。
+
+        Args:
+            url: PDF 地址
+            dest_path: 目标文件路径
+            overwrite: 是否覆盖已有文件
+
+        Returns:
+            目标文件路径
+
+        Raises:
+            PdfDownloadError: 重试后仍下载失败或校验失败
+        """
+        dest = Path(dest_path)
+        if not overwrite and dest.exists() and is_pdf(str(dest)):
+            logger.debug(f"PDF 已存在: {dest}")
+            return str(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part = dest.with_name(dest.name + PART_SUFFIX)
+
+        last_error: Optional[Exception] = None
+        for attempt in range(self.retries):
+            try:
+                with self._host_slot(url):
+                    self._fetch(url, part)
+                if not is_pdf(str(part)):
+                    part.unlink()
+                    raise PdfDownloadError(f"下载内容不是 PDF: {url}")
+                os.replace(part, dest)
+                logger.info(f"PDF 已下载: {dest}")
+                return str(dest)
+            except (requests.RequestException, PdfDownloadError, OSError) as e:
+                last_error = e
+                logger.warning(f"下载 PDF 失败 (尝试 {attempt + 1}/{self.retries}): {e}")
+                if attempt < self.retries - 1:
+                    time.sleep(self.retry_delay * (2 ** attempt))
+
+        raise PdfDownloadError(f"下载 PDF 失败: {url}: {last_error}")
+
+    def _fetch(self, url: str, part: Path) -> None:
+        """下载到临时文件，已有部分内容时以 Range 请求续传"""
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # 临时文件已不小于服务端文件，无法续传，从头下载
+                part.unlink()
+                raise PdfDownloadError(f"续传位置无效，已清除临时文件: {url}")
+            response.raise_for_status()
+
+            if response.status_code == 206:
+                mode, expected = "ab", self._total_length(response)
+            else:
+                # 服务端不支持 Range 时返回完整内容
+                offset, mode = 0, "wb"
+                length = response.headers.get("Content-Length")
+                expected = int(length) if length and length.isdigit() else None
+
+            with open(part, mode) as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+
+        size = part.stat().st_size
+        if expected is not None and size != expected:
+            if size > expected:
+                part.unlink()
+            raise PdfDownloadError(f"文件大小不符 ({size}/{expected} 字节): {url}")
+
+    @staticmethod
+    def _total_length(response: requests.Response) -> Optional[int]:
+        """从 Content-Range（bytes a-b/total）中解析文件总长度"""
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+
+
+_default_downloader: Optional[PdfDownloader] = None
+_default_lock = threading.Lock()
+
+
+def get_downloader() -> PdfDownloader:
+    """进程内共享的下载器（共享连接池和每主机并发上限）"""
+    global _default_downloader
+    with _default_lock:
+        if _default_downloader is None:
+            _default_downloader = PdfDownloader()
+        return _default_downloader
@@ -0,0 +1,266 @@
+"""
+内容寻址的 PDF 存储
+
+PDF 按 SHA-256 存放在 `<root>/objects/ab/<sha256>.pdf`，SQLite 索引记录论文ID到哈希的映射。
+按标题或ID命名的文件都是指向存储对象的硬链接，同一篇论文（不同版本号、改过标题）
+或内容相同的 PDF 只下载和存储一次；是否已有 PDF 只查询索引，不访问网络。
+
+硬链接与存储对象共用同一份数据：在阅读器中直接修改（如就地保存批注）任一文件，
+存储对象和其他同一论文的文件都会随之改变。复用对象前按收录时的大小和修改时间检查，
+被改动的对象视为缺失并重新获取；需要在文件上批注时可设置 link_mode="copy"
+（或环境变量 PDF_STORE_LINK_MODE=copy），文件改为复制，与存储对象互不影响。
+"""
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional
+
+from models.identifiers import normalize_arxiv_id
+from .downloader import PdfDownloader, get_downloader, is_pdf
+
+if TYPE_CHECKING:
+    from core.identity import IdentityIndex
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PdfStore:
+    """
+    内容寻址的 PDF 存储
+
+    Attributes:
+        root_dir: 存储根目录
+        downloader: 下载缺失 PDF 使用的下载器
+        identity: 论文别名索引（可选，设置时索引按论文的规范键存储）
+        link_mode: 放置文件的方式，hardlink（硬链接，不支持时复制）或 copy（总是复制）
+    """
+
+    LINK_MODES = ("hardlink", "copy")
+
+    def __init__(
+        self,
+        root_dir: Optional[str] = None,
+        downloader: Optional[PdfDownloader] = None,
+        identity: Optional["IdentityIndex"] = None,
+        link_mode: Optional[str] = None
+    ):
+        self.identity = identity
+        self.link_mode = link_mode or os.environ.get('PDF_STORE_LINK_MODE') or "hardlink"
+        if self.link_mode not in self.LINK_MODES:
+            raise ValueError(f"不支持的 PDF 放置方式: {self.link_mode}")
+        self.root_dir = Path(root_dir or os.environ.get('PDF_STORE_DIR') or "output/pdf_store")
+        self.objects_dir = self.root_dir / "objects"
+        self.tmp_dir = self.root_dir / "tmp"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.downloader = downloader or get_downloader()
+
+        self._lock = threading.Lock()
+        self._paper_locks: Dict[str, threading.Lock] = {}
+        self._conn = sqlite3.connect(str(self.root_dir / "index.db"), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS pdfs (
+                    paper_id TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    source_url TEXT,
+                    stored_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pdfs_sha256 ON pdfs (sha256)")
+
+    def normalize_id(self, paper_id: str) -> str:
+        """索引中使用的论文ID（规范键，未设置别名索引时为去掉版本号的 ArXiv ID）"""
+        if self.identity is not None:
+            return self.identity.resolve_id(paper_id)
+        return normalize_arxiv_id(paper_id) or paper_id
+
+    def _object_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / f"{sha256}.pdf"
+
+    def _paper_lock(self, paper_id: str) -> threading.Lock:
+        with self._lock:
+            return self._paper_locks.setdefault(paper_id, threading.Lock())
+
+    def get(self, paper_id: str) -> Optional[str]:
+        """
+        查询论文的存储对象路径
+
+        Returns:
+            存储对象路径，未存储时返回 None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256, size, stored_at FROM pdfs WHERE paper_id = ?", (self.normalize_id(paper_id),)
+            ).fetchone()
+        if row is None:
+            return None
+        sha256, size, stored_at = row
+        path = self._object_path(sha256)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        if st.st_size != size or st.st_mtime > stored_at:
+            # 经硬链接被就地修改过：丢弃该对象（已修改的文件保持原样），由调用方重新获取
+            logger.warning(f"PDF 存储对象已被修改（{st.st_nlink} 个链接），丢弃后重新获取: {paper_id}")
+            self._discard(sha256)
+            return None
+        return str(path)
+
+    def _discard(self, sha256: str) -> None:
+        """删除存储对象及引用它的索引记录"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pdfs WHERE sha256 = ?", (sha256,))
+        self._object_path(sha256).unlink(missing_ok=True)
+
+    def contains(self, paper_id: str) -> bool:
+        """检查论文的 PDF 是否已存储"""
+        return self.get(paper_id) is not None
+
+    def add_file(self, paper_id: str, path: str, source_url: Optional[str] = None, move: bool = False) -> str:
+        """
+        把本地 PDF 加入存储
+
+        内容已存在时复用已有对象；否则按 link_mode 硬链接或复制（move 为 True 时移动）到对象目录。
+
+        Returns:
+            存储对象路径
+        """
+        sha256 = file_sha256(path)
+        target = self._object_path(sha256)
+        if target.exists() and target.stat().st_size != os.path.getsize(path):
+            # 同名对象已被改动，用内容完好的文件替换
+            target.unlink()
+        if target.exists():
+            if move:
+                os.remove(path)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if move:
+                os.replace(path, target)
+            else:
+                self._link_or_copy(Path(path), target)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdfs (paper_id, sha256, size, source_url, stored_at) VALUES (?, ?, ?, ?, ?)",
+                (self.normalize_id(paper_id), sha256, target.stat().st_size, source_url, time.time())
+            )
+        return str(target)
+
+    def fetch(self, paper_id: str, url: str) -> str:
+        """
+        获取论文的存储对象，未存储时下载
+
+        Returns:
+            存储对象路径
+
+        Raises:
+            PdfDownloadError: 下载失败
+        """
+        key = self.normalize_id(paper_id)
+        with self._paper_lock(key):
+            stored = self.get(key)
+            if stored:
+                return stored
+            tmp_path = self.tmp_dir / f"{key.replace('/', '_')}.pdf"
+            self.downloader.download(url, str(tmp_path), overwrite=True)
+            return self.add_file(key, str(tmp_path), source_url=url, move=True)
+
+    def materialize(self, paper_id: str, url: str, dest_path: str) -> str:
+        """
+        在指定路径放置论文 PDF（指向存储对象的硬链接，link_mode 为 copy 时为副本）
+
+        目标路径已有有效 PDF 但索引中没有该论文时，直接收录该文件而不重新下载；
+        copy 模式下目标路径已有的有效 PDF 保持不变（可能带有批注）。
+
+        Returns:
+            目标路径
+
+        Raises:
+            PdfDownloadError: 下载失败
+        """
+        dest = Path(dest_path)
+        stored = self.get(paper_id)
+        if stored is None and dest.exists() and is_pdf(str(dest)):
+            stored = self.add_file(paper_id, str(dest), source_url=url)
+        if stored is None:
+            stored = self.fetch(paper_id, url)
+
+        keep = dest.exists() and (
+            os.path.samefile(stored, dest) or (self.link_mode == "copy" and is_pdf(str(dest)))
+        )
+        if not keep:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp_link = dest.with_name(dest.name + ".link")
+            self._link_or_copy(Path(stored), tmp_link)
+            os.replace(tmp_link, dest)
+        return str(dest)
+
+    def _link_or_copy(self, source: Path, target: Path) -> None:
+        """创建硬链接，copy 模式或跨文件系统等不支持硬链接时复制"""
+        if target.exists():
+            target.unlink()
+        if self.link_mode == "hardlink":
+            try:
+                os.link(source, target)
+                return
+            except OSError:
+                pass
+        shutil.copy2(source, target)
+
+    def stats(self) -> Dict[str, int]:
+        """索引中的论文数、存储对象数和对象总大小"""
+        with self._lock:
+            papers, objects = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT sha256) FROM pdfs"
+            ).fetchone()
+            size = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT sha256, size FROM pdfs)"
+            ).fetchone()[0]
+        return {"papers": papers, "objects": objects, "bytes": size}
+
+    def close(self) -> None:
+        """关闭索引数据库"""
+        with self._lock:
+            self._conn.close()
+
+
+_default_store: Optional[PdfStore] = None
+_default_lock = threading.Lock()
+
+
+def get_pdf_store(identity: Optional["IdentityIndex"] = None) -> PdfStore:
+    """
+    进程内共享的 PDF 存储（根目录由 PDF_STORE_DIR 指定）
+
+    Args:
+        identity: 论文别名索引，共享存储尚未设置别名索引时设置
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = PdfStore(identity=identity)
+        elif identity is not None and _default_store.identity is None:
+            _default_store.identity = identity
+        return _default_store
@@ -2,6 +2,9 @@
 from .base import BaseStorage
 from .notion import NotionStorage
 from .zotero import ZoteroStorage
+from .feishu import FeishuStorage
+from .wolai import WolaiStorage
+from .archive import ArchiveStorage
 from .factory import StorageFactory
 
-__all__ = ['BaseStorage', 'NotionStorage', 'ZoteroStorage', 'StorageFactory']
+__all__ = ['BaseStorage', 'NotionStorage', 'ZoteroStorage', 'FeishuStorage', 'WolaiStorage', 'ArchiveStorage', 'StorageFactory']
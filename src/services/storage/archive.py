@@ -0,0 +1,361 @@
+import os
+import json
+import uuid
+import logging
+import operator
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Set
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # 可选依赖：pip install pyarrow
+    pa = ds = pq = None
+
+from .base import BaseStorage
+from models.identifiers import normalize_arxiv_id
+from models.paper import Paper
+
+if TYPE_CHECKING:
+    from core.identity import IdentityIndex
+
+logger = logging.getLogger(__name__)
+
+# 论文字段列（与 Paper.to_dict 对应）
+PAPER_COLUMNS = (
+    "id", "title", "authors", "published_date", "summary", "summary_cn", "short_summary",
+    "tldr", "pdf_url", "abstract_url", "category", "tags", "arxiv_categories", "doi",
+    "journal_ref", "media_type", "media_url", "source", "citation_count", "influence_score",
+    "keywords",
+)
+# 列表类型的列
+LIST_COLUMNS = ("authors", "tags", "arxiv_categories", "keywords")
+
+# 过滤条件支持的比较运算
+_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _archive_schema() -> "pa.Schema":
+    """归档文件的列结构"""
+    fields = [pa.field("paper_key", pa.string())]
+    for name in PAPER_COLUMNS:
+        if name in LIST_COLUMNS:
+            fields.append(pa.field(name, pa.list_(pa.string())))
+        elif name == "citation_count":
+            fields.append(pa.field(name, pa.int64()))
+        elif name == "influence_score":
+            fields.append(pa.field(name, pa.float64()))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    fields.append(pa.field("archived_at", pa.string()))
+    return pa.schema(fields)
+
+
+def paper_to_row(paper: Paper, archived_at: datetime, paper_key: Optional[str] = None) -> Dict[str, Any]:
+    """论文转换为归档行，TLDR 以 JSON 字符串保存；paper_key 默认为去掉版本号的 ArXiv ID"""
+    data = paper.to_dict()
+    row = {name: data.get(name) for name in PAPER_COLUMNS}
+    row["tldr"] = json.dumps(paper.tldr or {}, ensure_ascii=False)
+    row["paper_key"] = paper_key or normalize_arxiv_id(paper.id) or paper.id
+    row["archived_at"] = archived_at.isoformat()
+    return row
+
+
+def row_to_paper(row: Dict[str, Any]) -> Paper:
+    """归档行转换为论文对象"""
+    data = dict(row)
+    data["tldr"] = json.loads(row.get("tldr") or "{}")
+    for name in LIST_COLUMNS:
+        data[name] = data.get(name) or []
+    return Paper.from_dict(data)
+
+
+class ArchiveStorage(BaseStorage):
+    """
+    本地列式归档存储
+
+    每篇处理完成的论文（包含增强结果）追加写入按归档日期分区的 Parquet 文件
+    （`<root>/date=YYYY-MM-DD/part-*.parquet`），不访问任何远程服务，
+    可作为分析、去重和重新导出的本地数据源。文件只追加不修改，
+    同一论文的多次写入在查询时保留最新的一行。
+    """
+
+    def __init__(
+        self,
+        root_dir: str = None,
+        flush_size: int = 100,
+        create_time: datetime = None,
+        identity: Optional["IdentityIndex"] = None,
+        **kwargs
+    ):
+        """
+        Args:
+            root_dir: 归档根目录
+            flush_size: 单篇插入先缓冲，累计到该数量时写出一个文件
+            create_time: 写入时间
+            identity: 论文别名索引（可选，设置时 paper_key 为论文的规范键）
+        """
+        super().__init__(create_time=create_time, **kwargs)
+        self.identity = identity
+        self.root_dir = Path(root_dir or os.environ.get('PAPER_ARCHIVE_DIR') or "output/archive")
+        self.flush_size = flush_size
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._keys: Optional[Set[str]] = None
+        self._lock = threading.RLock()
+
+    def get_storage_name(self) -> str:
+        return "archive"
+
+    def _key(self, paper_id: str) -> str:
+        """归档中使用的论文键"""
+        if self.identity is not None:
+            return self.identity.resolve_id(paper_id)
+        return normalize_arxiv_id(paper_id) or paper_id
+
+    def is_available(self) -> bool:
+        """检查是否已安装 pyarrow"""
+        return pa is not None
+
+    def _require_pyarrow(self) -> None:
+        if pa is None:
+            raise RuntimeError("本地归档存储需要 pyarrow，请运行 pip install pyarrow")
+
+    def _has_files(self) -> bool:
+        return self.root_dir.exists() and any(self.root_dir.glob("date=*/*.parquet"))
+
+    def _dataset(self) -> "ds.Dataset":
+        """以 hive 分区打开归档目录，`date` 分区列可用于过滤"""
+        return ds.dataset(
+            str(self.root_dir),
+            schema=_archive_schema().append(pa.field("date", pa.string())),
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+        )
+
+    def _ensure_keys(self) -> Set[str]:
+        """加载已归档论文的 paper_key 集合（只读取一列）"""
+        with self._lock:
+            if self._keys is None:
+                self._require_pyarrow()
+                self._keys = set()
+                if self._has_files():
+                    self._keys.update(self._dataset().to_table(columns=["paper_key"]).column("paper_key").to_pylist())
+            return self._keys
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """按归档日期分区写出，每个分区一个文件"""
+        self._require_pyarrow()
+        partitions: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            partitions.setdefault(row["archived_at"][:10], []).append(row)
+
+        paths: List[str] = []
+        with self._lock:
+            for date, partition_rows in partitions.items():
+                directory = self.root_dir / f"date={date}"
+                directory.mkdir(parents=True, exist_ok=True)
+                path = directory / f"part-{datetime.now():%H%M%S}-{uuid.uuid4().hex[:8]}.parquet"
+                pq.write_table(pa.Table.from_pylist(partition_rows, schema=_archive_schema()), str(path))
+                paths.append(str(path))
+            self._ensure_keys().update(row["paper_key"] for row in rows)
+
+        logger.debug(f"归档写入 {len(rows)} 篇论文: {paths}")
+        return paths
+
+    def flush(self) -> None:
+        """写出缓冲中的论文"""
+        with self._lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+            self._write_rows(rows)
+
+    def close(self) -> None:
+        """写出缓冲后关闭"""
+        self.flush()
+
+    def exists(self, paper_id: str) -> bool:
+        """检查论文是否已归档"""
+        key = self._key(paper_id)
+        with self._lock:
+            return key in self._ensure_keys() or any(row["paper_key"] == key for row in self._buffer)
+
+    def exists_many(self, paper_ids: List[str]) -> Dict[str, bool]:
+        """批量检查论文是否已归档"""
+        return {paper_id: self.exists(paper_id) for paper_id in paper_ids}
+
+    def insert(self, paper: Paper, **kwargs) -> Dict:
+        """
+        归档一篇论文
+
+        写入先进入缓冲，累计 flush_size 篇或调用 flush/close 时写出，避免产生大量小文件。
+
+        Returns:
+            {"success", "id", "message"}
+        """
+        self._require_pyarrow()
+        with self._lock:
+            self._buffer.append(paper_to_row(paper, datetime.now(), self._key(paper.id)))
+            if len(self._buffer) >= self.flush_size:
+                self.flush()
+        return {"success": True, "id": paper.id, "message": "已归档"}
+
+    def batch_insert(self, papers: List[Paper], skip_existing: bool = True, **kwargs) -> Dict[str, Any]:
+        """
+        批量归档论文，每个分区写出一个文件
+
+        Returns:
+            {"success": [...], "failed": [{"id", "error"}], "skipped": [...], "files": [文件路径]}
+        """
+        results: Dict[str, Any] = {"success": [], "failed": [], "skipped": [], "files": []}
+
+        archived_at = datetime.now()
+        rows: List[Dict[str, Any]] = []
+        seen: Set[str] = set()
+        for paper in papers:
+            row = paper_to_row(paper, archived_at, self._key(paper.id))
+            if row["paper_key"] in seen or (skip_existing and self.exists(paper.id)):
+                results["skipped"].append(paper.id)
+                continue
+            seen.add(row["paper_key"])
+            rows.append(row)
+
+        if not rows:
+            return results
+
+        try:
+            results["files"] = self._write_rows(rows)
+            results["success"].extend(row["id"] for row in rows)
+        except Exception as e:
+            logger.error(f"归档写入失败 ({len(rows)} 篇): {e}")
+            results["failed"].extend({"id": row["id"], "error": str(e)} for row in rows)
+        return results
+
+    def update(self, paper_id: str, data: Any, **kwargs) -> Dict:
+        """
+        追加论文的新版本
+
+        与最新一行比较，内容未变化时不写入。
+
+        Returns:
+            {"success", "id", "message", "changed"}
+
+        Raises:
+            KeyError: 论文未归档
+        """
+        paper = self._as_paper(paper_id, data)
+        current = self.scan({"paper_key": self._key(paper_id)}, limit=1)
+        if not current:
+            raise KeyError(f"归档中不存在该论文: {paper_id}")
+
+        row = paper_to_row(paper, datetime.now(), self._key(paper.id))
+        changed = [name for name in PAPER_COLUMNS if row[name] != current[0].get(name)]
+        if changed:
+            self._write_rows([row])
+        return {"success": True, "id": paper.id, "message": "已追加新版本" if changed else "内容未变化", "changed": changed}
+
+    @staticmethod
+    def _build_filter(filters: Dict[str, Any]) -> tuple:
+        """
+        把过滤条件转换为 pyarrow 表达式
+
+        条件值可以是单个值（相等）、列表或集合（in），或 (运算符, 值) 元组，
+        运算符支持 == != < <= > >= in contains；contains 用于列表列，读取后在本地过滤。
+
+        Returns:
+            (表达式或 None, [(列表列, 需包含的值)])
+        """
+        expression = None
+        contains: List[tuple] = []
+        for column, condition in filters.items():
+            if isinstance(condition, tuple):
+                op, value = condition
+            elif isinstance(condition, (list, set)):
+                op, value = "in", list(condition)
+            else:
+                op, value = "==", condition
+
+            if op == "contains":
+                contains.append((column, value))
+                continue
+            if op == "in":
+                term = ds.field(column).isin(list(value))
+            elif op in _OPERATORS:
+                term = _OPERATORS[op](ds.field(column), value)
+            else:
+                raise ValueError(f"不支持的过滤运算符: {op}")
+            expression = term if expression is None else expression & term
+        return expression, contains
+
+    def scan(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        columns: Optional[List[str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        按列过滤和投影读取归档
+
+        Args:
+            filters: 过滤条件，如 {"date": (">=", "2024-03-01"), "category": "RL", "tags": ("contains", "LLM")}
+            columns: 只返回这些列（默认全部）
+            limit: 最多返回的行数
+
+        Returns:
+            行字典列表，同一论文只保留最新写入的一行，按写入时间从新到旧排列
+        """
+        self._require_pyarrow()
+        self.flush()
+        if not self._has_files():
+            return []
+
+        filters = filters or {}
+        expression, contains = self._build_filter(filters)
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(
+                list(columns) + [column for column, _ in contains] + ["paper_key", "archived_at"]
+            ))
+
+        # 先按 paper_key 找出每篇论文最新一行的写入时间（只读两列），再对最新版本套用过滤条件，
+        # 否则旧版本满足条件而最新版本不满足时会返回过时的行
+        key_filter = self._build_filter({"paper_key": filters["paper_key"]})[0] if "paper_key" in filters else None
+        versions = self._dataset().to_table(columns=["paper_key", "archived_at"], filter=key_filter)
+        latest_at: Dict[str, Any] = {}
+        for key, archived_at in zip(versions.column("paper_key").to_pylist(), versions.column("archived_at").to_pylist()):
+            if key not in latest_at or archived_at > latest_at[key]:
+                latest_at[key] = archived_at
+
+        rows = self._dataset().to_table(columns=read_columns, filter=expression).to_pylist()
+        latest: Dict[str, Dict[str, Any]] = {
+            row["paper_key"]: row for row in rows
+            if row["archived_at"] == latest_at.get(row["paper_key"])
+            and all(value in (row.get(column) or []) for column, value in contains)
+        }
+        result = sorted(latest.values(), key=lambda r: r["archived_at"], reverse=True)
+
+        if limit is not None:
+            result = result[:limit]
+        if columns is not None:
+            result = [{column: row.get(column) for column in columns} for row in result]
+        return result
+
+    def query(self, filters: Optional[Dict[str, Any]] = None, limit: int = 100, **kwargs) -> List[Paper]:
+        """按列过滤查询论文，过滤条件格式见 scan"""
+        return [row_to_paper(row) for row in self.scan(filters, limit=limit)]
+
+    def get(self, paper_id: str) -> Optional[Paper]:
+        """获取论文的最新归档版本"""
+        rows = self.scan({"paper_key": self._key(paper_id)}, limit=1)
+        return row_to_paper(rows[0]) if rows else None
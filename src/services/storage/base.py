@@ -1,3 +1,5 @@
+import json
+import hashlib
 import logging
 from abc import abstractmethod
 from typing import Dict, List, Any, Optional
@@ -8,6 +10,23 @@ from models.paper import Paper
 
 logger = logging.getLogger(__name__)
 
+
+def hash_fields(fields: Dict[str, Any]) -> Dict[str, str]:
+    """计算各字段载荷的哈希，用于与上次写入的内容逐字段比较"""
+    return {
+        name: hashlib.sha256(
+            json.dumps(value, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        for name, value in fields.items()
+    }
+
+
+def changed_fields(hashes: Dict[str, str], previous: Optional[Dict[str, str]]) -> List[str]:
+    """返回哈希与上次写入不同的字段名；没有上次的记录时全部视为已变化"""
+    previous = previous or {}
+    return [name for name, digest in hashes.items() if previous.get(name) != digest]
+
+
 class BaseStorage(StorageInterface):
     """存储服务基类"""
 
@@ -15,11 +34,14 @@ class BaseStorage(StorageInterface):
         self,
         create_time: datetime = None,
         use_proxy: bool = True,
-        proxy_url: str = "http://127.0.0.1:7890"
+        proxy_url: str = "http://127.0.0.1:7890",
+        ledger: Any = None
     ):
         self.create_time = create_time or datetime.now()
         self.use_proxy = use_proxy
         self.proxy_url = proxy_url
+        # 同步账本（可选，core.ledger.SyncLedger），记录远程ID和各字段的载荷哈希
+        self.ledger = ledger
 
     @property
     def proxies(self) -> Optional[Dict[str, str]]:
@@ -62,3 +84,47 @@ class BaseStorage(StorageInterface):
                 results["failed"].append({"id": paper.id, "error": str(e)})
 
         return results
+
+    def batch_update(self, papers: List[Paper], **kwargs) -> Dict[str, Any]:
+        """
+        批量差量更新论文
+
+        Returns:
+            {"success": [...], "failed": [{"id", "error"}], "skipped": [内容未变化的论文ID]}
+        """
+        results = {
+            "success": [],
+            "failed": [],
+            "skipped": []
+        }
+
+        for paper in papers:
+            try:
+                result = self.update(paper.id, paper, **kwargs)
+            except Exception as e:
+                logger.error(f"更新论文失败 {paper.id}: {e}")
+                results["failed"].append({"id": paper.id, "error": str(e)})
+                continue
+
+            if not result.get("success"):
+                results["failed"].append({"id": paper.id, "error": result.get("message", "")})
+            elif result.get("changed"):
+                results["success"].append(paper.id)
+            else:
+                results["skipped"].append(paper.id)
+
+        return results
+
+    @staticmethod
+    def _as_paper(paper_id: str, data: Any) -> Paper:
+        """把 update 的数据参数转换为论文对象（论文对象或 Paper.to_dict() 格式的完整字典）"""
+        if isinstance(data, Paper):
+            return data
+        return Paper.from_dict({**data, "id": paper_id})
+
+    def _previous_field_hashes(self, paper_id: str) -> Optional[Dict[str, str]]:
+        """读取账本中上次写入的各字段哈希"""
+        if self.ledger is None:
+            return None
+        entry = self.ledger.get(self.get_storage_name(), paper_id)
+        return entry["field_hashes"] if entry else None
@@ -2,6 +2,9 @@ from typing import Dict, Type, List
 from .base import BaseStorage
 from .notion import NotionStorage
 from .zotero import ZoteroStorage
+from .feishu import FeishuStorage
+from .wolai import WolaiStorage
+from .archive import ArchiveStorage
 
 class StorageFactory:
     """存储服务工厂"""
@@ -9,6 +12,9 @@ class StorageFactory:
     _storages: Dict[str, Type[BaseStorage]] = {
         'notion': NotionStorage,
         'zotero': ZoteroStorage,
+        'feishu': FeishuStorage,
+        'wolai': WolaiStorage,
+        'archive': ArchiveStorage,
     }
 
     @classmethod
@@ -0,0 +1,330 @@
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+import requests
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+from .base import BaseStorage
+from .rate_limit import parse_delay_seconds
+from models.identifiers import normalize_arxiv_id
+from models.paper import Paper
+
+logger = logging.getLogger(__name__)
+
+
+def _field_text(value: Any) -> str:
+    """多维表格字段值转为文本（超链接字段为 {"link", "text"}，文本字段可能是分段列表）"""
+    if isinstance(value, dict):
+        return value.get("link") or value.get("text") or ""
+    if isinstance(value, list):
+        return "".join(_field_text(item) for item in value)
+    return value or ""
+
+
+class FeishuStorage(BaseStorage):
+    """飞书多维表格存储服务"""
+
+    API_BASE_URL = "https://open.feishu.cn/open-apis"
+    # records/batch_create 单次最多写入 500 条记录
+    MAX_RECORDS_PER_WRITE = 500
+    # 在令牌过期前提前刷新的秒数
+    TOKEN_REFRESH_MARGIN = 300
+    # 接口未返回 expire 时按 2 小时计算
+    DEFAULT_TOKEN_EXPIRE = 7200
+    # 令牌失效的错误码，收到后强制刷新令牌并重试一次
+    INVALID_TOKEN_CODES = (99991661, 99991663, 99991668)
+    # 服务端未给出重置时间时的默认等待秒数
+    DEFAULT_RETRY_AFTER = 1
+    # 存在性检索每次合并的 ArXiv ID 数和每页记录数
+    MAX_SEARCH_CONDITIONS = 20
+    SEARCH_PAGE_SIZE = 500
+
+    def __init__(
+        self,
+        app_id: str = None,
+        app_secret: str = None,
+        app_token: str = None,
+        table_id: str = None,
+        create_time: datetime = None,
+        max_retries: int = 3,
+        timeout: int = 30,
+        **kwargs
+    ):
+        """
+        Args:
+            app_id: 飞书应用ID
+            app_secret: 飞书应用密钥
+            app_token: 多维表格 app_token
+            table_id: 数据表ID
+            create_time: 写入时间
+            max_retries: 429 响应的最大重试次数
+            timeout: 请求超时（秒）
+        """
+        super().__init__(create_time=create_time, **kwargs)
+        self.app_id = app_id or os.environ.get('FEISHU_APP_ID')
+        self.app_secret = app_secret or os.environ.get('FEISHU_APP_SECRET')
+        self.app_token = app_token or os.environ.get('FEISHU_APP_TOKEN')
+        self.table_id = table_id or os.environ.get('FEISHU_TABLE_ID')
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        # tenant_access_token 缓存，过期前 TOKEN_REFRESH_MARGIN 秒刷新
+        self._access_token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+
+    def get_storage_name(self) -> str:
+        return "feishu"
+
+    def is_available(self) -> bool:
+        """检查飞书服务是否可用"""
+        return bool(self.app_id and self.app_secret and self.app_token and self.table_id)
+
+    def _get_tenant_access_token(self, force_refresh: bool = False) -> str:
+        """
+        获取 tenant_access_token
+
+        按接口返回的 `expire` 缓存令牌，在过期前提前刷新；多个线程共享同一次刷新。
+        """
+        with self._token_lock:
+            if (
+                not force_refresh
+                and self._access_token
+                and time.monotonic() < self._token_expires_at - self.TOKEN_REFRESH_MARGIN
+            ):
+                return self._access_token
+
+            response = requests.post(
+                f"{self.API_BASE_URL}/auth/v3/tenant_access_token/internal",
+                headers={"Content-Type": "application/json; charset=utf-8"},
+                json={"app_id": self.app_id, "app_secret": self.app_secret},
+                proxies=self.proxies,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            result = response.json()
+            if result.get("code") != 0:
+                raise PermissionError(f"获取飞书访问令牌失败: {result.get('msg', result)}")
+
+            self._access_token = result.get("tenant_access_token")
+            expire = result.get("expire") or self.DEFAULT_TOKEN_EXPIRE
+            self._token_expires_at = time.monotonic() + expire
+            logger.debug(f"已刷新飞书访问令牌，{expire} 秒后过期")
+            return self._access_token
+
+    def _request(self, method: str, url: str, **kwargs) -> Dict[str, Any]:
+        """
+        发送飞书开放平台请求
+
+        429 响应按 `x-ogw-ratelimit-reset` 等待后重试；令牌失效时刷新令牌重试一次。
+
+        Returns:
+            响应体
+        """
+        token_refreshed = False
+        force_refresh = False
+        attempt = 0
+        while True:
+            headers = {
+                "Authorization": f"Bearer {self._get_tenant_access_token(force_refresh=force_refresh)}",
+                "Content-Type": "application/json; charset=utf-8"
+            }
+            force_refresh = False
+            response = requests.request(
+                method,
+                url,
+                headers=headers,
+                proxies=self.proxies,
+                timeout=self.timeout,
+                **kwargs
+            )
+
+            if response.status_code == 429 and attempt < self.max_retries:
+                attempt += 1
+                retry_after = (
+                    parse_delay_seconds(response.headers.get('x-ogw-ratelimit-reset'))
+                    or self.DEFAULT_RETRY_AFTER
+                )
+                logger.warning(f"飞书限流，{retry_after} 秒后重试 (尝试 {attempt}/{self.max_retries})")
+                time.sleep(retry_after)
+                continue
+
+            result = response.json()
+            if result.get("code") in self.INVALID_TOKEN_CODES and not token_refreshed:
+                logger.info("飞书访问令牌已失效，刷新后重试")
+                token_refreshed = force_refresh = True
+                continue
+
+            return result
+
+    def _get_records_url(self) -> str:
+        """获取数据表记录API URL"""
+        return f"{self.API_BASE_URL}/bitable/v1/apps/{self.app_token}/tables/{self.table_id}/records"
+
+    def _build_fields(self, paper: Paper) -> Dict[str, Any]:
+        """构建多维表格记录字段（字段名需与表格列名一致）"""
+        tldr_keys = ('动机', '方法', '结果')
+        tldr_content = "\n".join(
+            f"{key}: {paper.tldr[key]}" for key in tldr_keys if paper.tldr.get(key)
+        )
+
+        return {
+            "标题": paper.title,
+            "作者": ", ".join(paper.authors),
+            "发表日期": paper.published_date.strftime('%Y-%m-%d') if paper.published_date else "",
+            "领域": paper.category,
+            "PDF链接": paper.pdf_url,
+            "AI总结": paper.short_summary,
+            "标签": paper.tags,
+            "TLDR": tldr_content,
+            "摘要": f"原文:\n{paper.summary}\n\n中文译文:\n{paper.summary_cn}",
+        }
+
+    def exists(self, paper_id: str) -> bool:
+        """检查论文是否已写入多维表格（见 exists_many）"""
+        return self.exists_many([paper_id])[paper_id]
+
+    def exists_many(self, paper_ids: List[str]) -> Dict[str, bool]:
+        """
+        批量检查论文是否已写入多维表格
+
+        先查账本；账本没有记录的 ArXiv ID 合并为“PDF链接包含任一ID”的条件检索记录（records/search），
+        每次最多 MAX_SEARCH_CONDITIONS 个ID。不是 ArXiv ID 的论文只以账本为准，检索失败时视为不存在。
+        """
+        found = {paper_id: False for paper_id in paper_ids}
+        if self.ledger is not None:
+            written = self.ledger.written_storages(paper_ids, [self.get_storage_name()])
+            found.update({paper_id: True for paper_id in written})
+
+        pending: Dict[str, List[str]] = {}
+        for paper_id in paper_ids:
+            arxiv_id = normalize_arxiv_id(paper_id)
+            if arxiv_id and not found[paper_id]:
+                pending.setdefault(arxiv_id, []).append(paper_id)
+
+        arxiv_ids = list(pending)
+        for start in range(0, len(arxiv_ids), self.MAX_SEARCH_CONDITIONS):
+            chunk = arxiv_ids[start:start + self.MAX_SEARCH_CONDITIONS]
+            try:
+                links = self._search_links(chunk)
+            except Exception as e:
+                logger.warning(f"检查飞书记录失败 ({len(chunk)} 篇): {e}")
+                continue
+            for arxiv_id in chunk:
+                if any(arxiv_id in link for link in links):
+                    found.update({paper_id: True for paper_id in pending[arxiv_id]})
+        return found
+
+    def _search_links(self, arxiv_ids: List[str]) -> List[str]:
+        """检索 PDF 链接包含任一 ArXiv ID 的记录，返回这些记录的 PDF 链接"""
+        body = {
+            "field_names": ["PDF链接"],
+            "filter": {
+                "conjunction": "or",
+                "conditions": [
+                    {"field_name": "PDF链接", "operator": "contains", "value": [arxiv_id]} for arxiv_id in arxiv_ids
+                ]
+            }
+        }
+        links: List[str] = []
+        params: Dict[str, Any] = {"page_size": self.SEARCH_PAGE_SIZE}
+        while True:
+            result = self._request('POST', f"{self._get_records_url()}/search", params=params, json=body)
+            if result.get("code") != 0:
+                raise RuntimeError(result.get("msg", result))
+            data = result.get("data") or {}
+            links.extend(_field_text(item.get("fields", {}).get("PDF链接")) for item in data.get("items") or [])
+            if not data.get("has_more") or not data.get("page_token"):
+                return links
+            params["page_token"] = data["page_token"]
+
+    def update(self, paper_id: str, data: Dict) -> Dict:
+        """飞书暂不支持更新"""
+        raise NotImplementedError("飞书存储暂不支持更新操作")
+
+    def insert(self, paper: Paper, **kwargs) -> Dict:
+        """
+        插入论文到飞书多维表格
+
+        Returns:
+            {"success", "id", "message", "response"}
+        """
+        result = self._request('POST', self._get_records_url(), json={"fields": self._build_fields(paper)})
+
+        if result.get("code") != 0:
+            logger.warning(f"飞书API错误: {result}")
+            return {
+                "success": False,
+                "id": None,
+                "message": result.get("msg", "未知错误"),
+                "response": result
+            }
+
+        return {
+            "success": True,
+            "id": result.get("data", {}).get("record", {}).get("record_id"),
+            "message": "创建成功",
+            "response": result
+        }
+
+    def batch_insert(self, papers: List[Paper], skip_existing: bool = True, **kwargs) -> Dict[str, Any]:
+        """
+        批量插入论文
+
+        使用 `records/batch_create` 接口，每次请求最多写入 500 条记录。
+        传入 `idempotency_key` 时按批次内的论文ID为每个请求生成 UUIDv4 格式的
+        client_token，重试同一批次不会重复创建记录。
+
+        Returns:
+            {"success": [...], "failed": [{"id", "error"}], "skipped": [...], "records": {paper_id: record_id}}
+        """
+        results: Dict[str, Any] = {"success": [], "failed": [], "skipped": [], "records": {}}
+
+        existing = self.exists_many([paper.id for paper in papers]) if skip_existing else {}
+        pending = []
+        for paper in papers:
+            if existing.get(paper.id):
+                results["skipped"].append(paper.id)
+            else:
+                pending.append(paper)
+
+        for start in range(0, len(pending), self.MAX_RECORDS_PER_WRITE):
+            chunk = pending[start:start + self.MAX_RECORDS_PER_WRITE]
+            params = {}
+            if kwargs.get('idempotency_key'):
+                # 令牌由批次内的论文ID决定，过滤结果变化时不会与其他批次的令牌重合
+                chunk_ids = ",".join(sorted(paper.id for paper in chunk))
+                digest = hashlib.md5(f"{kwargs['idempotency_key']}:{chunk_ids}".encode('utf-8')).digest()
+                params['client_token'] = str(uuid.UUID(bytes=digest[:16], version=4))
+
+            try:
+                result = self._request(
+                    'POST',
+                    f"{self._get_records_url()}/batch_create",
+                    params=params,
+                    json={"records": [{"fields": self._build_fields(paper)} for paper in chunk]}
+                )
+            except Exception as e:
+                logger.error(f"飞书批量写入失败: {e}")
+                results["failed"].extend({"id": paper.id, "error": str(e)} for paper in chunk)
+                continue
+
+            if result.get("code") != 0:
+                logger.warning(f"飞书批量写入失败: {result}")
+                error = result.get("msg", "未知错误")
+                results["failed"].extend({"id": paper.id, "error": error} for paper in chunk)
+                continue
+
+            # 返回的记录与请求顺序一致
+            records = result.get("data", {}).get("records", [])
+            for paper, record in zip(chunk, records):
+                results["success"].append(paper.id)
+                results["records"][paper.id] = record.get("record_id")
+            for paper in chunk[len(records):]:
+                results["failed"].append({"id": paper.id, "error": "响应中缺少对应记录"})
+
+        return results
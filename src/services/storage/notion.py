@@ -1,35 +1,243 @@
 import os
 import logging
+import threading
 import requests
-from typing import Dict, Any, Optional, List
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, Optional, List, Set
+from datetime import datetime, timedelta
 
-from .base import BaseStorage
+from .base import BaseStorage, changed_fields, hash_fields
+from .rate_limit import TokenBucket, parse_delay_seconds
+from models.identifiers import arxiv_id_from_url, normalize_arxiv_id
 from models.paper import Paper
 
 logger = logging.getLogger(__name__)
 
+
+# 差量更新时代表页面内容块的字段名
+CONTENT_FIELD = "__content__"
+# 页面内容替换时保留的媒体块类型
+MEDIA_BLOCK_TYPES = ("image", "video", "embed", "file", "pdf")
+
+
+def _title_property(content: str) -> Dict:
+    return {"title": [{"text": {"content": content}}]}
+
+
+def _rich_text_property(content: str) -> Dict:
+    return {"rich_text": [{"text": {"content": content}}]}
+
+
+def _date_property(content: str) -> Dict:
+    return {"date": {"start": content}}
+
+
+def _select_property(content: str) -> Dict:
+    return {"select": {"name": content}}
+
+
+def _multi_select_property(items: list) -> Dict:
+    return {"multi_select": [{"name": tag} for tag in items]}
+
+
+def _url_property(content: str) -> Dict:
+    return {"url": content}
+
+
+def _heading_block(content: str, level: int = 1) -> Dict:
+    block_type = f"heading_{level}"
+    return {
+        "object": "block",
+        "type": block_type,
+        block_type: {
+            "rich_text": [{"type": "text", "text": {"content": content}}]
+        }
+    }
+
+
+def _paragraph_block(content: str) -> Dict:
+    return {
+        "object": "block",
+        "type": "paragraph",
+        "paragraph": {
+            "rich_text": [{"type": "text", "text": {"content": content}}]
+        }
+    }
+
+
+def _media_block(media_type: str, url: str) -> Dict:
+    return {
+        "object": "block",
+        "type": media_type,
+        media_type: {
+            "type": "external",
+            "external": {"url": url}
+        }
+    }
+
+
+def _block_key(block: Dict) -> tuple:
+    """内容块的类型和纯文本，用于比较页面中已有的块与新构建的块"""
+    block_type = block.get("type", "")
+    rich_text = block.get(block_type, {}).get("rich_text", [])
+    text = "".join(item.get("plain_text") or item.get("text", {}).get("content", "") for item in rich_text)
+    return block_type, text
+
+
+def build_properties(
+    paper: Paper,
+    create_time: Optional[datetime],
+    arxiv_id_property: Optional[str] = "ArXiv ID"
+) -> Dict[str, Any]:
+    """构建页面属性，create_time 为 None 时不包含写入时间 `日期`"""
+    properties = {
+        '标题': _title_property(paper.title),
+        '首次发表日期': _rich_text_property(
+            paper.published_date.strftime('%Y-%m') if paper.published_date else ''
+        ),
+        '作者': _rich_text_property(', '.join(paper.authors)),
+        'AI总结': _rich_text_property(paper.short_summary),
+        '领域': _select_property(paper.category),
+        'PDF链接': _url_property(paper.pdf_url),
+        '标签': _multi_select_property(paper.tags),
+    }
+    if arxiv_id_property:
+        properties[arxiv_id_property] = _rich_text_property(normalize_arxiv_id(paper.id))
+    if create_time is not None:
+        properties['日期'] = _date_property(create_time.strftime('%Y-%m-%d'))
+    return properties
+
+
+def build_content_blocks(paper: Paper) -> List[Dict]:
+    """构建页面内容块（不含媒体块）"""
+    blocks: List[Dict] = [_heading_block('TL;DR', level=1)]
+
+    tldr_keys = ('动机', '方法', '结果')
+    if any(paper.tldr.get(key) for key in tldr_keys):
+        for key in tldr_keys:
+            if paper.tldr.get(key):
+                blocks.append(_heading_block(key, level=2))
+                blocks.append(_paragraph_block(paper.tldr[key]))
+
+    blocks.append(_heading_block('摘要', level=1))
+    blocks.append(_heading_block('原文', level=2))
+    blocks.append(_paragraph_block(paper.summary))
+    blocks.append(_heading_block('中文译文', level=2))
+    blocks.append(_paragraph_block(paper.summary_cn))
+    return blocks
+
+
+def build_page_payload(
+    paper: Paper,
+    db_id: str,
+    create_time: datetime,
+    hf_obj: Optional[Dict] = None,
+    arxiv_id_property: Optional[str] = "ArXiv ID"
+) -> Dict[str, Any]:
+    """
+    构建创建Notion页面的请求体
+
+    纯函数，不依赖也不修改任何实例状态，可在多个线程中并发调用。
+
+    Args:
+        paper: 论文对象
+        db_id: 目标数据库ID
+        create_time: 写入 `日期` 属性的日期
+        hf_obj: HuggingFace论文信息（可选，包含 media_type、media_url）
+        arxiv_id_property: ArXiv ID属性名，为 None 时不写入
+
+    Returns:
+        `POST /v1/pages` 请求体
+    """
+    blocks: List[Dict] = []
+
+    # 媒体块
+    if hf_obj and hf_obj.get('media_type') and hf_obj.get('media_url'):
+        blocks.append(_media_block(hf_obj['media_type'], hf_obj['media_url']))
+
+    # 内容块
+    blocks.extend(build_content_blocks(paper))
+
+    return {
+        'parent': {'database_id': db_id},
+        'properties': build_properties(paper, create_time, arxiv_id_property),
+        'children': blocks,
+    }
+
+
+def build_update_fields(paper: Paper, arxiv_id_property: Optional[str] = "ArXiv ID") -> Dict[str, Any]:
+    """
+    构建差量更新比较的字段
+
+    每个页面属性为一个字段（不含写入时间 `日期`），页面内容块整体为 CONTENT_FIELD 字段。
+    """
+    fields: Dict[str, Any] = build_properties(paper, None, arxiv_id_property)
+    fields[CONTENT_FIELD] = build_content_blocks(paper)
+    return fields
+
+
 class NotionStorage(BaseStorage):
     """Notion存储服务"""
 
     API_URL = "https://api.notion.com/v1/pages"
+    DATABASE_URL = "https://api.notion.com/v1/databases"
+    BLOCKS_URL = "https://api.notion.com/v1/blocks"
     API_VERSION = "2022-06-28"
+    QUERY_PAGE_SIZE = 100
+    # 索引窗口外的论文按ID补查时，每个查询请求包含的ID数
+    LOOKUP_BATCH_SIZE = 25
+    # 服务端未给出 Retry-After 时的默认等待秒数
+    DEFAULT_RETRY_AFTER = 1
+
+    # Notion 对每个集成平均限制 3 次请求/秒，所有实例和线程共享同一个令牌桶
+    _rate_limiter = TokenBucket(rate=3, capacity=3)
 
     def __init__(
         self,
         db_id: str = None,
         secret: str = None,
         create_time: datetime = None,
+        arxiv_id_property: Optional[str] = "ArXiv ID",
+        index_days: Optional[int] = 30,
+        max_workers: int = 3,
+        max_retries: int = 3,
+        timeout: int = 30,
         **kwargs
     ):
+        """
+        Args:
+            db_id: Notion数据库ID
+            secret: Notion集成密钥
+            create_time: 写入的日期
+            arxiv_id_property: 保存ArXiv ID的文本属性名，为 None 时不写入该属性
+            index_days: 存在性索引预加载的日期窗口（天），为 None 时加载整个数据库；
+                窗口只覆盖 `日期` 在最近 index_days 天内的页面，未命中的ID会再按
+                ArXiv ID/PDF链接逐批查询数据库
+            max_workers: 批量写入的并发线程数
+            max_retries: 429/503 响应的最大重试次数
+            timeout: 请求超时（秒）
+        """
         super().__init__(create_time=create_time, **kwargs)
         self.db_id = db_id or os.environ.get('NOTION_DB_ID')
         self.secret = secret or os.environ.get('NOTION_SECRET')
-
-        # 请求构建器
-        self._req_body: Dict = {}
-        self._properties: Dict = {}
-        self._blocks: List = []
+        self.arxiv_id_property = arxiv_id_property
+        self.index_days = index_days
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        # 存在性索引 {规范化ArXiv ID: page_id}
+        self._index: Dict[str, str] = {}
+        self._index_loaded = False
+        self._index_failed = False
+        # 索引是否只覆盖日期窗口，以及窗口外已确认不存在的ID
+        self._index_windowed = False
+        self._index_misses: Set[str] = set()
+        self._index_lock = threading.Lock()
+        # 数据库结构检查结果：实际写入的ArXiv ID属性名，检查失败时为 None
+        self._schema_checked = False
+        self._schema_property: Optional[str] = arxiv_id_property
+        self._schema_lock = threading.Lock()
 
     def get_storage_name(self) -> str:
         return "notion"
@@ -38,133 +246,454 @@ class NotionStorage(BaseStorage):
         """检查Notion服务是否可用"""
         return bool(self.db_id and self.secret)
 
-    def exists(self, paper_id: str) -> bool:
-        """Notion暂不支持检查，返回False"""
-        return False
-
-    def update(self, paper_id: str, data: Dict) -> Dict:
-        """Notion暂不支持更新"""
-        raise NotImplementedError("Notion存储暂不支持更新操作")
-
-    def insert(self, paper: Paper, **kwargs) -> Dict:
-        """插入论文到Notion"""
-        self._reset_builder()
-
-        hf_obj = kwargs.get('hf_obj')
-
-        # 设置数据库ID
-        self._req_body['parent'] = {'database_id': self.db_id}
-
-        # 添加属性
-        self._add_property_title('标题', paper.title)
-        self._add_property_date('日期', self.create_time.strftime('%Y-%m-%d'))
-        self._add_property_rich_text('首次发表日期', paper.published_date.strftime('%Y-%m') if paper.published_date else '')
-        self._add_property_rich_text('作者', ', '.join(paper.authors))
-        self._add_property_rich_text('AI总结', paper.short_summary)
-        self._add_property_select('领域', paper.category)
-        self._add_property_url('PDF链接', paper.pdf_url)
-        self._add_property_multi_select('标签', paper.tags)
-
-        # 添加媒体块
-        if hf_obj and hf_obj.get('media_type') and hf_obj.get('media_url'):
-            self._add_media_block(hf_obj['media_type'], hf_obj['media_url'])
-
-        # 添加内容块
-        self._add_heading('TL;DR', level=1)
-
-        tldr_keys = ('动机', '方法', '结果')
-        if any(paper.tldr.get(key) for key in tldr_keys):
-            for key in tldr_keys:
-                if paper.tldr.get(key):
-                    self._add_heading(key, level=2)
-                    self._add_paragraph(paper.tldr[key])
-
-        self._add_heading('摘要', level=1)
-        self._add_heading('原文', level=2)
-        self._add_paragraph(paper.summary)
-        self._add_heading('中文译文', level=2)
-        self._add_paragraph(paper.summary_cn)
-
-        return self._send()
-
-    def _reset_builder(self):
-        """重置请求构建器"""
-        self._req_body = {}
-        self._properties = {}
-        self._blocks = []
-
-    def _add_property_title(self, column: str, content: str):
-        self._properties[column] = {
-            "title": [{"text": {"content": content}}]
-        }
-
-    def _add_property_rich_text(self, column: str, content: str):
-        self._properties[column] = {
-            "rich_text": [{"text": {"content": content}}]
-        }
-
-    def _add_property_date(self, column: str, content: str):
-        self._properties[column] = {"date": {"start": content}}
-
-    def _add_property_select(self, column: str, content: str):
-        self._properties[column] = {"select": {"name": content}}
-
-    def _add_property_multi_select(self, column: str, items: list):
-        self._properties[column] = {
-            "multi_select": [{"name": tag} for tag in items]
-        }
-
-    def _add_property_url(self, column: str, content: str):
-        self._properties[column] = {"url": content}
-
-    def _add_heading(self, content: str, level: int = 1):
-        block_type = f"heading_{level}"
-        self._blocks.append({
-            "object": "block",
-            "type": block_type,
-            block_type: {
-                "rich_text": [{"type": "text", "text": {"content": content}}]
-            }
-        })
-
-    def _add_paragraph(self, content: str):
-        self._blocks.append({
-            "object": "block",
-            "type": "paragraph",
-            "paragraph": {
-                "rich_text": [{"type": "text", "text": {"content": content}}]
-            }
-        })
-
-    def _add_media_block(self, media_type: str, url: str):
-        self._blocks.append({
-            "object": "block",
-            "type": media_type,
-            media_type: {
-                "type": "external",
-                "external": {"url": url}
-            }
-        })
-
-    def _send(self) -> Dict:
-        """发送请求到Notion API"""
-        headers = {
+    def _get_headers(self) -> Dict[str, str]:
+        """获取请求头"""
+        return {
             'Authorization': f'Bearer {self.secret}',
             'Notion-Version': self.API_VERSION,
             'Content-Type': 'application/json'
         }
 
-        self._req_body['properties'] = self._properties
-        self._req_body['children'] = self._blocks
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        发送Notion API请求
+
+        每次请求前从共享令牌桶获取令牌；429/503 响应按 `Retry-After`
+        暂停令牌桶（所有写入线程一起等待）后重试。
+        """
+        response = None
+        for attempt in range(self.max_retries + 1):
+            self._rate_limiter.acquire()
+            response = requests.request(
+                method,
+                url,
+                headers=self._get_headers(),
+                proxies=self.proxies,
+                timeout=self.timeout,
+                **kwargs
+            )
+
+            if response.status_code in (429, 503) and attempt < self.max_retries:
+                retry_after = parse_delay_seconds(response.headers.get('Retry-After')) or self.DEFAULT_RETRY_AFTER
+                logger.warning(
+                    f"Notion限流 (HTTP {response.status_code})，{retry_after} 秒后重试 "
+                    f"(尝试 {attempt + 1}/{self.max_retries})"
+                )
+                self._rate_limiter.pause(retry_after)
+                continue
+            break
+
+        return response
+
+    def exists(self, paper_id: str) -> bool:
+        """检查论文是否存在（见 exists_many）"""
+        return self.exists_many([paper_id])[paper_id]
+
+    def exists_many(self, paper_ids: List[str]) -> Dict[str, bool]:
+        """
+        批量检查论文是否存在
+
+        先查本地预加载的索引；索引只覆盖日期窗口时，未命中的ID再逐批查询数据库。
+        """
+        if not self._ensure_index():
+            return {paper_id: False for paper_id in paper_ids}
+        self._lookup_outside_window(paper_ids)
+        return {paper_id: normalize_arxiv_id(paper_id) in self._index for paper_id in paper_ids}
+
+    def _ensure_index(self) -> bool:
+        """确保本次运行已预加载存在性索引，加载失败时返回 False"""
+        if self._index_loaded:
+            return True
+        if self._index_failed:
+            return False
+
+        with self._index_lock:
+            if not self._index_loaded and not self._index_failed:
+                try:
+                    self.load_index()
+                except Exception as e:
+                    logger.warning(f"加载Notion存在性索引失败: {e}")
+                    self._index_failed = True
+        return self._index_loaded
+
+    def load_index(self, since: datetime = None) -> int:
+        """
+        分页查询数据库，预加载存在性索引
+
+        每页 100 行，按 `日期` 属性过滤到最近 `index_days` 天；
+        未写入ArXiv ID属性的旧页面从 `PDF链接` 中提取ID。
+
+        Args:
+            since: 起始日期，默认为 create_time 往前 index_days 天
+
+        Returns:
+            索引中的论文数
+        """
+        query: Dict[str, Any] = {'page_size': self.QUERY_PAGE_SIZE}
+        if since is None and self.index_days:
+            since = (self.create_time or datetime.now()) - timedelta(days=self.index_days)
+        if since is not None:
+            query['filter'] = {
+                'property': '日期',
+                'date': {'on_or_after': since.strftime('%Y-%m-%d')}
+            }
 
-        response = requests.post(
-            self.API_URL,
-            headers=headers,
-            json=self._req_body,
-            proxies=self.proxies
+        index = self._query_index(query)
+
+        self._index = index
+        self._index_windowed = since is not None
+        self._index_misses = set()
+        self._index_loaded = True
+        self._index_failed = False
+        logger.info(f"Notion存在性索引已加载: {len(index)} 篇论文")
+        return len(index)
+
+    def _query_index(self, query: Dict[str, Any]) -> Dict[str, str]:
+        """分页执行数据库查询，返回 {规范化ArXiv ID: page_id}"""
+        index: Dict[str, str] = {}
+        while True:
+            response = self._request('POST', f"{self.DATABASE_URL}/{self.db_id}/query", json=query)
+            response.raise_for_status()
+            body = response.json()
+
+            for page in body.get('results', []):
+                arxiv_id = self._extract_arxiv_id(page)
+                if arxiv_id:
+                    index[arxiv_id] = page.get('id')
+
+            if not body.get('has_more') or not body.get('next_cursor'):
+                break
+            query['start_cursor'] = body['next_cursor']
+        return index
+
+    def _lookup_outside_window(self, paper_ids: List[str]) -> None:
+        """
+        索引按日期窗口加载时，查询窗口外的论文并补入索引
+
+        每批ID合并为一个 OR 过滤（ArXiv ID属性相等或PDF链接包含该ID），
+        确认不存在的ID在本次运行内不再重复查询；查询失败时不记录。
+        """
+        if not self._index_windowed:
+            return
+        missing = sorted(
+            {normalize_arxiv_id(paper_id) for paper_id in paper_ids}
+            - set(self._index) - self._index_misses
+        )
+        if not missing:
+            return
+
+        arxiv_id_property = self._ensure_schema()
+        for start in range(0, len(missing), self.LOOKUP_BATCH_SIZE):
+            chunk = missing[start:start + self.LOOKUP_BATCH_SIZE]
+            conditions = []
+            for arxiv_id in chunk:
+                if arxiv_id_property:
+                    conditions.append({'property': arxiv_id_property, 'rich_text': {'equals': arxiv_id}})
+                conditions.append({'property': 'PDF链接', 'url': {'contains': arxiv_id}})
+            try:
+                found = self._query_index({'page_size': self.QUERY_PAGE_SIZE, 'filter': {'or': conditions}})
+            except Exception as e:
+                logger.warning(f"查询Notion索引窗口外的论文失败: {e}")
+                continue
+            self._index.update(found)
+            self._index_misses.update(arxiv_id for arxiv_id in chunk if arxiv_id not in found)
+
+    def _extract_arxiv_id(self, page: Dict[str, Any]) -> str:
+        """从页面属性中读取ArXiv ID"""
+        properties = page.get('properties', {})
+
+        if self.arxiv_id_property:
+            rich_text = properties.get(self.arxiv_id_property, {}).get('rich_text') or []
+            text = ''.join(part.get('plain_text', '') for part in rich_text)
+            if text.strip():
+                return normalize_arxiv_id(text)
+
+        return arxiv_id_from_url(properties.get('PDF链接', {}).get('url'))
+
+    def _ensure_schema(self) -> Optional[str]:
+        """
+        确保数据库包含ArXiv ID属性，缺失时自动添加
+
+        检查结果只探测一次，探测完成后才对其他线程可见；配置的属性名保持不变。
+
+        Returns:
+            写入时应使用的ArXiv ID属性名，未配置或检查失败时为 None
+        """
+        if self._schema_checked or not self.arxiv_id_property:
+            return self._schema_property
+
+        with self._schema_lock:
+            if not self._schema_checked:
+                self._schema_property = self._probe_schema()
+                self._schema_checked = True
+        return self._schema_property
+
+    def _probe_schema(self) -> Optional[str]:
+        """探测并补齐ArXiv ID属性，返回可写入的属性名，失败时返回 None"""
+        url = f"{self.DATABASE_URL}/{self.db_id}"
+        try:
+            response = self._request('GET', url)
+            response.raise_for_status()
+            if self.arxiv_id_property in response.json().get('properties', {}):
+                return self.arxiv_id_property
+
+            response = self._request(
+                'PATCH',
+                url,
+                json={'properties': {self.arxiv_id_property: {'rich_text': {}}}}
+            )
+            response.raise_for_status()
+            logger.info(f"已为Notion数据库添加属性: {self.arxiv_id_property}")
+            return self.arxiv_id_property
+        except Exception as e:
+            logger.warning(f"检查Notion数据库属性失败，不写入 {self.arxiv_id_property}: {e}")
+            return None
+
+    def _resolve_page_id(self, paper_id: str) -> Optional[str]:
+        """查找论文对应的页面ID：先查账本，再查存在性索引"""
+        if self.ledger is not None:
+            entry = self.ledger.get(self.get_storage_name(), paper_id)
+            if entry and entry["remote_id"]:
+                return entry["remote_id"]
+        if self.exists(paper_id):
+            return self._index.get(normalize_arxiv_id(paper_id))
+        return None
+
+    def update(self, paper_id: str, data: Any, **kwargs) -> Dict:
+        """
+        差量更新论文页面
+
+        按字段比较新载荷与账本中上次写入的哈希，只 PATCH 变化的属性；
+        内容块变化时替换页面内容（保留媒体块）。账本中没有哈希时更新全部字段。
+
+        Args:
+            paper_id: 论文ID
+            data: 论文对象或 Paper.to_dict() 格式的完整字典
+
+        Returns:
+            {"success", "id", "message", "changed", "field_hashes"}
+
+        Raises:
+            KeyError: 数据库中没有该论文
+        """
+        paper = self._as_paper(paper_id, data)
+        page_id = self._resolve_page_id(paper_id)
+        if not page_id:
+            raise KeyError(f"Notion中不存在该论文: {paper_id}")
+
+        fields = build_update_fields(paper, self._ensure_schema())
+        hashes = hash_fields(fields)
+        changed = changed_fields(hashes, self._previous_field_hashes(paper_id))
+        if not changed:
+            return {"success": True, "id": page_id, "message": "内容未变化", "changed": [], "field_hashes": hashes}
+
+        properties = {name: fields[name] for name in changed if name != CONTENT_FIELD}
+        if properties:
+            response = self._request('PATCH', f"{self.API_URL}/{page_id}", json={'properties': properties})
+            if response.status_code != 200:
+                body = response.json()
+                logger.warning(f"Notion更新属性失败 {paper_id}: {body}")
+                return {
+                    "success": False,
+                    "id": page_id,
+                    "message": body.get('message', f"HTTP {response.status_code}"),
+                    "changed": [],
+                    "field_hashes": hashes
+                }
+
+        if CONTENT_FIELD in changed:
+            self._replace_content(page_id, fields[CONTENT_FIELD])
+
+        if self.ledger is not None:
+            self.ledger.record(
+                self.get_storage_name(), paper_id, page_id, self.ledger.payload_hash(paper), hashes
+            )
+        logger.info(f"已更新Notion页面 {paper_id}: {', '.join(changed)}")
+        return {"success": True, "id": page_id, "message": "更新成功", "changed": changed, "field_hashes": hashes}
+
+    def _replace_content(self, page_id: str, blocks: List[Dict]) -> None:
+        """
+        按新旧内容块的差异更新页面内容（保留媒体块）
+
+        新旧内容块按类型和文本逐块比较，首尾相同的块保留，只替换中间变化的块。
+        新块先插入到变化的位置，再删除旧块：追加失败时页面仍保留原有内容。
+        """
+        url = f"{self.BLOCKS_URL}/{page_id}/children"
+        params: Dict[str, Any] = {'page_size': self.QUERY_PAGE_SIZE}
+        children: List[Dict] = []
+        while True:
+            response = self._request('GET', url, params=params)
+            response.raise_for_status()
+            body = response.json()
+            children.extend(body.get('results', []))
+            if not body.get('has_more') or not body.get('next_cursor'):
+                break
+            params['start_cursor'] = body['next_cursor']
+
+        old = [block for block in children if block.get('type') not in MEDIA_BLOCK_TYPES]
+        old_keys = [_block_key(block) for block in old]
+        new_keys = [_block_key(block) for block in blocks]
+
+        prefix = 0
+        while prefix < min(len(old), len(blocks)) and old_keys[prefix] == new_keys[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            suffix < min(len(old), len(blocks)) - prefix
+            and old_keys[len(old) - 1 - suffix] == new_keys[len(blocks) - 1 - suffix]
+        ):
+            suffix += 1
+
+        # 新块插在保留的尾部之前，需要以前一个块为锚点；页面开头没有锚点时不保留尾部
+        payload: Dict[str, Any] = {}
+        if prefix < len(old):
+            position = children.index(old[prefix])
+            if position > 0:
+                payload['after'] = children[position - 1]['id']
+            else:
+                suffix = 0
+
+        stale = old[prefix:len(old) - suffix]
+        added = blocks[prefix:len(blocks) - suffix]
+        if added:
+            payload['children'] = added
+            self._request('PATCH', url, json=payload).raise_for_status()
+        for block in stale:
+            self._request('DELETE', f"{self.BLOCKS_URL}/{block['id']}").raise_for_status()
+
+    def batch_update(self, papers: List[Paper], max_workers: int = None, **kwargs) -> Dict[str, Any]:
+        """
+        并发批量差量更新
+
+        Notion 没有批量更新接口，页面由多个线程并发更新，总请求速率由共享令牌桶限制。
+
+        Returns:
+            {"success": [...], "failed": [{"id", "error"}], "skipped": [内容未变化的论文ID]}
+        """
+        results: Dict[str, Any] = {"success": [], "failed": [], "skipped": []}
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            futures = {executor.submit(self.update, paper.id, paper): paper for paper in papers}
+            for future in as_completed(futures):
+                paper = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"更新论文失败 {paper.id}: {e}")
+                    results["failed"].append({"id": paper.id, "error": str(e)})
+                    continue
+
+                if not result["success"]:
+                    results["failed"].append({"id": paper.id, "error": result["message"]})
+                elif result["changed"]:
+                    results["success"].append(paper.id)
+                else:
+                    results["skipped"].append(paper.id)
+
+        return results
+
+    def insert(self, paper: Paper, **kwargs) -> Dict:
+        """
+        插入论文到Notion
+
+        Args:
+            paper: 论文对象
+            hf_obj: HuggingFace论文信息（可选）
+            create_time: 写入的日期（可选，默认为实例的 create_time）
+
+        Returns:
+            {"success", "id", "url", "message", "response", "field_hashes"}
+        """
+        arxiv_id_property = self._ensure_schema()
+
+        payload = build_page_payload(
+            paper,
+            db_id=self.db_id,
+            create_time=kwargs.get('create_time') or self.create_time,
+            hf_obj=kwargs.get('hf_obj'),
+            arxiv_id_property=arxiv_id_property
         )
+        response = self._request('POST', self.API_URL, json=payload)
 
         if response.status_code != 200:
-            logger.warning(f"Notion API错误: {response.json()}")
+            # 错误响应（如网关错误）不一定是JSON
+            try:
+                body = response.json()
+            except ValueError:
+                body = {"message": response.text}
+            logger.warning(f"Notion API错误 (HTTP {response.status_code}): {body}")
+            return {
+                "success": False,
+                "id": None,
+                "url": None,
+                "message": body.get('message') or f"HTTP {response.status_code}",
+                "response": body
+            }
+
+        body = response.json()
+
+        self._index[normalize_arxiv_id(paper.id)] = body.get('id')
+        return {
+            "success": True,
+            "id": body.get('id'),
+            "url": body.get('url'),
+            "message": "创建成功",
+            "response": body,
+            "field_hashes": hash_fields(build_update_fields(paper, arxiv_id_property))
+        }
 
-        return response.json()
+    def batch_insert(
+        self,
+        papers: List[Paper],
+        skip_existing: bool = True,
+        max_workers: int = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        并发批量插入论文
+
+        页面由多个线程并发创建，总请求速率由共享令牌桶限制在Notion允许的上限内。
+
+        Args:
+            papers: 论文列表
+            skip_existing: 是否跳过已存在的论文
+            max_workers: 并发线程数，默认为实例的 max_workers
+            **kwargs: 传给 insert 的参数（如 hf_obj、create_time）
+
+        Returns:
+            {"success": [...], "failed": [{"id", "error"}], "skipped": [...], "pages": {paper_id: page_id},
+             "field_hashes": {paper_id: 各字段哈希}}
+        """
+        results: Dict[str, Any] = {"success": [], "failed": [], "skipped": [], "pages": {}, "field_hashes": {}}
+
+        existing = self.exists_many([paper.id for paper in papers]) if skip_existing else {}
+        pending = []
+        for paper in papers:
+            if existing.get(paper.id):
+                results["skipped"].append(paper.id)
+            else:
+                pending.append(paper)
+
+        if not pending:
+            return results
+
+        self._ensure_schema()
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            futures = {executor.submit(self.insert, paper, **kwargs): paper for paper in pending}
+            for future in as_completed(futures):
+                paper = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"插入论文失败 {paper.id}: {e}")
+                    results["failed"].append({"id": paper.id, "error": str(e)})
+                    continue
+
+                if result["success"]:
+                    results["success"].append(paper.id)
+                    results["pages"][paper.id] = result["id"]
+                    results["field_hashes"][paper.id] = result["field_hashes"]
+                else:
+                    results["failed"].append({"id": paper.id, "error": result["message"]})
+
+        return results
@@ -0,0 +1,69 @@
+"""
+存储服务请求限流
+
+提供线程安全的令牌桶，用于在多个写入线程之间共享同一服务的请求速率上限或上传带宽上限。
+"""
+import threading
+import time
+from typing import Optional
+
+
+def parse_delay_seconds(value: Optional[str]) -> float:
+    """解析 Retry-After / Backoff 等响应头中的秒数"""
+    if not value:
+        return 0.0
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return 0.0
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶
+
+    令牌以 `rate` 个/秒的速度补充，最多累积 `capacity` 个；
+    `acquire` 在没有可用令牌时阻塞到下一个令牌生成。
+
+    Attributes:
+        rate: 每秒补充的令牌数
+        capacity: 桶容量（允许的瞬时突发请求数）
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1) -> None:
+        """
+        获取令牌（默认一个），必要时阻塞等待
+
+        超过桶容量的请求按容量分段获取，总耗时仍受 `rate` 约束。
+        """
+        while tokens > 0:
+            portion = min(tokens, self.capacity)
+            while True:
+                with self._lock:
+                    self._refill()
+                    if self._tokens >= portion:
+                        self._tokens -= portion
+                        break
+                    wait = (portion - self._tokens) / self.rate
+                time.sleep(wait)
+            tokens -= portion
+
+    def pause(self, seconds: float) -> None:
+        """清空令牌并在指定秒数内不再发放（用于服务端返回限流时）"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
@@ -0,0 +1,350 @@
+import os
+import time
+import logging
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Set
+from datetime import datetime
+
+from .base import BaseStorage
+from .rate_limit import parse_delay_seconds
+from models.identifiers import arxiv_id_from_url, normalize_arxiv_id
+from models.paper import Paper
+
+logger = logging.getLogger(__name__)
+
+
+def _heading_block(text: str, level: int = 1) -> Dict:
+    return {
+        "type": "heading",
+        "level": level,
+        "content": {"title": text},
+        "text_alignment": "left"
+    }
+
+
+def _text_block(text: str) -> Dict:
+    return {"type": "text", "content": text, "text_alignment": "left"}
+
+
+def _quote_block(text: str) -> Dict:
+    return {"type": "quote", "content": text, "text_alignment": "left"}
+
+
+def _media_block(media_type: str, url: str) -> Dict:
+    return {"type": media_type, "link": url}
+
+
+def build_row(paper: Paper) -> Dict[str, Any]:
+    """构建数据库行（列名需与Wolai数据库一致）"""
+    return {
+        "标题": paper.title,
+        "类型": ["论文"],
+        "领域": [paper.category],
+        "文章标签": [str(tag) for tag in paper.tags],
+        "阅读标签": False,
+        "AI总结": paper.short_summary,
+        "首次发表时间": paper.published_date.strftime('%Y-%m-%d') if paper.published_date else "",
+        "作者": ", ".join(paper.authors),
+        "PDF链接": paper.pdf_url
+    }
+
+
+def build_blocks(paper: Paper) -> List[Dict[str, Any]]:
+    """
+    构建行页面的内容块
+
+    纯函数，不依赖也不修改任何实例状态，可在多个线程中并发调用。
+    """
+    blocks: List[Dict[str, Any]] = []
+
+    if paper.media_type and paper.media_url:
+        blocks.append(_media_block(paper.media_type, paper.media_url))
+
+    blocks.append(_text_block("关键词: " + ', '.join(paper.tags)))
+    blocks.append(_heading_block('TL;DR', level=1))
+    for key in ('动机', '方法', '结果'):
+        if paper.tldr.get(key):
+            blocks.append(_heading_block(key, level=2))
+            blocks.append(_text_block(paper.tldr[key]))
+
+    blocks.append(_heading_block('摘要', level=1))
+    blocks.append(_heading_block('原文', level=2))
+    blocks.append(_quote_block(paper.summary))
+    blocks.append(_heading_block('中文译文', level=2))
+    blocks.append(_quote_block(paper.summary_cn))
+    return blocks
+
+
+class WolaiStorage(BaseStorage):
+    """Wolai存储服务"""
+
+    API_BASE_URL = "https://openapi.wolai.com/v1"
+    # 单次创建数据库行的请求最多包含的行数
+    MAX_ROWS_PER_WRITE = 50
+    # 服务端未给出 Retry-After 时的默认等待秒数
+    DEFAULT_RETRY_AFTER = 1
+    # 账本中记录已创建行、但内容块尚未写入的存储名（远程ID为行ID）
+    ROW_LEDGER = "wolai_row"
+
+    def __init__(
+        self,
+        token: str = None,
+        db_id: str = None,
+        create_time: datetime = None,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        timeout: int = 30,
+        **kwargs
+    ):
+        """
+        Args:
+            token: Wolai API令牌
+            db_id: Wolai数据库ID
+            create_time: 写入时间
+            max_workers: 并发创建页面内容块的线程数
+            max_retries: 429 响应的最大重试次数
+            timeout: 请求超时（秒）
+        """
+        super().__init__(create_time=create_time, **kwargs)
+        self.token = token or os.environ.get('WOLAI_TOKEN')
+        self.db_id = db_id or os.environ.get('WOLAI_DB_ID')
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        # 存在性索引：数据库中已有论文的 ArXiv ID，每次运行首次检查时加载
+        self._index: Set[str] = set()
+        self._index_loaded = False
+        self._index_failed = False
+        self._index_lock = threading.Lock()
+
+    def get_storage_name(self) -> str:
+        return "wolai"
+
+    def is_available(self) -> bool:
+        """检查Wolai服务是否可用"""
+        return bool(self.token and self.db_id)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送Wolai API请求，429 响应按 `Retry-After` 等待后重试"""
+        response = None
+        for attempt in range(self.max_retries + 1):
+            response = requests.request(
+                method,
+                url,
+                headers={'Authorization': self.token},
+                proxies=self.proxies,
+                timeout=self.timeout,
+                **kwargs
+            )
+            if response.status_code == 429 and attempt < self.max_retries:
+                retry_after = parse_delay_seconds(response.headers.get('Retry-After')) or self.DEFAULT_RETRY_AFTER
+                logger.warning(f"Wolai限流，{retry_after} 秒后重试 (尝试 {attempt + 1}/{self.max_retries})")
+                time.sleep(retry_after)
+                continue
+            break
+
+        return response
+
+    def exists(self, paper_id: str) -> bool:
+        """检查论文是否已写入Wolai数据库（见 exists_many）"""
+        return self.exists_many([paper_id])[paper_id]
+
+    def exists_many(self, paper_ids: List[str]) -> Dict[str, bool]:
+        """
+        批量检查论文是否已写入Wolai数据库
+
+        先查账本，账本没有记录的论文查询本次运行预加载的存在性索引；索引加载失败时只以账本为准。
+        """
+        found = {paper_id: False for paper_id in paper_ids}
+        if self.ledger is not None:
+            written = self.ledger.written_storages(paper_ids, [self.get_storage_name()])
+            found.update({paper_id: True for paper_id in written})
+
+        pending = [paper_id for paper_id in paper_ids if not found[paper_id]]
+        if pending and self._ensure_index():
+            found.update({paper_id: normalize_arxiv_id(paper_id) in self._index for paper_id in pending})
+        return found
+
+    def _ensure_index(self) -> bool:
+        """确保本次运行已预加载存在性索引，加载失败时返回 False"""
+        if self._index_loaded:
+            return True
+        if self._index_failed:
+            return False
+
+        with self._index_lock:
+            if not self._index_loaded and not self._index_failed:
+                try:
+                    self.load_index()
+                except Exception as e:
+                    logger.warning(f"加载Wolai存在性索引失败: {e}")
+                    self._index_failed = True
+        return self._index_loaded
+
+    def load_index(self) -> int:
+        """
+        读取数据库内容，从各行的 `PDF链接` 列提取 ArXiv ID 作为存在性索引
+
+        Returns:
+            索引中的论文数
+        """
+        response = self._request('GET', f"{self.API_BASE_URL}/databases/{self.db_id}")
+        if response.status_code != 200:
+            raise RuntimeError(f"读取数据库失败 (HTTP {response.status_code}): {response.text}")
+        body = response.json()
+
+        index: Set[str] = set()
+        for row in (body.get('data') or {}).get('rows', []):
+            link = row.get('data', {}).get('PDF链接')
+            arxiv_id = arxiv_id_from_url(link.get('value') if isinstance(link, dict) else link)
+            if arxiv_id:
+                index.add(arxiv_id)
+
+        self._index = index
+        self._index_loaded = True
+        logger.info(f"Wolai存在性索引已加载: {len(index)} 篇论文")
+        return len(index)
+
+    def update(self, paper_id: str, data: Dict) -> Dict:
+        """Wolai暂不支持更新"""
+        raise NotImplementedError("Wolai存储暂不支持更新操作")
+
+    def _create_rows(self, papers: List[Paper]) -> List[str]:
+        """
+        一次请求创建多行
+
+        Returns:
+            新建行的块ID列表，与 papers 顺序一致
+        """
+        response = self._request(
+            'POST',
+            f"{self.API_BASE_URL}/databases/{self.db_id}/rows",
+            json={"rows": [build_row(paper) for paper in papers]}
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"创建数据库行失败 (HTTP {response.status_code}): {response.text}")
+        body = response.json()
+
+        # data 为新建行的页面链接列表，末段即块ID
+        return [url.split('/')[-1] for url in body.get('data', [])]
+
+    def _create_blocks(self, parent_id: str, paper: Paper) -> None:
+        """在行页面下创建内容块"""
+        response = self._request(
+            'POST',
+            f"{self.API_BASE_URL}/blocks",
+            json={"parent_id": parent_id, "blocks": build_blocks(paper)}
+        )
+        if response.status_code not in (200, 201):
+            raise RuntimeError(f"创建内容块失败 (HTTP {response.status_code}): {response.text}")
+
+    def insert(self, paper: Paper, **kwargs) -> Dict:
+        """
+        插入论文到Wolai
+
+        Returns:
+            {"success", "id", "message"}
+        """
+        results = self.batch_insert([paper], skip_existing=False)
+        if results["success"]:
+            return {"success": True, "id": results["rows"][paper.id], "message": "创建成功"}
+        return {
+            "success": False,
+            "id": results["rows"].get(paper.id),
+            "message": results["failed"][0]["error"]
+        }
+
+    def batch_insert(
+        self,
+        papers: List[Paper],
+        skip_existing: bool = True,
+        max_workers: int = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        批量插入论文
+
+        先以一次请求创建所有数据库行，再按返回的行ID并发创建各页面的内容块。
+        行已创建但内容块写入失败时，行ID随失败结果返回并记入账本，重试时只补写内容块。
+
+        Args:
+            papers: 论文列表
+            skip_existing: 是否跳过已存在的论文
+            max_workers: 创建内容块的并发线程数，默认为实例的 max_workers
+
+        Returns:
+            {"success": [...], "failed": [{"id", "error", "row_id"?}], "skipped": [...],
+             "rows": {paper_id: row_id}}
+        """
+        results: Dict[str, Any] = {"success": [], "failed": [], "skipped": [], "rows": {}}
+
+        # 上次只创建了行的论文：行已存在于数据库（存在性索引会命中），只补写内容块
+        incomplete = self._incomplete_rows([paper.id for paper in papers])
+        created: List[tuple] = []
+        for paper in papers:
+            if paper.id in incomplete:
+                results["rows"][paper.id] = incomplete[paper.id]
+                created.append((paper, incomplete[paper.id]))
+
+        remaining = [paper for paper in papers if paper.id not in incomplete]
+        existing = self.exists_many([paper.id for paper in remaining]) if skip_existing else {}
+        pending: List[Paper] = []
+        for paper in remaining:
+            if existing.get(paper.id):
+                results["skipped"].append(paper.id)
+            else:
+                pending.append(paper)
+
+        for start in range(0, len(pending), self.MAX_ROWS_PER_WRITE):
+            chunk = pending[start:start + self.MAX_ROWS_PER_WRITE]
+            try:
+                row_ids = self._create_rows(chunk)
+            except Exception as e:
+                logger.error(f"Wolai批量创建行失败: {e}")
+                results["failed"].extend({"id": paper.id, "error": str(e)} for paper in chunk)
+                continue
+
+            for paper, row_id in zip(chunk, row_ids):
+                results["rows"][paper.id] = row_id
+                created.append((paper, row_id))
+            for paper in chunk[len(row_ids):]:
+                results["failed"].append({"id": paper.id, "error": "响应中缺少对应行"})
+
+        if not created:
+            return results
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            futures = {
+                executor.submit(self._create_blocks, row_id, paper): paper
+                for paper, row_id in created
+            }
+            for future in as_completed(futures):
+                paper = futures[future]
+                row_id = results["rows"][paper.id]
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Wolai创建页面内容失败 {paper.id}: {e}")
+                    results["failed"].append({"id": paper.id, "error": str(e), "row_id": row_id})
+                    if self.ledger is not None and paper.id not in incomplete:
+                        self.ledger.record(self.ROW_LEDGER, paper.id, row_id, None)
+                    continue
+                results["success"].append(paper.id)
+                if self.ledger is not None and paper.id in incomplete:
+                    self.ledger.forget(self.ROW_LEDGER, paper.id)
+
+        return results
+
+    def _incomplete_rows(self, paper_ids: List[str]) -> Dict[str, str]:
+        """查询账本中已创建行、但内容块尚未写入的论文，返回 {论文ID: 行ID}"""
+        if self.ledger is None:
+            return {}
+        incomplete = {}
+        for paper_id in paper_ids:
+            entry = self.ledger.get(self.ROW_LEDGER, paper_id)
+            if entry and entry.get("remote_id"):
+                incomplete[paper_id] = entry["remote_id"]
+        return incomplete
@@ -1,12 +1,19 @@
 import os
 import json
+import hashlib
+import time
 import logging
+import threading
 import requests
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
 
-from .base import BaseStorage
+from .base import BaseStorage, changed_fields, hash_fields
+from .rate_limit import TokenBucket, parse_delay_seconds
+from .zotero_mirror import ZoteroLibraryMirror, arxiv_id_from_tags, arxiv_machine_tag
+from models.identifiers import arxiv_id_from_url, is_arxiv_id, normalize_arxiv_id
 from models.paper import Paper
 
 logger = logging.getLogger(__name__)
@@ -15,10 +22,71 @@ class ZoteroItemExistsError(Exception):
     """论文已存在异常"""
     pass
 
+
+def file_md5(path: str) -> str:
+    """计算文件的 MD5（Zotero 文件上传协议以 MD5 判断文件是否已存在）"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _UploadBody:
+    """
+    上传请求体：prefix + 文件内容 + suffix
+
+    提供长度以便 requests 设置 Content-Length，读取文件时按带宽令牌桶限速。
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, prefix: bytes, path: str, suffix: bytes, bandwidth: Optional[TokenBucket] = None):
+        self._parts = [prefix, suffix]
+        self._file = open(path, 'rb')
+        self._length = len(prefix) + os.path.getsize(path) + len(suffix)
+        self._bandwidth = bandwidth
+        self._stage = 0  # 0: prefix, 1: 文件, 2: suffix, 3: 结束
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        size = self.CHUNK_SIZE if size is None or size < 0 else min(size, self.CHUNK_SIZE)
+        if self._bandwidth is not None:
+            # 每块不超过桶容量，避免单次读取超出带宽上限
+            size = max(1, min(size, int(self._bandwidth.capacity)))
+        while self._stage < 3:
+            if self._stage == 1:
+                data = self._file.read(size)
+            else:
+                data, self._parts[self._stage // 2] = self._parts[self._stage // 2], b''
+            if data:
+                if self._bandwidth is not None:
+                    self._bandwidth.acquire(len(data))
+                return data
+            self._stage += 1
+        return b''
+
+    def close(self) -> None:
+        self._file.close()
+
 class ZoteroStorage(BaseStorage):
     """Zotero存储服务"""
 
     API_BASE_URL = "https://api.zotero.org"
+    # Zotero Web API 单次写请求最多包含 50 个条目
+    MAX_ITEMS_PER_WRITE = 50
+    # itemKey 查询参数单次最多 50 个key
+    MAX_KEYS_PER_READ = 50
+    # 差量更新比较和写入的条目字段（不更新集合和日期，保留用户在Zotero中的整理）
+    UPDATE_FIELDS = ('title', 'url', 'creators', 'tags', 'abstractNote', 'DOI', 'extra')
+    # 服务端未给出 Retry-After 时的默认等待秒数
+    DEFAULT_RETRY_AFTER = 5
+    # 账本中记录 PDF 附件上传状态的存储名（远程ID为附件key，载荷哈希为文件MD5）
+    ATTACHMENT_LEDGER = "zotero_attachment"
+    # 账本中记录文库已完成机器标签补充的存储名（论文ID为文库标识）
+    TAG_BACKFILL_LEDGER = "zotero_tag_backfill"
 
     def __init__(
         self,
@@ -29,8 +97,20 @@ class ZoteroStorage(BaseStorage):
         library_type: str = "user",
         create_time: datetime = None,
         templates_dir: str = "src/common_utils/json_templates",
+        category_map: Dict[str, List[str]] = None,
+        default_category: List[str] = None,
+        max_retries: int = 3,
+        timeout: int = 30,
+        mirror_path: str = None,
+        upload_concurrency: int = 2,
+        upload_bandwidth: Optional[int] = None,
         **kwargs
     ):
+        """
+        Args:
+            upload_concurrency: 同时上传的附件数
+            upload_bandwidth: 附件上传的总带宽上限（字节/秒），不设置时不限速
+        """
         super().__init__(create_time=create_time, **kwargs)
         self.api_key = api_key or os.environ.get('ZOTERO_API_KEY')
         self.user_id = user_id or os.environ.get('ZOTERO_USER_ID')
@@ -38,6 +118,25 @@ class ZoteroStorage(BaseStorage):
         self.item_type = item_type
         self.library_type = library_type
         self.templates_dir = Path(templates_dir)
+        self.category_map = category_map or {}
+        self.default_category = default_category or ["DFGZNVCM"]
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.upload_concurrency = upload_concurrency
+        self._upload_bandwidth = TokenBucket(upload_bandwidth) if upload_bandwidth else None
+
+        # 服务端通过 Backoff 头要求暂停写入的截止时间（monotonic 秒）
+        self._backoff_until = 0.0
+
+        # 本地文库镜像（可选），每次运行首次检查存在性时做一次增量同步
+        self._mirror: Optional[ZoteroLibraryMirror] = (
+            ZoteroLibraryMirror(mirror_path, library=self._library_key())
+            if mirror_path else None
+        )
+        self._mirror_synced = False
+        self._backfilled: Optional[bool] = None
+        self._mirror_sync_failed = False
+        self._sync_lock = threading.Lock()
 
         # 加载模板
         self._item_template = self._load_template(item_type)
@@ -49,11 +148,15 @@ class ZoteroStorage(BaseStorage):
         """检查Zotero服务是否可用"""
         return bool(self.api_key and (self.user_id or self.group_id))
 
+    def _get_library_url(self) -> str:
+        """获取文库API URL"""
+        if self.library_type == "group":
+            return f"{self.API_BASE_URL}/groups/{self.group_id}"
+        return f"{self.API_BASE_URL}/users/{self.user_id}"
+
     def _get_api_url(self) -> str:
         """获取API URL"""
-        if self.library_type == "group":
-            return f"{self.API_BASE_URL}/groups/{self.group_id}/items"
-        return f"{self.API_BASE_URL}/users/{self.user_id}/items"
+        return f"{self._get_library_url()}/items"
 
     def _load_template(self, item_type: str) -> Dict:
         """加载Zotero项目模板"""
@@ -64,11 +167,170 @@ class ZoteroStorage(BaseStorage):
         logger.warning(f"模板文件不存在: {template_path}")
         return {}
 
+    def _get_collections(self, paper: Paper) -> List[str]:
+        """根据论文领域获取Zotero集合ID"""
+        return self.category_map.get(paper.category, self.default_category)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        发送Zotero API请求
+
+        遵循服务端的限流提示：`Backoff` 头表示在指定秒数内暂停后续请求，
+        429/503 响应按 `Retry-After` 等待后重试。
+        """
+        response = None
+        for attempt in range(self.max_retries + 1):
+            wait = self._backoff_until - time.monotonic()
+            if wait > 0:
+                logger.info(f"Zotero要求退避，等待 {wait:.1f} 秒")
+                time.sleep(wait)
+
+            response = requests.request(
+                method,
+                url,
+                proxies=self.proxies,
+                timeout=self.timeout,
+                **kwargs
+            )
+
+            backoff = parse_delay_seconds(response.headers.get('Backoff'))
+            if backoff:
+                self._backoff_until = time.monotonic() + backoff
+
+            if response.status_code in (429, 503) and attempt < self.max_retries:
+                retry_after = parse_delay_seconds(response.headers.get('Retry-After')) or self.DEFAULT_RETRY_AFTER
+                logger.warning(
+                    f"Zotero限流 (HTTP {response.status_code})，{retry_after} 秒后重试 "
+                    f"(尝试 {attempt + 1}/{self.max_retries})"
+                )
+                time.sleep(retry_after)
+                continue
+            break
+
+        return response
+
     def exists(self, paper_id: str, doi: str = None, title: str = None) -> bool:
-        """检查论文是否存在"""
+        """检查论文是否存在（先查账本，启用镜像时为本地索引查询）"""
+        if self.ledger is not None and self.ledger.contains(self.get_storage_name(), paper_id):
+            return True
+        if self._ensure_mirror():
+            return self._mirror.contains(arxiv_id=paper_id, doi=doi, title=title)
+
         result = self._search_item(arxiv_id=paper_id, doi=doi, title=title)
         return result.get("exists", False)
 
+    def exists_many(self, paper_ids: List[str]) -> Dict[str, bool]:
+        """批量检查论文是否存在，先查账本，其余 ArXiv ID 合并为机器标签 OR 查询"""
+        known = set()
+        if self.ledger is not None:
+            known = set(self.ledger.written_storages(paper_ids, [self.get_storage_name()]))
+        pending = [pid for pid in paper_ids if pid not in known]
+
+        if not pending:
+            found = {}
+        elif self._ensure_mirror():
+            found = {pid: self._mirror.contains(arxiv_id=pid) for pid in pending}
+        else:
+            keys = self.find_by_arxiv_ids(pending)
+            # 文库补充机器标签之前，标签未命中的 ArXiv ID 再逐个全文搜索
+            found = {
+                pid: (
+                    normalize_arxiv_id(pid) in keys
+                    or (not self._tags_backfilled() and self._query_items(
+                        {'q': pid, 'qmode': 'everything', 'format': 'json'}
+                    )["exists"])
+                ) if is_arxiv_id(pid) else self.exists(pid)
+                for pid in pending
+            }
+        return {pid: pid in known or found[pid] for pid in paper_ids}
+
+    def _ensure_mirror(self) -> bool:
+        """确保本地镜像在本次运行中已完成一次增量同步，镜像不可用时返回 False"""
+        if self._mirror is None or self._mirror_sync_failed:
+            return False
+        if self._mirror_synced:
+            return True
+
+        with self._sync_lock:
+            if not self._mirror_synced and not self._mirror_sync_failed:
+                try:
+                    self.sync_mirror()
+                    self._mirror_synced = True
+                except Exception as e:
+                    logger.warning(f"同步Zotero镜像失败，回退到远程搜索: {e}")
+                    self._mirror_sync_failed = True
+        return self._mirror_synced
+
+    def sync_mirror(self) -> Dict[str, int]:
+        """
+        增量同步本地镜像
+
+        以镜像记录的文库版本请求 `?since=<version>&format=versions` 获取变更条目的
+        key，再按 itemKey 分批拉取识别字段；非首次同步时通过 `/deleted` 移除已删除条目。
+        同步完成后记录响应头中的 Last-Modified-Version。
+
+        Returns:
+            {"changed": 变更条目数, "removed": 删除条目数, "version": 文库版本}
+        """
+        if self._mirror is None:
+            raise RuntimeError("未配置Zotero本地镜像")
+
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        since = self._mirror.library_version
+
+        response = self._request(
+            'GET',
+            f"{self._get_library_url()}/items/top",
+            headers=headers,
+            params={"since": since, "format": "versions"}
+        )
+        response.raise_for_status()
+        versions: Dict[str, int] = response.json()
+        library_version = int(response.headers.get("Last-Modified-Version", since))
+
+        removed: List[str] = []
+        if since:
+            response = self._request(
+                'GET',
+                f"{self._get_library_url()}/deleted",
+                headers=headers,
+                params={"since": since}
+            )
+            response.raise_for_status()
+            removed = response.json().get("items", [])
+            self._mirror.remove_items(removed)
+
+        changed = list(versions.keys())
+        for start in range(0, len(changed), self.MAX_KEYS_PER_READ):
+            keys = changed[start:start + self.MAX_KEYS_PER_READ]
+            response = self._request(
+                'GET',
+                self._get_api_url(),
+                headers=headers,
+                params={"itemKey": ",".join(keys), "format": "json"}
+            )
+            response.raise_for_status()
+            self._mirror.upsert_items(response.json())
+
+        self._mirror.set_library_version(library_version)
+        logger.info(
+            f"Zotero镜像同步完成: 版本 {since} -> {library_version}, "
+            f"变更 {len(changed)}, 删除 {len(removed)}"
+        )
+        return {"changed": len(changed), "removed": len(removed), "version": library_version}
+
+    def _record_written(self, body: Dict) -> None:
+        """将写入成功的条目同步到本地镜像"""
+        if self._mirror is None:
+            return
+        successful = body.get("successful", {}) or {}
+        self._mirror.upsert_items(item for item in successful.values() if isinstance(item, dict))
+
+    def close(self) -> None:
+        """释放本地镜像连接"""
+        if self._mirror is not None:
+            self._mirror.close()
+
     def _search_item(
         self,
         arxiv_id: str = None,
@@ -76,10 +338,14 @@ class ZoteroStorage(BaseStorage):
         title: str = None
     ) -> Dict:
         """搜索Zotero中的项目"""
-        headers = {"Authorization": f"Bearer {self.api_key}"}
-
-        # 确定查询参数
-        if doi:
+        # 确定查询参数：ArXiv ID 走机器标签的精确索引，其余标识符退回全文搜索
+        if arxiv_id and is_arxiv_id(arxiv_id):
+            result = self._query_items({'tag': arxiv_machine_tag(arxiv_id), 'format': 'json'})
+            if result["exists"] or self._tags_backfilled():
+                return result
+            # 补充机器标签之前创建的条目没有标签，按ID全文搜索
+            params = {'q': arxiv_id, 'qmode': 'everything', 'format': 'json'}
+        elif doi:
             params = {'q': doi, 'qmode': 'everything', 'format': 'json'}
         elif arxiv_id:
             params = {'q': arxiv_id, 'qmode': 'everything', 'format': 'json'}
@@ -87,13 +353,17 @@ class ZoteroStorage(BaseStorage):
             params = {'q': title, 'qmode': 'title', 'format': 'json'}
         else:
             return {"exists": False, "count": 0, "items": []}
+        return self._query_items(params)
 
+    def _query_items(self, params: Dict[str, Any]) -> Dict:
+        """按查询参数检索条目"""
+        headers = {"Authorization": f"Bearer {self.api_key}"}
         try:
-            response = requests.get(
+            response = self._request(
+                'GET',
                 self._get_api_url(),
                 headers=headers,
-                params=params,
-                proxies=self.proxies
+                params=params
             )
             response.raise_for_status()
             items = response.json()
@@ -107,13 +377,360 @@ class ZoteroStorage(BaseStorage):
             logger.error(f"搜索Zotero项目失败: {e}")
             return {"exists": False, "count": 0, "items": []}
 
-    def update(self, paper_id: str, data: Dict) -> Dict:
-        """更新Zotero项目"""
-        raise NotImplementedError("Zotero更新功能尚未实现")
+    def _library_key(self) -> str:
+        library_id = self.group_id if self.library_type == "group" else self.user_id
+        return f"{self.library_type}:{library_id}"
+
+    def _tags_backfilled(self) -> bool:
+        """账本记录文库已补充过机器标签时，标签查询未命中即可认为条目不存在"""
+        if self._backfilled is None:
+            self._backfilled = (
+                self.ledger is not None and self.ledger.contains(self.TAG_BACKFILL_LEDGER, self._library_key())
+            )
+        return self._backfilled
+
+    def _confirm_written(self, papers: List[Paper]) -> Dict[str, str]:
+        """
+        确认写令牌已被使用（412）的批次中哪些论文确实已写入
+
+        直接查询服务端（镜像可能尚未同步刚写入的条目）：ArXiv ID 走机器标签
+        批量查询，其余论文按 DOI/标题搜索。
+
+        Returns:
+            {论文ID: Zotero条目key}，未找到的论文不出现在结果中
+        """
+        try:
+            tagged = self.find_by_arxiv_ids([paper.id for paper in papers])
+        except Exception as e:
+            logger.warning(f"确认Zotero已写入条目失败: {e}")
+            tagged = {}
+
+        confirmed: Dict[str, str] = {}
+        for paper in papers:
+            if is_arxiv_id(paper.id):
+                key = tagged.get(normalize_arxiv_id(paper.id))
+            else:
+                items = self._search_item(
+                    arxiv_id=paper.id, doi=paper.doi, title=paper.title
+                )["items"]
+                key = items[0].get("key") if items else None
+            if key:
+                confirmed[paper.id] = key
+        return confirmed
+
+    def find_by_arxiv_ids(self, paper_ids: List[str]) -> Dict[str, str]:
+        """
+        通过机器标签批量查找条目
+
+        每批ID合并为一个标签 OR 查询（`tag=arxiv:a || arxiv:b`）。
+
+        Args:
+            paper_ids: ArXiv ID 列表
+
+        Returns:
+            {规范化ArXiv ID: Zotero条目key}，未找到的ID不出现在结果中
+        """
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        wanted = sorted({normalize_arxiv_id(pid) for pid in paper_ids if is_arxiv_id(pid)})
+        found: Dict[str, str] = {}
+
+        for start in range(0, len(wanted), self.MAX_KEYS_PER_READ):
+            chunk = wanted[start:start + self.MAX_KEYS_PER_READ]
+            response = self._request(
+                'GET',
+                f"{self._get_api_url()}/top",
+                headers=headers,
+                params={
+                    'tag': " || ".join(arxiv_machine_tag(pid) for pid in chunk),
+                    'format': 'json',
+                    'limit': 100
+                }
+            )
+            response.raise_for_status()
+            for item in response.json():
+                arxiv_id = arxiv_id_from_tags(item.get("data", {}).get("tags"))
+                if arxiv_id:
+                    found[arxiv_id] = item.get("key")
+
+        return found
+
+    def backfill_machine_tags(self, dry_run: bool = False, page_size: int = 100) -> Dict[str, int]:
+        """
+        为文库中已有条目补充ArXiv机器标签
+
+        分页遍历顶层条目，从 archiveID 或 arxiv.org 链接中识别ArXiv ID，
+        对缺少机器标签的条目按 key/version 分批 POST 更新（只提交 tags 字段）。
+
+        Args:
+            dry_run: 只统计不写入
+            page_size: 分页大小（Zotero 最大 100）
+
+        Returns:
+            {"scanned": 扫描条目数, "tagged": 补充标签数, "failed": 失败数}
+        """
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        stats = {"scanned": 0, "tagged": 0, "failed": 0}
+        updates: List[Dict[str, Any]] = []
+
+        start = 0
+        while True:
+            response = self._request(
+                'GET',
+                f"{self._get_api_url()}/top",
+                headers=headers,
+                params={'format': 'json', 'limit': page_size, 'start': start}
+            )
+            response.raise_for_status()
+            items = response.json()
+            if not items:
+                break
+
+            for item in items:
+                stats["scanned"] += 1
+                data = item.get("data", {})
+                tags = data.get("tags", [])
+                if arxiv_id_from_tags(tags):
+                    continue
+                arxiv_id = normalize_arxiv_id(data.get("archiveID")) or arxiv_id_from_url(data.get("url"))
+                if not is_arxiv_id(arxiv_id):
+                    continue
+                updates.append({
+                    "key": item.get("key"),
+                    "version": item.get("version"),
+                    "tags": tags + [{"tag": arxiv_machine_tag(arxiv_id)}]
+                })
+
+            start += len(items)
+            total = int(response.headers.get("Total-Results", 0) or 0)
+            if total and start >= total:
+                break
+
+        if dry_run:
+            stats["tagged"] = len(updates)
+            return stats
+
+        for chunk_start in range(0, len(updates), self.MAX_ITEMS_PER_WRITE):
+            chunk = updates[chunk_start:chunk_start + self.MAX_ITEMS_PER_WRITE]
+            try:
+                response = self._request(
+                    'POST',
+                    self._get_api_url(),
+                    headers=self._get_write_headers(),
+                    json=chunk
+                )
+                response.raise_for_status()
+                body = response.json()
+                stats["tagged"] += len(body.get("success", {}) or body.get("successful", {}) or {})
+                stats["failed"] += len(body.get("failed", {}) or {})
+            except Exception as e:
+                logger.error(f"补充机器标签失败 ({len(chunk)} 条): {e}")
+                stats["failed"] += len(chunk)
+
+        # 全部条目都有标签后，标签查询未命中即可认为条目不存在，不再退回全文搜索
+        if not stats["failed"] and self.ledger is not None:
+            self.ledger.record(self.TAG_BACKFILL_LEDGER, self._library_key())
+            self._backfilled = True
+
+        logger.info(f"机器标签补充完成: {stats}")
+        return stats
+
+    def _build_update_fields(self, paper: Paper) -> Dict[str, Any]:
+        """构建差量更新比较的字段"""
+        item_data = self._build_item_data(paper, collections=[])
+        return {name: item_data[name] for name in self.UPDATE_FIELDS if name in item_data}
+
+    def _resolve_keys(self, paper_ids: List[str]) -> Dict[str, str]:
+        """
+        查找论文对应的条目key：依次查账本、本地镜像，其余合并为一次机器标签查询
+
+        Returns:
+            {论文ID: Zotero条目key}，未找到的论文不出现在结果中
+        """
+        keys: Dict[str, str] = {}
+        unresolved: List[str] = []
+        for paper_id in paper_ids:
+            key = None
+            if self.ledger is not None:
+                entry = self.ledger.get(self.get_storage_name(), paper_id)
+                key = entry["remote_id"] if entry else None
+            if not key and self._ensure_mirror():
+                item = self._mirror.find(arxiv_id=paper_id)
+                key = item["key"] if item else None
+            if key:
+                keys[paper_id] = key
+            else:
+                unresolved.append(paper_id)
+
+        if unresolved:
+            found = self.find_by_arxiv_ids(unresolved)
+            for paper_id in unresolved:
+                if normalize_arxiv_id(paper_id) in found:
+                    keys[paper_id] = found[normalize_arxiv_id(paper_id)]
+        return keys
+
+    def _fetch_versions(self, keys: List[str]) -> Dict[str, int]:
+        """批量获取条目的当前版本号（`format=versions`，每次最多 50 个key）"""
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        versions: Dict[str, int] = {}
+        for start in range(0, len(keys), self.MAX_KEYS_PER_READ):
+            chunk = keys[start:start + self.MAX_KEYS_PER_READ]
+            response = self._request(
+                'GET',
+                self._get_api_url(),
+                headers=headers,
+                params={'itemKey': ','.join(chunk), 'format': 'versions'}
+            )
+            response.raise_for_status()
+            versions.update(response.json())
+        return versions
+
+    def _record_updated(self, paper: Paper, key: str, hashes: Dict[str, str]) -> None:
+        """差量更新成功后记入账本"""
+        if self.ledger is not None:
+            self.ledger.record(
+                self.get_storage_name(), paper.id, key, self.ledger.payload_hash(paper), hashes
+            )
+
+    def update(self, paper_id: str, data: Any, **kwargs) -> Dict:
+        """
+        差量更新Zotero条目
+
+        按字段比较新载荷与账本中上次写入的哈希，只 PATCH 变化的字段，
+        并携带 `If-Unmodified-Since-Version`，条目在远程被修改过时不会覆盖。
+
+        Args:
+            paper_id: 论文ID
+            data: 论文对象或 Paper.to_dict() 格式的完整字典
+
+        Returns:
+            {"success", "id", "message", "changed", "field_hashes"}
+
+        Raises:
+            KeyError: 文库中没有该论文
+        """
+        paper = self._as_paper(paper_id, data)
+        key = self._resolve_keys([paper_id]).get(paper_id)
+        if not key:
+            raise KeyError(f"Zotero中不存在该论文: {paper_id}")
+
+        fields = self._build_update_fields(paper)
+        hashes = hash_fields(fields)
+        changed = changed_fields(hashes, self._previous_field_hashes(paper_id))
+        if not changed:
+            return {"success": True, "id": key, "message": "内容未变化", "changed": [], "field_hashes": hashes}
+
+        version = self._fetch_versions([key]).get(key)
+        if version is None:
+            raise KeyError(f"Zotero条目已被删除: {key}")
+        headers = self._get_write_headers()
+        headers['If-Unmodified-Since-Version'] = str(version)
+        response = self._request(
+            'PATCH',
+            f"{self._get_api_url()}/{key}",
+            headers=headers,
+            json={name: fields[name] for name in changed}
+        )
+        if response.status_code == 412:
+            logger.warning(f"Zotero条目 {key} 在版本 {version} 之后已被修改，跳过更新")
+            return {
+                "success": False,
+                "id": key,
+                "message": f"条目在版本 {version} 之后已被修改",
+                "changed": [],
+                "field_hashes": hashes
+            }
+        response.raise_for_status()
+
+        if self._mirror is not None:
+            self._mirror.upsert_items([{
+                "key": key,
+                "version": response.headers.get('Last-Modified-Version') or version,
+                "data": fields
+            }])
+        self._record_updated(paper, key, hashes)
+        logger.info(f"已更新Zotero条目 {paper_id}: {', '.join(changed)}")
+        return {"success": True, "id": key, "message": "更新成功", "changed": changed, "field_hashes": hashes}
+
+    def batch_update(self, papers: List[Paper], **kwargs) -> Dict[str, Any]:
+        """
+        批量差量更新
+
+        只包含变化字段的条目对象（带 key 和 version）按每批 MAX_ITEMS_PER_WRITE 个
+        POST 到 items 接口，Zotero 将其按 PATCH 语义处理；版本不匹配的条目单独失败。
+
+        Returns:
+            {"success": [...], "failed": [{"id", "error"}], "skipped": [内容未变化的论文ID]}
+        """
+        results: Dict[str, Any] = {"success": [], "failed": [], "skipped": []}
+
+        keys = self._resolve_keys([paper.id for paper in papers])
+        pending: List[tuple] = []
+        for paper in papers:
+            key = keys.get(paper.id)
+            if not key:
+                results["failed"].append({"id": paper.id, "error": "Zotero中不存在该论文"})
+                continue
+            fields = self._build_update_fields(paper)
+            hashes = hash_fields(fields)
+            changed = changed_fields(hashes, self._previous_field_hashes(paper.id))
+            if changed:
+                pending.append((paper, key, {name: fields[name] for name in changed}, hashes))
+            else:
+                results["skipped"].append(paper.id)
+
+        if not pending:
+            return results
+
+        try:
+            versions = self._fetch_versions([key for _, key, _, _ in pending])
+        except Exception as e:
+            logger.error(f"获取Zotero条目版本失败: {e}")
+            results["failed"].extend({"id": paper.id, "error": str(e)} for paper, _, _, _ in pending)
+            return results
+
+        for start in range(0, len(pending), self.MAX_ITEMS_PER_WRITE):
+            chunk = pending[start:start + self.MAX_ITEMS_PER_WRITE]
+            missing = [paper for paper, key, _, _ in chunk if key not in versions]
+            results["failed"].extend({"id": paper.id, "error": "Zotero条目已被删除"} for paper in missing)
+            chunk = [entry for entry in chunk if entry[1] in versions]
+            if not chunk:
+                continue
+            items = [
+                {"key": key, "version": versions[key], **changes}
+                for _, key, changes, _ in chunk
+            ]
+            try:
+                response = self._request('POST', self._get_api_url(), headers=self._get_write_headers(), json=items)
+                response.raise_for_status()
+                body = response.json()
+                self._record_written(body)
+            except Exception as e:
+                logger.error(f"批量更新Zotero失败 ({len(chunk)} 篇): {e}")
+                results["failed"].extend({"id": paper.id, "error": str(e)} for paper, _, _, _ in chunk)
+                continue
+
+            papers_in_chunk = [paper for paper, _, _, _ in chunk]
+            for (paper, key, _, hashes), outcome in zip(chunk, self._parse_write_response(papers_in_chunk, body)):
+                if outcome["success"]:
+                    results["success"].append(paper.id)
+                    self._record_updated(paper, key, hashes)
+                else:
+                    results["failed"].append({"id": paper.id, "error": outcome["message"]})
+
+        logger.info(
+            f"Zotero批量更新完成: 成功 {len(results['success'])}, "
+            f"未变化 {len(results['skipped'])}, 失败 {len(results['failed'])}"
+        )
+        return results
 
     def insert(self, paper: Paper, collections: List[str] = None, **kwargs) -> Dict:
-        """插入论文到Zotero"""
-        collections = collections or kwargs.get('collection', ["DFGZNVCM"])
+        """
+        插入论文到Zotero
+
+        Returns:
+            {"success", "id", "message", "response", "field_hashes"}，由调用方记入账本
+        """
+        collections = collections or kwargs.get('collection') or self._get_collections(paper)
 
         # 检查是否存在
         if self.exists(paper.id, paper.doi, paper.title):
@@ -122,25 +739,301 @@ class ZoteroStorage(BaseStorage):
         # 构建项目数据
         item_data = self._build_item_data(paper, collections)
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
         try:
-            response = requests.post(
+            response = self._request(
+                'POST',
                 self._get_api_url(),
-                headers=headers,
-                json=[item_data],
-                proxies=self.proxies
+                headers=self._get_write_headers(),
+                json=[item_data]
             )
             response.raise_for_status()
-            logger.info(f"成功插入到Zotero: {paper.title}")
-            return response.json()
         except Exception as e:
             logger.error(f"插入Zotero失败: {e}")
             raise
 
+        body = response.json()
+        self._record_written(body)
+        outcome = self._parse_write_response([paper], body)[0]
+        if outcome["success"]:
+            logger.info(f"成功插入到Zotero: {paper.title}")
+            outcome["field_hashes"] = hash_fields(self._build_update_fields(paper))
+        else:
+            logger.warning(f"Zotero拒绝写入 {paper.id}: {outcome['message']}")
+        return {**outcome, "response": body}
+
+    def batch_insert(
+        self,
+        papers: List[Paper],
+        skip_existing: bool = True,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        批量插入论文
+
+        每个写请求最多携带 MAX_ITEMS_PER_WRITE 个条目，集合按各论文的领域从
+        category_map 解析，服务端按下标返回的 successful/failed 结果映射回论文ID。
+        传入 `idempotency_key` 时按批次内的论文ID为每个写请求生成
+        Zotero-Write-Token，重试同一批次不会重复创建条目；令牌已被使用（412）
+        时逐篇确认条目存在，未确认的论文计为失败以便重试。
+
+        Returns:
+            {"success": [论文ID], "failed": [{"id", "error"}], "skipped": [论文ID],
+             "keys": {论文ID: Zotero条目key}, "field_hashes": {论文ID: 各字段哈希}}
+        """
+        results: Dict[str, Any] = {
+            "success": [],
+            "failed": [],
+            "skipped": [],
+            "keys": {},
+            "field_hashes": {}
+        }
+
+        pending: List[Paper] = []
+        for paper in papers:
+            try:
+                if skip_existing and self.exists(paper.id, paper.doi, paper.title):
+                    results["skipped"].append(paper.id)
+                    continue
+            except Exception as e:
+                logger.warning(f"检查论文存在性失败 {paper.id}: {e}")
+            pending.append(paper)
+
+        for start in range(0, len(pending), self.MAX_ITEMS_PER_WRITE):
+            chunk = pending[start:start + self.MAX_ITEMS_PER_WRITE]
+            items = [
+                self._build_item_data(paper, self._get_collections(paper))
+                for paper in chunk
+            ]
+
+            headers = self._get_write_headers()
+            if kwargs.get('idempotency_key'):
+                # 令牌由批次内的论文ID决定，过滤结果变化时不会与其他批次的令牌重合
+                chunk_ids = ",".join(sorted(paper.id for paper in chunk))
+                headers['Zotero-Write-Token'] = hashlib.md5(
+                    f"{kwargs['idempotency_key']}:{chunk_ids}".encode('utf-8')
+                ).hexdigest()
+
+            try:
+                response = self._request('POST', self._get_api_url(), headers=headers, json=items)
+                if response.status_code == 412 and 'Zotero-Write-Token' in headers:
+                    # 写令牌已被使用：逐篇确认条目确实存在后才计为成功
+                    confirmed = self._confirm_written(chunk)
+                    logger.info(
+                        f"Zotero写令牌已使用，确认已写入 {len(confirmed)}/{len(chunk)} 篇"
+                    )
+                    for paper in chunk:
+                        if paper.id in confirmed:
+                            results["success"].append(paper.id)
+                            results["keys"][paper.id] = confirmed[paper.id]
+                            results["field_hashes"][paper.id] = hash_fields(
+                                self._build_update_fields(paper)
+                            )
+                        else:
+                            results["failed"].append({
+                                "id": paper.id,
+                                "error": "写令牌已使用，但未找到已写入的条目"
+                            })
+                    continue
+                response.raise_for_status()
+                body = response.json()
+                self._record_written(body)
+            except Exception as e:
+                logger.error(f"批量插入Zotero失败 ({len(chunk)} 篇): {e}")
+                results["failed"].extend({"id": paper.id, "error": str(e)} for paper in chunk)
+                continue
+
+            for paper, outcome in zip(chunk, self._parse_write_response(chunk, body)):
+                if outcome["success"]:
+                    results["success"].append(paper.id)
+                    results["keys"][paper.id] = outcome["id"]
+                    results["field_hashes"][paper.id] = hash_fields(self._build_update_fields(paper))
+                else:
+                    results["failed"].append({"id": paper.id, "error": outcome["message"]})
+
+        logger.info(
+            f"Zotero批量写入完成: 成功 {len(results['success'])}, "
+            f"跳过 {len(results['skipped'])}, 失败 {len(results['failed'])}"
+        )
+        return results
+
+    def _get_file_url(self, attachment_key: str) -> str:
+        return f"{self._get_api_url()}/{attachment_key}/file"
+
+    def _create_attachment(self, parent_key: str, filename: str, title: str) -> str:
+        """在父条目下创建 imported_file 类型的附件条目，返回附件key"""
+        item = {
+            "itemType": "attachment",
+            "parentItem": parent_key,
+            "linkMode": "imported_file",
+            "title": title,
+            "contentType": "application/pdf",
+            "filename": filename,
+            "tags": [],
+            "relations": {},
+        }
+        response = self._request('POST', self._get_api_url(), headers=self._get_write_headers(), json=[item])
+        response.raise_for_status()
+        outcome = self._parse_write_response([None], response.json())[0]
+        if not outcome["success"]:
+            raise RuntimeError(f"创建附件条目失败: {outcome['message']}")
+        return outcome["id"]
+
+    def upload_attachment(self, paper_id: str, file_path: str, title: str = None) -> Dict[str, Any]:
+        """
+        把 PDF 作为子附件上传到论文条目
+
+        按 Zotero 文件上传协议：创建附件条目后以文件 MD5 申请上传授权，服务端已有相同文件时
+        返回 exists，不再传输内容；否则把文件上传到授权地址并登记。上传成功后以文件 MD5
+        记入账本，重复运行时同一文件不再上传；文件内容变化时更新已有附件。
+
+        Returns:
+            {"success", "id": 附件key, "message", "uploaded": 是否传输了文件内容}，
+            账本记录已上传过相同文件时另有 "skipped": True
+        """
+        md5 = file_md5(file_path)
+        entry = self.ledger.get(self.ATTACHMENT_LEDGER, paper_id) if self.ledger is not None else None
+        if entry and entry["payload_hash"] == md5:
+            return {
+                "success": True, "id": entry["remote_id"], "message": "账本记录该文件已上传",
+                "uploaded": False, "skipped": True
+            }
+
+        filename = os.path.basename(file_path)
+        if entry and entry["remote_id"]:
+            # 复用已建的附件条目；尚未上传过文件（哈希为空）时仍按新文件申请授权
+            attachment_key = entry["remote_id"]
+            condition = {"If-Match": entry["payload_hash"]} if entry["payload_hash"] else {"If-None-Match": "*"}
+        else:
+            parent_key = self._resolve_keys([paper_id]).get(paper_id)
+            if not parent_key:
+                raise KeyError(f"Zotero中不存在该论文: {paper_id}")
+            attachment_key = self._create_attachment(parent_key, filename, title or filename)
+            # 先记下附件key，上传失败重试时复用该条目，不再重复创建空附件
+            if self.ledger is not None:
+                self.ledger.record(self.ATTACHMENT_LEDGER, paper_id, attachment_key, None)
+            condition = {"If-None-Match": "*"}
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/x-www-form-urlencoded",
+            **condition
+        }
+        response = self._request('POST', self._get_file_url(attachment_key), headers=headers, data={
+            "md5": md5,
+            "filename": filename,
+            "filesize": os.path.getsize(file_path),
+            "mtime": int(os.path.getmtime(file_path) * 1000),
+        })
+        response.raise_for_status()
+        auth = response.json()
+
+        uploaded = not auth.get("exists")
+        if uploaded:
+            body = _UploadBody(
+                auth["prefix"].encode('utf-8'), file_path, auth["suffix"].encode('utf-8'), self._upload_bandwidth
+            )
+            try:
+                upload = requests.post(
+                    auth["url"], data=body, headers={"Content-Type": auth["contentType"]},
+                    proxies=self.proxies, timeout=self.timeout
+                )
+            finally:
+                body.close()
+            upload.raise_for_status()
+
+            response = self._request(
+                'POST', self._get_file_url(attachment_key), headers=headers, data={"upload": auth["uploadKey"]}
+            )
+            response.raise_for_status()
+
+        if self.ledger is not None:
+            self.ledger.record(self.ATTACHMENT_LEDGER, paper_id, attachment_key, md5)
+        logger.info(f"Zotero附件{'已上传' if uploaded else '已存在，跳过传输'}: {paper_id} -> {attachment_key}")
+        return {
+            "success": True,
+            "id": attachment_key,
+            "message": "已上传" if uploaded else "服务端已有相同文件",
+            "uploaded": uploaded
+        }
+
+    def upload_attachments(self, files: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        并发上传多篇论文的 PDF 附件（并发数为 upload_concurrency，共享带宽上限）
+
+        Args:
+            files: [(论文ID, PDF路径)]
+
+        Returns:
+            {"success": [论文ID], "failed": [{"id", "error"}], "skipped": [论文ID],
+             "keys": {论文ID: 附件key}}，skipped 为账本记录已上传过相同文件的论文
+        """
+        results: Dict[str, Any] = {"success": [], "failed": [], "skipped": [], "keys": {}}
+        if not files:
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.upload_concurrency, len(files))) as executor:
+            futures = {
+                executor.submit(self.upload_attachment, paper_id, path): paper_id
+                for paper_id, path in files
+            }
+            for future in as_completed(futures):
+                paper_id = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    logger.error(f"上传Zotero附件失败 {paper_id}: {e}")
+                    results["failed"].append({"id": paper_id, "error": str(e)})
+                    continue
+                results["keys"][paper_id] = outcome["id"]
+                if outcome.get("skipped"):
+                    results["skipped"].append(paper_id)
+                else:
+                    results["success"].append(paper_id)
+
+        logger.info(
+            f"Zotero附件上传完成: 成功 {len(results['success'])}, "
+            f"跳过 {len(results['skipped'])}, 失败 {len(results['failed'])}"
+        )
+        return results
+
+    def _get_write_headers(self) -> Dict[str, str]:
+        """获取写请求头"""
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+
+    @staticmethod
+    def _parse_write_response(papers: List[Paper], body: Dict) -> List[Dict[str, Any]]:
+        """
+        解析Zotero写请求的按下标结果
+
+        Zotero 以请求数组下标（字符串）为键返回 successful / unchanged / failed。
+        """
+        successful = body.get("successful", {}) or {}
+        unchanged = body.get("unchanged", {}) or {}
+        failed = body.get("failed", {}) or {}
+
+        outcomes: List[Dict[str, Any]] = []
+        for index, paper in enumerate(papers):
+            key = str(index)
+            if key in successful:
+                item = successful[key]
+                item_key = item.get("key") if isinstance(item, dict) else item
+                outcomes.append({"success": True, "id": item_key, "message": "created"})
+            elif key in unchanged:
+                outcomes.append({"success": True, "id": unchanged[key], "message": "unchanged"})
+            elif key in failed:
+                error = failed[key]
+                outcomes.append({
+                    "success": False,
+                    "id": None,
+                    "message": f"{error.get('code')}: {error.get('message')}"
+                })
+            else:
+                outcomes.append({"success": False, "id": None, "message": "响应中缺少该条目的结果"})
+        return outcomes
+
     def _build_item_data(self, paper: Paper, collections: List[str]) -> Dict:
         """构建Zotero项目数据"""
         item_data = self._item_template.copy()
@@ -162,10 +1055,12 @@ class ZoteroStorage(BaseStorage):
         item_data['dateAdded'] = f"{date_str} 00:00:00"
         item_data['dateModified'] = f"{date_str} 00:00:00"
 
-        # 标签（包含ArXiv分类）
+        # 标签（包含ArXiv分类和用于精确查找的机器标签）
         tags = [{"tag": tag} for tag in paper.tags]
         if paper.arxiv_categories:
             tags.extend([{"tag": f"#{cat}"} for cat in paper.arxiv_categories])
+        if is_arxiv_id(paper.id):
+            tags.append({"tag": arxiv_machine_tag(paper.id)})
         item_data['tags'] = tags
 
         # 摘要（使用中文摘要）
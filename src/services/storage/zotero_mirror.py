@@ -0,0 +1,205 @@
+"""
+Zotero 文库本地镜像
+
+在本地 SQLite 中保存目标文库中每个顶层条目的识别字段（archiveID、DOI、
+规范化标题、URL），配合 Zotero 基于版本号的增量同步，
+使存在性检查变为本地索引查询。
+"""
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from models.identifiers import (
+    arxiv_id_from_url,
+    is_arxiv_id,
+    normalize_arxiv_id,
+    normalize_title,
+    normalize_url,
+)
+
+logger = logging.getLogger(__name__)
+
+# 写入Zotero条目的机器标签前缀，如 "arxiv:2401.01234"
+ARXIV_TAG_PREFIX = "arxiv:"
+
+
+def arxiv_machine_tag(paper_id: str) -> str:
+    """生成确定性的ArXiv机器标签"""
+    return f"{ARXIV_TAG_PREFIX}{normalize_arxiv_id(paper_id)}"
+
+
+def arxiv_id_from_tags(tags: Iterable[Dict[str, Any]]) -> str:
+    """从条目标签中读取ArXiv机器标签对应的ID"""
+    for tag in tags or []:
+        value = tag.get("tag", "") if isinstance(tag, dict) else str(tag)
+        if value.startswith(ARXIV_TAG_PREFIX):
+            return normalize_arxiv_id(value[len(ARXIV_TAG_PREFIX):])
+    return ""
+
+
+class ZoteroLibraryMirror:
+    """
+    Zotero 文库本地镜像
+
+    只保存识别字段，不保存完整条目。`library_version` 记录最近一次同步时
+    服务端返回的 Last-Modified-Version，下次以 `since=<version>` 做增量同步。
+
+    Attributes:
+        db_path: SQLite 数据库路径
+        library: 文库标识（如 "user:123"），切换文库时会清空镜像
+    """
+
+    def __init__(self, db_path: str, library: str):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.library = library
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        """创建表和索引"""
+        with self._lock, self._conn:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS items (
+                    key TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    archive_id TEXT,
+                    doi TEXT,
+                    title TEXT,
+                    url TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_items_archive_id ON items(archive_id);
+                CREATE INDEX IF NOT EXISTS idx_items_doi ON items(doi);
+                CREATE INDEX IF NOT EXISTS idx_items_title ON items(title);
+                CREATE INDEX IF NOT EXISTS idx_items_url ON items(url);
+                CREATE TABLE IF NOT EXISTS meta (
+                    name TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                """
+            )
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'library'").fetchone()
+            if row and row[0] != self.library:
+                logger.info(f"Zotero镜像文库由 {row[0]} 切换为 {self.library}，清空镜像")
+                self._conn.execute("DELETE FROM items")
+                self._conn.execute("DELETE FROM meta")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('library', ?)",
+                (self.library,)
+            )
+
+    @property
+    def library_version(self) -> int:
+        """最近一次同步的文库版本号，0 表示尚未同步"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE name = 'library_version'"
+            ).fetchone()
+        return int(row[0]) if row else 0
+
+    def set_library_version(self, version: int) -> None:
+        """记录同步后的文库版本号"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('library_version', ?)",
+                (str(version),)
+            )
+
+    def upsert_items(self, items: Iterable[Dict[str, Any]]) -> int:
+        """
+        写入或更新条目
+
+        Args:
+            items: Zotero API 返回的条目对象（包含 key、version、data）
+
+        Returns:
+            写入的条目数
+        """
+        rows = []
+        for item in items:
+            data = item.get("data", item)
+            key = item.get("key") or data.get("key")
+            if not key:
+                continue
+            url = data.get("url", "")
+            archive_id = (
+                arxiv_id_from_tags(data.get("tags"))
+                or normalize_arxiv_id(data.get("archiveID"))
+                or arxiv_id_from_url(url)
+            )
+            rows.append((
+                key,
+                int(item.get("version") or data.get("version") or 0),
+                archive_id,
+                (data.get("DOI") or "").strip().lower(),
+                normalize_title(data.get("title")),
+                normalize_url(url),
+            ))
+
+        if rows:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO items (key, version, archive_id, doi, title, url) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+        return len(rows)
+
+    def remove_items(self, keys: Iterable[str]) -> None:
+        """删除条目"""
+        keys = list(keys)
+        if keys:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM items WHERE key = ?", [(key,) for key in keys])
+
+    def find(
+        self,
+        arxiv_id: str = None,
+        doi: str = None,
+        title: str = None,
+        url: str = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        按识别字段查找条目
+
+        依次尝试 ArXiv ID、DOI、URL、规范化标题，返回第一个命中的条目。
+
+        Returns:
+            {"key", "version"}，未找到返回 None
+        """
+        lookups = (
+            ("archive_id", normalize_arxiv_id(arxiv_id)),
+            ("doi", (doi or "").strip().lower()),
+            ("url", normalize_url(url)),
+            ("title", normalize_title(title)),
+        )
+        with self._lock:
+            for column, value in lookups:
+                if not value:
+                    continue
+                row = self._conn.execute(
+                    f"SELECT key, version FROM items WHERE {column} = ? LIMIT 1",
+                    (value,)
+                ).fetchone()
+                if row:
+                    return {"key": row[0], "version": row[1]}
+        return None
+
+    def contains(self, arxiv_id: str = None, doi: str = None, title: str = None, url: str = None) -> bool:
+        """检查条目是否存在"""
+        return self.find(arxiv_id=arxiv_id, doi=doi, title=title, url=url) is not None
+
+    def count(self) -> int:
+        """镜像中的条目数"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,70 @@
+"""本地归档存储单元测试"""
+import pytest
+
+pytest.importorskip("pyarrow")
+
+
+def _make_papers():
+    from models.paper import Paper
+
+    return [
+        Paper(id="2401.00001v1", title="A", category="RL", tags=["LLM", "Agent"], tldr={"方法": "m"}),
+        Paper(id="2401.00002", title="B", category="NLP", tags=["LLM"]),
+        Paper(id="2401.00003", title="C", category="RL", tags=["Vision"]),
+    ]
+
+
+class TestArchiveStorage:
+    """本地归档存储测试"""
+
+    def test_batch_insert_query_and_get(self, tmp_path):
+        """测试批量归档后按列过滤、投影和按ID获取"""
+        from services.storage.archive import ArchiveStorage
+
+        storage = ArchiveStorage(root_dir=str(tmp_path))
+        result = storage.batch_insert(_make_papers())
+
+        assert len(result["success"]) == 3 and len(result["files"]) == 1
+        assert "date=" in result["files"][0]
+        assert storage.batch_insert(_make_papers()[:1])["skipped"] == ["2401.00001v1"]
+
+        papers = storage.query({"category": "RL", "tags": ("contains", "LLM")})
+        assert [paper.title for paper in papers] == ["A"]
+        assert papers[0].tldr == {"方法": "m"}
+
+        rows = storage.scan({"category": ["RL", "NLP"]}, columns=["id", "title"])
+        assert sorted(rows, key=lambda r: r["id"])[1] == {"id": "2401.00002", "title": "B"}
+
+        assert storage.get("2401.00001").title == "A"
+        assert storage.get("2401.99999") is None
+
+    def test_buffered_insert_and_update_keep_latest(self, tmp_path):
+        """测试单篇插入先缓冲，更新追加新版本后查询返回最新版本"""
+        from services.storage.archive import ArchiveStorage
+
+        storage = ArchiveStorage(root_dir=str(tmp_path), flush_size=10)
+        paper = _make_papers()[1]
+        storage.insert(paper)
+        assert not list(tmp_path.glob("date=*/*.parquet"))
+        assert storage.exists("2401.00002v2")
+
+        paper.tags = ["LLM", "RAG"]
+        assert storage.update(paper.id, paper)["changed"] == ["tags"]
+        assert storage.update(paper.id, paper)["changed"] == []
+
+        assert storage.get(paper.id).tags == ["LLM", "RAG"]
+        assert len(ArchiveStorage(root_dir=str(tmp_path)).query()) == 1
+
+    def test_filters_apply_to_latest_version_only(self, tmp_path):
+        """测试旧版本满足过滤条件而最新版本不满足时不返回该论文"""
+        from services.storage.archive import ArchiveStorage
+
+        storage = ArchiveStorage(root_dir=str(tmp_path))
+        paper = _make_papers()[0]
+        storage.batch_insert([paper])
+
+        paper.category = "NLP"
+        storage.update(paper.id, paper)
+
+        assert storage.query({"category": "RL"}) == []
+        assert [p.category for p in storage.query({"category": "NLP"})] == ["NLP"]
@@ -0,0 +1,184 @@
+"""本地缓存存储单元测试"""
+import json
+import pickle
+import time
+from datetime import datetime
+
+
+class TestCacheStore:
+    """本地缓存存储测试"""
+
+    def test_namespaces_and_lru_gc(self, tmp_path, monkeypatch):
+        """测试命名空间隔离，并按最近访问时间淘汰可淘汰的条目"""
+        from core import cache_store
+        from core.cache_store import CacheStore, encode_value
+
+        monkeypatch.setattr(cache_store, "ACCESS_RESOLUTION", 0)
+
+        store = CacheStore(str(tmp_path / "cache.db"))
+        meta = {"id": "2401.00001", "title": "中文标题"}
+        store.set("arxiv_meta", "2401.00001", meta)
+        store.set("datasource", "2401.00001", {"id": "other"})
+        store.set("checkpoint:arxiv_ckpt", "2401.00001", True, evictable=False)
+        assert store.get("arxiv_meta", "2401.00001")["title"] == "中文标题"
+        assert store.get("datasource", "2401.00001") == {"id": "other"}
+        assert store.get("arxiv_meta", "missing", default={}) == {}
+
+        time.sleep(0.01)
+        store.set("arxiv_meta", "2401.00002", {"id": "2401.00002"})
+        time.sleep(0.01)
+        store.get("arxiv_meta", "2401.00001")
+
+        # 最久未访问的是 datasource 条目，其次是 2401.00002；检查点不淘汰
+        limit = len(encode_value(meta)[0]) + len(encode_value(True)[0])
+        assert store.gc(max_bytes=limit) == 2
+        assert store.keys("arxiv_meta") == ["2401.00001"]
+        assert not store.contains("datasource", "2401.00001")
+        assert store.keys("checkpoint:arxiv_ckpt") == ["2401.00001"]
+        store.close()
+
+    def test_migrate_dir(self, tmp_path):
+        """测试旧版缓存文件导入对应命名空间，arXiv 结果不再依赖 pickle"""
+        import arxiv
+        from core.cache_store import CacheStore, arxiv_result_from_dict
+
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        (cache_dir / "2401.00001.json").write_text(json.dumps({"id": "2401.00001", "tldr": {}}))
+        (cache_dir / "arxiv_2401.00001.json").write_text(json.dumps({"id": "2401.00001", "title": "T"}))
+        (cache_dir / "2401.00001.json.backup").write_text("{}")
+        (cache_dir / "arxiv_ckpt.txt").write_text("2401.00001\n2401.00002\n")
+        result = arxiv.Result(
+            entry_id="http://arxiv.org/abs/2401.00001v1",
+            published=datetime(2024, 1, 1),
+            title="Title",
+            authors=[arxiv.Result.Author("Alice")],
+            links=[arxiv.Result.Link("http://arxiv.org/pdf/2401.00001v1", title="pdf")],
+        )
+        with open(cache_dir / "2401.00001.pkl", "wb") as f:
+            pickle.dump(result, f)
+
+        store = CacheStore(str(cache_dir / "cache.db"))
+        counts = store.migrate_dir(str(cache_dir), delete=True)
+
+        assert counts["migrated"] == 4
+        assert store.get("arxiv_meta", "2401.00001") == {"id": "2401.00001", "tldr": {}}
+        assert store.get("datasource", "arxiv_2401.00001")["title"] == "T"
+        assert sorted(store.keys("checkpoint:arxiv_ckpt")) == ["2401.00001", "2401.00002"]
+        restored = arxiv_result_from_dict(store.get("arxiv_result", "2401.00001"))
+        assert restored.authors[0].name == "Alice"
+        assert restored.published == datetime(2024, 1, 1)
+        assert restored.pdf_url == "http://arxiv.org/pdf/2401.00001v1"
+        assert not (cache_dir / "2401.00001.pkl").exists()
+        assert (cache_dir / "2401.00001.json.backup").exists()
+        store.close()
+
+
+    def test_shared_store_migrates_legacy_files_once(self, tmp_path):
+        """测试首次打开共享缓存库时自动导入旧版检查点，之后不再重复导入"""
+        from core.cache_store import get_cache_store
+
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        (cache_dir / "ckpt_2024-01-01.txt").write_text("2401.00001v2\n")
+
+        store = get_cache_store(str(cache_dir / "cache.db"))
+
+        assert store.keys("checkpoint:ckpt_2024-01-01") == ["2401.00001"]
+        assert (cache_dir / "ckpt_2024-01-01.txt").exists()
+        assert store.migrate_legacy() is None
+
+
+class TestArxivVisitorCache:
+    """ArxivVisitor 回写缓存测试"""
+
+    def test_single_write_on_miss_and_none_on_hit(self, tmp_path, monkeypatch):
+        """测试未命中时每篇论文只写入一次元数据，命中时不写入"""
+        import arxiv
+        from service.arxiv_visitor import ArxivVisitor
+
+        result = arxiv.Result(
+            entry_id="http://arxiv.org/abs/2401.00001v1",
+            published=datetime(2024, 1, 1),
+            title="Title",
+            summary="reinforcement learning",
+        )
+        visitor = ArxivVisitor(str(tmp_path))
+        monkeypatch.setattr(visitor, "_fetch_arxiv_result", lambda _id: result)
+        monkeypatch.setattr(visitor, "_generate_tldr", lambda summary: {
+            "动机": "a", "方法": "b", "结果": "c", "翻译": "d", "short_summary": "e", "remark": "RL"
+        })
+        monkeypatch.setattr(visitor, "_generate_tag_info", lambda summary: {"主要领域": "RL", "标签": ["rl"]})
+
+        writes = []
+        original_set = visitor.cache_store.set
+
+        def recording_set(namespace, key, value, **kwargs):
+            # 别名登记不计入元数据写入
+            if namespace != "identity":
+                writes.append(namespace)
+            original_set(namespace, key, value, **kwargs)
+
+        monkeypatch.setattr(visitor.cache_store, "set", recording_set)
+
+        paper = visitor.find_by_id("2401.00001")
+        assert paper.summary_cn == "d"
+        assert paper.tags == ["rl", "/unread"]
+        assert sorted(writes) == ["arxiv_meta", "arxiv_result"]
+
+        writes.clear()
+        assert visitor.find_by_id("2401.00001").category == "RL"
+        assert writes == []
+
+
+class TestTieredCache:
+    """两级缓存测试"""
+
+    def test_memory_tier_negative_entries_and_stats(self, tmp_path):
+        """测试内存层命中不读磁盘、空结果在有效期内不重复加载，并发加载只执行一次"""
+        import threading
+
+        from core.cache_store import CacheStore
+        from core.tiered_cache import TieredCache
+
+        store = CacheStore(str(tmp_path / "cache.db"))
+        cache = TieredCache(store, negative_ttl=60)
+        calls = []
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(2)
+            return {"id": "2401.00001", "tags": ["rl"]}
+
+        threads = [
+            threading.Thread(target=cache.get_or_load, args=("datasource", "arxiv_2401.00001", loader))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        while cache.memory.stats()["coalesced"] < 2:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+
+        paper = cache.get_or_load("datasource", "arxiv_2401.00001", loader)
+        paper["tags"].append("/unread")
+        assert cache.get_or_load("datasource", "arxiv_2401.00001")["tags"] == ["rl"]
+        assert store.get("datasource", "arxiv_2401.00001") == {"id": "2401.00001", "tags": ["rl"]}
+
+        misses = []
+        assert cache.get_or_load("datasource", "arxiv_missing", lambda: misses.append(1)) is None
+        assert cache.get_or_load("datasource", "arxiv_missing", lambda: misses.append(1)) is None
+        # 新进程只有磁盘层，否定条目仍然有效
+        fresh = TieredCache(store, negative_ttl=60)
+        assert fresh.get_or_load("datasource", "arxiv_missing", lambda: misses.append(1)) is None
+        assert len(misses) == 1
+
+        stats = cache.stats()["namespaces"]["datasource"]
+        assert (stats["lookups"], stats["loads"], stats["memory_hits"]) == (7, 2, 5)
+        assert stats["hit_ratio"] == round(5 / 7, 4)
+        assert fresh.stats()["namespaces"]["datasource"]["negative_hits"] == 1
+        store.close()
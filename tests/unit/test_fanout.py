@@ -0,0 +1,57 @@
+"""存储写入并行分发单元测试"""
+import threading
+import time
+
+from core.fanout import StorageFanout
+
+
+class TestStorageFanout:
+    """存储写入并行分发测试"""
+
+    def test_runs_targets_concurrently_and_keeps_order(self):
+        """测试各存储并行写入、失败互不影响且结果顺序与调用一致"""
+        barrier = threading.Barrier(3, timeout=2)
+
+        def ok(name):
+            barrier.wait()
+            return {"success": True, "id": name}
+
+        def fail():
+            barrier.wait()
+            raise RuntimeError("boom")
+
+        fanout = StorageFanout()
+        outcomes = fanout.run({
+            "zotero": lambda: ok("zotero"),
+            "notion": fail,
+            "wolai": lambda: ok("wolai"),
+        })
+        fanout.close()
+
+        assert list(outcomes) == ["zotero", "notion", "wolai"]
+        assert outcomes["zotero"] == ({"success": True, "id": "zotero"}, None)
+        assert outcomes["notion"][0] is None
+        assert str(outcomes["notion"][1]) == "boom"
+
+    def test_per_target_limit(self):
+        """测试同一存储的并发写入数不超过上限"""
+        fanout = StorageFanout(limits={"notion": 1})
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def write():
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+
+        threads = [threading.Thread(target=fanout.run, args=({"notion": write},)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        fanout.close()
+
+        assert state["peak"] == 1
@@ -187,3 +187,23 @@ class TestFeishuService:
         # Verify raw_tldr was used
         call_args = mock_post.call_args_list[1]
         assert 'This is the raw TLDR content' in str(call_args)
+
+    @patch('service.feishu_service.time.monotonic')
+    @patch('service.feishu_service.requests.post')
+    def test_access_token_refreshed_before_expire(self, mock_post, mock_monotonic):
+        """测试访问令牌临近过期时重新获取"""
+        from service.feishu_service import FeishuService
+
+        first, second = MagicMock(), MagicMock()
+        first.json.return_value = {'code': 0, 'tenant_access_token': 'token_1', 'expire': 7200}
+        second.json.return_value = {'code': 0, 'tenant_access_token': 'token_2', 'expire': 7200}
+        mock_post.side_effect = [first, second]
+
+        service = FeishuService(app_id='test_id', app_secret='test_secret')
+        mock_monotonic.return_value = 0
+        assert service._get_tenant_access_token() == 'token_1'
+        mock_monotonic.return_value = 3600
+        assert service._get_tenant_access_token() == 'token_1'
+        mock_monotonic.return_value = 7000
+        assert service._get_tenant_access_token() == 'token_2'
+        assert mock_post.call_count == 2
@@ -0,0 +1,101 @@
+"""飞书多维表格存储服务单元测试"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _make_response(status_code=200, body=None, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = body or {}
+    return response
+
+
+def _make_storage():
+    from services.storage.feishu import FeishuStorage
+
+    return FeishuStorage(
+        app_id="app_id",
+        app_secret="app_secret",
+        app_token="app_token",
+        table_id="table_id",
+        use_proxy=False
+    )
+
+
+class TestFeishuBatchInsert:
+    """飞书批量写入测试"""
+
+    @patch("services.storage.feishu.requests.request")
+    @patch("services.storage.feishu.requests.post")
+    def test_batch_create_chunks_by_five_hundred(self, mock_post, mock_request):
+        """测试按500条分块调用batch_create，令牌只获取一次，client_token 为 UUIDv4"""
+        import uuid
+        from models.paper import Paper
+
+        mock_post.return_value = _make_response(body={
+            "code": 0, "tenant_access_token": "token", "expire": 7200
+        })
+
+        def fake_request(method, url, json=None, **kwargs):
+            records = [{"record_id": f"rec{i}"} for i in range(len(json["records"]))]
+            return _make_response(body={"code": 0, "data": {"records": records}})
+
+        mock_request.side_effect = fake_request
+        storage = _make_storage()
+        papers = [Paper(id=f"2401.{i:05d}", title=f"Paper {i}") for i in range(1200)]
+
+        results = storage.batch_insert(papers, skip_existing=False, idempotency_key="batch-1")
+
+        sizes = [len(call.kwargs["json"]["records"]) for call in mock_request.call_args_list]
+        assert sizes == [500, 500, 200]
+        tokens = [uuid.UUID(call.kwargs["params"]["client_token"]) for call in mock_request.call_args_list]
+        assert {token.version for token in tokens} == {4}
+        assert len(set(tokens)) == 3
+        assert mock_request.call_args.args[1].endswith("/records/batch_create")
+        assert len(results["success"]) == 1200
+        assert results["records"]["2401.00500"] == "rec0"
+        assert mock_post.call_count == 1
+
+    @patch("services.storage.feishu.requests.request")
+    @patch("services.storage.feishu.requests.post")
+    def test_invalid_token_is_refreshed_once(self, mock_post, mock_request):
+        """测试令牌失效时刷新令牌后重试"""
+        from models.paper import Paper
+
+        mock_post.side_effect = [
+            _make_response(body={"code": 0, "tenant_access_token": "old", "expire": 7200}),
+            _make_response(body={"code": 0, "tenant_access_token": "new", "expire": 7200}),
+        ]
+        mock_request.side_effect = [
+            _make_response(body={"code": 99991663, "msg": "token invalid"}),
+            _make_response(body={"code": 0, "data": {"records": [{"record_id": "rec0"}]}}),
+        ]
+        storage = _make_storage()
+
+        results = storage.batch_insert([Paper(id="2401.00001", title="T")], skip_existing=False)
+
+        assert results["success"] == ["2401.00001"]
+        assert mock_request.call_args.kwargs["headers"]["Authorization"] == "Bearer new"
+
+    @patch("services.storage.feishu.requests.request")
+    @patch("services.storage.feishu.requests.post")
+    def test_exists_many_merges_search_conditions(self, mock_post, mock_request):
+        """测试账本没有记录的ID合并为一次PDF链接检索，已有记录的论文跳过写入"""
+        from models.paper import Paper
+
+        mock_post.return_value = _make_response(body={"code": 0, "tenant_access_token": "token", "expire": 7200})
+        mock_request.side_effect = [
+            _make_response(body={"code": 0, "data": {"items": [
+                {"fields": {"PDF链接": {"link": "http://arxiv.org/pdf/2401.00001v2", "text": "PDF"}}}
+            ], "has_more": False}}),
+            _make_response(body={"code": 0, "data": {"records": [{"record_id": "rec0"}]}}),
+        ]
+        storage = _make_storage()
+
+        results = storage.batch_insert([Paper(id="2401.00001", title="A"), Paper(id="2401.00002", title="B")])
+
+        search = mock_request.call_args_list[0]
+        assert search.args[1].endswith("/records/search")
+        assert [c["value"] for c in search.kwargs["json"]["filter"]["conditions"]] == [["2401.00001"], ["2401.00002"]]
+        assert results["skipped"] == ["2401.00001"] and results["success"] == ["2401.00002"]
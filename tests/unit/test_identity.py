@@ -0,0 +1,106 @@
+"""论文身份（别名索引）单元测试"""
+
+
+class TestIdentityIndex:
+    """别名索引测试"""
+
+    def test_aliases_resolve_to_one_canonical_key(self, tmp_path):
+        """测试带版本号的 ArXiv ID、DOI、paperId 解析到同一规范键，标题相同但 ArXiv ID 不同的不合并"""
+        from core.cache_store import CacheStore
+        from core.identity import IdentityIndex
+        from models.paper import Paper
+
+        store = CacheStore(str(tmp_path / "cache.db"))
+        identity = IdentityIndex(store)
+
+        arxiv_paper = Paper(id="2401.00001", title="Deep RL", source="arxiv")
+        assert identity.resolve(arxiv_paper) == "2401.00001"
+        assert identity.resolve_id("2401.00001v3") == "2401.00001"
+        assert identity.resolve_id("https://arxiv.org/abs/2401.00001v2") == "2401.00001"
+
+        s2_id = "a" * 40
+        s2_paper = Paper(
+            id=s2_id, title="Deep RL", source="semantic_scholar",
+            raw_data={"externalIds": {"DOI": "10.1000/XYZ", "ArXiv": "2401.00001"}},
+        )
+        assert identity.resolve(s2_paper) == "2401.00001"
+        assert identity.resolve_id(s2_id) == "2401.00001"
+        assert identity.resolve_id("https://doi.org/10.1000/xyz") == "2401.00001"
+
+        # 无 ArXiv ID 的同名论文按标题合并，ArXiv ID 不同的同名论文不合并
+        assert identity.resolve(Paper(id="x", title="deep  RL!", source="other")) == "2401.00001"
+        assert identity.resolve(Paper(id="2402.00002", title="Deep RL", source="arxiv")) == "2402.00002"
+
+        # 新实例从磁盘读取已登记的别名
+        assert IdentityIndex(store).resolve_id(s2_id) == "2401.00001"
+        store.close()
+
+    def test_ledger_sees_aliases_as_synced(self, tmp_path):
+        """测试账本按规范键记录，别名ID视为已同步"""
+        from core.cache_store import CacheStore
+        from core.identity import IdentityIndex
+        from core.ledger import SyncLedger
+        from models.paper import Paper
+
+        store = CacheStore(str(tmp_path / "cache.db"))
+        identity = IdentityIndex(store)
+        identity.resolve(Paper(
+            id="b" * 40, title="T", source="semantic_scholar",
+            raw_data={"externalIds": {"ArXiv": "2401.00001"}},
+        ))
+        ledger = SyncLedger(str(tmp_path / "ledger.db"), identity=identity)
+        ledger.record("notion", "2401.00001v2", remote_id="page-1")
+        assert ledger.get("notion", "b" * 40)["remote_id"] == "page-1"
+        store.close()
+
+
+class TestPlanPapers:
+    """多数据源候选论文去重测试"""
+
+    def test_duplicates_enhanced_and_saved_once(self, tmp_path):
+        """测试多个数据源中的同一论文合并后只增强和写入一次，标题相同但 ArXiv ID 不同的不合并"""
+        from unittest.mock import Mock
+
+        from core.cache_store import CacheStore
+        from core.identity import IdentityIndex
+        from core.processor import PaperProcessor
+        from models.paper import Paper
+
+        arxiv = Mock()
+        arxiv.search.return_value = [
+            Paper(id="2401.00001v2", title="Deep RL", source="arxiv", summary="s"),
+            Paper(id="2402.00002", title="Deep RL", source="arxiv", summary="s"),
+        ]
+        s2 = Mock()
+        s2.search.return_value = [Paper(
+            id="c" * 40, title="Deep RL!", source="semantic_scholar", citation_count=7,
+            raw_data={"externalIds": {"DOI": "10.1000/xyz"}},
+        )]
+        storage = Mock()
+        storage.insert.return_value = {"success": True}
+        storage.exists_many.return_value = {}
+        llm = Mock()
+        llm.generate_summary.return_value = {"翻译": "t"}
+        llm.generate_tags.return_value = {"主要领域": "RL", "标签": ["rl"]}
+
+        store = CacheStore(str(tmp_path / "cache.db"))
+        processor = PaperProcessor(
+            data_sources={"arxiv": arxiv, "semantic_scholar": s2},
+            storages={"notion": storage},
+            llm_service=llm,
+            identity=IdentityIndex(store)
+        )
+        hf = Paper(id="2401.00001", title="Deep RL", source="huggingface", media_url="v.mp4")
+        plan = processor.plan_papers(["arxiv", "semantic_scholar"], keywords=["rl"], candidates=[hf])
+
+        assert arxiv.search.call_args.kwargs["enrich"] is False
+        assert (plan["fetched"], plan["duplicates"]) == (4, 2)
+        first, second = plan["papers"]
+        assert (first.id, first.citation_count, first.media_url) == ("2401.00001v2", 7, "v.mp4")
+        assert second.id == "2402.00002"
+
+        result = processor.process_planned(plan["papers"], download_pdf=False)
+        assert result["stats"]["saved"] == 2
+        assert storage.insert.call_count == 2
+        assert llm.generate_summary.call_count == 2
+        store.close()
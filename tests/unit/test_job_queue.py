@@ -0,0 +1,61 @@
+"""后台任务队列单元测试"""
+import threading
+
+import pytest
+
+
+class TestJobQueue:
+    """后台任务队列测试"""
+
+    def test_dedupe_status_and_stats(self):
+        """测试同一键排队期间只保留一个任务，并记录成功和失败状态"""
+        from core.job_queue import JobQueue
+
+        release = threading.Event()
+        calls = []
+
+        def handler(key):
+            release.wait(2)
+            calls.append(key)
+            if key == "bad":
+                raise RuntimeError("下载失败")
+            return {"title": key}
+
+        jobs = JobQueue(handler, workers=1)
+        first = jobs.submit("2401.00001")
+        assert jobs.submit("2401.00001")["id"] == first["id"]
+        bad = jobs.submit("bad")
+        release.set()
+        jobs.join()
+
+        assert calls == ["2401.00001", "bad"]
+        assert jobs.get(first["id"])["status"] == "succeeded"
+        assert jobs.get(first["id"])["result"] == {"title": "2401.00001"}
+        assert jobs.get(bad["id"])["error"] == "下载失败"
+        assert [job["key"] for job in jobs.list(status="failed")] == ["bad"]
+
+        stats = jobs.stats()
+        assert (stats["submitted"], stats["deduplicated"], stats["succeeded"], stats["failed"]) == (2, 1, 1, 1)
+        assert stats["queue_depth"] == 0
+        assert jobs.submit("2401.00001")["id"] != first["id"]
+
+    def test_rejects_when_queue_full(self):
+        """测试队列满时拒绝新任务"""
+        from core.job_queue import JobQueue, QueueFullError
+
+        release = threading.Event()
+        started = threading.Event()
+
+        def handler(key):
+            started.set()
+            release.wait(2)
+
+        jobs = JobQueue(handler, workers=1, max_pending=1)
+        jobs.submit("a")
+        started.wait(2)
+        jobs.submit("b")
+        with pytest.raises(QueueFullError):
+            jobs.submit("c")
+        assert jobs.stats()["rejected"] == 1
+        release.set()
+        jobs.join()
@@ -0,0 +1,66 @@
+"""同步账本单元测试"""
+import pytest
+from unittest.mock import Mock
+
+
+class TestSyncLedger:
+    """同步账本测试"""
+
+    def test_record_and_lookup_by_normalized_id(self, tmp_path):
+        """测试按规范化ID记录，补写时保留原有远程ID"""
+        from core.ledger import SyncLedger
+
+        ledger = SyncLedger(str(tmp_path / "ledger.db"))
+        ledger.record("notion", "2401.00001v2", "page-1", "hash-1")
+        ledger.record("notion", "2401.00001", None, "hash-2")
+        ledger.record("zotero", "2401.00001", "KEY1")
+
+        entry = ledger.get("notion", "2401.00001v1")
+        assert entry["remote_id"] == "page-1"
+        assert entry["payload_hash"] == "hash-2"
+        assert ledger.written_storages(["2401.00001v3", "2401.00002"]) == {
+            "2401.00001v3": {"notion", "zotero"}
+        }
+        assert ledger.written_storages(["2401.00001"], ["wolai"]) == {}
+        assert ledger.stats() == {"notion": 1, "zotero": 1}
+
+
+class TestProcessorLedger:
+    """处理器使用账本测试"""
+
+    def test_rerun_retries_only_failed_targets(self, tmp_path):
+        """测试重新运行时跳过已写入的存储服务，且不再请求远程存在性检查"""
+        from core.ledger import SyncLedger
+        from core.processor import PaperProcessor
+        from models.paper import Paper
+
+        papers = [Paper(id="2401.00001", title="A"), Paper(id="2401.00002", title="B")]
+        source = Mock()
+        source.fetch_papers.return_value = papers
+
+        notion = Mock()
+        notion.insert.return_value = {"success": True, "id": "page-1"}
+        zotero = Mock()
+        zotero.insert.return_value = {"success": True, "id": "KEY2"}
+        for storage in (notion, zotero):
+            storage.exists_many.return_value = {}
+
+        ledger = SyncLedger(str(tmp_path / "ledger.db"))
+        ledger.record("notion", "2401.00001", "page-0")
+        ledger.record("zotero", "2401.00001", "KEY0")
+        ledger.record("notion", "2401.00002", "page-9")
+
+        processor = PaperProcessor(
+            data_sources={"arxiv": source},
+            storages={"notion": notion, "zotero": zotero},
+            ledger=ledger
+        )
+        result = processor.process_papers(source="arxiv", enhance_with_llm=False, download_pdf=False)
+
+        assert result["stats"]["skipped"] == 1
+        assert result["stats"]["saved"] == 1
+        notion.insert.assert_not_called()
+        zotero.insert.assert_called_once_with(papers[1])
+        notion.exists_many.assert_not_called()
+        zotero.exists_many.assert_not_called()
+        assert ledger.get("zotero", "2401.00002")["remote_id"] == "KEY2"
@@ -0,0 +1,28 @@
+"""流式大模型输出解析单元测试"""
+import json
+
+
+class TestIterJsonFields:
+    """流式 JSON 字段解析测试"""
+
+    def test_fields_yielded_once_complete(self):
+        """测试文本任意切分时，每个字段在值完整后按顺序产出一次"""
+        from service.llm_service import iter_json_fields
+
+        text = json.dumps(
+            {"动机": 'a "quoted" 动机', "标签": ["rl", "/unread"], "remark": "RL/多智能体"},
+            ensure_ascii=False, indent=2
+        )
+        chunks = [text[i:i + 3] for i in range(0, len(text), 3)]
+
+        assert list(iter_json_fields(chunks)) == [
+            ("动机", 'a "quoted" 动机'),
+            ("标签", ["rl", "/unread"]),
+            ("remark", "RL/多智能体"),
+        ]
+
+    def test_incomplete_value_not_yielded(self):
+        """测试流中断时未完成的字段不会产出"""
+        from service.llm_service import iter_json_fields
+
+        assert list(iter_json_fields(['{"动机": "m", "方法": "未完'])) == [("动机", "m")]
@@ -0,0 +1,221 @@
+"""Notion存储服务单元测试"""
+import threading
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+
+def _make_response(status_code=200, body=None, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = body or {}
+    return response
+
+
+def _make_storage(**kwargs):
+    from services.storage.notion import NotionStorage
+
+    return NotionStorage(
+        db_id="db123",
+        secret="secret",
+        create_time=datetime(2024, 3, 31),
+        use_proxy=False,
+        **kwargs
+    )
+
+
+def _make_page(page_id, arxiv_id="", pdf_url=None):
+    return {
+        "id": page_id,
+        "properties": {
+            "ArXiv ID": {"rich_text": [{"plain_text": arxiv_id}] if arxiv_id else []},
+            "PDF链接": {"url": pdf_url},
+        }
+    }
+
+
+class TestNotionExistenceIndex:
+    """Notion存在性索引测试"""
+
+    @patch("services.storage.notion.requests.request")
+    def test_exists_many_preloads_paginated_index(self, mock_request):
+        """测试分页预加载索引，窗口外未命中的ID合并补查一次，之后不再请求远程"""
+        mock_request.side_effect = [
+            _make_response(body={
+                "results": [_make_page("p1", "2403.00001")],
+                "has_more": True,
+                "next_cursor": "cursor-2"
+            }),
+            _make_response(body={
+                "results": [_make_page("p2", pdf_url="http://arxiv.org/pdf/2403.00002v3")],
+                "has_more": False,
+                "next_cursor": None
+            }),
+            _make_response(body={"properties": {"ArXiv ID": {"rich_text": {}}}}),
+            _make_response(body={"results": [_make_page("old", "2301.00009")], "has_more": False}),
+        ]
+        storage = _make_storage()
+
+        found = storage.exists_many(["2403.00001v1", "2403.00002", "2403.00003", "2301.00009"])
+
+        assert found == {"2403.00001v1": True, "2403.00002": True, "2403.00003": False, "2301.00009": True}
+        assert storage.exists("2403.00002") and not storage.exists("2403.00003")
+        assert mock_request.call_count == 4
+        first_query = mock_request.call_args_list[0].kwargs["json"]
+        assert first_query["page_size"] == 100
+        assert first_query["filter"]["date"] == {"on_or_after": "2024-03-01"}
+        assert mock_request.call_args_list[1].kwargs["json"]["start_cursor"] == "cursor-2"
+        lookup = mock_request.call_args_list[3].kwargs["json"]["filter"]["or"]
+        assert {"property": "ArXiv ID", "rich_text": {"equals": "2403.00003"}} in lookup
+
+    @patch("services.storage.notion.requests.request")
+    def test_insert_writes_arxiv_id_property(self, mock_request):
+        """测试写入ArXiv ID属性并更新索引"""
+        from models.paper import Paper
+
+        mock_request.side_effect = [
+            _make_response(body={"properties": {"ArXiv ID": {"rich_text": {}}}}),
+            _make_response(body={"object": "page", "id": "page-1"}),
+        ]
+        storage = _make_storage()
+        storage._index_loaded = True
+
+        result = storage.insert(Paper(id="2403.00005v2", title="T"))
+
+        assert result["success"] and result["id"] == "page-1"
+        properties = mock_request.call_args.kwargs["json"]["properties"]
+        assert properties["ArXiv ID"]["rich_text"][0]["text"]["content"] == "2403.00005"
+        assert storage.exists("2403.00005")
+
+
+    @patch("services.storage.notion.requests.request")
+    def test_schema_probe_failure_keeps_configured_property(self, mock_request):
+        """测试属性检查失败时本次写入不带ArXiv ID属性，但不修改配置的属性名"""
+        from models.paper import Paper
+
+        probe = _make_response(status_code=403)
+        probe.raise_for_status.side_effect = RuntimeError("HTTP 403")
+        gateway_error = _make_response(status_code=502)
+        gateway_error.json.side_effect = ValueError("not json")
+        gateway_error.text = "Bad Gateway"
+        mock_request.side_effect = [probe, gateway_error]
+        storage = _make_storage()
+        storage._index_loaded = True
+
+        result = storage.insert(Paper(id="2403.00005", title="T"))
+
+        assert not result["success"] and result["message"] == "Bad Gateway"
+        assert "ArXiv ID" not in mock_request.call_args.kwargs["json"]["properties"]
+        assert storage.arxiv_id_property == "ArXiv ID"
+
+
+class TestNotionConcurrentWriter:
+    """Notion并发写入测试"""
+
+    def test_payload_builder_is_pure(self):
+        """测试请求体构建不依赖实例状态"""
+        from models.paper import Paper
+        from services.storage.notion import build_page_payload
+
+        paper = Paper(id="2403.00001", title="A", tldr={"方法": "m"})
+        payload = build_page_payload(paper, db_id="db", create_time=datetime(2024, 3, 1),
+                                     hf_obj={"media_type": "image", "media_url": "http://x/y.png"})
+
+        assert payload["parent"] == {"database_id": "db"}
+        assert payload["properties"]["日期"] == {"date": {"start": "2024-03-01"}}
+        assert payload["children"][0]["type"] == "image"
+        assert build_page_payload(paper, "db", datetime(2024, 3, 1)) != payload
+
+    @patch("services.storage.notion.NotionStorage._rate_limiter")
+    @patch("services.storage.notion.requests.request")
+    def test_batch_insert_retries_after_429(self, mock_request, mock_limiter):
+        """测试并发写入时429响应按Retry-After暂停令牌桶后重试"""
+        from models.paper import Paper
+
+        calls = {"count": 0}
+        lock = threading.Lock()
+
+        def fake_request(method, url, json=None, **kwargs):
+            with lock:
+                calls["count"] += 1
+                first = calls["count"] == 1
+            if first:
+                return _make_response(status_code=429, body={"message": "rate limited"},
+                                      headers={"Retry-After": "2"})
+            return _make_response(body={"object": "page", "id": f"page-{json['properties']['ArXiv ID']['rich_text'][0]['text']['content']}"})
+
+        mock_request.side_effect = fake_request
+        storage = _make_storage()
+        storage._index_loaded = True
+        storage._schema_checked = True
+        papers = [Paper(id=f"2403.0000{i}", title=f"T{i}") for i in range(5)]
+
+        results = storage.batch_insert(papers)
+
+        assert sorted(results["success"]) == [p.id for p in papers]
+        assert results["pages"]["2403.00003"] == "page-2403.00003"
+        assert mock_request.call_count == 6
+        mock_limiter.pause.assert_called_once_with(2.0)
+        assert mock_limiter.acquire.call_count == 6
+
+
+class TestNotionDifferentialUpdate:
+    """Notion差量更新测试"""
+
+    @patch("services.storage.notion.requests.request")
+    def test_update_patches_changed_properties_only(self, mock_request, tmp_path):
+        """测试只PATCH变化的属性，内容未变化时不替换内容块"""
+        from core.ledger import SyncLedger
+        from models.paper import Paper
+        from services.storage.base import hash_fields
+        from services.storage.notion import build_update_fields
+
+        ledger = SyncLedger(str(tmp_path / "ledger.db"))
+        paper = Paper(id="2403.00001", title="A", short_summary="old")
+        ledger.record("notion", paper.id, "page-1", None, hash_fields(build_update_fields(paper)))
+
+        mock_request.return_value = _make_response(body={"object": "page", "id": "page-1"})
+        storage = _make_storage(ledger=ledger)
+        storage._schema_checked = True
+        paper.short_summary = "new"
+
+        result = storage.update(paper.id, paper)
+
+        assert result["changed"] == ["AI总结"]
+        assert mock_request.call_count == 1
+        method, url = mock_request.call_args.args
+        assert (method, url) == ("PATCH", "https://api.notion.com/v1/pages/page-1")
+        assert list(mock_request.call_args.kwargs["json"]["properties"]) == ["AI总结"]
+        assert ledger.get("notion", paper.id)["field_hashes"] == result["field_hashes"]
+
+    @patch("services.storage.notion.requests.request")
+    def test_replace_content_appends_changed_blocks_before_deleting(self, mock_request):
+        """测试只替换变化的内容块，新块先插入再删除旧块，媒体块保留"""
+        from services.storage.notion import _heading_block, _paragraph_block
+
+        def existing(block_id, block):
+            return {**block, "id": block_id}
+
+        old = [
+            existing("m", {"type": "video", "video": {}}),
+            existing("b1", _heading_block("摘要")),
+            existing("b2", _paragraph_block("old")),
+            existing("b3", _heading_block("中文译文", level=2)),
+        ]
+        new = [_heading_block("摘要"), _paragraph_block("new"), _heading_block("中文译文", level=2)]
+        mock_request.side_effect = [
+            _make_response(body={"results": old, "has_more": False}),
+            _make_response(), _make_response(),
+        ]
+        storage = _make_storage()
+
+        storage._replace_content("page-1", new)
+
+        calls = [(call.args[0], call.args[1]) for call in mock_request.call_args_list[1:]]
+        assert calls == [
+            ("PATCH", "https://api.notion.com/v1/blocks/page-1/children"),
+            ("DELETE", "https://api.notion.com/v1/blocks/b2"),
+        ]
+        payload = mock_request.call_args_list[1].kwargs["json"]
+        assert payload == {"after": "b1", "children": [new[1]]}
@@ -0,0 +1,132 @@
+"""存储发件箱单元测试"""
+import pytest
+from unittest.mock import Mock
+
+
+def _make_papers(count):
+    from models.paper import Paper
+
+    return [Paper(id=f"2401.{i:05d}", title=f"Paper {i}") for i in range(count)]
+
+
+class TestStorageOutbox:
+    """发件箱测试"""
+
+    def test_enqueue_is_idempotent(self, tmp_path):
+        """测试同一论文重复追加只保留一条，已写出的不再发送"""
+        from core.outbox import StorageOutbox
+
+        outbox = StorageOutbox(str(tmp_path / "outbox.db"))
+        paper = _make_papers(1)[0]
+
+        assert outbox.enqueue("notion", paper)
+        assert outbox.enqueue("notion", paper)
+        entries = outbox.claim("notion", 10)
+        assert len(entries) == 1
+        assert entries[0]["paper"].title == "Paper 0"
+
+        outbox.mark_done([entries[0]["id"]])
+        assert not outbox.enqueue("notion", paper)
+        assert outbox.stats() == {"notion": {"pending": 0, "inflight": 0, "done": 1, "failed": 0}}
+
+    def test_inflight_entries_recovered_on_restart(self, tmp_path):
+        """测试上次运行中断时领取的条目在重新打开后恢复为待写出"""
+        from core.outbox import StorageOutbox
+
+        path = str(tmp_path / "outbox.db")
+        outbox = StorageOutbox(path)
+        outbox.enqueue("zotero", _make_papers(1)[0])
+        outbox.claim("zotero", 10)
+        outbox.close()
+
+        assert StorageOutbox(path).pending_count("zotero") == 1
+
+
+class TestOutboxFlusher:
+    """发件箱刷写测试"""
+
+    def test_flush_uses_batch_insert_and_requeues_failures(self, tmp_path):
+        """测试按批写出，失败条目按退避重新排队"""
+        from core.outbox import OutboxFlusher, StorageOutbox
+
+        outbox = StorageOutbox(str(tmp_path / "outbox.db"), retry_delay=60)
+        for paper in _make_papers(3):
+            outbox.enqueue("zotero", paper)
+
+        storage = Mock()
+        storage.batch_insert.return_value = {
+            "success": ["2401.00000"],
+            "skipped": ["2401.00001"],
+            "failed": [{"id": "2401.00002", "error": "HTTP 500"}],
+        }
+        storage.exists_many.return_value = {"2401.00001": True}
+
+        processed = OutboxFlusher(outbox, {"zotero": storage}).flush()
+
+        assert processed == {"zotero": 3}
+        storage.exists_many.assert_called_once_with(["2401.00001"])
+        assert storage.batch_insert.call_count == 1
+        kwargs = storage.batch_insert.call_args.kwargs
+        assert kwargs["skip_existing"] is False
+        assert len(kwargs["idempotency_key"]) == 40
+        assert outbox.stats()["zotero"] == {"pending": 1, "inflight": 0, "done": 2, "failed": 0}
+        assert outbox.recent_errors()[0]["error"] == "HTTP 500"
+
+        # 重试条目尚未到期，手动刷写时先使其到期
+        assert OutboxFlusher(outbox, {"zotero": storage}).flush() == {"zotero": 0}
+        outbox.make_due("zotero")
+        storage.batch_insert.return_value = {"success": ["2401.00002"], "skipped": [], "failed": []}
+        assert OutboxFlusher(outbox, {"zotero": storage}).flush() == {"zotero": 1}
+        assert outbox.stats()["zotero"]["done"] == 3
+
+    def test_unverified_skipped_entries_stay_pending(self, tmp_path):
+        """测试被跳过但远程未确认存在的条目不计为完成"""
+        from core.outbox import OutboxFlusher, StorageOutbox
+
+        outbox = StorageOutbox(str(tmp_path / "outbox.db"), retry_delay=60)
+        outbox.enqueue("zotero", _make_papers(1)[0])
+        storage = Mock()
+        storage.batch_insert.return_value = {"success": [], "skipped": ["2401.00000"], "failed": []}
+        storage.exists_many.return_value = {"2401.00000": False}
+
+        OutboxFlusher(outbox, {"zotero": storage}).flush()
+
+        assert outbox.stats()["zotero"]["pending"] == 1
+        assert outbox.recent_errors()[0]["error"] == "写入被跳过，但未确认远程已存在"
+
+    def test_flush_records_field_hashes_in_ledger(self, tmp_path):
+        """测试写出成功的论文连同各字段哈希记入账本，后续更新可以差量比较"""
+        from core.ledger import SyncLedger
+        from core.outbox import OutboxFlusher, StorageOutbox
+
+        outbox = StorageOutbox(str(tmp_path / "outbox.db"))
+        outbox.enqueue("notion", _make_papers(1)[0])
+        storage = Mock()
+        storage.batch_insert.return_value = {
+            "success": ["2401.00000"], "failed": [], "skipped": [],
+            "pages": {"2401.00000": "page-1"}, "field_hashes": {"2401.00000": {"标题": "abc"}},
+        }
+        ledger = SyncLedger(str(tmp_path / "ledger.db"))
+
+        OutboxFlusher(outbox, {"notion": storage}, ledger=ledger).flush()
+
+        entry = ledger.get("notion", "2401.00000")
+        assert entry["remote_id"] == "page-1"
+        assert entry["field_hashes"] == {"标题": "abc"}
+
+    def test_background_workers_drain_on_stop(self, tmp_path):
+        """测试后台线程在停止前写完到期条目"""
+        from core.outbox import OutboxFlusher, StorageOutbox
+
+        outbox = StorageOutbox(str(tmp_path / "outbox.db"))
+        storage = Mock()
+        storage.batch_insert.side_effect = lambda papers, **kwargs: {
+            "success": [p.id for p in papers], "skipped": [], "failed": []
+        }
+        flusher = OutboxFlusher(outbox, {"notion": storage}, batch_size=2, poll_interval=0.01)
+        flusher.start()
+        for paper in _make_papers(5):
+            outbox.enqueue("notion", paper)
+        flusher.stop(drain=True, timeout=5)
+
+        assert outbox.stats()["notion"]["done"] == 5
@@ -0,0 +1,68 @@
+"""PDF 下载器单元测试"""
+from unittest.mock import patch
+
+import pytest
+
+
+class _Response:
+    def __init__(self, body: bytes, status_code: int = 200, headers: dict = None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers or {"Content-Length": str(len(body))}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class TestPdfDownloader:
+    """PDF 下载器测试"""
+
+    def test_resume_partial_download(self, tmp_path):
+        """测试已有临时文件时以 Range 续传并原子重命名"""
+        from services.pdf import PdfDownloader
+
+        content = b"%PDF-1.7 " + b"x" * 100
+        dest = tmp_path / "paper.pdf"
+        (tmp_path / "paper.pdf.part").write_bytes(content[:40])
+
+        downloader = PdfDownloader(retry_delay=0)
+        response = _Response(content[40:], 206, {"Content-Range": f"bytes 40-{len(content) - 1}/{len(content)}"})
+        with patch.object(downloader.session, "get", return_value=response) as mock_get:
+            assert downloader.download("https://arxiv.org/pdf/1", str(dest)) == str(dest)
+
+        assert mock_get.call_args.kwargs["headers"] == {"Range": "bytes=40-"}
+        assert dest.read_bytes() == content
+        assert not (tmp_path / "paper.pdf.part").exists()
+
+        with patch.object(downloader.session, "get") as mock_get:
+            downloader.download("https://arxiv.org/pdf/1", str(dest))
+        mock_get.assert_not_called()
+
+    def test_rejects_truncated_and_non_pdf(self, tmp_path):
+        """测试长度不符和非 PDF 内容不会生成目标文件"""
+        from services.pdf import PdfDownloader, PdfDownloadError
+
+        downloader = PdfDownloader(retries=1, retry_delay=0)
+        dest = tmp_path / "paper.pdf"
+
+        truncated = _Response(b"%PDF-1.7", 200, {"Content-Length": "100"})
+        with patch.object(downloader.session, "get", return_value=truncated):
+            with pytest.raises(PdfDownloadError):
+                downloader.download("https://arxiv.org/pdf/1", str(dest))
+        assert not dest.exists() and (tmp_path / "paper.pdf.part").exists()
+
+        html = _Response(b"<html>captcha</html>")
+        with patch.object(downloader.session, "get", return_value=html):
+            with pytest.raises(PdfDownloadError):
+                downloader.download("https://arxiv.org/pdf/1", str(dest), overwrite=True)
+        assert not dest.exists() and not (tmp_path / "paper.pdf.part").exists()
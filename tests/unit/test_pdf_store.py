@@ -0,0 +1,113 @@
+"""内容寻址 PDF 存储单元测试"""
+import os
+from unittest.mock import Mock
+
+
+def _fake_downloader(content: bytes) -> Mock:
+    downloader = Mock()
+
+    def download(url, dest, overwrite=False):
+        with open(dest, "wb") as f:
+            f.write(content)
+        return dest
+
+    downloader.download.side_effect = download
+    return downloader
+
+
+class TestPdfStore:
+    """PDF 存储测试"""
+
+    def test_views_share_one_object(self, tmp_path):
+        """测试按ID和标题命名的文件都是同一对象的硬链接，不同版本号不重复下载"""
+        from services.pdf import PdfStore
+
+        downloader = _fake_downloader(b"%PDF-1.7 paper")
+        store = PdfStore(root_dir=str(tmp_path / "store"), downloader=downloader)
+
+        by_id = store.materialize("2401.00001v1", "https://arxiv.org/pdf/2401.00001v1", str(tmp_path / "pdf" / "2401.00001v1.pdf"))
+        by_title = store.materialize("2401.00001v2", "https://arxiv.org/pdf/2401.00001v2", str(tmp_path / "papers" / "Title.pdf"))
+
+        assert downloader.download.call_count == 1
+        assert os.path.samefile(by_id, by_title)
+        assert os.path.samefile(by_id, store.get("2401.00001"))
+        assert store.stats() == {"papers": 1, "objects": 1, "bytes": 14}
+
+    def test_adopts_existing_file_and_dedupes_content(self, tmp_path):
+        """测试收录已有文件而不重新下载，内容相同的 PDF 只保存一个对象"""
+        from services.pdf import PdfStore
+
+        existing = tmp_path / "papers" / "Old Title.pdf"
+        existing.parent.mkdir()
+        existing.write_bytes(b"%PDF-1.7 same")
+
+        downloader = _fake_downloader(b"%PDF-1.7 same")
+        store = PdfStore(root_dir=str(tmp_path / "store"), downloader=downloader)
+
+        store.materialize("2401.00002", "https://arxiv.org/pdf/2401.00002", str(existing))
+        downloader.download.assert_not_called()
+        assert store.contains("2401.00002v3")
+
+        store.materialize("2401.00003", "https://arxiv.org/pdf/2401.00003", str(tmp_path / "other.pdf"))
+        assert store.stats()["objects"] == 1
+        assert not list((tmp_path / "store" / "tmp").iterdir())
+
+    def test_modified_view_is_not_reused(self, tmp_path):
+        """测试经硬链接就地修改的存储对象不再复用，重新下载后其他文件得到原始内容"""
+        from services.pdf import PdfStore
+
+        downloader = _fake_downloader(b"%PDF-1.7 original")
+        store = PdfStore(root_dir=str(tmp_path / "store"), downloader=downloader)
+        view = store.materialize("2401.00005", "https://arxiv.org/pdf/2401.00005", str(tmp_path / "view.pdf"))
+        with open(view, "ab") as f:
+            f.write(b" annotated")
+
+        other = store.materialize("2401.00005", "https://arxiv.org/pdf/2401.00005", str(tmp_path / "other.pdf"))
+
+        assert downloader.download.call_count == 2
+        assert open(other, "rb").read() == b"%PDF-1.7 original"
+        assert open(view, "rb").read() == b"%PDF-1.7 original annotated"
+
+    def test_index_uses_identity_canonical_key(self, tmp_path):
+        """测试设置别名索引时按规范键存储，以 DOI 查询也能找到 ArXiv 论文的 PDF"""
+        from core.cache_store import CacheStore
+        from core.identity import IdentityIndex
+        from services.pdf import PdfStore
+
+        identity = IdentityIndex(CacheStore(str(tmp_path / "cache.db")))
+        identity.link("2401.00004", [("arxiv", "2401.00004"), ("doi", "10.48550/arxiv.2401.00004")])
+        store = PdfStore(
+            root_dir=str(tmp_path / "store"), downloader=_fake_downloader(b"%PDF-1.7 doi"), identity=identity
+        )
+
+        store.materialize("10.48550/arXiv.2401.00004", "https://arxiv.org/pdf/2401.00004", str(tmp_path / "a.pdf"))
+
+        assert store.contains("2401.00004v1")
+
+    def test_download_papers_reports_each_paper(self, tmp_path):
+        """测试批量下载直接使用论文对象，按论文返回成功、失败和跳过"""
+        from models.paper import Paper
+        from services.pdf import PdfDownloadError, PdfStore, download_papers
+
+        def download(url, dest, overwrite=False):
+            if url.endswith("bad"):
+                raise PdfDownloadError("404")
+            with open(dest, "wb") as f:
+                f.write(b"%PDF-1.7 " + url.encode())
+            return dest
+
+        downloader = Mock()
+        downloader.download.side_effect = download
+        store = PdfStore(root_dir=str(tmp_path / "store"), downloader=downloader)
+        papers = [
+            Paper(id="2401.00001", title="A: B", pdf_url="https://arxiv.org/pdf/2401.00001"),
+            Paper(id="2401.00002", title="C", pdf_url="https://arxiv.org/pdf/bad"),
+            Paper(id="2401.00003", title="D"),
+        ]
+
+        result = download_papers(papers, str(tmp_path / "papers"), store=store)
+
+        assert result["success"] == ["2401.00001"]
+        assert result["failed"] == [{"id": "2401.00002", "error": "404"}]
+        assert result["skipped"] == ["2401.00003"]
+        assert result["paths"]["2401.00001"].endswith("A_ B.pdf")
@@ -0,0 +1,61 @@
+"""响应缓存单元测试"""
+import threading
+import time
+
+import pytest
+
+
+class TestResponseCache:
+    """响应缓存测试"""
+
+    def test_concurrent_requests_share_one_computation(self):
+        """测试同一键的并发请求只计算一次，异常不缓存"""
+        from core.response_cache import ResponseCache
+
+        cache = ResponseCache()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(2)
+            return {"papers": [1]}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("q", compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while cache.stats()["coalesced"] < 4:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{"papers": [1]}] * 5
+        assert cache.get_or_compute("q", compute) == {"papers": [1]}
+        stats = cache.stats()
+        assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 4, 1)
+
+        with pytest.raises(ValueError):
+            cache.get_or_compute("bad", lambda: (_ for _ in ()).throw(ValueError("x")))
+        assert cache.get_or_compute("bad", lambda: 1) == 1
+
+    def test_ttl_expiry_and_lru_eviction(self):
+        """测试条目过期后重新计算，超过容量时淘汰最久未使用的条目"""
+        from core.response_cache import ResponseCache
+
+        cache = ResponseCache(max_entries=2, ttl=60)
+        cache.get_or_compute("short", lambda: 1, ttl=0.05)
+        time.sleep(0.1)
+        assert cache.get_or_compute("short", lambda: 2) == 2
+
+        cache.get_or_compute("a", lambda: "a")
+        cache.get_or_compute("short", lambda: 3)
+        cache.get_or_compute("b", lambda: "b")
+        assert cache.get_or_compute("short", lambda: 4) == 2
+        assert cache.get_or_compute("a", lambda: "new") == "new"
+        assert cache.stats()["evictions"] == 2
@@ -0,0 +1,46 @@
+"""论文全文索引单元测试"""
+import pytest
+
+
+def _make_index(tmp_path):
+    from core.search_index import PaperSearchIndex
+    from models.paper import Paper
+
+    index = PaperSearchIndex(str(tmp_path / "search_index.db"))
+    index.add_many([
+        Paper(id="2401.00001v2", title="Attention Is All You Need", summary="transformer attention",
+              summary_cn="提出了基于注意力机制的Transformer模型", tags=["NLP", "注意力机制"], authors=["Vaswani"]),
+        Paper(id="2401.00002", title="Deep Reinforcement Learning", summary="policy gradient with attention",
+              summary_cn="强化学习中的策略梯度方法", tags=["RL"], authors=["Sutton"]),
+        Paper(id="2401.00003", title="Vision Models", summary="image classification",
+              summary_cn="图像分类", tags=["CV"], authors=["He"]),
+    ])
+    return index
+
+
+class TestPaperSearchIndex:
+    """全文索引测试"""
+
+    def test_ranked_search_with_pagination(self, tmp_path):
+        """测试标题命中排在摘要命中之前，并支持分页"""
+        index = _make_index(tmp_path)
+
+        result = index.search("attention", page=1, page_size=1)
+        assert result["total"] == 2
+        assert [doc["paper_id"] for doc in result["papers"]] == ["2401.00001"]
+        assert index.search("attention", page=2, page_size=1)["papers"][0]["paper_id"] == "2401.00002"
+
+    def test_chinese_terms_and_id_lookup(self, tmp_path):
+        """测试中文子串、短词和ArXiv ID查询，重复索引覆盖旧内容"""
+        from models.paper import Paper
+
+        index = _make_index(tmp_path)
+        if index.tokenizer == "trigram":
+            assert [d["paper_id"] for d in index.search("注意力机制")["papers"]] == ["2401.00001"]
+        assert [d["paper_id"] for d in index.search("强化")["papers"]] == ["2401.00002"]
+        assert index.search("2401.00003v1")["papers"][0]["title"] == "Vision Models"
+
+        index.add(Paper(id="2401.00003", title="Vision Transformers"))
+        assert index.count() == 3
+        assert index.search("Vision Models")["total"] == 0
+        assert index.search("Transformers")["papers"][0]["paper_id"] == "2401.00003"
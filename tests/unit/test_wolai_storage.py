@@ -0,0 +1,105 @@
+"""Wolai存储服务单元测试"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _make_response(status_code=200, body=None, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = body or {}
+    return response
+
+
+class TestWolaiBatchInsert:
+    """Wolai批量写入测试"""
+
+    @patch("services.storage.wolai.requests.request")
+    def test_one_row_call_then_parallel_blocks(self, mock_request):
+        """测试一次请求创建全部行，再为每行创建内容块"""
+        from models.paper import Paper
+        from services.storage.wolai import WolaiStorage
+
+        def fake_request(method, url, json=None, **kwargs):
+            if url.endswith("/rows"):
+                return _make_response(body={
+                    "data": [f"https://www.wolai.com/row{i}" for i in range(len(json["rows"]))]
+                })
+            return _make_response(body={"data": []})
+
+        mock_request.side_effect = fake_request
+        storage = WolaiStorage(token="token", db_id="db", use_proxy=False)
+        papers = [Paper(id=f"2401.{i:05d}", title=f"Paper {i}", tldr={"方法": "m"}) for i in range(40)]
+
+        results = storage.batch_insert(papers)
+
+        urls = [call.args[1] for call in mock_request.call_args_list]
+        assert sum(url.endswith("/rows") for url in urls) == 1
+        assert sum(url.endswith("/blocks") for url in urls) == 40
+        assert sorted(results["success"]) == [paper.id for paper in papers]
+        assert results["rows"]["2401.00007"] == "row7"
+        parents = {call.kwargs["json"]["parent_id"] for call in mock_request.call_args_list
+                   if call.args[1].endswith("/blocks")}
+        assert len(parents) == 40
+
+    @patch("services.storage.wolai.requests.request")
+    def test_existing_rows_are_skipped(self, mock_request):
+        """测试按数据库中的PDF链接加载存在性索引，已有论文跳过写入"""
+        from models.paper import Paper
+        from services.storage.wolai import WolaiStorage
+
+        def fake_request(method, url, json=None, **kwargs):
+            if method == "GET":
+                return _make_response(body={"data": {"rows": [
+                    {"page_id": "old", "data": {"PDF链接": {"type": "link", "value": "http://arxiv.org/pdf/2401.00001v1"}}}
+                ]}})
+            if url.endswith("/rows"):
+                return _make_response(body={"data": ["https://www.wolai.com/row0"]})
+            return _make_response(body={"data": []})
+
+        mock_request.side_effect = fake_request
+        storage = WolaiStorage(token="token", db_id="db", use_proxy=False)
+
+        results = storage.batch_insert([Paper(id="2401.00001v2", title="A"), Paper(id="2401.00002", title="B")])
+
+        assert results["skipped"] == ["2401.00001v2"] and results["success"] == ["2401.00002"]
+        assert storage.exists("2401.00001")
+        assert sum(call.args[0] == "GET" for call in mock_request.call_args_list) == 1
+
+    @patch("services.storage.wolai.requests.request")
+    def test_block_failure_retry_reuses_created_row(self, mock_request, tmp_path):
+        """测试行已创建但内容块失败时记录行ID，重试只补写内容块"""
+        from core.ledger import SyncLedger
+        from models.paper import Paper
+        from services.storage.wolai import WolaiStorage
+
+        block_status = [500, 200]
+
+        def fake_request(method, url, json=None, **kwargs):
+            if url.endswith("/rows"):
+                return _make_response(body={"data": ["https://www.wolai.com/row0"]})
+            return _make_response(status_code=block_status.pop(0), body={"data": []})
+
+        mock_request.side_effect = fake_request
+        ledger = SyncLedger(str(tmp_path / "ledger.db"))
+        storage = WolaiStorage(token="token", db_id="db", use_proxy=False, ledger=ledger)
+        paper = Paper(id="2401.00001", title="A")
+
+        first = storage.batch_insert([paper], skip_existing=False)
+        assert first["failed"][0]["row_id"] == "row0"
+        assert ledger.get(WolaiStorage.ROW_LEDGER, "2401.00001")["remote_id"] == "row0"
+
+        second = storage.batch_insert([paper])
+        urls = [call.args[1] for call in mock_request.call_args_list]
+        assert sum(url.endswith("/rows") for url in urls) == 1
+        assert mock_request.call_args.kwargs["json"]["parent_id"] == "row0"
+        assert second["success"] == ["2401.00001"] and second["rows"] == {"2401.00001": "row0"}
+        assert not ledger.contains(WolaiStorage.ROW_LEDGER, "2401.00001")
+
+    def test_legacy_service_reads_env_lazily(self):
+        """测试旧版服务在实例化时才读取环境变量"""
+        with patch.dict("os.environ", {"WOLAI_TOKEN": "env_token"}):
+            from service.wolai_service import WolaiService
+
+            assert WolaiService().token == "env_token"
+            assert WolaiService(token="param").token == "param"
@@ -0,0 +1,384 @@
+"""Zotero存储服务单元测试"""
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+TEMPLATES_DIR = Path(__file__).parent.parent.parent / "src" / "common_utils" / "json_templates"
+
+
+def _make_response(status_code=200, body=None, headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = body or {}
+    return response
+
+
+def _make_storage(**kwargs):
+    from services.storage.zotero import ZoteroStorage
+
+    return ZoteroStorage(
+        api_key="test_key",
+        user_id="123",
+        templates_dir=str(TEMPLATES_DIR),
+        use_proxy=False,
+        **kwargs
+    )
+
+
+def _make_papers(count):
+    from models.paper import Paper
+
+    return [
+        Paper(id=f"2401.{i:05d}", title=f"Paper {i}", category="RL" if i % 2 else "NLP")
+        for i in range(count)
+    ]
+
+
+def _field_hashes(storage, paper):
+    from services.storage.base import hash_fields
+
+    return hash_fields(storage._build_update_fields(paper))
+
+
+class TestZoteroBatchInsert:
+    """Zotero批量写入测试"""
+
+    @patch("services.storage.zotero.requests.request")
+    def test_batch_insert_chunks_by_fifty(self, mock_request):
+        """测试按50条分块写入"""
+        def fake_request(method, url, json=None, **kwargs):
+            return _make_response(body={
+                "successful": {str(i): {"key": f"KEY{i}"} for i in range(len(json))}
+            })
+
+        mock_request.side_effect = fake_request
+        storage = _make_storage()
+
+        results = storage.batch_insert(_make_papers(120), skip_existing=False)
+
+        assert mock_request.call_count == 3
+        sizes = [len(call.kwargs["json"]) for call in mock_request.call_args_list]
+        assert sizes == [50, 50, 20]
+        assert len(results["success"]) == 120
+        assert results["keys"]["2401.00050"] == "KEY0"
+
+    @patch("services.storage.zotero.requests.request")
+    def test_batch_insert_maps_failed_indexes(self, mock_request):
+        """测试按下标映射失败结果并按领域解析集合"""
+        mock_request.return_value = _make_response(body={
+            "successful": {"0": {"key": "AAAA"}},
+            "failed": {"1": {"code": 400, "message": "Invalid field"}}
+        })
+        storage = _make_storage(category_map={"RL": ["RLCOLL"]}, default_category=["DEFAULT"])
+
+        results = storage.batch_insert(_make_papers(2), skip_existing=False)
+
+        assert results["success"] == ["2401.00000"]
+        assert results["failed"][0]["id"] == "2401.00001"
+        assert "Invalid field" in results["failed"][0]["error"]
+        items = mock_request.call_args.kwargs["json"]
+        assert items[0]["collections"] == ["DEFAULT"]
+        assert items[1]["collections"] == ["RLCOLL"]
+
+    @patch("services.storage.zotero.time.sleep")
+    @patch("services.storage.zotero.requests.request")
+    def test_request_honours_retry_after(self, mock_request, mock_sleep):
+        """测试429响应按Retry-After等待后重试"""
+        mock_request.side_effect = [
+            _make_response(status_code=429, headers={"Retry-After": "7"}),
+            _make_response(body={"successful": {"0": {"key": "AAAA"}}}),
+        ]
+        storage = _make_storage()
+
+        results = storage.batch_insert(_make_papers(1), skip_existing=False)
+
+        assert results["success"] == ["2401.00000"]
+        mock_sleep.assert_called_once_with(7.0)
+
+    @patch("services.storage.zotero.requests.request")
+    def test_write_token_confirms_already_written_batch(self, mock_request):
+        """测试写令牌由批次论文ID决定，412 时仅确认存在的条目计为成功"""
+        import hashlib
+
+        mock_request.side_effect = [
+            _make_response(status_code=412),
+            _make_response(body=[{"key": "AAAA", "data": {"tags": [{"tag": "arxiv:2401.00000"}]}}]),
+        ]
+        storage = _make_storage()
+
+        results = storage.batch_insert(
+            list(reversed(_make_papers(2))), skip_existing=False, idempotency_key="batch-1"
+        )
+
+        token = mock_request.call_args_list[0].kwargs["headers"]["Zotero-Write-Token"]
+        assert token == hashlib.md5(b"batch-1:2401.00000,2401.00001").hexdigest()
+        assert results["success"] == ["2401.00000"]
+        assert results["keys"] == {"2401.00000": "AAAA"}
+        assert results["skipped"] == []
+        assert [item["id"] for item in results["failed"]] == ["2401.00001"]
+
+
+class TestZoteroMirror:
+    """Zotero本地镜像测试"""
+
+    @patch("services.storage.zotero.requests.request")
+    def test_exists_uses_mirror_after_delta_sync(self, mock_request, tmp_path):
+        """测试首次同步后存在性检查走本地索引"""
+        mock_request.side_effect = [
+            _make_response(body={"AAAA": 5}, headers={"Last-Modified-Version": "42"}),
+            _make_response(body=[{
+                "key": "AAAA",
+                "version": 5,
+                "data": {"title": "Deep RL: A Survey", "url": "http://arxiv.org/pdf/2401.00001v2"}
+            }]),
+        ]
+        storage = _make_storage(mirror_path=str(tmp_path / "mirror.db"))
+
+        assert storage.exists("2401.00001")
+        assert storage.exists("unknown", title="deep rl a survey")
+        assert not storage.exists("2401.99999")
+        assert mock_request.call_count == 2
+        assert storage._mirror.library_version == 42
+
+    @patch("services.storage.zotero.requests.request")
+    def test_sync_removes_deleted_items(self, mock_request, tmp_path):
+        """测试增量同步移除已删除条目"""
+        storage = _make_storage(mirror_path=str(tmp_path / "mirror.db"))
+        storage._mirror.upsert_items([{"key": "AAAA", "version": 1, "data": {"archiveID": "2401.00001"}}])
+        storage._mirror.set_library_version(10)
+        mock_request.side_effect = [
+            _make_response(body={}, headers={"Last-Modified-Version": "11"}),
+            _make_response(body={"items": ["AAAA"]}),
+        ]
+
+        result = storage.sync_mirror()
+
+        assert result == {"changed": 0, "removed": 1, "version": 11}
+        assert mock_request.call_args_list[0].kwargs["params"] == {"since": 10, "format": "versions"}
+        assert not storage._mirror.contains(arxiv_id="2401.00001")
+
+
+class TestZoteroMachineTags:
+    """Zotero机器标签测试"""
+
+    def test_item_data_contains_machine_tag(self):
+        """测试写入条目带有arxiv机器标签"""
+        from models.paper import Paper
+
+        storage = _make_storage()
+        item = storage._build_item_data(Paper(id="2401.01234v2", title="T"), ["C"])
+
+        assert {"tag": "arxiv:2401.01234"} in item["tags"]
+
+    @patch("services.storage.zotero.requests.request")
+    def test_find_by_arxiv_ids_uses_tag_or_query(self, mock_request):
+        """测试多个ID合并为一次标签OR查询"""
+        mock_request.return_value = _make_response(body=[
+            {"key": "AAAA", "data": {"tags": [{"tag": "arxiv:2401.00001"}]}},
+        ])
+        storage = _make_storage()
+
+        found = storage.find_by_arxiv_ids(["2401.00001v1", "2401.00002"])
+
+        assert found == {"2401.00001": "AAAA"}
+        assert mock_request.call_count == 1
+        assert mock_request.call_args.kwargs["params"]["tag"] == "arxiv:2401.00001 || arxiv:2401.00002"
+
+    @patch("services.storage.zotero.requests.request")
+    def test_search_falls_back_to_full_text_until_backfilled(self, mock_request, tmp_path):
+        """测试标签未命中时退回全文搜索，补充标签后不再退回"""
+        from core.ledger import SyncLedger
+
+        ledger = SyncLedger(str(tmp_path / "ledger.db"))
+        storage = _make_storage(ledger=ledger)
+        mock_request.side_effect = [
+            _make_response(body=[]),
+            _make_response(body=[{"key": "OLD1", "data": {"tags": []}}]),
+        ]
+
+        assert storage._search_item(arxiv_id="2401.00001")["exists"] is True
+        assert mock_request.call_args.kwargs["params"]["qmode"] == "everything"
+
+        ledger.record(storage.TAG_BACKFILL_LEDGER, storage._library_key())
+        storage._backfilled = None
+        mock_request.side_effect = [_make_response(body=[])]
+
+        assert storage._search_item(arxiv_id="2401.00001")["exists"] is False
+        assert mock_request.call_count == 3
+
+
+    def test_cli_backfill_records_marker_for_exists(self, tmp_path, monkeypatch):
+        """测试命令行补充标签后记录账本标记，之后存在性检查不再退回全文搜索"""
+        import json
+        from click.testing import CliRunner
+        import cli
+        import main
+        from core.ledger import SyncLedger
+
+        monkeypatch.setattr(main, "LEDGER_PATH", tmp_path / "ledger.db")
+        monkeypatch.setattr(main, "CACHE_PATH", tmp_path / "cache.db")
+        config = tmp_path / "config.json"
+        config.write_text(json.dumps({"zotero": {"api_key": "test_key", "library_id": "123"}}))
+
+        with patch("services.storage.zotero.requests.request") as mock_request:
+            mock_request.side_effect = [
+                _make_response(body=[{
+                    "key": "OLD1", "version": 3,
+                    "data": {"url": "http://arxiv.org/abs/2401.00001v1", "tags": []}
+                }], headers={"Total-Results": "1"}),
+                _make_response(body={"successful": {"0": {"key": "OLD1"}}}),
+            ]
+            result = CliRunner().invoke(cli.cli, ["zotero", "backfill-tags", "--config", str(config)])
+
+        assert result.exit_code == 0, result.output
+        assert mock_request.call_args.args[1].endswith("/users/123/items")
+
+        storage = _make_storage(ledger=SyncLedger(str(tmp_path / "ledger.db")))
+        with patch("services.storage.zotero.requests.request") as mock_request:
+            mock_request.return_value = _make_response(body=[])
+            assert not storage.exists("2401.09999")
+
+        assert mock_request.call_count == 1
+        assert "tag" in mock_request.call_args.kwargs["params"]
+
+
+class TestZoteroDifferentialUpdate:
+    """Zotero差量更新测试"""
+
+    @patch("services.storage.zotero.requests.request")
+    def test_update_patches_only_changed_fields(self, mock_request, tmp_path):
+        """测试只发送变化的字段并携带版本前提条件"""
+        from core.ledger import SyncLedger
+
+        ledger = SyncLedger(str(tmp_path / "ledger.db"))
+        storage = _make_storage(ledger=ledger)
+        paper = _make_papers(1)[0]
+        ledger.record("zotero", paper.id, "KEY0", None, _field_hashes(storage, paper))
+
+        paper.tags = ["LLM"]
+        mock_request.side_effect = [
+            _make_response(body={"KEY0": 12}),
+            _make_response(status_code=204, headers={"Last-Modified-Version": "13"}),
+        ]
+
+        result = storage.update(paper.id, paper)
+
+        assert result["success"] and result["changed"] == ["tags"]
+        method, url = mock_request.call_args.args
+        assert (method, url) == ("PATCH", "https://api.zotero.org/users/123/items/KEY0")
+        assert mock_request.call_args.kwargs["headers"]["If-Unmodified-Since-Version"] == "12"
+        assert list(mock_request.call_args.kwargs["json"]) == ["tags"]
+
+        # 再次更新相同内容不发送请求
+        assert storage.update(paper.id, paper)["changed"] == []
+        assert mock_request.call_count == 2
+
+
+class TestZoteroAttachmentUpload:
+    """Zotero PDF附件上传测试"""
+
+    def test_upload_body_respects_small_bandwidth(self, tmp_path):
+        """测试带宽上限小于读取块大小时上传耗时仍受限"""
+        import time
+        from services.storage.rate_limit import TokenBucket
+        from services.storage.zotero import _UploadBody
+
+        pdf = tmp_path / "paper.pdf"
+        pdf.write_bytes(b"x" * 30000)
+        body = _UploadBody(b"PRE", str(pdf), b"SUF", TokenBucket(rate=20000))
+
+        started = time.monotonic()
+        data = b"".join(iter(lambda: body.read(), b""))
+        elapsed = time.monotonic() - started
+        body.close()
+
+        assert len(data) == len(body) == 30006
+        # 首个满桶 20000 字节免等待，其余 10006 字节按 20000 字节/秒发放
+        assert elapsed >= 0.45
+
+    @patch("services.storage.zotero.requests.post")
+    @patch("services.storage.zotero.requests.request")
+    def test_upload_then_skip_by_ledger(self, mock_request, mock_post, tmp_path):
+        """测试创建附件、上传并登记文件，重复上传同一文件时由账本跳过"""
+        from core.ledger import SyncLedger
+        from services.storage.zotero import file_md5
+
+        pdf = tmp_path / "paper.pdf"
+        pdf.write_bytes(b"%PDF-1.7 content")
+        ledger = SyncLedger(str(tmp_path / "ledger.db"))
+        ledger.record("zotero", "2401.00001", "PARENT", None)
+        storage = _make_storage(ledger=ledger, upload_bandwidth=1024 * 1024)
+
+        mock_request.side_effect = [
+            _make_response(body={"successful": {"0": {"key": "ATTACH"}}}),
+            _make_response(body={
+                "url": "https://upload.zotero.org/", "contentType": "multipart/form-data; boundary=b",
+                "prefix": "PRE", "suffix": "SUF", "uploadKey": "UPKEY"
+            }),
+            _make_response(status_code=204),
+        ]
+        uploaded = {}
+        mock_post.side_effect = lambda url, data=None, **kwargs: (
+            uploaded.update(length=len(data), body=b"".join(iter(lambda: data.read(8192), b"")))
+            or _make_response(status_code=201)
+        )
+
+        result = storage.upload_attachments([("2401.00001", str(pdf))])
+
+        assert result["success"] == ["2401.00001"] and result["keys"]["2401.00001"] == "ATTACH"
+        assert mock_request.call_args_list[0].kwargs["json"][0]["parentItem"] == "PARENT"
+        auth = mock_request.call_args_list[1]
+        assert auth.args[1].endswith("/items/ATTACH/file")
+        assert auth.kwargs["data"]["md5"] == file_md5(str(pdf))
+        assert auth.kwargs["headers"]["If-None-Match"] == "*"
+        assert uploaded["body"] == b"PRE%PDF-1.7 contentSUF" and uploaded["length"] == len(uploaded["body"])
+        assert mock_request.call_args_list[2].kwargs["data"] == {"upload": "UPKEY"}
+
+        assert storage.upload_attachments([("2401.00001", str(pdf))])["skipped"] == ["2401.00001"]
+        assert mock_request.call_count == 3
+
+    @patch("services.storage.zotero.requests.post")
+    @patch("services.storage.zotero.requests.request")
+    def test_existing_file_skips_transfer(self, mock_request, mock_post, tmp_path):
+        """测试服务端已有相同 MD5 的文件时不传输内容"""
+        pdf = tmp_path / "paper.pdf"
+        pdf.write_bytes(b"%PDF-1.7")
+        storage = _make_storage()
+
+        mock_request.side_effect = [
+            _make_response(body={"successful": {"0": {"key": "ATTACH"}}}),
+            _make_response(body={"exists": 1}),
+        ]
+        with patch.object(storage, "_resolve_keys", return_value={"2401.00001": "PARENT"}):
+            result = storage.upload_attachment("2401.00001", str(pdf))
+
+        assert result["success"] and not result["uploaded"]
+        mock_post.assert_not_called()
+
+    @patch("services.storage.zotero.requests.post")
+    @patch("services.storage.zotero.requests.request")
+    def test_retry_reuses_created_attachment(self, mock_request, mock_post, tmp_path):
+        """测试申请上传授权失败后重试时复用已创建的附件条目"""
+        from core.ledger import SyncLedger
+
+        pdf = tmp_path / "paper.pdf"
+        pdf.write_bytes(b"%PDF-1.7")
+        ledger = SyncLedger(str(tmp_path / "ledger.db"))
+        ledger.record("zotero", "2401.00001", "PARENT", None)
+        storage = _make_storage(ledger=ledger)
+
+        mock_request.side_effect = [
+            _make_response(body={"successful": {"0": {"key": "ATTACH"}}}),
+            _make_response(status_code=500),
+            _make_response(body={"exists": 1}),
+        ]
+
+        assert storage.upload_attachments([("2401.00001", str(pdf))])["failed"]
+        result = storage.upload_attachments([("2401.00001", str(pdf))])
+
+        assert result["keys"]["2401.00001"] == "ATTACH"
+        assert mock_request.call_count == 3
+        retry = mock_request.call_args_list[2]
+        assert retry.args[1].endswith("/items/ATTACH/file")
+        assert retry.kwargs["headers"]["If-None-Match"] == "*"